@@ -0,0 +1,35 @@
+import json
+import pathlib
+
+import pytest
+
+from opentrons import protocol_api  # noqa(F401)
+from opentrons.protocols.api_support.types import APIVersion
+from opentrons.protocols.implementations.protocol_context import \
+    ProtocolContextImplementation
+from opentrons.protocols.implementations.simulators.context_factory import \
+    SimulationContextFactory
+
+HERE = pathlib.Path(__file__).parent
+PROTOCOL_FIXTURES = HERE / '..' / '..' / 'shared-data' / 'protocol' / 'fixtures'
+TEST_DATA = HERE / '..' / 'tests' / 'opentrons' / 'data'
+
+_context_factory = SimulationContextFactory()
+
+
+@pytest.fixture
+def ctx():
+    with _context_factory.build(
+            implementation=ProtocolContextImplementation,
+            api_version=APIVersion(2, 8)) as context:
+        context.home()
+        yield context
+
+
+@pytest.fixture
+def get_json_protocol_fixture():
+    def _get_json_protocol_fixture(fixture_version, fixture_name):
+        path = PROTOCOL_FIXTURES / fixture_version / f'{fixture_name}.json'
+        return json.loads(path.read_text())
+
+    return _get_json_protocol_fixture
@@ -0,0 +1,129 @@
+"""Import time benchmark for the opentrons entry points.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+several times, and the median cumulative import time of the module and of
+its slowest dependencies is recorded as JSON:
+
+    python benchmarks/import_time.py --output benchmarks/output/import.json
+
+Passing ``--baseline`` with an earlier output compares against it and exits
+with an error if any module got more than ``--tolerance`` slower, which
+catches a heavy dependency that starts being imported eagerly again.
+
+Do not compare results from different machines.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+ENTRY_POINTS = [
+    'opentrons',
+    'opentrons.simulate',
+    'opentrons.execute',
+    'opentrons.protocol_api',
+]
+
+IMPORTTIME_RE = re.compile(
+    r'^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|'
+    r'(?P<indent>\s+)(?P<module>\S+)$')
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Import a module in a new interpreter and time its imports.
+
+    Returns the cumulative import time, in microseconds, of every module
+    that was imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True, env=os.environ.copy())
+    times: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            times[match.group('module')] = int(match.group('cumulative'))
+    return times
+
+
+def measure(module: str, runs: int, slowest: int) -> Dict[str, Any]:
+    """Take the median import times of a module over several runs."""
+    samples = [import_times(module) for _ in range(runs)]
+    medians = {
+        name: int(statistics.median(sample.get(name, 0)
+                                    for sample in samples))
+        for name in samples[0]}
+    dependencies = sorted(
+        (name for name in medians if name != module),
+        key=lambda name: medians[name], reverse=True)
+    return {
+        'total_us': medians[module],
+        'runs': [sample[module] for sample in samples],
+        'slowest_imports': {
+            name: medians[name] for name in dependencies[:slowest]},
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """List the modules that import more slowly than in the baseline."""
+    regressions = []
+    for module, result in results.items():
+        if module not in baseline:
+            continue
+        before = baseline[module]['total_us']
+        after = result['total_us']
+        if after > before * (1 + tolerance):
+            regressions.append(
+                f'{module}: {before}us -> {after}us')
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark, returning the exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('modules', nargs='*', default=ENTRY_POINTS)
+    parser.add_argument('-n', '--runs', type=int, default=5,
+                        help='Imports of each module to take the median of')
+    parser.add_argument('--slowest', type=int, default=15,
+                        help='Slowest dependencies to record per module')
+    parser.add_argument('-o', '--output', help='File to write results to')
+    parser.add_argument('--baseline', help='Earlier results to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown against the baseline, as a '
+                             'fraction of the baseline time')
+    args = parser.parse_args(argv)
+
+    results = {module: measure(module, args.runs, args.slowest)
+               for module in args.modules}
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'modules': results,
+    }
+    for module, result in results.items():
+        print(f'{module}: {result["total_us"] / 1000:.1f} ms')
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as base:
+            baseline = json.load(base)['modules']
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Import time regression: {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
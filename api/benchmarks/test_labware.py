@@ -0,0 +1,41 @@
+import pytest
+
+from opentrons.protocols.implementations.tip_tracker import TipTracker
+
+COMMON_LABWARE = [
+    'opentrons_96_tiprack_300ul',
+    'corning_96_wellplate_360ul_flat',
+    'corning_384_wellplate_112ul_flat',
+    'nest_12_reservoir_15ml',
+    'opentrons_24_tuberack_nest_1.5ml_snapcap',
+]
+
+
+@pytest.mark.parametrize('load_name', COMMON_LABWARE)
+def test_load_labware(benchmark, ctx, load_name):
+    def load():
+        ctx.load_labware(load_name, 1)
+        del ctx.deck[1]
+
+    benchmark(load)
+
+
+def test_well_by_name(benchmark, ctx):
+    plate = ctx.load_labware('corning_384_wellplate_112ul_flat', 1)
+    benchmark(lambda: plate['P24'])
+
+
+def test_wells(benchmark, ctx):
+    plate = ctx.load_labware('corning_384_wellplate_112ul_flat', 1)
+    benchmark(plate.wells)
+
+
+@pytest.mark.parametrize('used_tips', [0, 48, 95])
+def test_next_tip(benchmark, ctx, used_tips):
+    tiprack = ctx.load_labware('opentrons_96_tiprack_300ul', 1)
+    columns = [[well._impl for well in column]
+               for column in tiprack.columns()]
+    for well in tiprack.wells()[:used_tips]:
+        well.has_tip = False
+    tracker = TipTracker(columns)
+    assert benchmark(tracker.next_tip, 8 if used_tips == 0 else 1)
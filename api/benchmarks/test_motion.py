@@ -0,0 +1,24 @@
+from opentrons.hardware_control.util import plan_arc
+from opentrons.motion_planning import get_waypoints, MoveType
+from opentrons.types import Point
+
+ORIGIN = Point(10, 20, 30)
+DEST = Point(200, 150, 40)
+XY_WAYPOINTS = [(100, 100), (150, 120)]
+
+
+def test_plan_arc(benchmark):
+    benchmark(plan_arc, ORIGIN, DEST, 100,
+              extra_waypoints=XY_WAYPOINTS)
+
+
+def test_get_waypoints_general_arc(benchmark):
+    benchmark(get_waypoints, ORIGIN, DEST,
+              max_travel_z=150, min_travel_z=60,
+              xy_waypoints=XY_WAYPOINTS)
+
+
+def test_get_waypoints_in_labware_arc(benchmark):
+    benchmark(get_waypoints, ORIGIN, ORIGIN._replace(x=19),
+              max_travel_z=150, min_travel_z=40,
+              move_type=MoveType.IN_LABWARE_ARC)
@@ -0,0 +1,55 @@
+import copy
+import io
+import json
+
+import pytest
+
+from opentrons import simulate
+from opentrons.protocols.parse import parse, validate_json
+
+from conftest import TEST_DATA
+
+REFERENCE_PROTOCOLS = ['testosaur_v2.py', 'testosaur-gen2-v2.py']
+
+
+@pytest.fixture
+def large_json_protocol(get_json_protocol_fixture):
+    """ simpleV5 with its commands repeated to about 5000 commands """
+    protocol = get_json_protocol_fixture('5', 'simpleV5')
+    commands = protocol['commands']
+    protocol['commands'] = [
+        copy.deepcopy(command)
+        for _ in range(5000 // len(commands)) for command in commands]
+    return protocol
+
+
+def test_validate_json(benchmark, large_json_protocol):
+    version, _ = benchmark(validate_json, large_json_protocol)
+    assert version == 5
+
+
+def test_parse_json(benchmark, large_json_protocol):
+    text = json.dumps(large_json_protocol)
+    result = benchmark(parse, text, 'large.json')
+    assert result.schema_version == 5
+
+
+@pytest.mark.parametrize('protocol_name', REFERENCE_PROTOCOLS)
+def test_simulate_python(benchmark, protocol_name):
+    text = (TEST_DATA / protocol_name).read_text()
+
+    def run():
+        return simulate.simulate(io.StringIO(text), protocol_name)
+
+    runlog, _ = benchmark.pedantic(run, rounds=5, warmup_rounds=1)
+    assert runlog
+
+
+def test_simulate_json(benchmark, get_json_protocol_fixture):
+    text = json.dumps(get_json_protocol_fixture('5', 'simpleV5'))
+
+    def run():
+        return simulate.simulate(io.StringIO(text), 'simpleV5.json')
+
+    runlog, _ = benchmark.pedantic(run, rounds=5, warmup_rounds=1)
+    assert runlog
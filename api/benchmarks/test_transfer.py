@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize('plate_name', [
+    'corning_96_wellplate_360ul_flat',
+    'corning_384_wellplate_112ul_flat',
+])
+def test_transfer(benchmark, ctx, plate_name):
+    tiprack = ctx.load_labware('opentrons_96_tiprack_300ul', 1)
+    reservoir = ctx.load_labware('nest_12_reservoir_15ml', 2)
+    plate = ctx.load_labware(plate_name, 3)
+    pipette = ctx.load_instrument('p300_single_gen2', 'right', [tiprack])
+
+    def transfer():
+        pipette.transfer(20, reservoir['A1'], plate.wells())
+        tiprack.reset()
+
+    benchmark.pedantic(transfer, rounds=3, warmup_rounds=1)
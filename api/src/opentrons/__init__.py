@@ -5,15 +5,18 @@ from functools import partial
 from pathlib import Path
 import logging
 import asyncio
+import importlib
 import re
-from typing import List, Tuple
-from opentrons.hardware_control import API, ThreadManager
+from typing import List, Tuple, TYPE_CHECKING
 from opentrons.config import (feature_flags as ff, name,
                               robot_configs, IS_ROBOT, ROBOT_FIRMWARE_DIR)
 from opentrons.util import logging_config
 from opentrons.protocols.types import ApiDeprecationError
 from opentrons.protocols.api_support.types import APIVersion
 
+if TYPE_CHECKING:
+    from opentrons.hardware_control import API, ThreadManager  # noqa(F401)
+
 version = sys.version_info[0:2]
 if version < (3, 7):
     raise RuntimeError(
@@ -34,32 +37,47 @@ from opentrons import config  # noqa(E402)
 LEGACY_MODULES = [
     'robot', 'reset', 'instruments', 'containers', 'labware', 'modules']
 
+# Attributes that are only imported when first used, because importing them
+# takes most of the time it takes to import opentrons
+LAZY_ATTRIBUTES = {
+    'API': 'opentrons.hardware_control',
+    'ThreadManager': 'opentrons.hardware_control',
+}
+
 __all__ = ['version', 'HERE', 'config']
 
 
 def __getattr__(attrname):
     """
-    Prevent import of legacy modules from global to officially
-    deprecate Python API Version 1.0.
+    Import lazy attributes on first use, and prevent import of legacy
+    modules from global to officially deprecate Python API Version 1.0.
     """
+    if attrname in LAZY_ATTRIBUTES:
+        module = importlib.import_module(LAZY_ATTRIBUTES[attrname])
+        value = getattr(module, attrname)
+        globals()[attrname] = value
+        return value
     if attrname in LEGACY_MODULES:
         raise ApiDeprecationError(APIVersion(1, 0))
     raise AttributeError(attrname)
 
 
 def __dir__():
-    return sorted(__all__ + LEGACY_MODULES)
+    return sorted(__all__ + LEGACY_MODULES + list(LAZY_ATTRIBUTES))
 
 
-try:
-    from opentrons.hardware_control.socket_server\
-        import run as install_hardware_server
-except ImportError:
-    async def install_hardware_server(sock_path, api):  # type: ignore
-        log.warning("Cannot start hardware server: missing dependency")
+log = logging.getLogger(__name__)
 
 
-log = logging.getLogger(__name__)
+async def install_hardware_server(sock_path: str, api: 'API'):
+    """ Run the hardware socket server, if its dependencies are installed """
+    try:
+        from opentrons.hardware_control.socket_server import run
+    except ImportError:
+        log.warning("Cannot start hardware server: missing dependency")
+        return None
+    return await run(sock_path, api)
+
 
 try:
     import systemd.daemon  # type: ignore
@@ -91,7 +109,9 @@ def _find_smoothie_file() -> Tuple[Path, str]:
     raise OSError(f"Could not find smoothie firmware file in {resources_path}")
 
 
-async def initialize_robot() -> ThreadManager:
+async def initialize_robot() -> 'ThreadManager':
+    from opentrons.hardware_control import API, ThreadManager
+
     if os.environ.get("ENABLE_VIRTUAL_SMOOTHIE"):
         log.info("Initialized robot using virtual Smoothie")
         systemdd_notify()
@@ -134,7 +154,7 @@ async def initialize_robot() -> ThreadManager:
 async def initialize(
         hardware_server: bool = False,
         hardware_server_socket: str = None) \
-        -> ThreadManager:
+        -> 'ThreadManager':
     """
     Initialize the Opentrons hardware returning a hardware instance.
 
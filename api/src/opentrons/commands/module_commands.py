@@ -115,7 +115,8 @@ def thermocycler_execute_profile(
         'name': command_types.THERMOCYCLER_EXECUTE_PROFILE,
         'payload': {
             'text': text,
-            'steps': steps
+            'steps': steps,
+            'repetitions': repetitions
         }
     }
 
@@ -142,7 +143,7 @@ def thermocycler_set_lid_temperature(
     text = f'Setting Thermocycler lid temperature to {temp} °C'
     return {
         'name': command_types.THERMOCYCLER_SET_LID_TEMP,
-        'payload': {'text': text}
+        'payload': {'text': text, 'temperature': temp}
     }
 
 
@@ -208,6 +208,7 @@ class ThermocyclerSetBlockTempCommand(TypedDict):
 
 class ThermocyclerExecuteProfileCommandPayload(TextOnlyPayload):
     steps: List[ThermocyclerStep]
+    repetitions: int
 
 
 class ThermocyclerExecuteProfileCommand(TypedDict):
@@ -234,7 +235,7 @@ class ThermocyclerWaitForTempCommand(TypedDict):
 
 
 class ThermocyclerSetLidTempCommandPayload(TextOnlyPayload):
-    pass
+    temperature: float
 
 
 class ThermocyclerSetLidTempCommand(TypedDict):
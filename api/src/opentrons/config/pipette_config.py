@@ -87,13 +87,14 @@ NOZZLE_OFFSET_DEFAULT = [0.0, 0.0, 0.0]
 
 LOW_CURRENT_DEFAULT = 0.05
 
-config_models = list(model_config()['config'].keys())
+_model_config = model_config()
+config_models = list(_model_config['config'].keys())
 config_names = list(name_config().keys())
-configs = model_config()['config']
+configs = _model_config['config']
 #: A list of pipette model names for which we have config entries
-MUTABLE_CONFIGS = model_config()['mutableConfigs']
+MUTABLE_CONFIGS = _model_config['mutableConfigs']
 #: A list of mutable configs for pipettes
-VALID_QUIRKS = model_config()['validQuirks']
+VALID_QUIRKS = _model_config['validQuirks']
 #: A list of valid quirks for pipettes
 
 
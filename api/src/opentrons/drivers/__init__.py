@@ -1,18 +1,18 @@
 import configparser
 import glob
 import os
-import pkg_resources
 import sys
 import logging
 
 import serial  # type: ignore
 
+from opentrons import config
 from opentrons.drivers import connection
 
 VIRTUAL_SMOOTHIE_PORT = 'Virtual Smoothie'
 
-SMOOTHIE_DEFAULTS_DIR = pkg_resources.resource_filename(
-    'opentrons.config', 'smoothie')
+SMOOTHIE_DEFAULTS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(config.__file__)), 'smoothie')
 SMOOTHIE_DEFAULTS_FILE = os.path.join(
     SMOOTHIE_DEFAULTS_DIR, 'smoothie-defaults.ini')
 SMOOTHIE_VIRTUAL_CONFIG_FILE = os.path.join(
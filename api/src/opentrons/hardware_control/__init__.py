@@ -10,18 +10,44 @@ This module is not for use outside the opentrons api module. Higher-level
 functions are available elsewhere.
 """
 
-from .adapters import SynchronousAdapter
-from .api import API
-from .controller import Controller
-from .simulator import Simulator
-from .pipette import Pipette
-from .types import (HardwareAPILike, CriticalPoint,
-                    NoTipAttachedError, ExecutionState,
-                    ExecutionCancelledError)
-from .constants import DROP_TIP_RELEASE_DISTANCE
-from .thread_manager import ThreadManager
-from .execution_manager import ExecutionManager
-from .threaded_async_lock import ThreadedAsyncLock, ThreadedAsyncForbidden
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .adapters import SynchronousAdapter
+    from .api import API
+    from .controller import Controller
+    from .simulator import Simulator
+    from .pipette import Pipette
+    from .types import (HardwareAPILike, CriticalPoint,
+                        NoTipAttachedError, ExecutionState,
+                        ExecutionCancelledError)
+    from .constants import DROP_TIP_RELEASE_DISTANCE
+    from .thread_manager import ThreadManager
+    from .execution_manager import ExecutionManager
+    from .threaded_async_lock import (ThreadedAsyncLock,
+                                      ThreadedAsyncForbidden)
+
+# The submodule each public name comes from. Submodules are only imported
+# when one of their names is first used, so that importing something small
+# like hardware_control.types does not import the whole hardware controller.
+_SUBMODULES = {
+    'SynchronousAdapter': '.adapters',
+    'API': '.api',
+    'Controller': '.controller',
+    'Simulator': '.simulator',
+    'Pipette': '.pipette',
+    'HardwareAPILike': '.types',
+    'CriticalPoint': '.types',
+    'NoTipAttachedError': '.types',
+    'ExecutionState': '.types',
+    'ExecutionCancelledError': '.types',
+    'DROP_TIP_RELEASE_DISTANCE': '.constants',
+    'ThreadManager': '.thread_manager',
+    'ExecutionManager': '.execution_manager',
+    'ThreadedAsyncLock': '.threaded_async_lock',
+    'ThreadedAsyncForbidden': '.threaded_async_lock',
+}
 
 __all__ = [
     'API', 'Controller', 'Simulator', 'Pipette',
@@ -30,3 +56,16 @@ __all__ = [
     'ThreadManager', 'ExecutionManager', 'ExecutionState',
     'ExecutionCancelledError', 'ThreadedAsyncLock', 'ThreadedAsyncForbidden'
 ]
+
+
+def __getattr__(attrname):
+    if attrname not in _SUBMODULES:
+        raise AttributeError(attrname)
+    module = importlib.import_module(_SUBMODULES[attrname], __name__)
+    value = getattr(module, attrname)
+    globals()[attrname] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -245,6 +245,16 @@ class API(HardwareAPILike):
         """ `True` if this is a simulator; `False` otherwise. """
         return isinstance(self._backend, Simulator)
 
+    @property
+    def simulated_time(self) -> float:
+        """ Seconds the motions simulated so far would take on a robot.
+
+        Always `0` if this is not a simulator.
+        """
+        if isinstance(self._backend, Simulator):
+            return self._backend.simulated_time
+        return 0.0
+
     def validate_calibration(self) -> DeckTransformState:
         """
         The lru cache decorator is currently not supported by the
@@ -4,7 +4,7 @@ import copy
 import logging
 from threading import Event
 from typing import (Dict, Optional, List, Tuple,
-                    TYPE_CHECKING, Sequence)
+                    TYPE_CHECKING, Sequence, cast)
 from contextlib import contextmanager
 
 from opentrons_shared_data.pipette import dummy_model_for_name
@@ -16,12 +16,15 @@ from opentrons.config.pipette_config import (config_models,
                                              load)
 from opentrons.config.types import RobotConfig
 from opentrons.drivers.smoothie_drivers import SimulatingDriver
+from opentrons.drivers.smoothie_drivers.driver_3_0 import (
+    DEFAULT_AXES_SPEED, HOME_SEQUENCE)
 
 from opentrons.drivers.rpi_drivers.gpio_simulator import SimulatingGPIOCharDev
 
 from . import modules
 from .execution_manager import ExecutionManager
 from .types import BoardRevision, Axis
+from .util import estimate_move_time
 
 
 if TYPE_CHECKING:
@@ -148,17 +151,41 @@ class Simulator:
         self._run_flag.set()
         self._log = MODULE_LOG.getChild(repr(self))
         self._strict_attached = bool(strict_attached_instruments)
+        self._simulated_time = 0.0
 
     @property
     def gpio_chardev(self) -> GPIODriverLike:
         return self._gpio_chardev
 
+    @property
+    def simulated_time(self) -> float:
+        """ Seconds the motions simulated so far would take on a robot """
+        return self._simulated_time
+
+    def _advance_clock(self, target_position: Dict[str, float],
+                       speed: float = None,
+                       axis_max_speeds: Dict[str, float] = None):
+        max_speeds = cast(Dict[str, float],
+                          dict(self.config.default_max_speed))
+        max_speeds.update(axis_max_speeds or {})
+        self._simulated_time += estimate_move_time(
+            self._position, target_position,
+            speed or DEFAULT_AXES_SPEED, max_speeds,
+            self.config.acceleration, self.config.gantry_steps_per_mm)
+
+    def _advance_clock_homing(self, axes: Sequence[str]):
+        homed = self._smoothie_driver.homed_position
+        for group in HOME_SEQUENCE:
+            targets = {ax: homed[ax] for ax in group if ax in axes}
+            self._advance_clock(targets, float('inf'))
+
     def update_position(self) -> Dict[str, float]:
         return self._position
 
     def move(self, target_position: Dict[str, float],
              home_flagged_axes: bool = True, speed: float = None,
              axis_max_speeds: Dict[str, float] = None):
+        self._advance_clock(target_position, speed, axis_max_speeds)
         self._position.update(target_position)
         self._engaged_axes.update({ax: True
                                    for ax in target_position})
@@ -166,6 +193,7 @@ class Simulator:
     def home(self, axes: List[str] = None) -> Dict[str, float]:
         # driver_3_0-> HOMED_POSITION
         checked_axes = axes or 'XYZABC'
+        self._advance_clock_homing(checked_axes)
         self._position.update({ax: self._smoothie_driver.homed_position[ax]
                                for ax in checked_axes})
         self._engaged_axes.update({ax: True
@@ -174,6 +202,7 @@ class Simulator:
 
     def fast_home(
             self, axis: Sequence[str], margin: float) -> Dict[str, float]:
+        self._advance_clock_homing(axis)
         for ax in axis:
             self._position[ax] = self._smoothie_driver.homed_position[ax]
             self._engaged_axes[ax] = True
@@ -91,3 +91,45 @@ def check_motion_bounds(
             mod_log.warning(bounds_message)
             if checks.value & MotionChecks.HIGH.value:
                 raise OutOfBoundsMove(bounds_message)
+
+
+def estimate_move_time(
+        start: Mapping[str, float],
+        target: Mapping[str, float],
+        speed: float,
+        max_speeds: Mapping[str, float],
+        accelerations: Mapping[str, float],
+        steps_per_mm: Mapping[str, float] = None) -> float:
+    """
+    Estimate how long the motor controller takes to execute a move, in seconds
+
+    The move is modelled the way the Smoothie plans it: a straight line
+    through all the moving axes with a trapezoidal velocity profile. The
+    requested speed is the speed along that line and is capped so that no
+    axis exceeds its own max speed; the acceleration is likewise limited by
+    the slowest-accelerating axis. If ``steps_per_mm`` is given, each axis
+    distance is rounded to a whole number of steps first.
+    """
+    steps = steps_per_mm or {}
+    distances = {}
+    for ax, pos in target.items():
+        dist = abs(pos - start.get(ax, pos))
+        if ax in steps:
+            dist = round(dist * steps[ax]) / steps[ax]
+        if dist > 0:
+            distances[ax] = dist
+    if not distances or speed <= 0:
+        return 0.0
+    length = sum(d ** 2 for d in distances.values()) ** 0.5
+    velocity = min([speed] + [max_speeds[ax] * length / d
+                              for ax, d in distances.items()
+                              if ax in max_speeds])
+    accel = min(accelerations.get(ax, float('inf')) * length / d
+                for ax, d in distances.items())
+    if accel == float('inf'):
+        return length / velocity
+    if length >= velocity ** 2 / accel:
+        # reaches cruise speed: accelerate, cruise, decelerate
+        return length / velocity + velocity / accel
+    # triangular profile: never reaches cruise speed
+    return 2 * (length / accel) ** 0.5
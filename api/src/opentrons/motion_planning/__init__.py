@@ -4,10 +4,11 @@ from .waypoints import (
     DEFAULT_GENERAL_ARC_Z_MARGIN,
     DEFAULT_IN_LABWARE_ARC_Z_MARGIN,
     MINIMUM_Z_MARGIN,
-    get_waypoints
+    get_waypoints,
+    get_waypoints_batch,
 )
 
-from .types import Waypoint, MoveType
+from .types import Waypoint, WaypointBatch, MoveType
 
 from .errors import (
     MotionPlanningError,
@@ -20,9 +21,11 @@ __all__ = [
     "DEFAULT_IN_LABWARE_ARC_Z_MARGIN",
     "MINIMUM_Z_MARGIN",
     "Waypoint",
+    "WaypointBatch",
     "MoveType",
     "MotionPlanningError",
     "DestinationOutOfBoundsError",
     "ArcOutOfBoundsError",
     "get_waypoints",
+    "get_waypoints_batch",
 ]
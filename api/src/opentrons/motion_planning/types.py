@@ -1,9 +1,11 @@
 """Motion planning base interfaces."""
 from dataclasses import dataclass
 from enum import Enum, auto as auto_enum_value
-from typing import Optional
+from typing import List, Optional
 from typing_extensions import final
 
+import numpy as np  # type: ignore
+
 from opentrons.types import Point
 from opentrons.hardware_control.types import CriticalPoint
 
@@ -30,3 +32,41 @@ class MoveType(Enum):
     GENERAL_ARC = auto_enum_value()
     IN_LABWARE_ARC = auto_enum_value()
     DIRECT = auto_enum_value()
+
+
+@dataclass(frozen=True)
+@final
+class WaypointBatch:
+    """
+    Waypoints for a batch of moves, packed into NumPy arrays.
+
+    Every move in the batch is represented by exactly three waypoints:
+
+    - index 0: the origin XY at the travel height (the "rise")
+    - index 1: the destination XY at the travel height (the "traverse")
+    - index 2: the destination itself
+
+    Waypoints that :py:func:`get_waypoints` would leave out of a single move
+    (for instance, a rise when the origin is already at the travel height)
+    are flagged as unused in ``mask``, so the arrays keep a fixed shape.
+
+    :param positions: ``(N, 3, 3)`` array of waypoint XYZ positions.
+    :param mask: ``(N, 3)`` boolean array of waypoints to actually visit.
+    :param travel_z: ``(N,)`` array of the travel height of each move.
+    """
+
+    positions: np.ndarray
+    mask: np.ndarray
+    travel_z: np.ndarray
+
+    def __len__(self) -> int:
+        """Get the number of moves in the batch."""
+        return len(self.positions)
+
+    def get_waypoints(self, index: int) -> List[Waypoint]:
+        """Unpack the waypoints of a single move in the batch."""
+        return [
+            Waypoint(Point(*(float(v) for v in position)))
+            for position, used in zip(self.positions[index], self.mask[index])
+            if used
+        ]
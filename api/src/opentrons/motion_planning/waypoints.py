@@ -1,12 +1,18 @@
 """Waypoint planning."""
-from typing import List, Optional, Sequence, Tuple
+from typing import List, Optional, Sequence, Tuple, Type, Union
 from typing_extensions import Final
 
+import numpy as np  # type: ignore
+
 from opentrons.types import Point
 from opentrons.hardware_control.types import CriticalPoint
 
-from .types import Waypoint, MoveType
-from .errors import DestinationOutOfBoundsError, ArcOutOfBoundsError
+from .types import Waypoint, WaypointBatch, MoveType
+from .errors import (
+    MotionPlanningError,
+    DestinationOutOfBoundsError,
+    ArcOutOfBoundsError,
+)
 
 DEFAULT_GENERAL_ARC_Z_MARGIN: Final[float] = 10.0
 DEFAULT_IN_LABWARE_ARC_Z_MARGIN: Final[float] = 5.0
@@ -114,3 +120,111 @@ def get_waypoints(
     waypoints.append(dest_waypoint)
 
     return waypoints
+
+
+def get_waypoints_batch(
+    origins: np.ndarray,
+    dests: np.ndarray,
+    *,
+    max_travel_z: Union[float, np.ndarray],
+    min_travel_z: Union[float, np.ndarray] = 0.0,
+    move_type: MoveType = MoveType.GENERAL_ARC,
+) -> WaypointBatch:
+    """
+    Get waypoints for many origin to destination moves at once.
+
+    This applies the same arc and bounds rules as :py:func:`get_waypoints`,
+    evaluated with array operations rather than one move at a time, which
+    makes it suitable for planning the full trajectory of a long sequence of
+    moves (e.g. a transfer across a 384 well plate).
+
+    Critical points and extra XY waypoints are not supported in batches; use
+    :py:func:`get_waypoints` for moves that need them.
+
+    :param origins: ``(N, 3)`` array-like of move start points.
+    :param dests: ``(N, 3)`` array-like of move end points.
+    :param max_travel_z: The maximum allowed travel height of the arc moves,
+                         either a scalar or an ``(N,)`` array-like.
+    :param min_travel_z: The minimum allowed travel height of the arc moves,
+                         either a scalar or an ``(N,)`` array-like.
+    :param move_type: Direct move, in-labware arc, or general arc move type,
+                      applied to every move in the batch.
+
+    :returns: A :py:class:`.WaypointBatch` holding the waypoints of each move.
+    :raises DestinationOutOfBoundsError: If any destination is out of bounds;
+                                         the error describes the first
+                                         offending move.
+    :raises ArcOutOfBoundsError: If any arc is out of bounds; the error
+                                 describes the first offending move.
+    """
+    origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+    dests = np.asarray(dests, dtype=float).reshape(-1, 3)
+
+    if origins.shape != dests.shape:
+        raise ValueError(
+            f"Got {len(origins)} origins but {len(dests)} destinations"
+        )
+
+    count = len(dests)
+    max_z = np.broadcast_to(np.asarray(max_travel_z, dtype=float), (count,))
+    min_z = np.broadcast_to(np.asarray(min_travel_z, dtype=float), (count,))
+    positions = np.repeat(dests[:, np.newaxis, :], 3, axis=1)
+    mask = np.zeros((count, 3), dtype=bool)
+    mask[:, 2] = True
+
+    # a direct move can ignore all arc and waypoint planning
+    if move_type == MoveType.DIRECT:
+        return WaypointBatch(
+            positions=positions, mask=mask, travel_z=dests[:, 2].copy()
+        )
+
+    # ensure destinations are not out of bounds and that the passed in
+    # min_travel_z and max_travel_z are compatible, reporting the first
+    # failing move the same way a sequence of get_waypoints calls would
+    dest_out_of_bounds = dests[:, 2] + MINIMUM_Z_MARGIN > max_z
+    arc_out_of_bounds = min_z + MINIMUM_Z_MARGIN > max_z
+    out_of_bounds = dest_out_of_bounds | arc_out_of_bounds
+
+    if out_of_bounds.any():
+        index = int(np.argmax(out_of_bounds))
+        error_type: Type[MotionPlanningError] = (
+            DestinationOutOfBoundsError
+            if dest_out_of_bounds[index]
+            else ArcOutOfBoundsError
+        )
+
+        raise error_type(
+            origin=Point(*(float(v) for v in origins[index])),
+            dest=Point(*(float(v) for v in dests[index])),
+            clearance=MINIMUM_Z_MARGIN,
+            min_travel_z=float(min_z[index]),
+            max_travel_z=float(max_z[index]),
+            message=(
+                "Destination out of bounds in the Z-axis"
+                if dest_out_of_bounds[index]
+                else "Arc out of bounds in the Z-axis"
+            ),
+        )
+
+    # set the z clearance according to the arc type
+    travel_z_margin = (
+        DEFAULT_GENERAL_ARC_Z_MARGIN
+        if move_type == MoveType.GENERAL_ARC
+        else DEFAULT_IN_LABWARE_ARC_Z_MARGIN
+    )
+
+    # see get_waypoints for the travel z rules
+    travel_z = np.minimum(
+        max_z,
+        np.maximum.reduce(
+            [min_z + travel_z_margin, origins[:, 2], dests[:, 2]]
+        )
+    )
+
+    positions[:, 0, :2] = origins[:, :2]
+    positions[:, 0, 2] = travel_z
+    positions[:, 1, 2] = travel_z
+    mask[:, 0] = travel_z > origins[:, 2]
+    mask[:, 1] = travel_z > dests[:, 2]
+
+    return WaypointBatch(positions=positions, mask=mask, travel_z=travel_z)
@@ -987,6 +987,16 @@ class InstrumentContext(CommandPublisher):
               gradient is linear (lambda x: x), however a method can be passed
               with the `gradient` keyword argument to create a custom curve.
 
+            * *order_strategy* (``string``) --
+              The order in which to visit wells. If ``'as given'`` (default),
+              wells are visited in the order of `source` and `dest`. If
+              ``'minimize travel'``, wells are reordered to reduce gantry
+              travel where the order does not change the result: the
+              destinations of a :py:meth:`distribute`, and the
+              source/destination pairs of a transfer if no well is both a
+              source and a destination and no destination is filled twice.
+              Each volume stays with its well.
+
         :returns: This instance
         """
         self._log.debug("Transfer {} from {} to {}".format(
@@ -1032,6 +1042,11 @@ class InstrumentContext(CommandPublisher):
         else:
             max_volume = self.hw_pipette['working_volume']
 
+        order_strategy = kwargs.get('order_strategy')
+        if isinstance(order_strategy, str):
+            order_strategy = transfers.OrderStrategy[
+                order_strategy.upper().replace(' ', '_')]
+
         touch_tip = None
         if kwargs.get('touch_tip'):
             touch_tip = transfers.TouchTipStrategy.ALWAYS
@@ -1060,13 +1075,18 @@ class InstrumentContext(CommandPublisher):
             blow_out_strategy=blow_out_strategy or
             default_args.blow_out_strategy,
             touch_tip_strategy=(touch_tip or
-                                default_args.touch_tip_strategy)
+                                default_args.touch_tip_strategy),
+            order_strategy=order_strategy or default_args.order_strategy
         )
         transfer_options = transfers.TransferOptions(transfer=transfer_args,
                                                      mix=mix_opts)
         plan = transfers.TransferPlan(volume, source, dest, self, max_volume,
                                       self.api_version, kwargs['mode'],
                                       transfer_options)
+        if plan.travel_saved:
+            self._log.info(
+                f"Reordered wells to save an estimated "
+                f"{plan.travel_saved:.1f} mm of travel")
         self._execute_transfer(plan)
         return self
 
@@ -1,15 +1,20 @@
 import enum
+import itertools
+import logging
 from typing import (Any, Dict, List, Optional, Union, NamedTuple,
-                    Callable, Generator, Iterator, Tuple,
+                    Callable, Generator, Iterable, Iterator, Sequence, Tuple,
                     TYPE_CHECKING, TypeVar)
 from opentrons.protocol_api.labware import Well
 from opentrons import types
 from opentrons.protocols.api_support.types import APIVersion
+from opentrons.protocols.advanced_control.travel import plan_travel_order
 
 if TYPE_CHECKING:
     from opentrons.protocol_api.contexts import InstrumentContext  # noqa (F501)
     from opentrons.protocols.execution.dev_types import Dictable  # noqa(F501)
 
+MODULE_LOG = logging.getLogger(__name__)
+
 
 class MixStrategy(enum.Enum):
     BOTH = enum.auto()
@@ -36,6 +41,11 @@ class BlowOutStrategy(enum.Enum):
     CUSTOM_LOCATION = enum.auto()
 
 
+class OrderStrategy(enum.Enum):
+    AS_GIVEN = enum.auto()
+    MINIMIZE_TRAVEL = enum.auto()
+
+
 class TransferMode(enum.Enum):
     DISTRIBUTE = enum.auto()
     CONSOLIDATE = enum.auto()
@@ -57,6 +67,7 @@ class Transfer(NamedTuple):
     drop_tip_strategy: DropTipStrategy = DropTipStrategy.TRASH
     blow_out_strategy: BlowOutStrategy = BlowOutStrategy.NONE
     touch_tip_strategy: TouchTipStrategy = TouchTipStrategy.NEVER
+    order_strategy: OrderStrategy = OrderStrategy.AS_GIVEN
 
 
 Transfer.new_tip.__doc__ = """
@@ -186,6 +197,23 @@ Transfer.touch_tip_strategy.__doc__ = """
     :py:attr:`.TransferOptions.touch_tip`.
     """
 
+Transfer.order_strategy.__doc__ = """
+    Controls the order in which wells are visited.
+
+    :py:attr:`OrderStrategy.AS_GIVEN`
+        Visit wells in the order of the source and destination lists.
+
+    :py:attr:`OrderStrategy.MINIMIZE_TRAVEL`
+        Where the order doesn't change what ends up in each well, reorder
+        wells to reduce gantry travel: distribute destinations are visited
+        in a short path from the source, and the source/destination pairs
+        of a transfer are reordered as whole pairs. Pairs are only
+        reordered if no well is both a source and a destination and no
+        destination is filled twice, so a serial dilution keeps its order.
+        Consolidate sources keep their order. The estimated travel saved is available as
+        :py:attr:`.TransferPlan.travel_saved`.
+    """
+
 
 class PickUpTipOpts(NamedTuple):
     """
@@ -351,6 +379,55 @@ TransferOptions.dispense.__doc__ = """
     """
 
 
+class TransferStep:
+    """ A single instrument method call produced by a :py:class:`TransferPlan`
+
+    Steps are generated in large numbers, so this is a slotted record rather
+    than a dict. For compatibility it can still be indexed like the dicts
+    plans used to produce (``step['method']``) and compares equal to them.
+    """
+    __slots__ = ('method', 'args', 'kwargs')
+
+    def __init__(self,
+                 method: str,
+                 args: Optional[List] = None,
+                 kwargs: Optional[Dict[str, Any]] = None) -> None:
+        self.method = method
+        self.args = args if args is not None else []
+        self.kwargs = kwargs if kwargs is not None else {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {'method': self.method,
+                'args': self.args,
+                'kwargs': self.kwargs}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TransferStep):
+            return self._asdict() == other._asdict()
+        elif isinstance(other, dict):
+            return self._asdict() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f'TransferStep({self.method!r}, {self.args!r}, {self.kwargs!r})'
+
+
+Target = TypeVar('Target')
+
+
+def _repeat_each(items: Iterable[Target], times: int) -> Iterator[Target]:
+    """ Lazily repeat each item ``times`` times in a row """
+    return itertools.chain.from_iterable(
+        itertools.repeat(item, times) for item in items)
+
+
 class TransferPlan:
     """ Calculate and carry state for an arbitrary transfer
 
@@ -359,6 +436,10 @@ class TransferPlan:
     It handles calculations based on pipette channels, tip management, and all
     the various little commands that can be involved in a transfer. It can be
     iterated to resolve methods to call to execute the plan.
+
+    Iterating the plan is a generator pipeline: volume splits and well pairs
+    are computed step by step as :py:class:`TransferStep` records, so memory
+    use doesn't grow with the size of the transfer.
     """
     def __init__(self,
                  volume,
@@ -400,19 +481,18 @@ class TransferPlan:
             elif isinstance(dests, Well) or isinstance(dests, types.Location):
                 dests = [dests]
 
-        total_xfers = max(len(sources), len(dests))
-
-        self._volumes = self._create_volume_list(volume, total_xfers)
         self._sources = sources
         self._dests = dests
         self._options = options or TransferOptions()
         self._strategy = self._options.transfer
-        self._tip_opts = self._options.pick_up_tip
-        self._blow_opts = self._options.blow_out
-        self._touch_tip_opts = self._options.touch_tip
+        self._tip_opts = self._filter_kwargs(self._options.pick_up_tip)
+        self._blow_opts = self._filter_kwargs(self._options.blow_out)
+        self._touch_tip_opts = self._filter_kwargs(self._options.touch_tip)
         self._mix_before_opts = self._options.mix.mix_before
         self._mix_after_opts = self._options.mix.mix_after
         self._max_volume = max_volume
+        self._total_xfers = max(len(sources), len(dests))
+        self._volume = self._check_volume(volume, self._total_xfers)
 
         if not mode:
             if len(sources) < len(dests):
@@ -424,17 +504,103 @@ class TransferPlan:
         else:
             self._mode = TransferMode[mode.upper()]
 
-    def __iter__(self):
+        self._travel_saved = 0.0
+        self._apply_order_strategy()
+
+    @property
+    def travel_saved(self) -> float:
+        """ Estimated XY gantry travel (in mm) saved by reordering wells.
+
+        This is always 0 unless :py:attr:`.Transfer.order_strategy` is
+        :py:attr:`OrderStrategy.MINIMIZE_TRAVEL`.
+        """
+        return self._travel_saved
+
+    def _apply_order_strategy(self):
+        """ Reorder wells to reduce gantry travel if requested and safe.
+
+        Volumes always stay with the wells they were specified for.
+        """
+        if self._strategy.order_strategy != OrderStrategy.MINIMIZE_TRAVEL:
+            return
+        if self._mode == TransferMode.DISTRIBUTE \
+                and self._total_xfers == len(self._dests):
+            start = self._well_point(self._sources[0])
+            steps = [(self._well_point(d), self._well_point(d))
+                     for d in self._dests]
+            travel = plan_travel_order(steps, start)
+            self._dests = [self._dests[i] for i in travel.order]
+        elif self._mode == TransferMode.TRANSFER:
+            sources, dests = (list(wells) for wells in
+                              self._extend_source_target_lists(
+                                  self._sources, self._dests))
+            if not self._pairs_are_independent(sources, dests):
+                # e.g. a serial dilution, where a destination is a later
+                # source: the order is part of the result
+                MODULE_LOG.debug(
+                    "Not reordering transfer: its pairs depend on each other")
+                return
+            steps = [(self._well_point(s), self._well_point(d))
+                     for s, d in zip(sources, dests)]
+            travel = plan_travel_order(steps)
+            self._sources = [sources[i] for i in travel.order]
+            self._dests = [dests[i] for i in travel.order]
+        else:
+            # consolidate sources all end up in the same tip, so leave the
+            # order they are picked up in alone
+            return
+        volumes = list(self._iter_volumes())
+        self._volume = [volumes[i] for i in travel.order]
+        self._travel_saved = travel.travel_saved
+        MODULE_LOG.debug(
+            f"Reordered {self._mode.name.lower()} to save an estimated "
+            f"{travel.travel_saved:.1f} mm of travel")
+
+    @classmethod
+    def _pairs_are_independent(
+            cls,
+            sources: List[Union[Well, types.Location]],
+            dests: List[Union[Well, types.Location]]) -> bool:
+        """ Whether transfer pairs can run in any order with the same result.
+
+        They can if no well is both a source and a destination and no
+        destination is filled twice. A location that is not in a known
+        well could be anywhere, so its pairs are never reordered.
+        """
+        source_wells = [cls._well_key(s) for s in sources]
+        dest_wells = [cls._well_key(d) for d in dests]
+        if None in source_wells or None in dest_wells:
+            return False
+        unique_dests = set(dest_wells)
+        return len(unique_dests) == len(dest_wells) \
+            and unique_dests.isdisjoint(source_wells)
+
+    @staticmethod
+    def _well_key(
+            target: Union[Well, types.Location]) -> Optional[types.Point]:
+        if isinstance(target, Well):
+            return target.top().point
+        if target.labware.is_well:
+            return target.labware.as_well().top().point
+        return None
+
+    @staticmethod
+    def _well_point(target: Union[Well, types.Location]) -> types.Point:
+        if isinstance(target, types.Location):
+            return target.point
+        return target.top().point
+
+    def __iter__(self) -> Iterator[TransferStep]:
         if self._strategy.new_tip == types.TransferTipPolicy.ONCE:
-            yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
+            yield self._format_step('pick_up_tip', kwargs=self._tip_opts)
         yield from {TransferMode.CONSOLIDATE: self._plan_consolidate,
                     TransferMode.DISTRIBUTE: self._plan_distribute,
                     TransferMode.TRANSFER: self._plan_transfer}[self._mode]()
         if self._strategy.new_tip == types.TransferTipPolicy.ONCE:
             if self._strategy.drop_tip_strategy == DropTipStrategy.RETURN:
-                yield self._format_dict('return_tip')
+                yield self._format_step('return_tip')
             else:
-                yield self._format_dict('drop_tip')
+                yield self._format_step('drop_tip')
 
     def _plan_transfer(self):
         """
@@ -471,15 +637,15 @@ class TransferPlan:
         sources, dests = self._extend_source_target_lists(
             self._sources, self._dests)
         plan_iter = self._expand_for_volume_constraints(
-            self._volumes, zip(sources, dests),
+            self._iter_volumes(), zip(sources, dests),
             self._instr.max_volume
             - self._strategy.disposal_volume
             - self._strategy.air_gap)
+        max_vol = self._max_volume - \
+            self._strategy.disposal_volume - self._strategy.air_gap
         for step_vol, (src, dest) in plan_iter:
             if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
-                yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
-            max_vol = self._max_volume - \
-                self._strategy.disposal_volume - self._strategy.air_gap
+                yield self._format_step('pick_up_tip', kwargs=self._tip_opts)
             xferred_vol = 0.0
             while xferred_vol < step_vol:
                 # TODO: account for unequal length sources, dests
@@ -492,22 +658,25 @@ class TransferPlan:
 
     @staticmethod
     def _extend_source_target_lists(
-            sources: List[Union[Well, types.Location]],
-            targets: List[Union[Well, types.Location]]):
-        """Extend source or target list to match the length of the other
+            sources: Sequence[Union[Well, types.Location]],
+            targets: Sequence[Union[Well, types.Location]])\
+            -> Tuple[Iterable[Union[Well, types.Location]],
+                     Iterable[Union[Well, types.Location]]]:
+        """Lazily extend source or target list to match the length of the
+        other
         """
         if len(sources) < len(targets):
             if len(targets) % len(sources) != 0:
                 raise ValueError(
                     'Source and destination lists must be divisible')
-            sources = [source for source in sources
-                       for i in range(int(len(targets)/len(sources)))]
+            return (_repeat_each(sources, len(targets) // len(sources)),
+                    targets)
         elif len(sources) > len(targets):
             if len(sources) % len(targets) != 0:
                 raise ValueError(
                     'Source and destination lists must be divisible')
-            targets = [target for target in targets
-                       for i in range(int(len(sources)/len(targets)))]
+            return (sources,
+                    _repeat_each(targets, len(sources) // len(targets)))
         return sources, targets
 
     def _plan_distribute(self):
@@ -553,7 +722,7 @@ class TransferPlan:
         # First method keeps distribute consistent with current behavior while
         # the other maintains consistency in default behaviors of all functions
         plan_iter = self._expand_for_volume_constraints(
-            self._volumes, self._dests,
+            self._iter_volumes(), self._dests,
             self._instr.max_volume
             - self._strategy.disposal_volume
             - self._strategy.air_gap)
@@ -561,11 +730,12 @@ class TransferPlan:
         done = False
         current_xfer = next(plan_iter)
         if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
-            yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
+            yield self._format_step('pick_up_tip', kwargs=self._tip_opts)
         while not done:
             asp_grouped: List[Tuple[float, Well]] = []
+            grouped_vol = 0.0
             try:
-                while (sum(a[0] for a in asp_grouped) +
+                while (grouped_vol +
                        self._strategy.disposal_volume +
                        self._strategy.air_gap +
                        current_xfer[0]) <= self._max_volume:
@@ -573,13 +743,14 @@ class TransferPlan:
                         self._api_version, current_xfer[0])
                     if append_xfer:
                         asp_grouped.append(current_xfer)
+                        grouped_vol += current_xfer[0]
                     current_xfer = next(plan_iter)
             except StopIteration:
                 done = True
             if not asp_grouped:
                 break
 
-            yield from self._aspirate_actions(sum(a[0] for a in asp_grouped) +
+            yield from self._aspirate_actions(grouped_vol +
                                               self._strategy.disposal_volume,
                                               self._sources[0])
             for step in asp_grouped:
@@ -590,13 +761,12 @@ class TransferPlan:
                     is_disp_next=step is not asp_grouped[-1])
         yield from self._new_tip_action()
 
-    Target = TypeVar('Target')
-    @staticmethod  # noqa(E301)
+    @staticmethod
     def _expand_for_volume_constraints(
-            volumes: Iterator[float],
-            targets: Iterator[Target],
+            volumes: Iterable[float],
+            targets: Iterable[Target],
             max_volume: float)\
-            -> Generator[Tuple[float, 'Target'], None, None]:
+            -> Generator[Tuple[float, Target], None, None]:
         """ Split a sequence of proposed transfers if necessary to keep each
         transfer under the given max volume.
         """
@@ -648,15 +818,16 @@ class TransferPlan:
                .. Aspirate -> .....*
         """
         plan_iter = self._expand_for_volume_constraints(
-            self._volumes, self._sources, self._instr.max_volume)
+            self._iter_volumes(), self._sources, self._instr.max_volume)
         current_xfer = next(plan_iter)
         if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
-            yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
+            yield self._format_step('pick_up_tip', kwargs=self._tip_opts)
         done = False
         while not done:
             asp_grouped: List[Tuple[float, Well]] = []
+            grouped_vol = 0.0
             try:
-                while (sum([a[0] for a in asp_grouped]) +
+                while (grouped_vol +
                        self._strategy.disposal_volume +
                        self._strategy.air_gap * len(asp_grouped) +
                        current_xfer[0]) <= self._max_volume:
@@ -664,33 +835,34 @@ class TransferPlan:
                         self._api_version, current_xfer[0])
                     if append_xfer:
                         asp_grouped.append(current_xfer)
+                        grouped_vol += current_xfer[0]
                     current_xfer = next(plan_iter)
             except StopIteration:
                 done = True
             if not asp_grouped:
                 break
             # Q: What accounts as disposal volume in a consolidate action?
-            # yield self._format_dict('aspirate',
+            # yield self._format_step('aspirate',
             #                         self._strategy.disposal_volume, loc)
             for step in asp_grouped:
                 yield from self._aspirate_actions(step[0], step[1])
             yield from self._dispense_actions(
-                vol=sum([a[0] + self._strategy.air_gap for a in asp_grouped])
-                - self._strategy.air_gap,
+                vol=grouped_vol
+                + self._strategy.air_gap * (len(asp_grouped) - 1),
                 src=None,
                 dest=self._dests[0])
         yield from self._new_tip_action()
 
     def _aspirate_actions(self, vol, loc):
         yield from self._before_aspirate(loc)
-        yield self._format_dict('aspirate',
+        yield self._format_step('aspirate',
                                 [vol, loc, self._options.aspirate.rate])
         yield from self._after_aspirate()
 
     def _dispense_actions(self, vol, dest, src=None, is_disp_next=False):
         if self._strategy.air_gap:
             vol += self._strategy.air_gap
-        yield self._format_dict('dispense',
+        yield self._format_step('dispense',
                                 [vol, dest, self._options.dispense.rate])
         yield from self._after_dispense(
             dest=dest, src=src, is_disp_next=is_disp_next)
@@ -701,14 +873,14 @@ class TransferPlan:
             if self._instr.current_volume == 0:
                 mix_before_opts = self._mix_before_opts._asdict()
                 mix_before_opts['location'] = loc
-                yield self._format_dict(
+                yield self._format_step(
                     'mix', kwargs=mix_before_opts)
 
     def _after_aspirate(self):
         if self._strategy.air_gap:
-            yield self._format_dict('air_gap', [self._strategy.air_gap])
+            yield self._format_step('air_gap', [self._strategy.air_gap])
         if self._strategy.touch_tip_strategy == TouchTipStrategy.ALWAYS:
-            yield self._format_dict('touch_tip', kwargs=self._touch_tip_opts)
+            yield self._format_step('touch_tip', kwargs=self._touch_tip_opts)
 
     def _after_dispense(self, dest, src, is_disp_next=False):  # noqa(C901)
         # This sequence of actions is subject to change
@@ -721,81 +893,83 @@ class TransferPlan:
                         self._strategy.mix_strategy == MixStrategy.BOTH:
                     mix_after_opts = self._mix_after_opts._asdict()
                     mix_after_opts['location'] = dest
-                    yield self._format_dict('mix', kwargs=mix_after_opts)
+                    yield self._format_step('mix', kwargs=mix_after_opts)
             if self._strategy.touch_tip_strategy == TouchTipStrategy.ALWAYS:
-                yield self._format_dict('touch_tip',
+                yield self._format_step('touch_tip',
                                         kwargs=self._touch_tip_opts)
 
             if self._strategy.blow_out_strategy == \
                     BlowOutStrategy.SOURCE:
-                yield self._format_dict('blow_out', [src])
+                yield self._format_step('blow_out', [src])
             elif self._strategy.blow_out_strategy \
                     == BlowOutStrategy.DEST:
-                yield self._format_dict('blow_out', [dest])
+                yield self._format_step('blow_out', [dest])
             elif self._strategy.blow_out_strategy == \
                     BlowOutStrategy.CUSTOM_LOCATION:
-                yield self._format_dict('blow_out', kwargs=self._blow_opts)
+                yield self._format_step('blow_out', kwargs=self._blow_opts)
             elif self._strategy.blow_out_strategy == BlowOutStrategy.TRASH or \
                     self._strategy.disposal_volume:
-                yield self._format_dict('blow_out', [
+                yield self._format_step('blow_out', [
                     self._instr.trash_container.wells()[0]])
         else:
             # Used by distribute
             if self._strategy.air_gap:
-                yield self._format_dict('air_gap', [self._strategy.air_gap])
+                yield self._format_step('air_gap', [self._strategy.air_gap])
             if self._strategy.touch_tip_strategy == TouchTipStrategy.ALWAYS:
-                yield self._format_dict('touch_tip',
+                yield self._format_step('touch_tip',
                                         kwargs=self._touch_tip_opts)
 
     def _new_tip_action(self):
         if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
             if self._strategy.drop_tip_strategy == DropTipStrategy.RETURN:
-                yield self._format_dict('return_tip')
+                yield self._format_step('return_tip')
             else:
-                yield self._format_dict('drop_tip')
+                yield self._format_step('drop_tip')
 
-    def _format_dict(self, method: str,
+    @staticmethod
+    def _filter_kwargs(
+            kwargs: Union['Dictable', Dict[str, Any], None]) -> Dict[str, Any]:
+        if not kwargs:
+            return {}
+        params = kwargs if isinstance(kwargs, Dict) else kwargs._asdict()
+        return {key: val for key, val in params.items() if val}
+
+    def _format_step(self, method: str,
                      args: List = None,
-                     kwargs: Union['Dictable', Dict[str, Any]] = None):
-        if kwargs:
-            if isinstance(kwargs, Dict):
-                params = {key: val for key, val in kwargs.items() if val}
-            else:
-                params = {key: val
-                          for key, val in kwargs._asdict().items() if val}
-        else:
-            params = {}
-        if not args:
-            args = []
-        return {'method': method, 'args': args, 'kwargs': params}
-
-    def _create_volume_list(self, volume, total_xfers):
-        if isinstance(volume, (float, int)):
-            return [volume] * total_xfers
-        elif isinstance(volume, tuple):
+                     kwargs: Union['Dictable', Dict[str, Any]] = None)\
+            -> TransferStep:
+        return TransferStep(method, args, self._filter_kwargs(kwargs))
+
+    @staticmethod
+    def _check_volume(volume, total_xfers):
+        if isinstance(volume, (float, int, tuple)):
+            return volume
+        if not isinstance(volume, List):
+            raise TypeError("Volume expected as a number or List or"
+                            " tuple but got {}".format(volume))
+        elif not len(volume) == total_xfers:
+            raise RuntimeError("List of volumes should be equal to number "
+                               "of transfers")
+        return volume
+
+    def _iter_volumes(self) -> Iterator[float]:
+        """ Lazily generate the volume of each transfer """
+        if isinstance(self._volume, (float, int)):
+            return itertools.repeat(self._volume, self._total_xfers)
+        elif isinstance(self._volume, tuple):
             return self._create_volume_gradient(
-                volume[0], volume[-1], total_xfers,
+                self._volume[0], self._volume[-1], self._total_xfers,
                 self._strategy.gradient_function)
-        else:
-            if not isinstance(volume, List):
-                raise TypeError("Volume expected as a number or List or"
-                                " tuple but got {}".format(volume))
-            elif not len(volume) == total_xfers:
-                raise RuntimeError("List of volumes should be equal to number "
-                                   "of transfers")
-            return volume
-
-    def _create_volume_gradient(self, min_v, max_v, total, gradient=None):
+        return iter(self._volume)
 
+    @staticmethod
+    def _create_volume_gradient(min_v, max_v, total, gradient=None)\
+            -> Iterator[float]:
         diff_vol = max_v - min_v
-
-        def _map_volume(i):
-            nonlocal diff_vol, total
+        for i in range(total):
             rel_x = i / (total - 1)
             rel_y = gradient(rel_x) if gradient else rel_x
-            return (rel_y * diff_vol) + min_v
-
-        return [_map_volume(i) for i in range(total)]
+            yield (rel_y * diff_vol) + min_v
 
     def _check_valid_well_list(self, well_list, id, old_well_list):
         if self._api_version >= APIVersion(2, 2) and len(well_list) < 1:
@@ -0,0 +1,140 @@
+""" Heuristics for ordering liquid handling steps to reduce gantry travel.
+
+Each step is modelled as a pair of XY points: the point the pipette has to
+go to first (e.g. a source well) and the point it is left at afterwards (e.g.
+a destination well). For distribute targets both points are the same well.
+"""
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+from opentrons import types
+
+# Above this many steps, skip 2-opt refinement, which needs an NxN distance
+# matrix, and rely on the nearest-neighbor tour alone
+TWO_OPT_MAX_STEPS = 1000
+TWO_OPT_MAX_PASSES = 10
+
+
+class TravelOrder(NamedTuple):
+    """ The result of :py:func:`plan_travel_order`. """
+    order: List[int]
+    original_travel: float
+    planned_travel: float
+
+    @property
+    def travel_saved(self) -> float:
+        """ Estimated XY gantry travel saved by the new order, in mm. """
+        return self.original_travel - self.planned_travel
+
+
+def plan_travel_order(
+        steps: Sequence[Tuple[types.Point, types.Point]],
+        start: Optional[types.Point] = None) -> TravelOrder:
+    """ Order steps to minimize the XY travel between them.
+
+    Builds a nearest-neighbor tour and refines it with 2-opt. Travel within
+    a step (from its first point to its last) is fixed and is not counted.
+
+    :param steps: ``(enter, exit)`` points of each step.
+    :param start: Where the pipette is before the first step. If ``None``,
+                  the first step is kept first.
+    :returns: The step indices in their new order, with the travel of the
+              original and the new order.
+    """
+    count = len(steps)
+    identity = list(range(count))
+    if count < 2:
+        return TravelOrder(identity, 0.0, 0.0)
+
+    enter = np.array([(p.x, p.y) for p, _ in steps], dtype=float)
+    leave = np.array([(p.x, p.y) for _, p in steps], dtype=float)
+    origin = None if start is None else np.array([start.x, start.y])
+
+    order = _nearest_neighbor(enter, leave, origin)
+    if count <= TWO_OPT_MAX_STEPS:
+        order = _two_opt(order, enter, leave, origin)
+
+    original = _travel(identity, enter, leave, origin)
+    planned = _travel(order, enter, leave, origin)
+    if planned >= original:
+        return TravelOrder(identity, original, original)
+    return TravelOrder(order, original, planned)
+
+
+def _travel(order: Sequence[int], enter: np.ndarray, leave: np.ndarray,
+            origin: Optional[np.ndarray]) -> float:
+    idx = np.asarray(order)
+    hops = np.linalg.norm(enter[idx[1:]] - leave[idx[:-1]], axis=1).sum()
+    if origin is not None:
+        hops += np.linalg.norm(enter[idx[0]] - origin)
+    return float(hops)
+
+
+def _nearest_neighbor(enter: np.ndarray, leave: np.ndarray,
+                      origin: Optional[np.ndarray]) -> List[int]:
+    count = len(enter)
+    visited = np.zeros(count, dtype=bool)
+    if origin is None:
+        order = [0]
+        visited[0] = True
+        position = leave[0]
+    else:
+        order = []
+        position = origin
+    while len(order) < count:
+        distances = np.linalg.norm(enter - position, axis=1)
+        distances[visited] = np.inf
+        nearest = int(np.argmin(distances))
+        order.append(nearest)
+        visited[nearest] = True
+        position = leave[nearest]
+    return order
+
+
+def _two_opt(order: List[int], enter: np.ndarray, leave: np.ndarray,
+             origin: Optional[np.ndarray]) -> List[int]:
+    """ Refine an open tour by reversing segments while that shortens it.
+
+    Steps may be asymmetric (entered and left at different points), so the
+    cost of the hops inside a reversed segment is recomputed from prefix
+    sums of forward and backward hop costs.
+    """
+    # hop[i, j] is the distance from leaving step i to entering step j
+    hop = np.linalg.norm(leave[:, np.newaxis, :] - enter[np.newaxis, :, :],
+                         axis=2)
+    first_hop = (np.zeros(len(enter)) if origin is None
+                 else np.linalg.norm(enter - origin, axis=1))
+    # with no start position the first step is pinned in place
+    lowest_i = 1 if origin is None else 0
+    path = np.array(order)
+    count = len(path)
+
+    for _ in range(TWO_OPT_MAX_PASSES):
+        improved = False
+        for i in range(lowest_i, count - 1):
+            forward = np.concatenate(
+                ([0.0], np.cumsum(hop[path[:-1], path[1:]])))
+            backward = np.concatenate(
+                ([0.0], np.cumsum(hop[path[1:], path[:-1]])))
+            js = np.arange(i + 1, count)
+            if i == 0:
+                old_in = first_hop[path[i]]
+                new_in = first_hop[path[js]]
+            else:
+                old_in = hop[path[i - 1], path[i]]
+                new_in = hop[path[i - 1], path[js]]
+            has_next = js < count - 1
+            nexts = path[np.minimum(js + 1, count - 1)]
+            old_out = np.where(has_next, hop[path[js], nexts], 0.0)
+            new_out = np.where(has_next, hop[path[i], nexts], 0.0)
+            delta = (new_in + new_out + backward[js] - backward[i]) \
+                - (old_in + old_out + forward[js] - forward[i])
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                j = int(js[best])
+                path[i:j + 1] = path[i:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return [int(step) for step in path]
@@ -0,0 +1,220 @@
+""" Estimating how long a protocol takes to run on a robot.
+
+The estimator listens to the commands a protocol publishes while it is
+simulated. Time spent moving comes from the hardware simulator, which models
+each move with the motor controller's speeds and accelerations; time spent
+waiting (delays, module temperature changes and holds) is modelled here from
+the command payloads.
+"""
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from opentrons.broker import Broker
+from opentrons.commands import types as command_types
+
+MODULE_LOG = logging.getLogger(__name__)
+
+#: Temperature everything is assumed to start at, in °C
+AMBIENT_TEMPERATURE = 25.0
+
+# Approximate ramp rates, in °C/s. Modules cool more slowly than they heat.
+TEMPDECK_HEATING_RATE = 0.1
+TEMPDECK_COOLING_RATE = 0.05
+THERMOCYCLER_BLOCK_HEATING_RATE = 4.0
+THERMOCYCLER_BLOCK_COOLING_RATE = 2.0
+THERMOCYCLER_LID_HEATING_RATE = 0.4
+THERMOCYCLER_LID_COOLING_RATE = 0.2
+
+#: Seconds the thermocycler takes to open or close its lid
+THERMOCYCLER_LID_MOVE_TIME = 20.0
+#: Seconds the magnetic module takes to raise or lower its magnets
+MAGDECK_MOVE_TIME = 2.0
+
+
+class CommandDuration(NamedTuple):
+    """ How long a single command is estimated to take. """
+    name: str
+    text: str
+    level: int
+    duration: float
+
+
+CommandDuration.name.__doc__ = 'The command name, e.g. command.ASPIRATE'
+CommandDuration.text.__doc__ = 'The formatted command text'
+CommandDuration.level.__doc__ = 'How deeply the command is nested'
+CommandDuration.duration.__doc__ =\
+    'Estimated seconds, including any nested commands'
+
+
+def ramp_time(start: float, target: float,
+              heating_rate: float, cooling_rate: float) -> float:
+    """ Seconds to change temperature from start to target, in °C """
+    if target > start:
+        return (target - start) / heating_rate
+    return (start - target) / cooling_rate
+
+
+class DurationEstimator:
+    """ Estimate run time from the commands published to a broker.
+
+    Build this before running a protocol in simulation; afterwards,
+    :py:attr:`durations` holds an estimate for every command, in the order
+    the commands started, and :py:attr:`total_duration` the estimate for
+    the whole run.
+
+    If built with a callback, estimates are not kept; instead each one is
+    passed to the callback as soon as its command ends, along with the
+    index of the command in the order the commands started.
+
+    Temperature module and thermocycler commands are assumed to wait until
+    the target is reached, and since command payloads do not say which
+    module they are for, a single module of each type is modelled.
+    """
+
+    def __init__(self,
+                 broker: Broker,
+                 motion_clock: Callable[[], float],
+                 callback: Callable[[int, CommandDuration], None] = None
+                 ) -> None:
+        """ Build the estimator.
+
+        :param broker: The broker the protocol publishes its commands to
+        :param motion_clock: Returns the seconds of motion simulated so far,
+                             e.g. ``hardware.simulated_time``
+        :param callback: If specified, pass each estimate to this when its
+                         command ends instead of keeping it in
+                         :py:attr:`durations`
+        """
+        self._motion_clock = motion_clock
+        self._motion_start = motion_clock()
+        self._waiting = 0.0
+        self._temperatures: Dict[str, float] = {}
+        self._durations: List[CommandDuration] = []
+        self._callback = callback
+        self._started_count = 0
+        # the index, estimate and start time of each command still running
+        self._open: List[Tuple[int, CommandDuration, float]] = []
+        self._unsub: Optional[Callable[[], None]] = broker.subscribe(
+            command_types.COMMAND, self._command_callback)
+
+    @property
+    def clock(self) -> float:
+        """ Estimated seconds elapsed since the estimator was built """
+        return self._motion_clock() - self._motion_start + self._waiting
+
+    @property
+    def total_duration(self) -> float:
+        """ Estimated seconds for everything run so far """
+        return self.clock
+
+    @property
+    def durations(self) -> List[CommandDuration]:
+        """ The estimate for each command, in the order they started """
+        return self._durations
+
+    def unsubscribe(self) -> None:
+        """ Stop listening to the broker """
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+
+    def _command_callback(self, message: command_types.CommandMessage):
+        payload = message['payload']
+        if message['$'] == 'before':
+            estimate = CommandDuration(
+                name=message['name'],
+                text=payload.get('text', ''),
+                level=len(self._open),
+                duration=0.0)
+            self._open.append((self._started_count, estimate, self.clock))
+            self._started_count += 1
+            if not self._callback:
+                self._durations.append(estimate)
+            # waits are accounted before the command body runs so that
+            # anyone reading the clock when the command ends sees them
+            self._waiting += self._wait_time(message['name'], payload)
+        elif self._open:
+            index, estimate, started = self._open.pop()
+            estimate = estimate._replace(duration=self.clock - started)
+            if self._callback:
+                self._callback(index, estimate)
+            else:
+                self._durations[index] = estimate
+
+    def _wait_time(self, name: str, payload) -> float:
+        handler = self._WAIT_HANDLERS.get(name)
+        return handler(self, payload) if handler else 0.0
+
+    def _delay(self, payload) -> float:
+        return payload['minutes'] * 60 + payload['seconds']
+
+    def _tempdeck_set(self, payload) -> float:
+        return self._ramp('tempdeck', payload['celsius'],
+                          TEMPDECK_HEATING_RATE, TEMPDECK_COOLING_RATE)
+
+    def _tempdeck_deactivate(self, payload) -> float:
+        self._temperatures['tempdeck'] = AMBIENT_TEMPERATURE
+        return 0.0
+
+    def _tc_set_block(self, payload) -> float:
+        return self._block_step(payload['temperature'],
+                                payload.get('hold_time') or 0)
+
+    def _tc_profile(self, payload) -> float:
+        return sum(
+            self._block_step(
+                step['temperature'],
+                (step.get('hold_time_seconds') or 0)
+                + (step.get('hold_time_minutes') or 0) * 60)
+            for _ in range(payload.get('repetitions', 1))
+            for step in payload['steps'])
+
+    def _tc_set_lid(self, payload) -> float:
+        return self._ramp('lid', payload['temperature'],
+                          THERMOCYCLER_LID_HEATING_RATE,
+                          THERMOCYCLER_LID_COOLING_RATE)
+
+    def _tc_deactivate_block(self, payload) -> float:
+        self._temperatures['block'] = AMBIENT_TEMPERATURE
+        return 0.0
+
+    def _tc_deactivate_lid(self, payload) -> float:
+        self._temperatures['lid'] = AMBIENT_TEMPERATURE
+        return 0.0
+
+    def _tc_deactivate(self, payload) -> float:
+        self._tc_deactivate_block(payload)
+        return self._tc_deactivate_lid(payload)
+
+    def _tc_lid_move(self, payload) -> float:
+        return THERMOCYCLER_LID_MOVE_TIME
+
+    def _magdeck_move(self, payload) -> float:
+        return MAGDECK_MOVE_TIME
+
+    _WAIT_HANDLERS: Dict[str, Callable[['DurationEstimator', Any], float]] = {
+        command_types.DELAY: _delay,
+        command_types.TEMPDECK_SET_TEMP: _tempdeck_set,
+        command_types.TEMPDECK_DEACTIVATE: _tempdeck_deactivate,
+        command_types.THERMOCYCLER_SET_BLOCK_TEMP: _tc_set_block,
+        command_types.THERMOCYCLER_EXECUTE_PROFILE: _tc_profile,
+        command_types.THERMOCYCLER_SET_LID_TEMP: _tc_set_lid,
+        command_types.THERMOCYCLER_DEACTIVATE_BLOCK: _tc_deactivate_block,
+        command_types.THERMOCYCLER_DEACTIVATE_LID: _tc_deactivate_lid,
+        command_types.THERMOCYCLER_DEACTIVATE: _tc_deactivate,
+        command_types.THERMOCYCLER_OPEN: _tc_lid_move,
+        command_types.THERMOCYCLER_CLOSE: _tc_lid_move,
+        command_types.MAGDECK_ENGAGE: _magdeck_move,
+        command_types.MAGDECK_DISENGAGE: _magdeck_move,
+    }
+
+    def _ramp(self, module: str, target: float,
+              heating_rate: float, cooling_rate: float) -> float:
+        start = self._temperatures.get(module, AMBIENT_TEMPERATURE)
+        self._temperatures[module] = target
+        return ramp_time(start, target, heating_rate, cooling_rate)
+
+    def _block_step(self, target: float, hold_time: float) -> float:
+        return hold_time + self._ramp(
+            'block', target,
+            THERMOCYCLER_BLOCK_HEATING_RATE, THERMOCYCLER_BLOCK_COOLING_RATE)
@@ -1,5 +1,6 @@
+import functools
 import logging
-from typing import Dict, TYPE_CHECKING
+from typing import Callable, Dict, List, TYPE_CHECKING
 
 from opentrons.protocol_api.contexts import ProtocolContext, InstrumentContext
 from opentrons.protocol_api import labware
@@ -220,34 +221,59 @@ dispatcher_map: 'PipetteDispatch' = {
 }
 
 
+def compile_json(context: ProtocolContext,
+                 protocol_data: 'JsonProtocolV3',
+                 instruments: Dict[str, InstrumentContext],
+                 loaded_labware: Dict[str, labware.Labware]
+                 ) -> List[Callable[[], None]]:
+    """ Turn the commands of a JSON protocol into calls ready to run.
+
+    Each command's handler is looked up here, so a protocol with an
+    unsupported command fails before anything moves.
+    """
+    return [_compile_command(context, command_item['command'],
+                             command_item['params'], instruments,
+                             loaded_labware)
+            for command_item in protocol_data['commands']]
+
+
+_PIPETTE_COMMANDS = {
+    JsonPipetteCommand.blowout.value,
+    JsonPipetteCommand.pickUpTip.value,
+    JsonPipetteCommand.dropTip.value,
+    JsonPipetteCommand.aspirate.value,
+    JsonPipetteCommand.dispense.value,
+    JsonPipetteCommand.touchTip.value,
+}
+
+
+def _compile_command(context: ProtocolContext,
+                     command_type: str,
+                     params,
+                     instruments: Dict[str, InstrumentContext],
+                     loaded_labware: Dict[str, labware.Labware]
+                     ) -> Callable[[], None]:
+    # different `_command` helpers take different args
+    if command_type in _PIPETTE_COMMANDS:
+        return functools.partial(
+            dispatcher_map[command_type],  # type: ignore
+            instruments, loaded_labware, params)
+    elif command_type == JsonRobotCommand.delay.value:
+        return functools.partial(
+            dispatcher_map[command_type], context, params)  # type: ignore
+    elif command_type == JsonPipetteCommand.moveToSlot.value:
+        return functools.partial(
+            dispatcher_map[command_type],  # type: ignore
+            context, instruments, params)
+    else:
+        raise RuntimeError(
+            "Unsupported command type {}".format(command_type))
+
+
 def dispatch_json(context: ProtocolContext,
                   protocol_data: 'JsonProtocolV3',
                   instruments: Dict[str, InstrumentContext],
                   loaded_labware: Dict[str, labware.Labware]) -> None:
-    commands = protocol_data['commands']
-
-    pipette_commands = {
-        JsonPipetteCommand.blowout.value,
-        JsonPipetteCommand.pickUpTip.value,
-        JsonPipetteCommand.dropTip.value,
-        JsonPipetteCommand.aspirate.value,
-        JsonPipetteCommand.dispense.value,
-        JsonPipetteCommand.touchTip.value,
-    }
-
-    for command_item in commands:
-        command_type = command_item['command']
-        params = command_item['params']
-
-        # different `_command` helpers take different args
-        if command_type in pipette_commands:
-            dispatcher_map[command_type](  # type: ignore
-                instruments, loaded_labware, params)  # type: ignore
-        elif command_type == JsonRobotCommand.delay.value:
-            dispatcher_map[command_type](context, params)  # type: ignore
-        elif command_type == JsonPipetteCommand.moveToSlot.value:
-            dispatcher_map[command_type](
-                context, instruments, params)  # type: ignore
-        else:
-            raise RuntimeError(
-                "Unsupported command type {}".format(command_type))
+    for command in compile_json(
+            context, protocol_data, instruments, loaded_labware):
+        command()
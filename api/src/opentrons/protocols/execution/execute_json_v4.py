@@ -1,5 +1,7 @@
+import functools
 import logging
-from typing import Dict, List, TYPE_CHECKING, Union
+from typing import (
+    Any, Callable, Dict, List, Tuple, TYPE_CHECKING, Union)
 from opentrons.protocol_api.contexts import ProtocolContext, \
     MagneticModuleContext, TemperatureModuleContext, ModuleContext, \
     ThermocyclerContext
@@ -16,9 +18,7 @@ if TYPE_CHECKING:
         MagneticModuleEngageParams,
         ModuleIDParams, TemperatureParams,
         ThermocyclerSetTargetBlockParams,
-        ThermocyclerRunProfileParams, Command,
-        TemperatureModuleCommandId, MagneticModuleCommandId,
-        ThermocyclerCommandId
+        ThermocyclerRunProfileParams, Command
     )
     from opentrons.protocols.execution.dev_types import (
         PipetteDispatch, JsonV4MagneticModuleDispatch,
@@ -223,7 +223,7 @@ def assert_tc_commands_do_not_use_unimplemented_params(
                     "the robot server").format(command_type, k))
 
 
-def dispatch_json(
+def compile_json(
         context: ProtocolContext,
         protocol_data: Union['JsonProtocolV4', 'JsonProtocolV5'],
         instruments: Instruments,
@@ -233,98 +233,81 @@ def dispatch_json(
         magnetic_module_command_map: 'JsonV4MagneticModuleDispatch',
         temperature_module_command_map: 'JsonV4TemperatureModuleDispatch',
         thermocycler_module_command_map: 'JsonV4ThermocyclerDispatch'
-) -> None:
+) -> List[Callable[[], None]]:
+    """ Turn the commands of a JSON protocol into calls ready to run.
+
+    The protocol-wide checks, the lookup of each command's handler and
+    module, and the module type checks all happen here, so a protocol with
+    an unsupported command fails before anything moves and running the
+    commands is only a matter of calling each in turn.
+    """
     commands = protocol_data['commands']
 
     assert_no_async_tc_behavior(commands)
     assert_tc_commands_do_not_use_unimplemented_params(commands)
 
-    for command_item in commands:
-        command_type = command_item['command']
-        params = command_item['params']
-        # because of https://github.com/python/mypy/issues/8940
-        # we can't narrow down types using in sadly
-        if command_type in pipette_command_map:
-            pipette_command_map[command_type](  # type: ignore
-                instruments, loaded_labware, params)
-        elif command_type in magnetic_module_command_map:
-            handleMagnetCommand(
-                params,  # type: ignore
-                modules,
-                command_type,  # type: ignore
-                magnetic_module_command_map
-            )
-        elif command_type in temperature_module_command_map:
-            handleTemperatureCommand(params,  # type: ignore
-                                     modules,
-                                     command_type,  # type: ignore
-                                     temperature_module_command_map)
-        elif command_type in thermocycler_module_command_map:
-            handleThermocyclerCommand(params,  # type: ignore
-                                      modules,  # type: ignore
-                                      command_type,  # type: ignore
-                                      thermocycler_module_command_map)
-        elif command_item['command'] == JsonRobotCommand.delay.value:
-            _delay(context, params)  # type: ignore
-        elif command_type == JsonPipetteCommand.moveToSlot.value:
-            _move_to_slot(context, instruments, params)  # type: ignore
-        else:
-            raise RuntimeError(
-                "Unsupported command type {}".format(command_type))
-
-
-def handleTemperatureCommand(
-        params: Union['TemperatureParams', 'ModuleIDParams'],
+    module_command_maps: List[Tuple[Any, type, str]] = [
+        (magnetic_module_command_map, MagneticModuleContext,
+         'Magnetic Module does not match MagneticModuleContext interface'),
+        (temperature_module_command_map, TemperatureModuleContext,
+         'Temperature Module does not match ' +
+         'TemperatureModuleContext interface'),
+        (thermocycler_module_command_map, ThermocyclerContext,
+         'Thermocycler Module does not match ThermocyclerContext interface'),
+    ]
+    return [_compile_command(context, command_item, instruments,
+                             loaded_labware, modules, pipette_command_map,
+                             module_command_maps)
+            for command_item in commands]
+
+
+def _compile_command(
+        context: ProtocolContext,
+        command_item: 'Command',
+        instruments: Instruments,
+        loaded_labware: LoadedLabware,
         modules: Dict[str, ModuleContext],
-        command_type: 'TemperatureModuleCommandId',
-        temperature_module_command_map
-) -> None:
-    module_id = params['module']
-    module = modules[module_id]
-    if isinstance(module, TemperatureModuleContext):
-        temperature_module_command_map[command_type](
-            module, params
-        )
-    else:
-        raise RuntimeError(
-            "Temperature Module does not match " +
-            "TemperatureModuleContext interface"
-        )
-
-
-def handleThermocyclerCommand(
-        params: Union['ModuleIDParams', 'TemperatureParams',
-                      'ThermocyclerRunProfileParams',
-                      'ThermocyclerSetTargetBlockParams'],
-        modules: Dict[str, ThermocyclerContext],
-        command_type: 'ThermocyclerCommandId',
-        thermocycler_module_command_map
-) -> None:
-    module_id = params['module']
-    module = modules[module_id]
-    if isinstance(module, ThermocyclerContext):
-        thermocycler_module_command_map[command_type](
-            module, params
-        )
-    else:
-        raise RuntimeError(
-            "Thermocycler Module does not match ThermocyclerContext interface"
-        )
+        pipette_command_map: 'PipetteDispatch',
+        module_command_maps: List[Tuple[Any, type, str]]
+) -> Callable[[], None]:
+    command_type = command_item['command']
+    params = command_item['params']
+    # because of https://github.com/python/mypy/issues/8940
+    # we can't narrow down types using in sadly
+    if command_type in pipette_command_map:
+        return functools.partial(
+            pipette_command_map[command_type],  # type: ignore
+            instruments, loaded_labware, params)
+    for command_map, module_type, mismatch in module_command_maps:
+        if command_type in command_map:
+            module = modules[params['module']]  # type: ignore
+            if not isinstance(module, module_type):
+                raise RuntimeError(mismatch)
+            return functools.partial(
+                command_map[command_type], module, params)
+    if command_type == JsonRobotCommand.delay.value:
+        return functools.partial(_delay, context, params)  # type: ignore
+    if command_type == JsonPipetteCommand.moveToSlot.value:
+        return functools.partial(
+            _move_to_slot, context, instruments, params)  # type: ignore
+    raise RuntimeError(
+        "Unsupported command type {}".format(command_type))
 
 
-def handleMagnetCommand(
-        params: Union['ModuleIDParams', 'MagneticModuleEngageParams'],
+def dispatch_json(
+        context: ProtocolContext,
+        protocol_data: Union['JsonProtocolV4', 'JsonProtocolV5'],
+        instruments: Instruments,
+        loaded_labware: LoadedLabware,
         modules: Dict[str, ModuleContext],
-        command_type: 'MagneticModuleCommandId',
-        magnetic_module_command_map
+        pipette_command_map: 'PipetteDispatch',
+        magnetic_module_command_map: 'JsonV4MagneticModuleDispatch',
+        temperature_module_command_map: 'JsonV4TemperatureModuleDispatch',
+        thermocycler_module_command_map: 'JsonV4ThermocyclerDispatch'
 ) -> None:
-    module_id = params['module']
-    module = modules[module_id]
-    if isinstance(module, MagneticModuleContext):
-        magnetic_module_command_map[command_type](
-            module, params
-        )
-    else:
-        raise RuntimeError(
-            "Magnetic Module does not match MagneticModuleContext interface"
-        )
+    for command in compile_json(
+            context, protocol_data, instruments, loaded_labware, modules,
+            pipette_command_map, magnetic_module_command_map,
+            temperature_module_command_map,
+            thermocycler_module_command_map):
+        command()
@@ -1,7 +1,8 @@
+import functools
 import logging
 from collections import UserDict
 from dataclasses import dataclass
-from typing import Optional, List, Dict, TYPE_CHECKING
+from typing import Any, Optional, List, Dict, Tuple, TYPE_CHECKING
 
 from opentrons import types
 from opentrons.protocol_api.labware import load as load_lw, Labware
@@ -14,7 +15,7 @@ from opentrons_shared_data.deck import load as load_deck
 
 if TYPE_CHECKING:
     from opentrons_shared_data.deck.dev_types import (
-        SlotDefV2,
+        DeckDefinitionV2, SlotDefV2,
     )
 
 MODULE_LOG = logging.getLogger(__name__)
@@ -37,6 +38,12 @@ class CalibrationPosition:
     displayName: str
 
 
+@functools.lru_cache(maxsize=None)
+def _load_definition(load_name: str) -> 'DeckDefinitionV2':
+    # every deck of a kind shares one definition, which is only ever read
+    return load_deck(load_name, 2)
+
+
 class Deck(UserDict):
     def __init__(self, load_name=STANDARD_DECK):
         super().__init__()
@@ -49,9 +56,20 @@ class Deck(UserDict):
                                                 0)
                            for idx in range(12)}
         self._highest_z = 0.0
-        self._definition = load_deck(load_name, 2)
+        # the generation is bumped on every change to the deck layout, and
+        # facts derived from the layout are memoized against it
+        self._generation = 0
+        self._memo: Dict[str, Any] = {}
+        self._slot_parents: Dict[int, Tuple[object, Optional[str]]] = {}
+        self._slot_centers: Dict[str, types.Point] = {}
+        self._definition = _load_definition(load_name)
         self._load_fixtures()
 
+    def _bump_generation(self) -> None:
+        self._generation += 1
+        self._memo = {}
+        self._slot_parents = {}
+
     def _load_fixtures(self):
         for f in self._definition['locations']['fixtures']:
             slot_name = self._check_name(f['slot'])  # type: ignore
@@ -88,6 +106,7 @@ class Deck(UserDict):
         checked_key = self._check_name(key)
         old = self.data[checked_key]
         self.data[checked_key] = None
+        self._bump_generation()
         if old:
             self.recalculate_high_z()
 
@@ -115,6 +134,7 @@ class Deck(UserDict):
                              f'{", ".join(flattened_overlappers)}')
         self.data[slot_key_int] = val
         self._highest_z = max(val.highest_z, self._highest_z)
+        self._bump_generation()
 
     def __contains__(self, key: object) -> bool:
         try:
@@ -130,7 +150,7 @@ class Deck(UserDict):
         depending on the mount you are using and the column you are moving
         to inside of the labware.
         """
-        slot = LabwareLike(target).first_parent()
+        slot = self.resolve_slot(LabwareLike(target))
         if not slot:
             return False
         if mount is types.Mount.RIGHT:
@@ -167,6 +187,24 @@ class Deck(UserDict):
         self._highest_z = 0.0
         for item in [lw for lw in self.data.values() if lw]:
             self._highest_z = max(item.highest_z, self._highest_z)
+        self._bump_generation()
+
+    def resolve_slot(self, labware: LabwareLike) -> Optional[str]:
+        """ Return the slot a labware-like object is ultimately in.
+
+        This is :py:meth:`.LabwareLike.first_parent`, memoized for the
+        current deck generation.
+        """
+        obj = labware.object
+        key = id(obj)
+        cached = self._slot_parents.get(key)
+        # the cached object is kept alive with its result, so its id can't
+        # be reused by another object while the entry exists
+        if cached is not None and cached[0] is obj:
+            return cached[1]
+        slot = labware.first_parent()
+        self._slot_parents[key] = (obj, slot)
+        return slot
 
     def get_slot_definition(self, slot_name) -> 'SlotDefV2':
         slots = self._definition['locations']['orderedSlots']
@@ -179,11 +217,17 @@ class Deck(UserDict):
         return slot_def
 
     def get_slot_center(self, slot_name) -> types.Point:
-        defn = self.get_slot_definition(slot_name)
-        return types.Point(
-            defn['position'][0] + defn['boundingBox']['xDimension']/2,
-            defn['position'][1] + defn['boundingBox']['yDimension']/2,
-            defn['position'][2] + defn['boundingBox']['zDimension']/2)
+        # slot centers come straight from the deck definition, so they
+        # never need to be invalidated
+        center = self._slot_centers.get(slot_name)
+        if center is None:
+            defn = self.get_slot_definition(slot_name)
+            center = types.Point(
+                defn['position'][0] + defn['boundingBox']['xDimension']/2,
+                defn['position'][1] + defn['boundingBox']['yDimension']/2,
+                defn['position'][2] + defn['boundingBox']['zDimension']/2)
+            self._slot_centers[slot_name] = center
+        return center
 
     def resolve_module_location(
             self, module_type: ModuleType,
@@ -221,6 +265,33 @@ class Deck(UserDict):
         """ Return the tallest known point on the deck. """
         return self._highest_z
 
+    @property
+    def generation(self) -> int:
+        """ Return a counter that changes whenever the deck layout does.
+
+        Anything derived from the deck's contents can be cached for as long
+        as this value stays the same.
+        """
+        return self._generation
+
+    @property
+    def slot_heights(self) -> Dict[int, float]:
+        """ Return the highest z of the item in each occupied slot. """
+        if 'slot_heights' not in self._memo:
+            self._memo['slot_heights'] = {
+                slot: item.highest_z
+                for slot, item in self.data.items() if item}
+        return self._memo['slot_heights']
+
+    @property
+    def thermocycler_present(self) -> bool:
+        """ Return whether a thermocycler is loaded on the deck. """
+        if 'thermocycler_present' not in self._memo:
+            self._memo['thermocycler_present'] = any(
+                isinstance(item, ThermocyclerGeometry)
+                for item in self.data.values())
+        return self._memo['thermocycler_present']
+
     @property
     def slots(self) -> List['SlotDefV2']:
         """ Return the definition of the loaded robot deck. """
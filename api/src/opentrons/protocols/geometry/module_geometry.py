@@ -15,10 +15,10 @@ from typing import (Mapping, Optional,
                     Type, TypeVar, Union, TYPE_CHECKING)
 
 import numpy as np  # type: ignore
-import jsonschema  # type: ignore
 from opentrons.protocols.implementations.labware import LabwareImplementation
 
 from opentrons_shared_data import module
+from opentrons.protocols import schemas
 from opentrons.types import Location, Point, LocationLabware
 from opentrons.protocols.api_support.types import APIVersion
 from opentrons.protocols.api_support.definitions import (
@@ -497,9 +497,9 @@ def load_module_from_definition(
         v1def: 'ModuleDefinitionV1' = definition  # type: ignore
         return _load_from_v1(v1def, parent, api_level)
     if schema == 'module/schemas/2':
-        schema_doc = module.load_schema('2')
+        import jsonschema  # type: ignore
         try:
-            jsonschema.validate(definition, schema_doc)
+            schemas.validate(definition, schemas.MODULE_SCHEMA_V2)
         except jsonschema.ValidationError:
             log.exception("Failed to validate module def schema")
             raise RuntimeError('The specified module definition is not valid.')
@@ -17,8 +17,7 @@ from opentrons.motion_planning import (
 
 from opentrons.protocols.api_support.labware_like import LabwareLike
 from opentrons.protocols.geometry.deck import Deck
-from opentrons.protocols.geometry.module_geometry import (
-    ThermocyclerGeometry, ModuleGeometry)
+from opentrons.protocols.geometry.module_geometry import ModuleGeometry
 
 
 MODULE_LOG = logging.getLogger(__name__)
@@ -58,9 +57,9 @@ def should_dodge_thermocycler(
 
     Returns True if we need to dodge, False otherwise
     """
-    if any([isinstance(item, ThermocyclerGeometry) for item in deck.values()]):
-        transit = (from_loc.labware.first_parent(),
-                   to_loc.labware.first_parent())
+    if deck.thermocycler_present:
+        transit = (deck.resolve_slot(from_loc.labware),
+                   deck.resolve_slot(to_loc.labware))
         # mypy doesn't like this because transit could be none, but it's
         # checked by value in BAD_PAIRS which has only strings
         return transit in BAD_PAIRS
@@ -170,9 +169,10 @@ def _build_safe_height(from_loc: types.Location,
                >= (deck.highest_z + constraints.minimum_lw_z_margin):
                 to_safety = constraints.instr_max_height
             else:
-                tallest_lw = list(filter(
-                    lambda lw: lw.highest_z == deck.highest_z,
-                    [lw for lw in deck.data.values() if lw]))[0]
+                tallest_slot = next(
+                    slot for slot, height in deck.slot_heights.items()
+                    if height == deck.highest_z)
+                tallest_lw = deck.data[tallest_slot]
                 if isinstance(tallest_lw, ModuleGeometry) and\
                         tallest_lw.labware:
                     tallest_lw = tallest_lw.labware
@@ -0,0 +1,107 @@
+"""
+opentrons.protocols.implementations.simulators.context_factory: reusing
+simulation setup between protocols
+
+Building a simulating protocol context from scratch starts a new hardware
+simulator thread, which is most of the cost of simulating a short protocol.
+A :py:class:`SimulationContextFactory` keeps one simulator warm and resets
+it for each context it builds instead.
+"""
+import contextlib
+import logging
+import os
+import threading
+from typing import Any, Iterator, Optional, Type
+
+from opentrons import API
+from opentrons.hardware_control import ThreadManager
+from opentrons.protocol_api import ProtocolContext
+from opentrons.protocols.implementations.protocol_context import \
+    ProtocolContextImplementation
+from opentrons.protocols.types import Protocol
+
+from .protocol_context import ProtocolContextSimulation
+
+MODULE_LOG = logging.getLogger(__name__)
+
+
+class SimulationContextFactory:
+    """ Builds simulating protocol contexts that share a hardware simulator.
+
+    Before each context is handed out, the shared simulator is reset so that
+    no instruments, tips or queued state carry over from the last protocol.
+    Each context still gets its own deck, so loaded labware and modules
+    never do either.
+
+    Only one context from a factory can use the shared simulator at a time.
+    If :py:meth:`build` is called while another context is still in use, it
+    gives out a context with its own new simulator, as if there were no
+    factory, rather than waiting.
+    """
+
+    def __init__(self) -> None:
+        self._hardware: Optional[ThreadManager] = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def build(
+            self,
+            protocol: Optional[Protocol] = None,
+            implementation: Type[ProtocolContextImplementation]
+            = ProtocolContextSimulation,
+            **kwargs: Any) -> Iterator[ProtocolContext]:
+        """ Build a protocol context, cleaned up when the block exits.
+
+        .. code-block:: python
+
+            factory = SimulationContextFactory()
+            with factory.build(protocol) as context:
+                run_protocol(protocol, context=context)
+
+        :param protocol: If specified, the context is provisioned with the
+                         protocol's api level and bundle contents
+        :param implementation: The protocol context implementation to build
+        :param kwargs: Other arguments to the implementation, except
+                       ``hardware``
+        """
+        shared = self._lock.acquire(blocking=False)
+        try:
+            if shared:
+                kwargs['hardware'] = self._warm_hardware()
+            else:
+                MODULE_LOG.debug(
+                    'Shared simulator busy, building a new one')
+            if protocol is None:
+                context = ProtocolContext(
+                    implementation=implementation(**kwargs))
+            else:
+                context = ProtocolContext.build_using(
+                    implementation=implementation.build_using(
+                        protocol, **kwargs),
+                    protocol=protocol)
+            try:
+                yield context
+            finally:
+                context.cleanup()
+        finally:
+            if shared:
+                self._lock.release()
+
+    def clean_up(self) -> None:
+        """ Stop the shared simulator. It is rebuilt if needed again. """
+        with self._lock:
+            if self._hardware is not None and self._pid == os.getpid():
+                self._hardware.clean_up()
+                self._hardware = None
+
+    def _warm_hardware(self) -> ThreadManager:
+        if self._pid != os.getpid():
+            # a forked child has the simulator but not the thread running it
+            self._hardware = None
+            self._pid = os.getpid()
+        if self._hardware is None:
+            self._hardware = ThreadManager(API.build_hardware_simulator)
+        else:
+            self._hardware.sync.reset()
+        return self._hardware
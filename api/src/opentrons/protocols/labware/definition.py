@@ -8,14 +8,13 @@ from pathlib import Path
 from typing import (
     Any, AnyStr, List, Dict, Union)
 
-import jsonschema  # type: ignore
-
+from opentrons.protocols import schemas
 from opentrons.protocols.api_support.util import ModifiedList
 from opentrons.calibration_storage import helpers, modify
 from opentrons.protocols.implementations.interfaces.labware import \
     LabwareInterface
 from opentrons.types import Point
-from opentrons_shared_data import load_shared_data, get_shared_data_root
+from opentrons_shared_data import get_shared_data_root
 from opentrons.protocols.geometry.deck_item import DeckItem
 from opentrons.protocols.api_support.constants import (
     OPENTRONS_NAMESPACE, CUSTOM_NAMESPACE, STANDARD_DEFS_PATH, USER_DEFS_PATH)
@@ -140,14 +139,11 @@ def verify_definition(contents: Union[
     :raises jsonschema.ValidationError: If the definition is not valid.
     :returns: The parsed definition
     """
-    schema_body = load_shared_data('labware/schemas/2.json').decode('utf-8')
-    labware_schema_v2 = json.loads(schema_body)
-
     if isinstance(contents, dict):
         to_return = contents
     else:
         to_return = json.loads(contents)
-    jsonschema.validate(to_return, labware_schema_v2)
+    schemas.validate(to_return, schemas.LABWARE_SCHEMA_V2)
     # we can type ignore this because if it passes the jsonschema it has
     # the correct structure
     return to_return  # type: ignore
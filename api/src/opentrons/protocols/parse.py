@@ -12,15 +12,15 @@ from io import BytesIO
 from zipfile import ZipFile
 from typing import Any, Dict, Optional, Union, Tuple, TYPE_CHECKING
 
-import jsonschema  # type: ignore
-
 from opentrons.config import feature_flags as ff
-from opentrons_shared_data import load_shared_data, protocol
+from opentrons_shared_data import protocol
 from .api_support.types import APIVersion
 from .types import (Protocol, PythonProtocol, JsonProtocol,
                     Metadata, MalformedProtocolError,
                     ApiDeprecationError)
 from .bundle import extract_bundle
+from . import schemas
+from .parse_cache import CompiledPython, get_parse_cache
 
 if TYPE_CHECKING:
     from opentrons_shared_data.labware.dev_types import LabwareDefinition
@@ -85,6 +85,36 @@ def _parse_json(
     )
 
 
+def _compile_python(
+        protocol_contents: str, ast_filename: str) -> CompiledPython:
+    parsed = ast.parse(protocol_contents,
+                       filename=ast_filename)
+
+    metadata = extract_metadata(parsed)
+    protocol = compile(parsed, filename=ast_filename, mode='exec')
+    version = get_version(metadata, parsed)
+
+    if version >= APIVersion(2, 0):
+        _validate_v2_ast(parsed)
+    else:
+        raise ApiDeprecationError(version)
+    return CompiledPython(protocol, metadata, version)
+
+
+def _compile_python_cached(
+        protocol_contents: str, ast_filename: str) -> CompiledPython:
+    """ Compile and check a python protocol, reusing earlier results """
+    cache = get_parse_cache()
+    if cache is None:
+        return _compile_python(protocol_contents, ast_filename)
+    key = cache.key(protocol_contents, ast_filename)
+    compiled = cache.get(key)
+    if compiled is None:
+        compiled = _compile_python(protocol_contents, ast_filename)
+        cache.put(key, compiled)
+    return compiled
+
+
 def _parse_python(
     protocol_contents: str,
     filename: str = None,
@@ -100,17 +130,8 @@ def _parse_python(
     else:
         ast_filename = filename_checked
 
-    parsed = ast.parse(protocol_contents,
-                       filename=ast_filename)
-
-    metadata = extract_metadata(parsed)
-    protocol = compile(parsed, filename=ast_filename, mode='exec')
-    version = get_version(metadata, parsed)
-
-    if version >= APIVersion(2, 0):
-        _validate_v2_ast(parsed)
-    else:
-        raise ApiDeprecationError(version)
+    protocol, metadata, version = _compile_python_cached(
+        protocol_contents, ast_filename)
 
     result = PythonProtocol(
         text=protocol_contents,
@@ -329,27 +350,33 @@ def _get_schema_for_protocol(version_num: int) -> protocol.Schema:
             f'JSON Protocol version {version_num} is not yet ' +
             'supported in this version of the API')
     try:
-        schema = load_shared_data(
-            f'protocol/schemas/{version_num}.json')
+        schema = schemas.load_schema(
+            schemas.protocol_schema_path(version_num))
     except FileNotFoundError:
         schema = None  # type: ignore
     if not schema:
         raise RuntimeError('JSON Protocol schema "{}" does not exist'
                            .format(version_num))
-    return json.loads(schema.decode('utf-8'))
+    return schema  # type: ignore
+
+
+def _is_labware(contents: Dict[Any, Any]) -> bool:
+    if not schemas.looks_like_labware(contents):
+        return False
+    import jsonschema  # type: ignore
+    try:
+        schemas.validate(contents, schemas.LABWARE_SCHEMA_V2)
+    except jsonschema.ValidationError:
+        return False
+    return True
 
 
 def validate_json(
         protocol_json: Dict[Any, Any]) -> Tuple[int, 'JsonProtocolDef']:
     """ Validates a json protocol and returns its schema version """
+    import jsonschema  # type: ignore
     # Check if this is actually a labware
-    labware_schema_v2 = json.loads(load_shared_data(
-        'labware/schemas/2.json').decode('utf-8'))
-    try:
-        jsonschema.validate(protocol_json, labware_schema_v2)
-    except jsonschema.ValidationError:
-        pass
-    else:
+    if _is_labware(protocol_json):
         MODULE_LOG.error("labware uploaded instead of protocol")
         raise RuntimeError(
             'The file you are trying to open is a JSON labware definition, '
@@ -372,19 +399,12 @@ def validate_json(
             'version. Please update your OT-2 App and robot server to the '
             'latest version and try again.'
         )
-    protocol_schema = _get_schema_for_protocol(version_num)
-
-    # instruct schema how to resolve all $ref's used in protocol schemas
-    resolver = jsonschema.RefResolver(
-        protocol_schema.get('$id', ''),
-        protocol_schema,
-        store={
-            "opentronsLabwareSchemaV2": labware_schema_v2
-        })
+    _get_schema_for_protocol(version_num)
 
     # do the validation
     try:
-        jsonschema.validate(protocol_json, protocol_schema, resolver=resolver)
+        schemas.validate(
+            protocol_json, schemas.protocol_schema_path(version_num))
     except jsonschema.ValidationError:
         MODULE_LOG.exception("JSON protocol validation failed")
         raise RuntimeError(
@@ -0,0 +1,154 @@
+"""
+opentrons.protocols.parse_cache: reusing the work of parsing python protocols
+
+Parsing a python protocol means building its AST, pulling out and checking
+its metadata and compiling it. The result only depends on the protocol text
+and file name, so it is cached by a hash of those. Entries live in a small
+in-memory LRU and can also be stored on disk, like ``__pycache__``, so that
+they survive restarts.
+"""
+import hashlib
+import importlib.util
+import logging
+import marshal
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from types import CodeType
+from typing import Optional, NamedTuple
+
+from .api_support.definitions import MAX_SUPPORTED_VERSION
+from .api_support.types import APIVersion
+from .types import Metadata
+
+MODULE_LOG = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 32
+CACHE_FILE_SUFFIX = '.ot2c'
+
+
+class CompiledPython(NamedTuple):
+    """ The cacheable result of parsing a python protocol. """
+    code: CodeType
+    metadata: Metadata
+    api_level: APIVersion
+
+
+class ParseCache:
+    """ A cache of parsed python protocols, keyed by content hash.
+
+    The memory cache keeps the ``maxsize`` most recently used entries. If
+    ``directory`` is set, entries are also written there as marshalled code
+    objects and read back when they are not in memory. Entries from a
+    different python or API version are never used, since the interpreter
+    magic number and the maximum supported API version are part of the key.
+    """
+
+    def __init__(self,
+                 maxsize: int = DEFAULT_MAXSIZE,
+                 directory: Optional[Path] = None) -> None:
+        self._maxsize = maxsize
+        self._directory = directory
+        self._entries: 'OrderedDict[str, CompiledPython]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Optional[Path]:
+        """ Where entries are stored on disk, if anywhere """
+        return self._directory
+
+    @staticmethod
+    def key(contents: str, filename: str) -> str:
+        """ Build the cache key for a protocol """
+        hasher = hashlib.sha256(importlib.util.MAGIC_NUMBER)
+        for part in (str(MAX_SUPPORTED_VERSION), filename, contents):
+            hasher.update(part.encode('utf-8'))
+            hasher.update(b'\0')
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[CompiledPython]:
+        """ Look up an entry, from memory first and then from disk """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is None:
+                return None
+            self._remember(key, entry)
+        # metadata is a plain dict that callers may modify
+        return entry._replace(metadata=dict(entry.metadata))
+
+    def put(self, key: str, entry: CompiledPython) -> None:
+        """ Add an entry, storing it on disk if there is a directory """
+        self._remember(key, entry._replace(metadata=dict(entry.metadata)))
+        self._store(key, entry)
+
+    def clear(self) -> None:
+        """ Empty the memory cache. Entries on disk are kept. """
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, entry: CompiledPython) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> Optional[Path]:
+        if self._directory is None:
+            return None
+        return self._directory / (key + CACHE_FILE_SUFFIX)
+
+    def _load(self, key: str) -> Optional[CompiledPython]:
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            code, metadata, (major, minor) = marshal.loads(path.read_bytes())
+            return CompiledPython(code, metadata, APIVersion(major, minor))
+        except (OSError, EOFError, ValueError, TypeError):
+            MODULE_LOG.warning(f'Discarding unreadable parse cache {path}')
+            path.unlink()
+            return None
+
+    def _store(self, key: str, entry: CompiledPython) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            data = marshal.dumps((entry.code, entry.metadata,
+                                  (entry.api_level.major,
+                                   entry.api_level.minor)))
+        except ValueError:
+            MODULE_LOG.debug('Protocol metadata cannot be cached on disk')
+            return
+        temp = path.with_name(
+            f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp.write_bytes(data)
+            os.replace(temp, path)
+        except OSError:
+            MODULE_LOG.exception(f'Could not write parse cache {path}')
+
+
+_cache: Optional[ParseCache] = ParseCache()
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """ The cache used when parsing python protocols, if any """
+    return _cache
+
+
+def set_parse_cache(cache: Optional[ParseCache]) -> None:
+    """ Replace the cache used when parsing python protocols.
+
+    Pass a cache with a directory to also cache on disk, or ``None`` to
+    turn caching off.
+    """
+    global _cache
+    _cache = cache
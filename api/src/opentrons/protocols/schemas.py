@@ -0,0 +1,84 @@
+"""
+opentrons.protocols.schemas: validating against shared-data JSON schemas
+
+Each schema is loaded from shared data and checked against its metaschema
+only once per process; after that, validating a document only walks the
+document itself. jsonschema is slow to import and only needed here, so it
+is imported by the functions that use it rather than with this module.
+"""
+import functools
+import json
+from typing import Any, Dict
+
+from opentrons_shared_data import load_shared_data
+
+LABWARE_SCHEMA_V2 = 'labware/schemas/2.json'
+MODULE_SCHEMA_V2 = 'module/schemas/2.json'
+
+
+def protocol_schema_path(version_num: int) -> str:
+    """ The shared-data path of a JSON protocol schema version """
+    return f'protocol/schemas/{version_num}.json'
+
+
+@functools.lru_cache(maxsize=None)
+def load_schema(path: str) -> Dict[str, Any]:
+    """ Load a schema from shared data.
+
+    The same object is returned every time, so it must not be modified.
+
+    :raises FileNotFoundError: If there is no schema at ``path``
+    """
+    return json.loads(load_shared_data(path).decode('utf-8'))
+
+
+@functools.lru_cache(maxsize=None)
+def _validator_class(path: str) -> Any:
+    import jsonschema  # type: ignore
+    schema = load_schema(path)
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls
+
+
+def get_validator(path: str) -> Any:
+    """ Build a validator for a shared-data schema.
+
+    References to the v2 labware schema, which the protocol schemas use,
+    are resolved from memory. The ref resolver tracks scopes while it
+    validates, so each validator gets its own and validators should not be
+    shared between threads.
+    """
+    import jsonschema  # type: ignore
+    schema = load_schema(path)
+    cls = _validator_class(path)
+    resolver = jsonschema.RefResolver(
+        schema.get('$id', ''), schema,
+        store={'opentronsLabwareSchemaV2': load_schema(LABWARE_SCHEMA_V2)})
+    return cls(schema, resolver=resolver)
+
+
+def validate(instance: Any, path: str) -> None:
+    """ Validate a document against a shared-data schema.
+
+    This is a drop-in replacement for :py:func:`jsonschema.validate`.
+
+    :raises jsonschema.ValidationError: With the most relevant error, if the
+                                        document is not valid
+    """
+    import jsonschema  # type: ignore
+    error = jsonschema.exceptions.best_match(
+        get_validator(path).iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+def looks_like_labware(contents: Any) -> bool:
+    """ Cheaply check whether a document might be a v2 labware definition.
+
+    This only checks for the top-level keys the labware schema requires, so a
+    ``True`` result still needs a full validation to be sure. JSON protocols
+    never have all of these keys.
+    """
+    return isinstance(contents, dict) and all(
+        key in contents for key in load_schema(LABWARE_SCHEMA_V2)['required'])
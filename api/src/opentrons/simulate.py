@@ -6,14 +6,19 @@ a protocol from the command line.
 
 import argparse
 import asyncio
+import contextlib
+import functools
+from collections import deque
 
 import sys
+import json
 import logging
 import os
 import pathlib
 import queue
-from typing import (Any, Dict, List, Mapping, TextIO, Tuple, BinaryIO,
-                    Optional, Union, TYPE_CHECKING)
+import threading
+from typing import (Any, Callable, Deque, Dict, Iterator, List, Mapping,
+                    TextIO, Tuple, BinaryIO, Optional, Union, TYPE_CHECKING)
 
 
 import opentrons
@@ -27,9 +32,12 @@ from opentrons.commands import types as command_types
 from opentrons.protocols.api_support.util import HardwareToManage
 from opentrons.protocols.implementations.protocol_context import \
     ProtocolContextImplementation
+from opentrons.protocols.implementations.simulators.context_factory import \
+    SimulationContextFactory
 from opentrons.protocols import parse, bundle
+from opentrons.protocols.duration import CommandDuration, DurationEstimator
 from opentrons.protocols.types import (
-    PythonProtocol, BundleContents)
+    Protocol, PythonProtocol, BundleContents)
 from opentrons.protocols.api_support.types import APIVersion
 from .util.entrypoint_util import labware_from_paths, datafiles_from_paths
 
@@ -61,17 +69,30 @@ class CommandScraper:
     The :py:attr:`commands` property contains the list of commands
     and log messages integrated together. Each element of the list is
     a dict following the pattern in the docs of :py:meth:`simulate`.
+
+    If built with a callback, commands are not kept; instead each one is
+    passed to the callback once the next command starts, or when
+    :py:meth:`flush` is called at the end of the run.
+
+    Once :py:meth:`estimate_durations` is called, each command also gets a
+    ``duration`` when it ends. A streamed command is then held until it
+    has ended, so a nested command is passed on only after the command it
+    is part of; at most the commands of one top-level command are held.
     """
 
     def __init__(self,
                  logger: logging.Logger,
                  level: str,
-                 broker: opentrons.broker.Broker) -> None:
+                 broker: opentrons.broker.Broker,
+                 callback: Callable[[Mapping[str, Any]], None] = None
+                 ) -> None:
         """ Build the scraper.
 
         :param logger: The :py:class:`logging.logger` to scrape
         :param level: The log level to scrape
         :param broker: Which broker to subscribe to
+        :param callback: If specified, stream commands to this instead of
+                         accumulating them in :py:attr:`commands`
         """
         self._logger = logger
         self._broker = broker
@@ -87,6 +108,14 @@ class CommandScraper:
             self._handler = None
         self._depth = 0
         self._commands: List[Mapping[str, Any]] = []
+        self._callback = callback
+        self._latest: Optional[Dict[str, Any]] = None
+        # commands not yet passed to the callback, in the order they started
+        self._pending: Deque[Dict[str, Any]] = deque()
+        # commands awaiting a duration, by their index in start order
+        self._awaiting: Dict[int, Dict[str, Any]] = {}
+        self._estimating = False
+        self._started = 0
         self._unsub = self._broker.subscribe(
             command_types.COMMAND,
             self._command_callback)
@@ -96,6 +125,43 @@ class CommandScraper:
         """ The list of commands. See :py:meth:`simulate` """
         return self._commands
 
+    def flush(self) -> None:
+        """ Pass the commands still held to the callback, if streaming """
+        self._latest = None
+        self._awaiting.clear()
+        self._pass_on()
+
+    def estimate_durations(self, motion_clock: Callable[[], float])\
+            -> DurationEstimator:
+        """ Add a ``duration`` to each command as it ends
+
+        Call this before the protocol runs; unsubscribe the returned
+        estimator when it is done.
+
+        :param motion_clock: Returns the seconds of motion simulated so far,
+                             e.g. ``hardware.simulated_time``
+        """
+        self._estimating = True
+        return DurationEstimator(
+            self._broker, motion_clock, callback=self._add_duration)
+
+    def _add_duration(self, index: int, estimate: CommandDuration) -> None:
+        entry = self._awaiting.pop(index, None)
+        if entry is not None:
+            entry['duration'] = estimate.duration
+            self._pass_on()
+
+    def _pass_on(self) -> None:
+        """ Pass the held commands that are complete to the callback """
+        while self._pending:
+            entry = self._pending[0]
+            if self._latest is not None and (
+                    entry is self._latest
+                    or (self._estimating and 'duration' not in entry)):
+                break
+            self._pending.popleft()
+            self._callback(entry)  # type: ignore
+
     def __del__(self):
         if getattr(self, '_handler', None):
             try:
@@ -109,13 +175,21 @@ class CommandScraper:
         """ The callback subscribed to the broker """
         payload = message['payload']
         if message['$'] == 'before':
-            self._commands.append({'level': self._depth,
-                                   'payload': payload,
-                                   'logs': []})
+            self._latest = {'level': self._depth,
+                            'payload': payload,
+                            'logs': []}
+            if self._estimating:
+                self._awaiting[self._started] = self._latest
+            self._started += 1
+            if self._callback:
+                self._pending.append(self._latest)
+                self._pass_on()
+            else:
+                self._commands.append(self._latest)
             self._depth += 1
         else:
-            while not self._queue.empty():
-                self._commands[-1]['logs'].append(self._queue.get())
+            while not self._queue.empty() and self._latest is not None:
+                self._latest['logs'].append(self._queue.get())
             self._depth = max(self._depth - 1, 0)
 
 
@@ -174,14 +248,20 @@ def get_protocol_api(
         raise TypeError('version must be either a string or an APIVersion')
     else:
         checked_version = version
+    return _build_protocol_context(
+        checked_version, bundled_labware, bundled_data,
+        _default_extra_labware(extra_labware), hardware_simulator)
+
+
+def _default_extra_labware(
+        extra_labware: Optional[Dict[str, 'LabwareDefinition']])\
+        -> Optional[Dict[str, 'LabwareDefinition']]:
     if extra_labware is None\
        and IS_ROBOT\
        and JUPYTER_NOTEBOOK_LABWARE_DIR.is_dir():  # type: ignore
-        extra_labware = labware_from_paths(
+        return labware_from_paths(
             [str(JUPYTER_NOTEBOOK_LABWARE_DIR)])
-    return _build_protocol_context(
-        checked_version, bundled_labware, bundled_data,
-        extra_labware, hardware_simulator)
+    return extra_labware
 
 
 def _build_protocol_context(
@@ -227,14 +307,92 @@ def bundle_from_sim(
                           bundled_python={})
 
 
+def _simulate_v1(
+        protocol: Protocol,
+        scrape: Callable[[opentrons.broker.Broker], CommandScraper]
+) -> CommandScraper:
+    opentrons.robot.disconnect()
+    opentrons.robot.reset()
+    scraper = scrape(opentrons.robot.broker)
+    try:
+        exec(protocol.contents, {})  # type: ignore
+    finally:
+        scraper.flush()
+    return scraper
+
+
+# simulations without a custom hardware simulator share a warm one
+_context_factory = SimulationContextFactory()
+
+
+@contextlib.contextmanager
+def _simulation_context(
+        protocol: Protocol,
+        hardware_simulator: Optional[HardwareToManage]
+) -> Iterator[protocol_api.ProtocolContext]:
+    version = getattr(protocol, 'api_level', MAX_SUPPORTED_VERSION)
+    # we want a None literal rather than empty dict so get_protocol_api
+    # will look for custom labware if this is a robot
+    gpa_extras = getattr(protocol, 'extra_labware', None) or None
+    context_kwargs = {
+        'bundled_labware': getattr(protocol, 'bundled_labware', None),
+        'bundled_data': getattr(protocol, 'bundled_data', None),
+        'extra_labware': _default_extra_labware(gpa_extras)}
+    if hardware_simulator is not None:
+        context = _build_protocol_context(
+            version, hardware_simulator=hardware_simulator,
+            **context_kwargs)
+        try:
+            yield context
+        finally:
+            context.cleanup()
+        return
+    with _context_factory.build(
+            implementation=ProtocolContextImplementation,
+            api_version=version, **context_kwargs) as context:
+        context.home()
+        yield context
+
+
+def _simulate_v2(
+        protocol: Protocol,
+        scrape: Callable[[opentrons.broker.Broker], CommandScraper],
+        hardware_simulator: Optional[HardwareToManage],
+        estimate_duration: bool
+) -> Tuple[CommandScraper, Optional[BundleContents]]:
+    bundle_contents:  Optional[BundleContents] = None
+    with _simulation_context(protocol, hardware_simulator) as context:
+        scraper = scrape(context.broker)
+        estimator: Optional[DurationEstimator] = None
+        if estimate_duration:
+            hardware = context._implementation.get_hardware().hardware
+            estimator = scraper.estimate_durations(
+                lambda: hardware.simulated_time)
+        try:
+            execute.run_protocol(protocol, context)
+            if isinstance(protocol, PythonProtocol)\
+               and protocol.api_level >= APIVersion(2, 0)\
+               and protocol.bundled_labware is None\
+               and allow_bundle():
+                bundle_contents = bundle_from_sim(
+                    protocol, context)
+        finally:
+            if estimator:
+                estimator.unsubscribe()
+            scraper.flush()
+    return scraper, bundle_contents
+
+
 def simulate(protocol_file: TextIO,
              file_name: str = None,
              custom_labware_paths: List[str] = None,
              custom_data_paths: List[str] = None,
              propagate_logs: bool = False,
              hardware_simulator_file_path: str = None,
-             log_level: str = 'warning') -> Tuple[List[Mapping[str, Any]],
-                                                  Optional[BundleContents]]:
+             log_level: str = 'warning',
+             estimate_duration: bool = False,
+             runlog_callback: Callable[[Mapping[str, Any]], None] = None
+             ) -> Tuple[List[Mapping[str, Any]], Optional[BundleContents]]:
     """
     Simulate the protocol itself.
 
@@ -265,6 +423,9 @@ def simulate(protocol_file: TextIO,
                        a payload do ``payload['text'].format(**payload)``.
         - ``logs``: Any log messages that occurred during execution of this
                     command, as a logging.LogRecord
+        - ``duration``: Only if ``estimate_duration`` is set: the estimated
+                        seconds this command would take on a robot,
+                        including any commands nested inside it
 
     :param file-like protocol_file: The protocol file to simulate.
     :param str file_name: The name of the file
@@ -293,6 +454,17 @@ def simulate(protocol_file: TextIO,
     :param log_level: The level of logs to capture in the runlog. Default:
                       ``'warning'``
     :type log_level: 'debug', 'info', 'warning', or 'error'
+    :param estimate_duration: Whether to estimate how long each command would
+                              take on a robot. Ignored for Python Protocol
+                              API v1 protocols. Default: ``False``
+    :param runlog_callback: If specified, each run log element is passed to
+                            this as soon as it is complete instead of being
+                            collected, and the returned run log is empty.
+                            Memory use then does not grow with the length
+                            of the protocol. With ``estimate_duration``,
+                            an element is passed on once its command has
+                            ended, so nested commands follow the command
+                            they are part of.
     :returns: A tuple of a run log for user output, and possibly the required
               data to write to a bundle to bundle this protocol. The bundle is
               only emitted if bundling is allowed (see
@@ -324,42 +496,98 @@ def simulate(protocol_file: TextIO,
                            extra_data=extra_data)
     bundle_contents:  Optional[BundleContents] = None
 
+    scrape = functools.partial(CommandScraper, stack_logger, log_level,
+                               callback=runlog_callback)
     if getattr(protocol, 'api_level', APIVersion(2, 0)) < APIVersion(2, 0):
-        def _simulate_v1():
-            opentrons.robot.disconnect()
-            opentrons.robot.reset()
-            scraper = CommandScraper(stack_logger, log_level,
-                                     opentrons.robot.broker)
-            exec(protocol.contents, {})  # type: ignore
-            return scraper
-
-        scraper = _simulate_v1()
+        scraper = _simulate_v1(protocol, scrape)
     else:
-        # we want a None literal rather than empty dict so get_protocol_api
-        # will look for custom labware if this is a robot
-        gpa_extras = getattr(protocol, 'extra_labware', None) or None
-        context = get_protocol_api(
-            getattr(protocol, 'api_level', MAX_SUPPORTED_VERSION),
-            bundled_labware=getattr(protocol, 'bundled_labware', None),
-            bundled_data=getattr(protocol, 'bundled_data', None),
-            hardware_simulator=hardware_simulator,
-            extra_labware=gpa_extras)
-        broker = context.broker
-        scraper = CommandScraper(stack_logger,
-                                 log_level,
-                                 broker)
+        scraper, bundle_contents = _simulate_v2(
+            protocol, scrape, hardware_simulator, estimate_duration)
+
+    return scraper.commands, bundle_contents
+
+
+class _RunlogQueue:
+    """ Hands run log elements from a simulating thread to a consumer """
+    _DONE = object()
+
+    def __init__(self, maxsize: int) -> None:
+        self._entries: 'queue.Queue[Any]' = queue.Queue(maxsize=maxsize)
+        self._stopped = threading.Event()
+        self.failure: Optional[BaseException] = None
+
+    def put(self, entry: Any) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._entries.put(entry, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise RuntimeError('Simulation stopped by its consumer')
+
+    def finish(self, failure: Optional[BaseException]) -> None:
+        self.failure = failure
         try:
-            execute.run_protocol(protocol, context)
-            if isinstance(protocol, PythonProtocol)\
-               and protocol.api_level >= APIVersion(2, 0)\
-               and protocol.bundled_labware is None\
-               and allow_bundle():
-                bundle_contents = bundle_from_sim(
-                    protocol, context)
+            self.put(self._DONE)
+        except RuntimeError:
+            pass
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def __iter__(self) -> Iterator[Mapping[str, Any]]:
+        while True:
+            entry = self._entries.get()
+            if entry is self._DONE:
+                return
+            yield entry
+
+
+def simulate_iter(protocol_file: TextIO,
+                  file_name: str = None,
+                  max_queued: int = 100,
+                  **kwargs: Any) -> Iterator[Mapping[str, Any]]:
+    """
+    Simulate a protocol, yielding run log elements as they happen.
+
+    This runs :py:func:`simulate` in a background thread with a
+    ``runlog_callback``, so the first elements are available long before
+    the simulation ends and memory use does not grow with the length of
+    the protocol. Any exception from the simulation is raised from the
+    iterator. Closing the iterator early stops the simulation.
+
+    :param protocol_file: The protocol file to simulate
+    :param file_name: The name of the file
+    :param max_queued: How many run log elements may be waiting to be
+                       consumed before the simulation pauses
+    :param kwargs: Other arguments to :py:func:`simulate`, except
+                   ``runlog_callback``
+    """
+    entries = _RunlogQueue(max_queued)
+
+    def _run() -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        failure: Optional[BaseException] = None
+        try:
+            simulate(protocol_file, file_name,
+                     runlog_callback=entries.put, **kwargs)
+        except BaseException as e:
+            failure = e
         finally:
-            context.cleanup()
+            loop.close()
+            entries.finish(failure)
 
-    return scraper.commands, bundle_contents
+    worker = threading.Thread(
+        target=_run, name='opentrons-simulate', daemon=True)
+    worker.start()
+    try:
+        yield from entries
+    finally:
+        entries.stop()
+        worker.join()
+    if entries.failure:
+        raise entries.failure
 
 
 def format_runlog(runlog: List[Mapping[str, Any]]) -> str:
@@ -369,20 +597,59 @@ def format_runlog(runlog: List[Mapping[str, Any]]) -> str:
 
     :param runlog: The output of a call to :py:func:`simulate`
     """
-    to_ret = []
-    for command in runlog:
-        to_ret.append(
-            '\t' * command['level']
-            + command['payload'].get('text', '').format(**command['payload']))
-        if command['logs']:
-            to_ret.append('\t' * command['level'] + 'Logs from this command:')
-            to_ret.extend(
-                ['\t' * command['level']
-                 + f'{l.levelname} ({l.module}): {l.msg}' % l.args
-                 for l in command['logs']])  # noqa(E741)
+    return '\n'.join(format_runlog_entry(command) for command in runlog)
+
+
+def format_runlog_entry(command: Mapping[str, Any]) -> str:
+    """
+    Format one element of a run log into human-readable lines, as
+    :py:func:`format_runlog` does
+
+    :param command: An element of a run log
+    """
+    text = command['payload'].get('text', '').format(**command['payload'])
+    if 'duration' in command:
+        text += f' ({format_duration(command["duration"])})'
+    to_ret = ['\t' * command['level'] + text]
+    if command['logs']:
+        to_ret.append('\t' * command['level'] + 'Logs from this command:')
+        to_ret.extend(
+            ['\t' * command['level']
+             + f'{l.levelname} ({l.module}): {l.msg}' % l.args
+             for l in command['logs']])  # noqa(E741)
     return '\n'.join(to_ret)
 
 
+def format_runlog_entry_json(command: Mapping[str, Any]) -> str:
+    """
+    Format one element of a run log as a single line of JSON, for output
+    as newline-delimited JSON
+
+    The line has the command's ``level``, its formatted ``text``, its
+    ``logs`` as objects with ``level``, ``module`` and ``message`` keys and,
+    if present, its ``duration``.
+
+    :param command: An element of a run log
+    """
+    record: Dict[str, Any] = {
+        'level': command['level'],
+        'text': command['payload'].get('text', '').format(
+            **command['payload']),
+        'logs': [{'level': l.levelname, 'module': l.module,
+                  'message': l.getMessage()}
+                 for l in command['logs']]}  # noqa(E741)
+    if 'duration' in command:
+        record['duration'] = command['duration']
+    return json.dumps(record)
+
+
+def format_duration(seconds: float) -> str:
+    """ Format a number of seconds as h:mm:ss.s """
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f'{hours}:{minutes:02d}:{secs:04.1f}'
+
+
 def _get_bundle_args(
         parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
     parser.add_argument(
@@ -474,20 +741,42 @@ def get_arguments(
         parser = _get_bundle_args(parser)
 
     parser.add_argument(
-        'protocol', metavar='PROTOCOL',
+        'protocol', metavar='PROTOCOL', nargs='?',
         type=argparse.FileType('rb'),
         help='The protocol file to simulate. If you pass \'-\', you can pipe '
         'the protocol via stdin; this could be useful if you want to use this '
-        'utility as part of an automated workflow.')
+        'utility as part of an automated workflow. Required unless --batch '
+        'is specified.')
+    parser.add_argument(
+        '--batch', metavar='DIRECTORY', type=pathlib.Path, default=None,
+        help='Simulate every protocol (.py, .json or .zip file) in this '
+             'directory, in parallel, instead of a single protocol. For each '
+             'protocol, a line of JSON is printed with whether it passed, '
+             'any error, its number of commands, its estimated run time, '
+             'the peak memory use of the worker process that simulated it '
+             '(over every protocol that worker ran) and how much it raised '
+             'that peak.')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='How many protocols to simulate at once with --batch. By '
+             'default, one per CPU.')
     parser.add_argument(
         '-v', '--version', action='version',
         version=f'%(prog)s {opentrons.__version__}',
         help='Print the opentrons package version and exit')
     parser.add_argument(
         '-o', '--output', action='store',
-        help='What to output during simulations',
-        choices=['runlog', 'nothing'],
+        help='What to output during simulations: the run log as text, the '
+             'run log as newline-delimited JSON with one object per '
+             'command, or nothing',
+        choices=['runlog', 'ndjson', 'nothing'],
         default='runlog')
+    parser.add_argument(
+        '-e', '--estimate-duration', action='store_true',
+        help='Estimate how long the protocol and each of its commands would '
+             'take to run on a robot, and print the estimates. Each command '
+             'is then printed once it has ended, after any commands it '
+             'is made of')
     return parser
 
 
@@ -512,6 +801,43 @@ def _get_bundle_dest(
         return None
 
 
+def _write_bundle(
+        args: argparse.Namespace, contents: BundleContents) -> None:
+    bundle_name = getattr(args, 'bundle', None)
+    if bundle_name == args.protocol.name:
+        raise RuntimeError(
+            'Bundle path and input path must be different')
+    bundle_dest = _get_bundle_dest(
+        bundle_name, 'PROTOCOL.ot2.zip', args.protocol.name)
+    if bundle_dest:
+        bundle.create_bundle(contents, bundle_dest)
+
+
+def _print_total_duration(args: argparse.Namespace, total: float) -> None:
+    if args.output == 'ndjson':
+        print(json.dumps({'total_duration': total}))
+    else:
+        print(f'Estimated run time: {format_duration(total)}')
+
+
+def _batch_main(args: argparse.Namespace) -> int:
+    from .util.batch_simulate import find_protocols, simulate_batch
+
+    failed = 0
+    summaries = simulate_batch(
+        find_protocols(args.batch), args.jobs,
+        custom_labware_paths=getattr(args, 'custom_labware_path', []),
+        custom_data_paths=(getattr(args, 'custom_data_path', [])
+                           + getattr(args, 'custom_data_file', [])),
+        hardware_simulator_file_path=getattr(
+            args, 'custom_hardware_simulator_file'),
+        log_level=args.log_level)
+    for summary in summaries:
+        failed += not summary['ok']
+        print(json.dumps(summary), flush=True)
+    return 1 if failed else 0
+
+
 # Note - this script is also set up as a setuptools entrypoint and thus does
 # an absolute minimum of work since setuptools does something odd generating
 # the scripts
@@ -522,8 +848,26 @@ def main() -> int:
     parser = get_arguments(parser)
 
     args = parser.parse_args()
+    if args.batch:
+        return _batch_main(args)
+    if not args.protocol:
+        parser.error('a protocol or --batch is required')
     # Try to migrate api v1 containers if needed
 
+    formatter = {'runlog': format_runlog_entry,
+                 'ndjson': format_runlog_entry_json,
+                 'nothing': lambda entry: None}[args.output]
+
+    total_duration = 0.0
+
+    def _print_entry(entry: Mapping[str, Any]) -> None:
+        nonlocal total_duration
+        if entry['level'] == 0:
+            total_duration += entry.get('duration', 0)
+        line = formatter(entry)
+        if line is not None:
+            print(line, flush=True)
+
     runlog, maybe_bundle = simulate(
         args.protocol,
         args.protocol.name,
@@ -532,20 +876,17 @@ def main() -> int:
         + getattr(args, 'custom_data_file', []),
         hardware_simulator_file_path=getattr(args,
                                              'custom_hardware_simulator_file'),
-        log_level=args.log_level)
+        log_level=args.log_level,
+        estimate_duration=args.estimate_duration,
+        runlog_callback=_print_entry)
 
     if maybe_bundle:
-        bundle_name = getattr(args, 'bundle', None)
-        if bundle_name == args.protocol.name:
-            raise RuntimeError(
-                'Bundle path and input path must be different')
-        bundle_dest = _get_bundle_dest(
-            bundle_name, 'PROTOCOL.ot2.zip', args.protocol.name)
-        if bundle_dest:
-            bundle.create_bundle(maybe_bundle, bundle_dest)
-
-    if args.output == 'runlog':
-        print(format_runlog(runlog))
+        _write_bundle(args, maybe_bundle)
+
+    for entry in runlog:
+        _print_entry(entry)
+    if args.estimate_duration:
+        _print_total_duration(args, total_duration)
 
     return 0
 
@@ -0,0 +1,133 @@
+""" opentrons.util.batch_simulate: simulating many protocols in parallel
+
+Protocols are simulated in a pool of worker processes, so that the global
+state a simulation touches (loggers, the legacy robot singleton, hardware
+simulators) is never shared between two protocols running at once. Each
+worker loads the schemas and shared data every simulation needs once,
+when it starts, and then simulates one protocol at a time.
+"""
+import logging
+import multiprocessing
+import pathlib
+import signal
+import sys
+import time
+import traceback
+from typing import Any, Dict, Iterator, List, Mapping, Sequence
+
+from opentrons import simulate
+from opentrons.protocols import schemas
+from opentrons.protocols.parse import MAX_SUPPORTED_JSON_SCHEMA_VERSION
+from opentrons.protocol_api import MAX_SUPPORTED_VERSION
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None  # type: ignore
+
+log = logging.getLogger(__name__)
+
+#: The file suffixes treated as protocols when simulating a directory
+PROTOCOL_SUFFIXES = ('.py', '.json', '.zip')
+
+
+def find_protocols(directory: pathlib.Path) -> List[pathlib.Path]:
+    """ List the protocol files directly inside a directory, sorted """
+    if not directory.is_dir():
+        raise RuntimeError(f'{directory} is not a directory')
+    return sorted(path for path in directory.iterdir()
+                  if path.is_file() and path.suffix in PROTOCOL_SUFFIXES)
+
+
+def _worker_peak_memory_kb() -> int:
+    """ The high-water mark of this process's memory use, in KiB """
+    if resource is None:
+        return 0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes where linux reports kilobytes
+    return maxrss // 1024 if sys.platform == 'darwin' else maxrss
+
+
+def _warm_worker() -> None:
+    # let the parent process handle ctrl-c and stop the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    schemas.get_validator(schemas.LABWARE_SCHEMA_V2)
+    for version in range(3, MAX_SUPPORTED_JSON_SCHEMA_VERSION + 1):
+        schemas.get_validator(schemas.protocol_schema_path(version))
+    # building a context loads the deck, fixtures and the rest of the
+    # protocol api that a simulation would otherwise load on first use
+    simulate.get_protocol_api(MAX_SUPPORTED_VERSION).cleanup()
+
+
+def simulate_one(path: pathlib.Path,
+                 simulate_kwargs: Mapping[str, Any]) -> Dict[str, Any]:
+    """ Simulate one protocol file and summarize the result.
+
+    :param path: The protocol file
+    :param simulate_kwargs: Other arguments to :py:func:`.simulate.simulate`
+    :returns: A JSON-serializable summary with the keys ``protocol``,
+              ``ok``, ``error``, ``commands`` (the number of commands run,
+              up to the failure if it failed), ``simulated_time`` (the
+              estimated run time on a robot, in seconds), ``wall_time`` (how
+              long the simulation took, in seconds),
+              ``worker_peak_memory_kb`` (the high-water mark of the memory
+              use of the worker process, over every protocol it simulated so
+              far) and ``peak_memory_growth_kb`` (how much this protocol
+              raised that high-water mark; 0 if it fit in the memory earlier
+              protocols in the same worker reached)
+    """
+    summary: Dict[str, Any] = {
+        'protocol': str(path), 'ok': False, 'error': None,
+        'commands': 0, 'simulated_time': 0.0}
+    simulated_time = 0.0
+
+    def _tally(entry: Mapping[str, Any]) -> None:
+        nonlocal simulated_time
+        summary['commands'] += 1
+        if entry['level'] == 0:
+            simulated_time += entry.get('duration', 0)
+
+    start = time.monotonic()
+    peak_before = _worker_peak_memory_kb()
+    try:
+        with open(path, 'rb') as protocol_file:
+            simulate.simulate(
+                protocol_file, path.name,  # type: ignore
+                estimate_duration=True, runlog_callback=_tally,
+                **simulate_kwargs)
+    except Exception as e:
+        log.debug(f'{path} failed to simulate', exc_info=True)
+        summary['error'] = ''.join(
+            traceback.format_exception_only(type(e), e)).strip()
+    else:
+        summary.update(ok=True, simulated_time=simulated_time)
+    summary['wall_time'] = time.monotonic() - start
+    peak_after = _worker_peak_memory_kb()
+    summary['worker_peak_memory_kb'] = peak_after
+    summary['peak_memory_growth_kb'] = max(0, peak_after - peak_before)
+    return summary
+
+
+def _simulate_job(job: Sequence[Any]) -> Dict[str, Any]:
+    path, simulate_kwargs = job
+    return simulate_one(path, simulate_kwargs)
+
+
+def simulate_batch(paths: Sequence[pathlib.Path],
+                   jobs: int = None,
+                   **simulate_kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """ Simulate protocols in parallel, yielding summaries as they finish.
+
+    :param paths: The protocol files to simulate
+    :param jobs: How many worker processes to use. If not specified, one
+                 per CPU.
+    :param simulate_kwargs: Other arguments to :py:func:`.simulate.simulate`
+                            for every protocol, except ``estimate_duration``
+                            and ``runlog_callback``
+    :returns: An iterator of the summaries described in
+              :py:func:`simulate_one`, in the order the protocols finish
+    """
+    work = [(path, simulate_kwargs) for path in paths]
+    with multiprocessing.Pool(processes=jobs,
+                              initializer=_warm_worker) as pool:
+        yield from pool.imap_unordered(_simulate_job, work)
@@ -6,8 +6,6 @@ from json import JSONDecodeError
 import pathlib
 from typing import Dict, List, TYPE_CHECKING
 
-from jsonschema import ValidationError  # type: ignore
-
 from opentrons.protocol_api import labware
 from opentrons.calibration_storage import helpers
 
@@ -17,6 +15,7 @@ log = logging.getLogger(__name__)
 
 
 def labware_from_paths(paths: List[str]) -> Dict[str, 'LabwareDefinition']:
+    from jsonschema import ValidationError  # type: ignore
     labware_defs: Dict[str, 'LabwareDefinition'] = {}
 
     for strpath in paths:
@@ -33,6 +33,27 @@ async def test_home_specific_sim(hardware_api, monkeypatch, is_robot):
                                               Axis.C: 19}
 
 
+async def test_simulated_time(hardware_api):
+    await hardware_api.home()
+    await hardware_api.move_to(types.Mount.RIGHT, types.Point(0, 10, 20))
+    moved = hardware_api.simulated_time
+    assert moved > 0
+    await hardware_api.move_to(types.Mount.RIGHT, types.Point(0, 10, 20))
+    assert hardware_api.simulated_time == moved
+    await hardware_api.home()
+    homed = hardware_api.simulated_time
+    assert homed > moved
+    await hardware_api.move_to(types.Mount.RIGHT, types.Point(0, 10, 20))
+    moved = hardware_api.simulated_time
+    assert hardware_api.simulated_time == moved
+    await hardware_api.move_to(
+        types.Mount.RIGHT, types.Point(300, 10, 20), speed=10)
+    slow = hardware_api.simulated_time - moved
+    await hardware_api.move_to(
+        types.Mount.RIGHT, types.Point(0, 10, 20), speed=400)
+    assert slow > hardware_api.simulated_time - moved - slow
+
+
 async def test_retract(hardware_api, toggle_new_calibration):
     await hardware_api.home()
     await hardware_api.move_to(types.Mount.RIGHT, types.Point(0, 10, 20))
@@ -1,6 +1,7 @@
 from typing import List
 
-from opentrons.hardware_control.util import plan_arc, check_motion_bounds
+from opentrons.hardware_control.util import (
+    plan_arc, check_motion_bounds, estimate_move_time)
 from opentrons.hardware_control.types import (
     CriticalPoint, MotionChecks, OutOfBoundsMove, Axis)
 from opentrons.types import Point
@@ -97,3 +98,22 @@ def test_check_motion_bounds(xformed, deck, bounds, check, catch, phrase):
             check_motion_bounds(xformed, deck, bounds, check)
     else:
         check_motion_bounds(xformed, deck, bounds, check)
+
+
+def test_estimate_move_time():
+    maxes = {'X': 600, 'Y': 400}
+    accels = {'X': 3000, 'Y': 2000}
+    # long enough to cruise: 100mm at 400mm/s plus a ramp of v/a
+    assert estimate_move_time({'X': 0}, {'X': 100}, 400, maxes, accels)\
+        == pytest.approx(100 / 400 + 400 / 3000)
+    # too short to reach cruise speed: triangular profile
+    assert estimate_move_time({'X': 0}, {'X': 10}, 400, maxes, accels)\
+        == pytest.approx(2 * (10 / 3000) ** 0.5)
+    # the requested speed is capped by the axis max speed
+    assert estimate_move_time({'Y': 0}, {'Y': 400}, 1000, maxes, accels)\
+        == pytest.approx(400 / 400 + 400 / 2000)
+    # axes that do not move take no time
+    assert estimate_move_time({'X': 5}, {'X': 5}, 400, maxes, accels) == 0
+    # distances are rounded to whole steps
+    assert estimate_move_time(
+        {'X': 0}, {'X': 0.001}, 400, maxes, accels, {'X': 80}) == 0
@@ -5,6 +5,7 @@ from opentrons.hardware_control.types import CriticalPoint as CP
 
 from opentrons.motion_planning import (
     get_waypoints,
+    get_waypoints_batch,
     Waypoint,
     MoveType,
     DestinationOutOfBoundsError,
@@ -242,3 +243,67 @@ def test_get_waypoints_direct_moves_ignore_clearance_requirements() -> None:
     assert result == [
         Waypoint(Point(1, 1, 5.5))
     ]
+
+
+@pytest.mark.parametrize("move_type", list(MoveType))
+def test_get_waypoints_batch_matches_get_waypoints(move_type: MoveType) -> None:
+    """It should plan the same waypoints as individual get_waypoints calls."""
+    origins = [(1, 1, 3), (1, 1, 14), (1, 1, 15), (1, 1, 3), (3, 3, 50)]
+    dests = [(2, 2, 3), (2, 2, 15), (2, 2, 14), (2, 2, 3), (4, 4, 1)]
+    min_travel_z = [5, 3, 3, 5, 5]
+    max_travel_z = [100, 100, 100, 6, 100]
+
+    result = get_waypoints_batch(
+        origins,
+        dests,
+        move_type=move_type,
+        min_travel_z=min_travel_z,
+        max_travel_z=max_travel_z,
+    )
+
+    assert len(result) == len(origins)
+
+    for i, (origin, dest) in enumerate(zip(origins, dests)):
+        assert result.get_waypoints(i) == get_waypoints(
+            origin=Point(*origin),
+            dest=Point(*dest),
+            move_type=move_type,
+            min_travel_z=min_travel_z[i],
+            max_travel_z=max_travel_z[i],
+        )
+
+
+def test_get_waypoints_batch_raises_for_first_bad_move() -> None:
+    """It should raise an error describing the first out of bounds move."""
+    with pytest.raises(ArcOutOfBoundsError) as exc_info:
+        get_waypoints_batch(
+            [(1, 1, 3), (1, 1, 3), (1, 1, 3)],
+            [(2, 2, 3), (3, 3, 3), (4, 4, 5)],
+            move_type=MoveType.GENERAL_ARC,
+            min_travel_z=[5, 5, 5],
+            max_travel_z=[100, 5.9, 5.9],
+        )
+
+    assert exc_info.value.dest == Point(3, 3, 3)
+    assert exc_info.value.max_travel_z == 5.9
+
+    with pytest.raises(DestinationOutOfBoundsError) as dest_exc_info:
+        get_waypoints_batch(
+            [(1, 1, 3), (1, 1, 3)],
+            [(2, 2, 3), (4, 4, 5)],
+            move_type=MoveType.GENERAL_ARC,
+            min_travel_z=5,
+            max_travel_z=[100, 5.9],
+        )
+
+    assert dest_exc_info.value.dest == Point(4, 4, 5)
+
+
+def test_get_waypoints_batch_rejects_mismatched_inputs() -> None:
+    """It should require one destination per origin."""
+    with pytest.raises(ValueError):
+        get_waypoints_batch(
+            [(1, 1, 3), (1, 1, 3)],
+            [(2, 2, 3)],
+            max_travel_z=100,
+        )
@@ -749,6 +749,14 @@ def test_transfer_options(ctx, monkeypatch):
         dispense=tf.DispenseOpts()
     )
     assert transfer_options == expected_xfer_options2
+    instr.distribute(50, lw1['A1'], lw2.columns()[0],
+                     order_strategy='minimize travel')
+    assert transfer_options.transfer.order_strategy\
+        == tf.OrderStrategy.MINIMIZE_TRAVEL
+    instr.transfer(50, lw1['A1'], lw2['A1'],
+                   order_strategy=tf.OrderStrategy.MINIMIZE_TRAVEL)
+    assert transfer_options.transfer.order_strategy\
+        == tf.OrderStrategy.MINIMIZE_TRAVEL
     with pytest.raises(ValueError, match='air_gap.*'):
         instr.transfer(300, lw1['A1'], lw2['A1'], air_gap=300)
     with pytest.raises(ValueError, match='air_gap.*'):
@@ -1321,3 +1321,146 @@ def test_blowout_to_dest(_instr_labware):
         {'method': 'drop_tip', 'args': [], 'kwargs': {}}]
     for step, expected in zip(dist_plan, exp):
         assert step == expected
+
+
+def test_minimize_travel_distribute(_instr_labware):
+    _instr_labware['ctx'].home()
+    lw1 = _instr_labware['lw1']
+    lw2 = _instr_labware['lw2']
+
+    # zig-zag between the far ends of the plate
+    dests = [lw2.wells_by_name()[name]
+             for name in ['A12', 'A1', 'A11', 'A2', 'A10', 'A3']]
+    options = tx.TransferOptions(transfer=tx.Transfer(
+        order_strategy=tx.OrderStrategy.MINIMIZE_TRAVEL))
+    xfer_plan = tx.TransferPlan(
+        [10, 20, 30, 40, 50, 60], lw1.columns()[0][0], dests,
+        _instr_labware['instr'],
+        max_volume=_instr_labware['instr'].hw_pipette['working_volume'],
+        api_version=_instr_labware['ctx'].api_version,
+        options=options)
+    dispenses = [(step['args'][0], step['args'][1].display_name.split()[0])
+                 for step in xfer_plan if step['method'] == 'dispense']
+
+    # volumes stay with their wells, and wells are visited from slot 1
+    # outwards across the plate in slot 2
+    assert dispenses == [(20, 'A1'), (40, 'A2'), (60, 'A3'),
+                         (50, 'A10'), (30, 'A11'), (10, 'A12')]
+    assert xfer_plan.travel_saved > 0
+
+
+def test_minimize_travel_transfer_keeps_pairs(_instr_labware):
+    _instr_labware['ctx'].home()
+    lw1 = _instr_labware['lw1']
+    lw2 = _instr_labware['lw2']
+
+    names = ['A1', 'A12', 'A2', 'A11', 'A3', 'A10']
+    sources = [lw1.wells_by_name()[name] for name in names]
+    dests = [lw2.wells_by_name()[name] for name in names]
+    options = tx.TransferOptions(transfer=tx.Transfer(
+        order_strategy=tx.OrderStrategy.MINIMIZE_TRAVEL))
+    xfer_plan = tx.TransferPlan(
+        100, sources, dests,
+        _instr_labware['instr'],
+        max_volume=_instr_labware['instr'].hw_pipette['working_volume'],
+        api_version=_instr_labware['ctx'].api_version,
+        options=options)
+    steps = [step for step in xfer_plan
+             if step['method'] in ('aspirate', 'dispense')]
+    pairs = [(asp['args'][1], disp['args'][1])
+             for asp, disp in zip(steps[::2], steps[1::2])]
+
+    assert sorted(pairs, key=lambda p: names.index(p[0].well_name)) \
+        == list(zip(sources, dests))
+    assert pairs[0] == (sources[0], dests[0])
+    assert xfer_plan.travel_saved > 0
+
+
+@pytest.mark.parametrize('names,dest_names', [
+    # a serial dilution along a zig-zag: each destination is the next source
+    (['A1', 'A12', 'A2', 'A11', 'A3'], ['A12', 'A2', 'A11', 'A3', 'A10']),
+    # the same destination filled from several sources
+    (['A1', 'A12', 'A2', 'A11'], ['B1', 'B12', 'B1', 'B12']),
+])
+def test_minimize_travel_keeps_dependent_pairs(_instr_labware,
+                                               names, dest_names):
+    _instr_labware['ctx'].home()
+    lw2 = _instr_labware['lw2']
+
+    sources = [lw2.wells_by_name()[name] for name in names]
+    dests = [lw2.wells_by_name()[name] for name in dest_names]
+    options = tx.TransferOptions(transfer=tx.Transfer(
+        order_strategy=tx.OrderStrategy.MINIMIZE_TRAVEL))
+    xfer_plan = tx.TransferPlan(
+        100, sources, dests,
+        _instr_labware['instr'],
+        max_volume=_instr_labware['instr'].hw_pipette['working_volume'],
+        api_version=_instr_labware['ctx'].api_version,
+        options=options)
+    steps = [step for step in xfer_plan
+             if step['method'] in ('aspirate', 'dispense')]
+    pairs = [(asp['args'][1], disp['args'][1])
+             for asp, disp in zip(steps[::2], steps[1::2])]
+
+    assert pairs == list(zip(sources, dests))
+    assert xfer_plan.travel_saved == 0
+
+
+def test_default_order_is_unchanged(_instr_labware):
+    _instr_labware['ctx'].home()
+    lw1 = _instr_labware['lw1']
+    lw2 = _instr_labware['lw2']
+
+    dests = [lw2.wells_by_name()[name] for name in ['A12', 'A1', 'A11']]
+    xfer_plan = tx.TransferPlan(
+        10, lw1.columns()[0][0], dests,
+        _instr_labware['instr'],
+        max_volume=_instr_labware['instr'].hw_pipette['working_volume'],
+        api_version=_instr_labware['ctx'].api_version)
+
+    assert [step['args'][1] for step in xfer_plan
+            if step['method'] == 'dispense'] == dests
+    assert xfer_plan.travel_saved == 0
+
+
+def test_transfer_steps_are_records():
+    step = tx.TransferStep('aspirate', [10, None, 1.0])
+    assert step.method == 'aspirate'
+    assert step['args'] == [10, None, 1.0]
+    assert step['kwargs'] == {}
+    assert step == {'method': 'aspirate', 'args': [10, None, 1.0],
+                    'kwargs': {}}
+    assert step != tx.TransferStep('dispense', [10, None, 1.0])
+    with pytest.raises(KeyError):
+        step['location']
+
+
+def test_plan_is_generated_lazily(_instr_labware):
+    _instr_labware['ctx'].home()
+    lw1 = _instr_labware['lw1']
+    lw2 = _instr_labware['lw2']
+
+    sources, dests = tx.TransferPlan._extend_source_target_lists(
+        lw1.wells()[:2], lw2.wells())
+    assert not isinstance(sources, list)
+    assert list(sources) == [well for well in lw1.wells()[:2]
+                             for _ in range(48)]
+    assert dests == lw2.wells()
+
+    xfer_plan = tx.TransferPlan(
+        (10, 100), lw1.wells()[0], lw2.wells(),
+        _instr_labware['instr'],
+        max_volume=_instr_labware['instr'].hw_pipette['working_volume'],
+        api_version=_instr_labware['ctx'].api_version,
+        mode='transfer')
+    steps = iter(xfer_plan)
+    assert next(steps) == {'method': 'pick_up_tip', 'args': [], 'kwargs': {}}
+    assert next(steps) == {'method': 'aspirate',
+                           'args': [10, lw1.wells()[0], 1.0], 'kwargs': {}}
+
+    # the plan can be iterated again from the start
+    dispenses = [step['args'][0] for step in xfer_plan
+                 if step['method'] == 'dispense']
+    assert len(dispenses) == 96
+    assert dispenses[0] == 10
+    assert dispenses[-1] == 100
@@ -0,0 +1,48 @@
+""" Test the transfer travel ordering heuristics """
+from opentrons.types import Point
+from opentrons.protocols.advanced_control import travel
+
+
+def test_single_step():
+    result = travel.plan_travel_order([(Point(1, 1, 0), Point(2, 2, 0))])
+    assert result.order == [0]
+    assert result.travel_saved == 0
+
+
+def test_orders_line_from_start():
+    xs = [5, 1, 4, 2, 3]
+    steps = [(Point(x, 0, 0), Point(x, 0, 0)) for x in xs]
+    result = travel.plan_travel_order(steps, start=Point(0, 0, 0))
+
+    assert [xs[i] for i in result.order] == [1, 2, 3, 4, 5]
+    assert result.planned_travel == 5
+    assert result.original_travel == 5 + 4 + 3 + 2 + 1
+    assert result.travel_saved == 10
+
+
+def test_keeps_first_step_without_start():
+    xs = [3, 1, 4, 2, 5]
+    steps = [(Point(x, 0, 0), Point(x, 0, 0)) for x in xs]
+    result = travel.plan_travel_order(steps)
+
+    assert result.order[0] == 0
+    assert result.planned_travel <= result.original_travel
+
+
+def test_asymmetric_steps():
+    # each step enters at y=0 and leaves at y=10; visiting them in order of
+    # x is never worse than the given zig-zag
+    xs = [0, 30, 10, 40, 20]
+    steps = [(Point(x, 0, 0), Point(x, 10, 0)) for x in xs]
+    result = travel.plan_travel_order(steps)
+
+    assert sorted(result.order) == list(range(len(xs)))
+    assert result.planned_travel < result.original_travel
+
+
+def test_never_worse_than_given_order():
+    steps = [(Point(x, 0, 0), Point(x, 0, 0)) for x in range(10)]
+    result = travel.plan_travel_order(steps, start=Point(0, 0, 0))
+
+    assert result.order == list(range(10))
+    assert result.travel_saved == 0
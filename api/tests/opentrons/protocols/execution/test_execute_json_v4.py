@@ -500,6 +500,51 @@ def test_dispatch_json_invalid_command(
         )
 
 
+def test_compile_json_checks_before_running(
+    mockObj,
+    pipette_command_map,
+    magnetic_module_command_map,
+    temperature_module_command_map,
+    thermocycler_module_command_map
+):
+    mock_temperature_module = mock.create_autospec(TemperatureModuleContext)
+    kwargs = dict(
+        context=None,
+        instruments=mock.sentinel.instruments,
+        loaded_labware=mock.sentinel.loaded_labware,
+        modules={'tempId': mock_temperature_module},
+        pipette_command_map=pipette_command_map,
+        magnetic_module_command_map=magnetic_module_command_map,
+        temperature_module_command_map=temperature_module_command_map,
+        thermocycler_module_command_map=thermocycler_module_command_map)
+
+    commands = v4.compile_json(protocol_data={'commands': [
+        {'command': 'aspirate', 'params': 'aspirate_params'},
+        {'command': 'temperatureModule/deactivate',
+         'params': {'module': 'tempId'}},
+    ]}, **kwargs)
+    # nothing runs until the compiled commands are called
+    assert mockObj.mock_calls == []
+    for command in commands:
+        command()
+    assert mockObj.mock_calls == [
+        mock.call._aspirate(mock.sentinel.instruments,
+                            mock.sentinel.loaded_labware, 'aspirate_params'),
+        mock.call._temperature_module_deactivate(
+            mock_temperature_module, {'module': 'tempId'})]
+
+    mockObj.reset_mock()
+    # a bad command late in the protocol stops it before anything runs
+    for bad_command in ({'command': 'no_such_command', 'params': 'foo'},
+                        {'command': 'magneticModule/disengageMagnet',
+                         'params': {'module': 'tempId'}}):
+        with pytest.raises(RuntimeError):
+            dispatch_json(protocol_data={'commands': [
+                {'command': 'aspirate', 'params': 'aspirate_params'},
+                bad_command]}, **kwargs)
+    assert mockObj.mock_calls == []
+
+
 def test_papi_execute_json_v4(monkeypatch, ctx, get_json_protocol_fixture):
     protocol_data = get_json_protocol_fixture(
         '4', 'testModulesProtocol', False)
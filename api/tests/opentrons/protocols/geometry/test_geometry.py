@@ -8,6 +8,7 @@ from opentrons.protocol_api import labware
 from opentrons.protocols.geometry import module_geometry
 from opentrons.hardware_control.types import CriticalPoint
 from opentrons.protocols.api_support.definitions import MAX_SUPPORTED_VERSION
+from opentrons.protocols.api_support.labware_like import LabwareLike
 
 tall_lw_name = 'opentrons_96_tiprack_1000ul'
 labware_name = 'corning_96_wellplate_360ul_flat'
@@ -398,6 +399,37 @@ def test_should_dodge():
         Location(point=deck.position_for(1).point, labware=None),
         deck.position_for(12)
     )
+    # and removing the tc should invalidate the cached deck layout
+    del deck[7]
+    assert not should_dodge_thermocycler(
+        deck, deck.position_for(12), deck.position_for(1))
+
+
+def test_deck_generation():
+    deck = Deck()
+    generation = deck.generation
+    assert not deck.thermocycler_present
+
+    tc = module_geometry.load_module(
+        module_geometry.ThermocyclerModuleModel.THERMOCYCLER_V1,
+        deck.position_for(7))
+    deck[7] = tc
+    assert deck.generation > generation
+    assert deck.thermocycler_present
+    assert deck.slot_heights[7] == tc.highest_z
+
+    generation = deck.generation
+    lw = tc.add_labware(labware.load(labware_name, tc.location))
+    deck.recalculate_high_z()
+    assert deck.generation > generation
+    assert deck.slot_heights[7] == tc.highest_z
+    assert deck.resolve_slot(LabwareLike(lw.wells()[0])) == '7'
+
+    generation = deck.generation
+    del deck[7]
+    assert deck.generation > generation
+    assert not deck.thermocycler_present
+    assert 7 not in deck.slot_heights
 
 
 def test_labware_in_next_slot():
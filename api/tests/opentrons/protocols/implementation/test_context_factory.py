@@ -0,0 +1,75 @@
+import pytest
+
+from opentrons import types
+from opentrons.protocols.api_support.types import APIVersion
+from opentrons.protocols.implementations.protocol_context import \
+    ProtocolContextImplementation
+from opentrons.protocols.implementations.simulators.context_factory import \
+    SimulationContextFactory
+from opentrons.protocols.implementations.simulators.protocol_context import \
+    ProtocolContextSimulation
+from opentrons.protocols.types import PythonProtocol
+
+
+@pytest.fixture
+def factory():
+    factory = SimulationContextFactory()
+    yield factory
+    factory.clean_up()
+
+
+def _hardware(context):
+    return context._implementation.get_hardware().hardware
+
+
+def test_shares_hardware(factory):
+    with factory.build() as first:
+        first_hardware = _hardware(first)
+        assert isinstance(first._implementation, ProtocolContextSimulation)
+    with factory.build() as second:
+        assert _hardware(second) is first_hardware
+
+
+def test_reuse_starts_clean(factory):
+    with factory.build() as first:
+        first.load_labware('corning_96_wellplate_360ul_flat', 1)
+        first.load_module('tempdeck', 3)
+        tiprack = first.load_labware('opentrons_96_tiprack_300ul', 2)
+        pip = first.load_instrument('p300_single', types.Mount.RIGHT,
+                                    tip_racks=[tiprack])
+        pip.pick_up_tip()
+        assert pip.has_tip
+        deck = first.deck
+    with factory.build() as second:
+        assert second.deck is not deck
+        assert second.loaded_labwares.keys() == {12}
+        assert second.loaded_modules == {}
+        assert not any(second.loaded_instruments.values())
+        attached = _hardware(second).attached_instruments
+        assert not any(attached.values())
+        # a fresh instrument does not inherit the old one's tip
+        pip = second.load_instrument('p300_single', types.Mount.RIGHT)
+        assert not pip.has_tip
+
+
+def test_concurrent_build_gets_own_hardware(factory):
+    with factory.build() as first:
+        with factory.build() as second:
+            assert _hardware(second) is not _hardware(first)
+            _hardware(second).clean_up()
+
+
+def test_build_from_protocol(factory):
+    protocol = PythonProtocol(
+        text='', contents=compile('', 'proto.py', 'exec'),
+        filename='proto.py', metadata={}, api_level=APIVersion(2, 3),
+        bundled_labware=None, bundled_data={'data.csv': b'1,2'},
+        bundled_python=None, extra_labware=None)
+    with factory.build(protocol) as context:
+        assert context.api_version == APIVersion(2, 3)
+        assert context.bundled_data == {'data.csv': b'1,2'}
+    with factory.build(
+            implementation=ProtocolContextImplementation,
+            api_version=APIVersion(2, 1)) as context:
+        assert type(context._implementation) is \
+            ProtocolContextImplementation
@@ -0,0 +1,75 @@
+import pytest
+
+from opentrons.broker import Broker
+from opentrons.commands import types as command_types
+from opentrons.protocols import duration
+
+
+def _publish(broker, name, payload, before=True):
+    broker.publish(command_types.COMMAND, {
+        'name': name, 'payload': {'text': name, **payload},
+        '$': 'before' if before else 'after'})
+
+
+def _run(broker, name, **payload):
+    _publish(broker, name, payload)
+    _publish(broker, name, payload, before=False)
+
+
+def test_nested_commands_and_motion():
+    broker = Broker()
+    motion = [3.0]
+    estimator = duration.DurationEstimator(broker, lambda: motion[0])
+    _publish(broker, command_types.TRANSFER, {})
+    motion[0] += 2
+    _run(broker, command_types.ASPIRATE)
+    _run(broker, command_types.DELAY, minutes=1, seconds=5)
+    motion[0] += 1
+    _publish(broker, command_types.TRANSFER, {}, before=False)
+    assert [(d.name, d.level, d.duration) for d in estimator.durations] == [
+        (command_types.TRANSFER, 0, 68),
+        (command_types.ASPIRATE, 1, 0),
+        (command_types.DELAY, 1, 65)]
+    assert estimator.total_duration == 68
+    estimator.unsubscribe()
+    _run(broker, command_types.DELAY, minutes=1, seconds=0)
+    assert len(estimator.durations) == 3
+
+
+def test_module_ramps():
+    broker = Broker()
+    estimator = duration.DurationEstimator(broker, lambda: 0.0)
+    _run(broker, command_types.TEMPDECK_SET_TEMP, celsius=45)
+    _run(broker, command_types.TEMPDECK_SET_TEMP, celsius=35)
+    _run(broker, command_types.TEMPDECK_DEACTIVATE)
+    _run(broker, command_types.THERMOCYCLER_CLOSE)
+    _run(broker, command_types.THERMOCYCLER_SET_LID_TEMP, temperature=105)
+    _run(broker, command_types.THERMOCYCLER_SET_BLOCK_TEMP,
+         temperature=95, hold_time=30)
+    _run(broker, command_types.THERMOCYCLER_EXECUTE_PROFILE, repetitions=2,
+         steps=[{'temperature': 55, 'hold_time_seconds': 10},
+                {'temperature': 95, 'hold_time_minutes': 1}])
+    assert [d.duration for d in estimator.durations] == pytest.approx([
+        20 / duration.TEMPDECK_HEATING_RATE,
+        10 / duration.TEMPDECK_COOLING_RATE,
+        0,
+        duration.THERMOCYCLER_LID_MOVE_TIME,
+        80 / duration.THERMOCYCLER_LID_HEATING_RATE,
+        30 + 70 / duration.THERMOCYCLER_BLOCK_HEATING_RATE,
+        2 * (10 + 40 / duration.THERMOCYCLER_BLOCK_COOLING_RATE
+             + 60 + 40 / duration.THERMOCYCLER_BLOCK_HEATING_RATE)])
+
+
+def test_callback():
+    broker = Broker()
+    ended = []
+    estimator = duration.DurationEstimator(
+        broker, lambda: 0.0, callback=lambda i, d: ended.append((i, d)))
+    _publish(broker, command_types.TRANSFER, {})
+    _run(broker, command_types.DELAY, minutes=0, seconds=5)
+    _publish(broker, command_types.TRANSFER, {}, before=False)
+    # each estimate is passed on as its command ends, and none are kept
+    assert [(i, d.name, d.level, d.duration) for i, d in ended] == [
+        (1, command_types.DELAY, 1, 5),
+        (0, command_types.TRANSFER, 0, 5)]
+    assert estimator.durations == []
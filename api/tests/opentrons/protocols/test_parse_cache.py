@@ -0,0 +1,77 @@
+import marshal
+
+import pytest
+
+from opentrons.protocols import parse, parse_cache
+from opentrons.protocols.api_support.types import APIVersion
+
+PROTOCOL = '''
+metadata = {"apiLevel": "2.5", "author": "me"}
+
+def run(ctx):
+    pass
+'''
+
+
+@pytest.fixture
+def cache(tmp_path):
+    old = parse_cache.get_parse_cache()
+    cache = parse_cache.ParseCache(maxsize=2, directory=tmp_path)
+    parse_cache.set_parse_cache(cache)
+    yield cache
+    parse_cache.set_parse_cache(old)
+
+
+def test_parse_uses_cache(cache, monkeypatch):
+    first = parse.parse(PROTOCOL, 'proto.py')
+    first.metadata['author'] = 'someone else'
+
+    def _fail(*args, **kwargs):
+        raise AssertionError('should not have been compiled again')
+    monkeypatch.setattr(parse, '_compile_python', _fail)
+
+    second = parse.parse(PROTOCOL, 'proto.py')
+    assert second.contents is first.contents
+    assert second.metadata == {'apiLevel': '2.5', 'author': 'me'}
+    assert second.api_level == APIVersion(2, 5)
+
+
+def test_key_includes_filename():
+    assert parse_cache.ParseCache.key(PROTOCOL, 'a.py')\
+        != parse_cache.ParseCache.key(PROTOCOL, 'b.py')
+    assert parse_cache.ParseCache.key(PROTOCOL, 'a.py')\
+        == parse_cache.ParseCache.key(PROTOCOL, 'a.py')
+
+
+def test_memory_lru_and_disk(cache, tmp_path):
+    for name in ('a.py', 'b.py', 'c.py'):
+        parse.parse(PROTOCOL, name)
+    assert len(list(tmp_path.iterdir())) == 3
+    key = cache.key(PROTOCOL, 'a.py')
+    assert key not in cache._entries
+
+    from_disk = cache.get(key)
+    assert from_disk.metadata == {'apiLevel': '2.5', 'author': 'me'}
+    assert from_disk.api_level == APIVersion(2, 5)
+    assert key in cache._entries
+
+    cache.clear()
+    restarted = parse_cache.ParseCache(directory=tmp_path)
+    assert restarted.get(cache.key(PROTOCOL, 'c.py')) is not None
+
+
+def test_corrupt_disk_entry(cache, tmp_path):
+    key = cache.key(PROTOCOL, 'proto.py')
+    path = tmp_path / (key + parse_cache.CACHE_FILE_SUFFIX)
+    path.write_bytes(marshal.dumps('garbage'))
+    assert cache.get(key) is None
+    assert not path.exists()
+    assert parse.parse(PROTOCOL, 'proto.py').api_level == APIVersion(2, 5)
+
+
+def test_errors_are_not_cached(cache):
+    bad = 'metadata = {"apiLevel": "2.5"}\n'
+    for _ in range(2):
+        with pytest.raises(Exception, match='run'):
+            parse.parse(bad, 'bad.py')
+    assert cache.get(cache.key(bad, 'bad.py')) is None
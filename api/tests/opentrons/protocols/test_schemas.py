@@ -0,0 +1,26 @@
+import pytest
+import jsonschema  # type: ignore
+
+from opentrons.protocols import schemas
+from opentrons_shared_data.labware import load_definition
+
+
+def test_load_schema_is_cached():
+    assert schemas.load_schema(schemas.LABWARE_SCHEMA_V2)\
+        is schemas.load_schema(schemas.LABWARE_SCHEMA_V2)
+
+
+def test_validate():
+    definition = load_definition('opentrons_96_tiprack_300ul', 1)
+    schemas.validate(definition, schemas.LABWARE_SCHEMA_V2)
+    with pytest.raises(jsonschema.ValidationError):
+        schemas.validate({**definition, 'wells': 'hi'},
+                         schemas.LABWARE_SCHEMA_V2)
+
+
+def test_looks_like_labware(get_json_protocol_fixture):
+    assert schemas.looks_like_labware(
+        load_definition('opentrons_96_tiprack_300ul', 1))
+    assert not schemas.looks_like_labware(
+        get_json_protocol_fixture('5', 'simpleV5', decode=True))
+    assert not schemas.looks_like_labware([])
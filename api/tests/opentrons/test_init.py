@@ -1,5 +1,9 @@
+import subprocess
+import sys
 from pathlib import Path
 
+import pytest
+
 
 def test_find_smoothie_file(monkeypatch, tmpdir):
     import opentrons
@@ -10,3 +14,25 @@ def test_find_smoothie_file(monkeypatch, tmpdir):
 
     monkeypatch.setattr(opentrons, 'IS_ROBOT', True)
     assert opentrons._find_smoothie_file() == (dummy_file, 'edge-2cac98asda')
+
+
+def test_import_is_lazy():
+    # importing opentrons should not load the hardware controller or
+    # jsonschema until something uses them
+    heavy = ['opentrons.hardware_control.api', 'jsonschema',
+             'opentrons.hardware_control.socket_server']
+    code = ('import sys, opentrons; '
+            f'print([m for m in {heavy!r} if m in sys.modules])')
+    result = subprocess.run([sys.executable, '-c', code],
+                            stdout=subprocess.PIPE, check=True,
+                            universal_newlines=True)
+    assert result.stdout.strip() == '[]'
+
+
+def test_lazy_attributes():
+    import opentrons
+    from opentrons.hardware_control import API, ThreadManager
+    assert opentrons.API is API
+    assert opentrons.ThreadManager is ThreadManager
+    with pytest.raises(AttributeError):
+        opentrons.not_an_attribute
@@ -1,11 +1,15 @@
 # coding=utf-8
 import io
+import json
+import logging
 import os
 from pathlib import Path
 
 import pytest
 
 from opentrons import simulate, protocols
+from opentrons.broker import Broker
+from opentrons.commands import types as command_types
 from opentrons.protocols.types import ApiDeprecationError
 from opentrons.protocols.execution.errors import ExceptionInProtocolError
 
@@ -115,3 +119,108 @@ def test_simulate_extra_labware(protocol, protocol_file, monkeypatch):
     ctx = simulate.get_protocol_api('2.0')
     with pytest.raises(FileNotFoundError):
         ctx.load_labware("fixture_12_trough", 1, namespace='fixture')
+
+
+@pytest.mark.parametrize('protocol_file', ['testosaur_v2.py'])
+def test_simulate_estimate_duration(protocol, protocol_file):
+    runlog, _ = simulate.simulate(
+        protocol.filelike, 'testosaur_v2.py', estimate_duration=True)
+    assert all(item['duration'] > 0 for item in runlog)
+    assert '(0:00:' in simulate.format_runlog(runlog)
+
+
+@pytest.mark.parametrize('protocol_file', ['testosaur_v2.py'])
+def test_simulate_streams_runlog(protocol, protocol_file):
+    expected, _ = simulate.simulate(protocol.filelike, 'testosaur_v2.py')
+    protocol.filelike.seek(0)
+    streamed = []
+    runlog, _ = simulate.simulate(
+        protocol.filelike, 'testosaur_v2.py',
+        runlog_callback=streamed.append)
+    assert runlog == []
+    assert [entry['payload']['text'] for entry in streamed]\
+        == [entry['payload']['text'] for entry in expected]
+    assert [entry['level'] for entry in streamed]\
+        == [entry['level'] for entry in expected]
+
+    protocol.filelike.seek(0)
+    estimated, _ = simulate.simulate(
+        protocol.filelike, 'testosaur_v2.py', estimate_duration=True)
+    protocol.filelike.seek(0)
+    streamed = []
+    simulate.simulate(
+        protocol.filelike, 'testosaur_v2.py',
+        runlog_callback=streamed.append, estimate_duration=True)
+    assert [(entry['payload']['text'], entry['duration'])
+            for entry in streamed]\
+        == [(entry['payload']['text'], entry['duration'])
+            for entry in estimated]
+
+
+def test_scraper_streams_nested_estimates():
+    broker = Broker()
+    streamed = []
+    scraper = simulate.CommandScraper(
+        logging.getLogger('opentrons'), 'none', broker,
+        callback=streamed.append)
+    motion = [0.0]
+    estimator = scraper.estimate_durations(lambda: motion[0])
+
+    def publish(name, before=True):
+        broker.publish(command_types.COMMAND, {
+            'name': name, 'payload': {'text': name},
+            '$': 'before' if before else 'after'})
+
+    publish(command_types.TRANSFER)
+    publish(command_types.ASPIRATE)
+    motion[0] += 2
+    publish(command_types.ASPIRATE, before=False)
+    publish(command_types.DISPENSE)
+    motion[0] += 1
+    publish(command_types.DISPENSE, before=False)
+    # nothing is passed on until the command they are part of has ended
+    assert streamed == []
+    publish(command_types.TRANSFER, before=False)
+    publish(command_types.HOME)
+    assert [(entry['payload']['text'], entry['level'], entry['duration'])
+            for entry in streamed] == [
+        (command_types.TRANSFER, 0, 3),
+        (command_types.ASPIRATE, 1, 2),
+        (command_types.DISPENSE, 1, 1)]
+    # a command that never ends is passed on without a duration
+    scraper.flush()
+    assert streamed[-1]['payload']['text'] == command_types.HOME
+    assert 'duration' not in streamed[-1]
+    estimator.unsubscribe()
+
+
+@pytest.mark.parametrize('protocol_file', ['testosaur_v2.py'])
+def test_simulate_iter(protocol, protocol_file):
+    entries = list(simulate.simulate_iter(
+        protocol.filelike, 'testosaur_v2.py'))
+    assert [entry['payload']['text'] for entry in entries][0]\
+        == 'Picking up tip from A1 of Opentrons 96 Tip Rack 300 µL on 1'
+    assert len(entries) == 4
+
+    protocol.filelike.seek(0)
+    stream = simulate.simulate_iter(
+        protocol.filelike, 'testosaur_v2.py', max_queued=1)
+    next(stream)
+    stream.close()
+
+
+def test_simulate_iter_raises():
+    bad = io.StringIO('metadata = {"apiLevel": "2.0"}\n'
+                      'def run(ctx):\n'
+                      '    raise ValueError("oops")\n')
+    with pytest.raises(ExceptionInProtocolError):
+        list(simulate.simulate_iter(bad, 'bad.py'))
+
+
+@pytest.mark.parametrize('protocol_file', ['testosaur_v2.py'])
+def test_format_runlog_entry_json(protocol, protocol_file):
+    runlog, _ = simulate.simulate(protocol.filelike, 'testosaur_v2.py')
+    record = json.loads(simulate.format_runlog_entry_json(runlog[0]))
+    assert record == {
+        'level': 0, 'logs': [],
+        'text': 'Picking up tip from A1 of Opentrons 96 Tip Rack 300 µL on 1'}
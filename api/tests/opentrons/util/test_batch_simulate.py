@@ -0,0 +1,80 @@
+import pathlib
+
+import pytest
+
+from opentrons.util import batch_simulate
+
+GOOD = '''
+metadata = {"apiLevel": "2.0"}
+
+def run(ctx):
+    ctx.delay(seconds=10)
+'''
+
+BAD = '''
+metadata = {"apiLevel": "2.0"}
+
+def run(ctx):
+    ctx.comment("first")
+    ctx.comment("second")
+    raise ValueError("nope")
+'''
+
+
+@pytest.fixture
+def protocol_dir(tmp_path):
+    (tmp_path / 'good.py').write_text(GOOD)
+    (tmp_path / 'bad.py').write_text(BAD)
+    (tmp_path / 'notes.txt').write_text('not a protocol')
+    (tmp_path / 'sub.py').mkdir()
+    return tmp_path
+
+
+def test_find_protocols(protocol_dir):
+    assert batch_simulate.find_protocols(protocol_dir) == [
+        protocol_dir / 'bad.py', protocol_dir / 'good.py']
+    with pytest.raises(RuntimeError):
+        batch_simulate.find_protocols(protocol_dir / 'good.py')
+
+
+def test_simulate_one(protocol_dir):
+    good = batch_simulate.simulate_one(protocol_dir / 'good.py', {})
+    assert good['ok']
+    assert good['error'] is None
+    assert good['commands'] == 1
+    assert good['simulated_time'] == pytest.approx(10)
+    assert good['wall_time'] > 0
+
+
+def test_simulate_one_failure(protocol_dir, monkeypatch):
+    runs = []
+    simulate = batch_simulate.simulate.simulate
+
+    def _simulate(*args, **kwargs):
+        runs.append(kwargs)
+        return simulate(*args, **kwargs)
+
+    monkeypatch.setattr(batch_simulate.simulate, 'simulate', _simulate)
+    bad = batch_simulate.simulate_one(protocol_dir / 'bad.py', {})
+    assert not bad['ok']
+    assert 'nope' in bad['error']
+    # the commands run before the failure are counted in the same run
+    assert bad['commands'] == 2
+    assert len(runs) == 1
+
+
+def test_simulate_one_memory(protocol_dir, monkeypatch):
+    peaks = iter([1000, 1500])
+    monkeypatch.setattr(batch_simulate, '_worker_peak_memory_kb',
+                        lambda: next(peaks))
+    good = batch_simulate.simulate_one(protocol_dir / 'good.py', {})
+    assert good['worker_peak_memory_kb'] == 1500
+    assert good['peak_memory_growth_kb'] == 500
+
+
+def test_simulate_batch(protocol_dir):
+    summaries = batch_simulate.simulate_batch(
+        batch_simulate.find_protocols(protocol_dir), jobs=2)
+    by_name = {pathlib.Path(s['protocol']).name: s for s in summaries}
+    assert by_name['good.py']['ok']
+    assert not by_name['bad.py']['ok']
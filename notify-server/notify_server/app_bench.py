@@ -0,0 +1,435 @@
+"""
+Load and latency benchmark application.
+
+Starts a notify-server with its publisher address on local IPC and its
+subscriber address on local TCP, then drives publishers and subscribers,
+each in a process of its own, through the client modules. Every event
+carries the time it was published, so subscribers measure the latency
+from publishing to receiving, encoding and decoding included. Events a
+subscriber never receives, whether dropped by the server or by zmq, are
+counted as dropped.
+
+Settings of the server other than its addresses, like
+OT_NOTIFY_SERVER_max_queued_events, are read from the environment as usual.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import queue
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing.synchronize import Event as ProcessEvent
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from notify_server.clients import publisher, snapshot, subscriber
+from notify_server.clients.encoding import Encoding
+from notify_server.models.event import Event
+from notify_server.models.sample_events import SampleTwo
+from notify_server.server import server
+from notify_server.settings import ServerBindAddress, Settings
+
+log = logging.getLogger(__name__)
+
+TOPIC_PREFIX = "bench/"
+PROBE_TOPIC = f"{TOPIC_PREFIX}probe"
+END_TOPIC = f"{TOPIC_PREFIX}end"
+
+# Seconds to wait for the processes to start
+START_TIMEOUT = 30.0
+# Seconds a subscriber waits for an event before deciding the rest were
+# dropped
+IDLE_TIMEOUT = 5.0
+
+
+class BenchmarkConfig(BaseModel):
+    """The load to put on the server."""
+
+    publishers: int = Field(1, ge=1, description="Publisher processes")
+    subscribers: int = Field(1, ge=1, description="Subscriber processes")
+    rate: float = Field(
+        1000, ge=0,
+        description="Events per second of each publisher, 0 for as fast as "
+                    "it can")
+    duration: float = Field(5, gt=0, description="Seconds of publishing")
+    size: int = Field(100, ge=0, description="Bytes of payload per event")
+    encoding: Encoding = Encoding.json
+    batch: bool = False
+    trusted: bool = False
+    port: int = Field(
+        5565,
+        description="The subscriber port of the server; the snapshot port "
+                    "is the next one")
+
+
+class SubscriberReport(NamedTuple):
+    """What a subscriber received."""
+
+    received: int
+    latencies: List[float]
+    first: Optional[float]
+    last: Optional[float]
+
+
+class BenchmarkResult(BaseModel):
+    """The measurements of a benchmark."""
+
+    published: int
+    received: int
+    dropped: int
+    publish_rate: float = Field(..., description="Events per second")
+    throughput: float = Field(
+        ..., description="Events per second received by all subscribers")
+    latency_p50: Optional[float] = Field(None, description="Milliseconds")
+    latency_p99: Optional[float] = Field(None, description="Milliseconds")
+    latency_max: Optional[float] = Field(None, description="Milliseconds")
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Get the nearest-rank percentile of sorted values."""
+    index = max(int(round(fraction * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(config: BenchmarkConfig,
+              published: int,
+              reports: Sequence[SubscriberReport]) -> BenchmarkResult:
+    """
+    Summarize the reports of the subscribers.
+
+    :param config: The benchmark configuration.
+    :param published: The number of events published.
+    :param reports: The report of each subscriber.
+    """
+    received = sum(r.received for r in reports)
+    firsts = [r.first for r in reports if r.first is not None]
+    lasts = [r.last for r in reports if r.last is not None]
+    span = max(lasts) - min(firsts) if firsts else 0
+    latencies = sorted(
+        latency for r in reports for latency in r.latencies)
+    result = BenchmarkResult(
+        published=published,
+        received=received,
+        dropped=published * len(reports) - received,
+        publish_rate=published / config.duration,
+        throughput=received / span if span else 0)
+    if latencies:
+        result.latency_p50 = percentile(latencies, 0.5) * 1000
+        result.latency_p99 = percentile(latencies, 0.99) * 1000
+        result.latency_max = latencies[-1] * 1000
+    return result
+
+
+def _serve(settings: Settings) -> None:
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(server.run(settings))
+
+
+def _event(value: int, text: str) -> Event:
+    return Event(createdOn=datetime.now(),
+                 publisher="app_bench",
+                 data=SampleTwo(val1=value, val2=text))
+
+
+async def _run_publisher(index: int,
+                         config: BenchmarkConfig,
+                         address: str,
+                         started: "multiprocessing.Queue[Any]",
+                         go: ProcessEvent) -> int:
+    pub = publisher.create(address,
+                           batch=config.batch,
+                           encoding=config.encoding)
+    topic = f"{TOPIC_PREFIX}{index}"
+    text = "x" * config.size
+    started.put(("started", index))
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, go.wait)
+
+    total = int(config.rate * config.duration) if config.rate else None
+    start = loop.time()
+    sent = 0
+    while True:
+        elapsed = loop.time() - start
+        if total is None:
+            if elapsed >= config.duration:
+                break
+            due = sent + 100
+        else:
+            if sent >= total:
+                break
+            due = min(int(elapsed * config.rate) + 1, total)
+        sending = None
+        while sent < due:
+            sending = pub.send_nowait(topic, _event(sent, text))
+            sent += 1
+        if sending is not None:
+            # Wait for zmq to take the events, rather than queueing
+            # without bound when publishing faster than it sends
+            await sending
+        await asyncio.sleep(0.001 if config.rate else 0)
+
+    await pub.send(END_TOPIC, _event(sent, ""))
+    pub.close()
+    return sent
+
+
+def _publish(index: int,
+             config: BenchmarkConfig,
+             address: str,
+             results: "multiprocessing.Queue[Any]",
+             go: ProcessEvent) -> None:
+    sent = asyncio.run(_run_publisher(index, config, address, results, go))
+    results.put(("published", index, sent))
+
+
+class _Receiver:
+    """Measures the events a subscriber receives."""
+
+    def __init__(self,
+                 index: int,
+                 config: BenchmarkConfig,
+                 ready: "multiprocessing.Queue[Any]") -> None:
+        self._index = index
+        self._config = config
+        self._ready = ready
+        self.is_ready = False
+        self.active = time.monotonic()
+        self.latencies: List[float] = []
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+
+    async def receive(self, sub: subscriber.Subscriber) -> None:
+        ends = 0
+        async for e in sub:
+            self.active = time.monotonic()
+            if e.topic == PROBE_TOPIC:
+                if not self.is_ready:
+                    self.is_ready = True
+                    self._ready.put(("ready", self._index))
+            elif e.topic == END_TOPIC:
+                ends += 1
+                if ends == self._config.publishers:
+                    return
+            else:
+                now = datetime.now()
+                self.latencies.append(
+                    (now - e.event.createdOn).total_seconds())
+                self.last = now.timestamp()
+                if self.first is None:
+                    self.first = self.last
+
+
+async def _run_subscriber(index: int,
+                          config: BenchmarkConfig,
+                          address: str,
+                          ready: "multiprocessing.Queue[Any]") \
+        -> SubscriberReport:
+    sub = subscriber.create(address, [TOPIC_PREFIX], trusted=config.trusted)
+    receiver = _Receiver(index, config, ready)
+    task = asyncio.ensure_future(receiver.receive(sub))
+    try:
+        while not task.done():
+            await asyncio.wait([task], timeout=1)
+            idle = time.monotonic() - receiver.active
+            if receiver.is_ready and idle > IDLE_TIMEOUT:
+                # The rest of the events, end markers included, were dropped
+                task.cancel()
+                await asyncio.wait([task])
+        if not task.cancelled():
+            task.result()
+    finally:
+        sub.close()
+    return SubscriberReport(received=len(receiver.latencies),
+                            latencies=receiver.latencies,
+                            first=receiver.first,
+                            last=receiver.last)
+
+
+def _subscribe(index: int,
+               config: BenchmarkConfig,
+               address: str,
+               results: "multiprocessing.Queue[Any]") -> None:
+    report = asyncio.run(_run_subscriber(index, config, address, results))
+    results.put(("received", index, report))
+
+
+class _Messages:
+    """The messages of the benchmark processes, by kind."""
+
+    def __init__(self, results: "multiprocessing.Queue[Any]") -> None:
+        self._results = results
+        self._messages: Dict[str, List[Any]] = {}
+
+    def get(self, kind: str) -> List[Any]:
+        return self._messages.get(kind, [])
+
+    def poll(self, timeout: float) -> None:
+        try:
+            message = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return
+        self._messages.setdefault(message[0], []).append(message[1:])
+
+    def wait(self, kind: str, count: int, timeout: float) -> List[Any]:
+        deadline = time.monotonic() + timeout
+        while len(self.get(kind)) < count:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"Timed out waiting for {kind} messages")
+            self.poll(remaining)
+        return self.get(kind)
+
+
+async def _wait_for_server(address: str) -> None:
+    client = snapshot.create(address)
+    try:
+        await asyncio.wait_for(client.get([PROBE_TOPIC]), START_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise RuntimeError("The notify-server did not start")
+    finally:
+        client.close()
+
+
+async def _wait_for_subscribers(address: str,
+                                messages: _Messages,
+                                count: int) -> None:
+    """Publish probes until every subscriber has received one."""
+    probe = publisher.create(address)
+    deadline = time.monotonic() + START_TIMEOUT
+    try:
+        while len(messages.get("ready")) < count:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Subscribers did not start")
+            await probe.send(PROBE_TOPIC, _event(0, ""))
+            messages.poll(0.05)
+    finally:
+        probe.close()
+
+
+async def run(config: BenchmarkConfig) -> BenchmarkResult:
+    """Run a benchmark."""
+    context = multiprocessing.get_context("spawn")
+    results: "multiprocessing.Queue[Any]" = context.Queue()
+    messages = _Messages(results)
+    go = context.Event()
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = Settings(
+            publisher_address=ServerBindAddress(
+                scheme="ipc", path=f"{directory}/notify-server"),
+            subscriber_address=ServerBindAddress(
+                scheme="tcp", host="127.0.0.1", port=config.port),
+            snapshot_address=ServerBindAddress(
+                scheme="tcp", host="127.0.0.1", port=config.port + 1))
+        publisher_address = settings.publisher_address.connection_string()
+        subscriber_address = settings.subscriber_address.connection_string()
+
+        server_process = context.Process(target=_serve, args=(settings,))
+        server_process.start()
+        processes = []
+        try:
+            await _wait_for_server(
+                settings.snapshot_address.connection_string())
+
+            for i in range(config.subscribers):
+                processes.append(context.Process(
+                    target=_subscribe,
+                    args=(i, config, subscriber_address, results)))
+            for i in range(config.publishers):
+                processes.append(context.Process(
+                    target=_publish,
+                    args=(i, config, publisher_address, results, go)))
+            for p in processes:
+                p.start()
+
+            await _wait_for_subscribers(publisher_address,
+                                        messages,
+                                        config.subscribers)
+            messages.wait("started", config.publishers, START_TIMEOUT)
+            go.set()
+
+            timeout = config.duration + START_TIMEOUT + IDLE_TIMEOUT
+            published = messages.wait("published", config.publishers, timeout)
+            received = messages.wait("received", config.subscribers, timeout)
+            for p in processes:
+                p.join()
+        finally:
+            for p in [server_process, *processes]:
+                if p.is_alive():
+                    p.terminate()
+                p.join()
+
+    return summarize(config,
+                     sum(count for _, count in published),
+                     [report for _, report in received])
+
+
+def _print_result(config: BenchmarkConfig, result: BenchmarkResult) -> None:
+    rate = f"{config.rate:g}/s" if config.rate else "unlimited"
+    print(f"publishers: {config.publishers}, "
+          f"subscribers: {config.subscribers}, rate: {rate} each, "
+          f"size: {config.size} bytes, encoding: {config.encoding.value}")
+    print(f"published: {result.published} events "
+          f"({result.publish_rate:.1f}/s)")
+    print(f"received:  {result.received} events "
+          f"({result.throughput:.1f}/s)")
+    expected = result.published * config.subscribers
+    dropped = result.dropped / expected * 100 if expected else 0
+    print(f"dropped:   {result.dropped} ({dropped:.2f}%)")
+    if result.latency_p50 is not None:
+        print(f"latency:   p50 {result.latency_p50:.2f} ms, "
+              f"p99 {result.latency_p99:.2f} ms, "
+              f"max {result.latency_max:.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='opentrons-notify-bench',
+        description='Opentrons notify-server load and latency benchmark')
+    defaults = BenchmarkConfig()
+    parser.add_argument("-p", "--publishers", type=int,
+                        default=defaults.publishers,
+                        help="The number of publishers.")
+    parser.add_argument("-s", "--subscribers", type=int,
+                        default=defaults.subscribers,
+                        help="The number of subscribers.")
+    parser.add_argument("-r", "--rate", type=float, default=defaults.rate,
+                        help="Events per second of each publisher, 0 for "
+                             "as fast as it can.")
+    parser.add_argument("-d", "--duration", type=float,
+                        default=defaults.duration,
+                        help="Seconds of publishing.")
+    parser.add_argument("-b", "--size", type=int, default=defaults.size,
+                        help="Bytes of payload per event.")
+    parser.add_argument("-e", "--encoding",
+                        choices=[e.value for e in Encoding],
+                        default=defaults.encoding.value,
+                        help="The encoding of events.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Batch the events of publishers.")
+    parser.add_argument("--trusted", action="store_true",
+                        help="Decode events without validating them.")
+    parser.add_argument("--port", type=int, default=defaults.port,
+                        help="The subscriber port of the server; the "
+                             "snapshot port is the next one.")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the result as json.")
+    args = parser.parse_args()
+    bench_config = BenchmarkConfig(
+        publishers=args.publishers,
+        subscribers=args.subscribers,
+        rate=args.rate,
+        duration=args.duration,
+        size=args.size,
+        encoding=args.encoding,
+        batch=args.batch,
+        trusted=args.trusted,
+        port=args.port)
+    bench_result = asyncio.run(run(bench_config))
+    if args.json:
+        print(bench_result.json())
+    else:
+        _print_result(bench_config, bench_result)
@@ -1,18 +1,38 @@
 """Subscriber client application."""
 import asyncio
 import argparse
-from typing import List
+from typing import List, Optional
 
+from notify_server.clients import snapshot
+from notify_server.clients.serdes import TopicEvent
 from notify_server.clients.subscriber import create
 
 
-async def run(host_address: str, topics: List[str]) -> None:
+def _print_event(e: TopicEvent) -> None:
+    print(f"{e.event.createdOn}: topic={e.topic}, "
+          f"publisher={e.event.publisher}, data={e.event.data}")
+
+
+async def run(host_address: str,
+              topics: List[str],
+              snapshot_address: Optional[str] = None) -> None:
     """Run the subscriber client."""
     print(f"Connecting to {host_address} for topics '{topics}'")
     sub = create(host_address, topics)
+    last_sequence = 0
+    if snapshot_address:
+        # Subscribed first, so that no event is missed in between
+        client = snapshot.create(snapshot_address)
+        snap = await client.get(topics)
+        client.close()
+        for e in snap.events:
+            _print_event(e)
+        last_sequence = snap.sequence
     async for e in sub:
-        print(f"{e.event.createdOn}: topic={e.topic}, "
-              f"publisher={e.event.publisher}, data={e.event.data}")
+        if e.sequence is not None and e.sequence <= last_sequence:
+            # Already in the snapshot
+            continue
+        _print_event(e)
 
 
 if __name__ == '__main__':
@@ -25,10 +45,17 @@ if __name__ == '__main__':
         required=True,
         help="The address of the notify-server, for "
              "example tcp://localhost:5555")
+    parser.add_argument(
+        "-r",
+        "--snapshot-address",
+        help="The snapshot address of the notify-server, for example "
+             "tcp://localhost:5557. If given, the last event of each topic "
+             "is printed first.")
     parser.add_argument(
         "topics",
         nargs="+",
         help="At least one topic that will be subscribed to.")
     args = parser.parse_args()
     asyncio.run(run(host_address=args.server_address,
-                    topics=args.topics))
+                    topics=args.topics,
+                    snapshot_address=args.snapshot_address))
@@ -0,0 +1,36 @@
+"""Conflation of events of high frequency topics."""
+from typing import Dict, Mapping, Union
+
+
+class ConflationWindows:
+    """
+    The conflation windows of topics.
+
+    Within the window of a topic, only the newest event of the topic is
+    sent. Topics match windows by prefix, like subscriptions; the longest
+    matching prefix wins.
+    """
+
+    def __init__(self, windows: Mapping[str, float]) -> None:
+        """
+        Construct.
+
+        :param windows: The window of each topic prefix, in seconds.
+        """
+        self._windows = sorted(
+            ((prefix.encode('utf-8'), window)
+             for prefix, window in windows.items() if window > 0),
+            key=lambda item: len(item[0]), reverse=True)
+        self._cache: Dict[bytes, float] = {}
+
+    def window(self, topic: Union[str, bytes]) -> float:
+        """Get the conflation window of a topic, 0 if it has none."""
+        if isinstance(topic, str):
+            topic = topic.encode('utf-8')
+        try:
+            return self._cache[topic]
+        except KeyError:
+            window = next((w for prefix, w in self._windows
+                           if topic.startswith(prefix)), 0.0)
+            self._cache[topic] = window
+            return window
@@ -0,0 +1,219 @@
+"""
+Encodings of events in frames.
+
+Events are json by default. Msgpack is a compact alternative, used when
+the optional msgpack package is installed and a publisher asks for it.
+A msgpack frame starts with a byte giving the version of its schema, which
+json frames never start with, so decoders tell the encodings apart.
+
+Validating an event with pydantic is most of the cost of decoding it.
+Events from trusted publishers can skip validation: their payload type is
+looked up from their event name and the models are built directly.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from pydantic.fields import ModelField, SHAPE_SINGLETON
+
+from notify_server.models.event import Event
+from notify_server.models.payload_type import PayloadType
+
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    msgpack = None
+
+
+class Encoding(str, Enum):
+    """The encodings of events."""
+
+    json = "json"
+    msgpack = "msgpack"
+
+
+# The first byte of msgpack frames
+MSGPACK_SCHEMA_VERSION = 1
+_MSGPACK_PREFIX = bytes([MSGPACK_SCHEMA_VERSION])
+
+
+def check_encoding(encoding: Encoding) -> None:
+    """
+    Check that an encoding can be used.
+
+    :raises: ValueError if msgpack is asked for but not installed.
+    """
+    if encoding == Encoding.msgpack and msgpack is None:
+        raise ValueError("The msgpack encoding needs the msgpack package")
+
+
+def encode(event: Event, encoding: Encoding = Encoding.json) -> bytes:
+    """
+    Encode an event.
+
+    :raises: ValueError, TypeError if the event cannot be encoded.
+    """
+    if encoding == Encoding.msgpack:
+        check_encoding(encoding)
+        packed: bytes = msgpack.packb(_to_primitive(event))
+        return _MSGPACK_PREFIX + packed
+    # The same json as event.json(), without building a dict of the event
+    # and looking up an encoder for each value
+    return json.dumps(_to_primitive(event)).encode('utf-8')
+
+
+def decode(data: bytes, trusted: bool = False) -> Event:
+    """
+    Decode an event in either encoding.
+
+    :param data: The encoded event.
+    :param trusted: Whether the event comes from a trusted publisher, so
+        that it need not be validated.
+    :raises: ValueError if the event is malformed.
+    """
+    if data[:1] == _MSGPACK_PREFIX:
+        if msgpack is None:
+            raise ValueError("Cannot decode msgpack without msgpack package")
+        try:
+            values = msgpack.unpackb(data[1:])
+        except Exception as e:
+            raise ValueError("Malformed msgpack event") from e
+    elif trusted:
+        values = json.loads(data)
+    else:
+        return Event.parse_raw(data)
+
+    if trusted:
+        try:
+            return _construct_event(values)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            # Not what a trusted publisher sends; validate to find out why
+            pass
+    return Event.parse_obj(values)
+
+
+def _to_primitive(value: Any) -> Any:
+    """Convert a model to the types json and msgpack support."""
+    value_type = type(value)
+    try:
+        convert = _to_primitive_by_type[value_type]
+    except KeyError:
+        convert = _to_primitive_converter(value_type)
+        _to_primitive_by_type[value_type] = convert
+    return convert(value)
+
+
+def _to_primitive_converter(value_type: type) -> Callable[[Any], Any]:
+    if issubclass(value_type, BaseModel):
+        return lambda v: {k: _to_primitive(f) for k, f in v.__dict__.items()}
+    if issubclass(value_type, Enum):
+        return lambda v: v.value
+    if issubclass(value_type, datetime):
+        return lambda v: v.isoformat()
+    if issubclass(value_type, (list, tuple)):
+        return lambda v: [_to_primitive(i) for i in v]
+    if issubclass(value_type, dict):
+        return lambda v: {k: _to_primitive(i) for k, i in v.items()}
+    return lambda v: v
+
+
+_to_primitive_by_type: Dict[type, Callable[[Any], Any]] = {}
+
+
+def _payload_types() -> Dict[Tuple[str, str], Type[BaseModel]]:
+    """Map the event name of each payload type to the type."""
+    types = {}
+    for payload_type in PayloadType.__args__:  # type: ignore
+        for name in ('event', 'type'):
+            field = payload_type.__fields__.get(name)
+            if field is not None and field.default is not None:
+                default = field.default
+                key = default.value if isinstance(default, Enum) else default
+                types[(name, key)] = payload_type
+    return types
+
+
+_PAYLOAD_TYPES = _payload_types()
+
+
+def _construct_event(values: Dict[str, Any]) -> Event:
+    data = values['data']
+    name = 'event' if 'event' in data else 'type'
+    payload_type = _PAYLOAD_TYPES[(name, data[name])]
+    event: Event = _new(Event, {
+        'createdOn': datetime.fromisoformat(values['createdOn']),
+        'publisher': values['publisher'],
+        'data': _construct(payload_type, data)})
+    return event
+
+
+def _construct(model: Type[BaseModel], values: Dict[str, Any]) -> BaseModel:
+    """Build a model and its submodels without validation."""
+    try:
+        converters = _field_converters[model]
+    except KeyError:
+        converters = {name: _field_converter(model, field)
+                      for name, field in model.__fields__.items()}
+        _field_converters[model] = converters
+        _required[model] = frozenset(
+            name for name, field in model.__fields__.items()
+            if field.required)
+    if not _required[model].issubset(values):
+        raise ValueError("Missing a required field")
+    fields = {}
+    for name, value in values.items():
+        convert = converters[name]
+        fields[name] = value if convert is None else convert(value)
+    instance: BaseModel = _new(model, fields)
+    return instance
+
+
+def _field_converter(model: Type[BaseModel],
+                     field: ModelField) -> Optional[Callable[[Any], Any]]:
+    """Get the function building the value of a field, if it needs one."""
+    if field.shape != SHAPE_SINGLETON:
+        return _cannot_construct
+    field_type = field.type_
+    if isinstance(field_type, type):
+        if issubclass(field_type, BaseModel):
+            return partial(_construct, field_type)
+        if issubclass(field_type, Enum):
+            return field_type
+        if issubclass(field_type, datetime):
+            return datetime.fromisoformat
+    return None
+
+
+def _cannot_construct(value: Any) -> Any:
+    raise TypeError("Cannot construct a field of this shape")
+
+
+_field_converters: \
+    Dict[Type[BaseModel], Dict[str, Optional[Callable[[Any], Any]]]] = {}
+_required: Dict[Type[BaseModel], FrozenSet[str]] = {}
+
+
+_defaults: Dict[Type[BaseModel], Dict[str, Any]] = {}
+
+
+def _new(model: Type[BaseModel], values: Dict[str, Any]) -> Any:
+    """
+    Create a model like BaseModel.construct does.
+
+    The defaults are not copied; they are all immutable in event models.
+    """
+    defaults = _defaults.get(model)
+    if defaults is None:
+        defaults = {name: field.default
+                    for name, field in model.__fields__.items()
+                    if not field.required}
+        _defaults[model] = defaults
+    instance = model.__new__(model)
+    object.__setattr__(instance, '__dict__', {**defaults, **values})
+    object.__setattr__(instance, '__fields_set__', set(values))
+    return instance
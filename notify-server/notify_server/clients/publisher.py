@@ -1,10 +1,13 @@
 """A publisher client."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from asyncio import Future
-from typing import Any
+from typing import Any, Dict, List, Mapping, Optional
 
+from notify_server.clients.conflation import ConflationWindows
+from notify_server.clients.encoding import Encoding, check_encoding
 from notify_server.clients.serdes import to_frames
 from notify_server.models.event import Event
 from notify_server.network.connection import create_push, Connection
@@ -12,31 +15,117 @@ from notify_server.network.connection import create_push, Connection
 log = logging.getLogger(__name__)
 
 
-def create(host_address: str) -> Publisher:
+def create(host_address: str,
+           conflation_windows: Optional[Mapping[str, float]] = None,
+           batch: bool = False,
+           encoding: Encoding = Encoding.json) -> Publisher:
     """
     Construct a publisher.
 
     :param host_address: uri to connect to.
+    :param conflation_windows: The conflation window, in seconds, of topics
+        starting with each prefix.
+    :param batch: Whether to send events of a topic published together in
+        one message.
+    :param encoding: The encoding of events.
+    :raises: ValueError if the encoding cannot be used.
     """
-    return Publisher(connection=create_push(host_address))
+    check_encoding(encoding)
+    return Publisher(connection=create_push(host_address),
+                     conflation_windows=conflation_windows,
+                     batch=batch,
+                     encoding=encoding)
+
+
+class _Pending:
+    """Events of a topic waiting to be sent."""
+
+    def __init__(self, sent: Future[Any]) -> None:
+        self.events: List[bytes] = []
+        self.sent = sent
 
 
 class Publisher:
-    """Publisher class."""
+    """
+    Publisher class.
+
+    By default each event is sent as it is published. Events of a topic
+    with a conflation window are sent at most once per window; an event
+    published before the window is over replaces the one waiting. With
+    batching, the events of a topic published in the same iteration of the
+    event loop are sent in one message.
+    """
 
-    def __init__(self, connection: Connection) -> None:
+    def __init__(self,
+                 connection: Connection,
+                 conflation_windows: Optional[Mapping[str, float]] = None,
+                 batch: bool = False,
+                 encoding: Encoding = Encoding.json) -> None:
         """Construct a Publisher."""
         self._connection = connection
+        self._encoding = encoding
+        self._windows = ConflationWindows(conflation_windows or {})
+        self._batch = batch
+        self._pending: Dict[str, _Pending] = {}
+        self._next_send: Dict[str, float] = {}
 
     async def send(self, topic: str, event: Event) -> None:
         """Publish an event to a topic."""
         await self.send_nowait(topic=topic, event=event)
 
     def send_nowait(self, topic: str, event: Event) -> Future[Any]:
-        """Publish an event to a topic without waiting for completion."""
-        frames = to_frames(topic=topic, event=event)
-        return self._connection.send_multipart(frames)
+        """
+        Publish an event to a topic without waiting for completion.
+
+        The future is done when the message with the event is sent, or with
+        the event that replaced it.
+        """
+        frames = to_frames(topic=topic, event=event, encoding=self._encoding)
+        window = self._windows.window(topic)
+        if not window and not self._batch:
+            return self._connection.send_multipart(frames)
+
+        pending = self._pending.get(topic)
+        if pending is None:
+            loop = asyncio.get_event_loop()
+            pending = _Pending(loop.create_future())
+            self._pending[topic] = pending
+            delay = self._next_send.get(topic, 0) - loop.time()
+            loop.call_later(max(delay, 0), self._flush, topic)
+        if window:
+            pending.events.clear()
+        pending.events.append(frames[1])
+        return pending.sent
+
+    def _flush(self, topic: str) -> None:
+        pending = self._pending.pop(topic, None)
+        if pending is None:
+            return
+        window = self._windows.window(topic)
+        if window:
+            self._next_send[topic] = \
+                asyncio.get_event_loop().time() + window
+        done = pending.sent
+        sent = self._connection.send_multipart(
+            [topic.encode('utf-8'), *pending.events])
+        asyncio.ensure_future(sent).add_done_callback(
+            lambda f: _copy_result(f, done))
 
     def close(self) -> None:
-        """Close the connection."""
+        """Send the events waiting and close the connection."""
+        for topic in list(self._pending):
+            self._flush(topic)
         self._connection.close()
+
+
+def _copy_result(source: Future[Any], destination: Future[Any]) -> None:
+    if destination.done():
+        return
+    if source.cancelled():
+        destination.cancel()
+        return
+    exception = source.exception()
+    if exception is not None:
+        destination.set_exception(exception)
+    else:
+        destination.set_result(source.result())
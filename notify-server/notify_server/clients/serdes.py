@@ -1,10 +1,12 @@
 """Methods and types for serializing and deserializing frames."""
 from __future__ import annotations
 
-from typing import List
+import json
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from notify_server.clients.encoding import Encoding, encode, decode
 from notify_server.models.event import Event
 
 
@@ -20,21 +22,26 @@ class FrameEncodingError(Exception):
     pass
 
 
-def to_frames(topic: str, event: Event) -> List[bytes]:
+def to_frames(topic: str,
+              event: Event,
+              encoding: Encoding = Encoding.json) -> List[bytes]:
     """
     Create zmq frames from members.
 
     :raises: FrameEncodingError
     """
     try:
-        event_json = event.json()
+        data = encode(event, encoding)
     except (ValueError, TypeError) as e:
-        # Could not serialize event to json.
+        # Could not serialize event.
         raise FrameEncodingError() from e
 
-    return [
-        bytes(v, 'utf-8') for v in (topic, event_json,)
-    ]
+    return [topic.encode('utf-8'), data]
+
+
+def add_sequence(frames: List[bytes], sequence: int) -> List[bytes]:
+    """Add the sequence number given by the server to an event's frames."""
+    return frames[:2] + [str(sequence).encode('utf-8')]
 
 
 class TopicEvent(BaseModel):
@@ -42,21 +49,111 @@ class TopicEvent(BaseModel):
 
     topic: str
     event: Event
+    sequence: Optional[int] = \
+        Field(None,
+              description="The position of the event among all events "
+                          "published by the server")
 
 
-def from_frames(frames: List[bytes]) -> TopicEvent:
+def from_frames(frames: List[bytes], trusted: bool = False) -> TopicEvent:
     """
     Create an object from a zmq frame.
 
-    The frame must have two entries: a topic, a json serialized Event
-    object.
+    The frame must have two entries: a topic, a serialized Event object.
+    A third entry, if there is one, is the sequence number given by the
+    server.
 
+    :param frames: The frames.
+    :param trusted: Whether the event is from a trusted publisher and need
+        not be validated.
     :raises: MalformedFrame
     """
     try:
-        return TopicEvent(
+        return TopicEvent.construct(
             topic=frames[0].decode('utf-8'),
-            event=Event.parse_raw((frames[1]))
+            event=decode(frames[1], trusted),
+            sequence=int(frames[2]) if len(frames) > 2 else None
         )
     except (ValueError, IndexError, AttributeError) as e:
         raise MalformedFrames() from e
+
+
+def from_batch_frames(frames: List[bytes],
+                      trusted: bool = False) -> List[TopicEvent]:
+    """
+    Create the objects of a zmq frame that may hold several events.
+
+    The frame has a topic followed by the serialized Event object and
+    sequence number of each event. A frame with only a topic and a single
+    Event object holds one event with no sequence number.
+
+    :raises: MalformedFrame
+    """
+    if len(frames) == 2:
+        return [from_frames(frames, trusted)]
+    if len(frames) < 3 or len(frames) % 2 == 0:
+        raise MalformedFrames()
+    return [from_frames([frames[0], frames[i], frames[i + 1]], trusted)
+            for i in range(1, len(frames), 2)]
+
+
+class SnapshotRequest(BaseModel):
+    """A request for the latest events of some topics."""
+
+    topics: List[str] = \
+        Field(..., description="The topics to get events of")
+    since: Optional[int] = \
+        Field(None,
+              description="The sequence number of the last event the "
+                          "client received. If the events after it are "
+                          "still kept by the server, they are returned "
+                          "instead of the last event of each topic.")
+
+
+class Snapshot(BaseModel):
+    """The reply to a snapshot request."""
+
+    sequence: int = \
+        Field(..., description="The sequence number of the latest event "
+                               "published to any topic")
+    replayed: bool = \
+        Field(..., description="Whether the events are all those after "
+                               "the requested sequence number, rather than "
+                               "the last event of each topic")
+    events: List[TopicEvent]
+
+
+def snapshot_to_frames(sequence: int,
+                       replayed: bool,
+                       events: List[List[bytes]]) -> List[bytes]:
+    """
+    Create the frames of a snapshot reply.
+
+    The first frame is a json header, followed by the topic, event and
+    sequence frames of each event as they were published.
+    """
+    header = {'sequence': sequence, 'replayed': replayed}
+    frames = [json.dumps(header).encode('utf-8')]
+    for event_frames in events:
+        frames.extend(event_frames)
+    return frames
+
+
+def snapshot_from_frames(frames: List[bytes]) -> Snapshot:
+    """
+    Create a snapshot from the frames of a snapshot reply.
+
+    :raises: MalformedFrame
+    """
+    if not frames or (len(frames) - 1) % 3:
+        raise MalformedFrames()
+    try:
+        header = json.loads(frames[0])
+        return Snapshot(
+            sequence=header['sequence'],
+            replayed=header['replayed'],
+            events=[from_frames(frames[i:i + 3])
+                    for i in range(1, len(frames), 3)]
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise MalformedFrames() from e
@@ -0,0 +1,57 @@
+"""A snapshot client."""
+from __future__ import annotations
+
+import logging
+from typing import Optional, Sequence
+
+from notify_server.clients.serdes import Snapshot, SnapshotRequest, \
+    snapshot_from_frames
+from notify_server.network.connection import create_request, Connection
+
+log = logging.getLogger(__name__)
+
+
+def create(host_address: str) -> SnapshotClient:
+    """
+    Create a snapshot client.
+
+    :param host_address: The server notify_server snapshot address
+    :return: A SnapshotClient instance.
+    """
+    return SnapshotClient(connection=create_request(host_address))
+
+
+class SnapshotClient:
+    """
+    Async client getting the latest events from the server.
+
+    A subscriber that starts after events were published gets the last
+    event of each topic with a snapshot. Sequence numbers tell it which
+    events it then receives are already in the snapshot. A subscriber that
+    missed events, for instance while reconnecting, asks for the events
+    since the last one it received.
+    """
+
+    def __init__(self, connection: Connection) -> None:
+        """Construct a SnapshotClient."""
+        self._connection = connection
+
+    async def get(self,
+                  topics: Sequence[str],
+                  since: Optional[int] = None) -> Snapshot:
+        """
+        Get the latest events of topics.
+
+        :param topics: The topics to get events of.
+        :param since: The sequence number of the last event received. If
+            the server still has the events after it, the snapshot is those
+            events rather than the last event of each topic.
+        :raises: MalformedFrames
+        """
+        request = SnapshotRequest(topics=list(topics), since=since)
+        await self._connection.send_multipart([request.json().encode()])
+        return snapshot_from_frames(await self._connection.recv_multipart())
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._connection.close()
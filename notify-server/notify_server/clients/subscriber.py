@@ -3,8 +3,9 @@ from __future__ import annotations
 
 import logging
 import typing
+from collections import deque
 
-from notify_server.clients.serdes import TopicEvent, from_frames
+from notify_server.clients.serdes import TopicEvent, from_batch_frames
 from notify_server.network.connection import create_subscriber, Connection
 
 log = logging.getLogger(__name__)
@@ -12,24 +13,30 @@ log = logging.getLogger(__name__)
 
 def create(
         host_address: str,
-        topics: typing.Sequence[str]) -> Subscriber:
+        topics: typing.Sequence[str],
+        trusted: bool = False) -> Subscriber:
     """
     Create a subscriber.
 
     :param host_address: The server notify_server address
     :param topics: The topics to subscribe to.
+    :param trusted: Whether all publishers to the server are trusted, so
+        that events need not be validated.
     :return: A Subscriber instance.
     """
-    return Subscriber(create_subscriber(host_address, topics))
+    return Subscriber(create_subscriber(host_address, topics), trusted)
 
 
 class Subscriber:
     """Async Subscriber class."""
 
     def __init__(self,
-                 connection: Connection) -> None:
+                 connection: Connection,
+                 trusted: bool = False) -> None:
         """Construct."""
         self._connection = connection
+        self._trusted = trusted
+        self._received: typing.Deque[TopicEvent] = deque()
 
     def close(self) -> None:
         """Stop the subscriber task."""
@@ -37,8 +44,10 @@ class Subscriber:
 
     async def next_event(self) -> TopicEvent:
         """Get next event."""
-        s = await self._connection.recv_multipart()
-        return from_frames(s)
+        if not self._received:
+            s = await self._connection.recv_multipart()
+            self._received.extend(from_batch_frames(s, self._trusted))
+        return self._received.popleft()
 
     def __aiter__(self) -> 'Subscriber':
         """Create an async iterator."""
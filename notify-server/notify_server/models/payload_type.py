@@ -2,6 +2,7 @@
 from typing import Union
 
 from notify_server.models.hardware_event import HardwareEventPayload
+from notify_server.models.protocol_event import ProtocolEventPayload
 from notify_server.models.sample_events import SampleOne, SampleTwo
 
 
@@ -10,4 +11,5 @@ PayloadType = Union[
     SampleOne,
     SampleTwo,
     HardwareEventPayload,
+    ProtocolEventPayload,
 ]
@@ -0,0 +1,7 @@
+"""Definitions of protocol event payloads."""
+from typing import Union
+
+from .analysis import ProtocolAnalysisPayload
+
+
+ProtocolEventPayload = Union[ProtocolAnalysisPayload]
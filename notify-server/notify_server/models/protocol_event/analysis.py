@@ -0,0 +1,15 @@
+"""Model the protocol analysis event."""
+from typing_extensions import Literal
+
+from pydantic import BaseModel, Field
+
+from notify_server.models.protocol_event.names import ProtocolEventName
+
+
+class ProtocolAnalysisPayload(BaseModel):
+    """The payload in an "analysis_complete" event."""
+
+    event: Literal[ProtocolEventName.ANALYSIS_COMPLETE] = \
+        ProtocolEventName.ANALYSIS_COMPLETE
+    protocolId: str = \
+        Field(..., description="The protocol that was analyzed")
@@ -0,0 +1,8 @@
+"""The protocol event names."""
+from enum import Enum
+
+
+class ProtocolEventName(str, Enum):
+    """The protocol event name enumeration."""
+
+    ANALYSIS_COMPLETE = "analysis_complete"
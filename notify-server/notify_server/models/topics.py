@@ -6,3 +6,4 @@ class RobotEventTopics(str, enum.Enum):
     """All robot-server event topics."""
 
     HARDWARE_EVENTS = "hardware_events"
+    PROTOCOL_EVENTS = "protocol_events"
@@ -61,6 +61,28 @@ def create_subscriber(address: str, topics: Sequence[str]) -> Connection:
     return Connection(sock)
 
 
+def create_reply(address: str) -> Connection:
+    """Create a REP server connection."""
+    ctx = Context.instance()
+    sock = ctx.socket(zmq.REP)
+
+    log.info("Replier binding to %s", address)
+    sock.bind(address)
+
+    return Connection(sock)
+
+
+def create_request(address: str) -> Connection:
+    """Create a REQ client connection."""
+    ctx = Context.instance()
+    sock = ctx.socket(zmq.REQ)
+
+    log.info("Requester connecting to %s", address)
+    sock.connect(address)
+
+    return Connection(sock)
+
+
 class Connection:
     """Wrapper for a connected zmq socket."""
 
@@ -0,0 +1,74 @@
+"""The history of published events."""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from notify_server.clients.serdes import add_sequence
+
+
+class EventHistory:
+    """
+    Recent events, numbered in the order they were published.
+
+    The last event of each topic is kept, along with a bounded buffer of the
+    most recent events of any topic. Events are kept as the frames they are
+    published as.
+    """
+
+    def __init__(self, max_replay: int) -> None:
+        """
+        Construct.
+
+        :param max_replay: The number of recent events that can be replayed.
+        """
+        self._sequence = 0
+        self._last: Dict[bytes, List[bytes]] = {}
+        self._replay: Deque[Tuple[int, List[bytes]]] = \
+            deque(maxlen=max_replay)
+
+    @property
+    def sequence(self) -> int:
+        """Get the sequence number of the last event."""
+        return self._sequence
+
+    def add(self, frames: List[bytes]) -> List[bytes]:
+        """
+        Record a published event.
+
+        :param frames: The topic and event frames of the event.
+        :return: The event's frames with its sequence number added.
+        """
+        self._sequence += 1
+        frames = add_sequence(frames, self._sequence)
+        self._last[frames[0]] = frames
+        self._replay.append((self._sequence, frames))
+        return frames
+
+    def last_events(self, topics: Sequence[str]) -> List[List[bytes]]:
+        """Get the last event of each topic, in the order published."""
+        prefixes = _prefixes(topics)
+        events = [frames for topic, frames in self._last.items()
+                  if topic.startswith(prefixes)]
+        return sorted(events, key=lambda frames: int(frames[2]))
+
+    def replay(self,
+               topics: Sequence[str],
+               since: int) -> Optional[List[List[bytes]]]:
+        """
+        Get the events of topics published after a sequence number.
+
+        :return: The events, or None if some of them are no longer kept.
+        """
+        if since > self._sequence:
+            # The sequence is from before the server restarted
+            return None
+        oldest = self._replay[0][0] if self._replay else self._sequence + 1
+        if since < oldest - 1:
+            return None
+        prefixes = _prefixes(topics)
+        return [frames for sequence, frames in self._replay
+                if sequence > since and frames[0].startswith(prefixes)]
+
+
+def _prefixes(topics: Sequence[str]) -> Tuple[bytes, ...]:
+    # Topics match as they do for subscribers, by prefix
+    return tuple(t.encode('utf-8') for t in topics)
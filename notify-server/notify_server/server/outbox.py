@@ -0,0 +1,100 @@
+"""Events waiting to be published to subscribers."""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from notify_server.clients.conflation import ConflationWindows
+
+log = logging.getLogger(__name__)
+
+
+class Outbox:
+    """
+    Events waiting to be published, conflated and batched by topic.
+
+    An event of a topic with a conflation window is sent once the window
+    since the topic was last sent has passed; until then, each newer event
+    replaces it. All waiting events of a topic are sent together, in
+    batches of up to max_batch events.
+    """
+
+    def __init__(self,
+                 max_queued: int,
+                 windows: ConflationWindows,
+                 max_batch: int) -> None:
+        """
+        Construct.
+
+        :param max_queued: The most events that may wait. Beyond that, the
+            oldest event of the topic with the most waiting is dropped.
+        :param windows: The conflation windows of topics.
+        :param max_batch: The most events sent in one message.
+        """
+        self._max_queued = max_queued
+        self._windows = windows
+        self._max_batch = max(max_batch, 1)
+        self._pending: Dict[bytes, List[Tuple[bytes, bytes]]] = {}
+        self._count = 0
+        self._next_send: Dict[bytes, float] = {}
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        """Get the number of events waiting."""
+        return self._count
+
+    def put(self, frames: List[bytes]) -> None:
+        """
+        Add an event to be published.
+
+        :param frames: The topic, event and sequence frames of the event.
+        """
+        topic, event, sequence = frames
+        pending = self._pending.get(topic)
+        if pending and self._windows.window(topic):
+            self._count -= len(pending)
+            pending.clear()
+        elif self._count >= self._max_queued and self._pending:
+            self._drop()
+        self._pending.setdefault(topic, []).append((event, sequence))
+        self._count += 1
+        self._changed.set()
+
+    async def get(self) -> List[List[bytes]]:
+        """Wait for events that are due, and take them as messages."""
+        loop = asyncio.get_event_loop()
+        while True:
+            now = loop.time()
+            due = [topic for topic in self._pending
+                   if self._next_send.get(topic, 0) <= now]
+            if due:
+                break
+            self._changed.clear()
+            timeout: Optional[float] = min(
+                (self._next_send[topic] - now for topic in self._pending),
+                default=None)
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        messages = []
+        for topic in due:
+            pending = self._pending.pop(topic)
+            self._count -= len(pending)
+            window = self._windows.window(topic)
+            if window:
+                self._next_send[topic] = now + window
+            for i in range(0, len(pending), self._max_batch):
+                message = [topic]
+                for event, sequence in pending[i:i + self._max_batch]:
+                    message.extend((event, sequence))
+                messages.append(message)
+        return messages
+
+    def _drop(self) -> None:
+        topic = max(self._pending, key=lambda t: len(self._pending[t]))
+        _, sequence = self._pending[topic].pop(0)
+        if not self._pending[topic]:
+            del self._pending[topic]
+        self._count -= 1
+        log.warning("Subscribers are behind. Dropping event %s", sequence)
@@ -2,32 +2,44 @@
 
 import logging
 import asyncio
-from asyncio import Queue
+from typing import List
 
+from notify_server.clients.conflation import ConflationWindows
+from notify_server.clients.serdes import SnapshotRequest, snapshot_to_frames
 from notify_server.network.connection import create_publisher, create_pull, \
-    Connection
+    create_reply, Connection
+from notify_server.server.history import EventHistory
+from notify_server.server.outbox import Outbox
 from notify_server.settings import Settings
 
 log = logging.getLogger(__name__)
 
 
 async def _publisher_server_task(connection: Connection,
-                                 queue: Queue) -> None:
+                                 outbox: Outbox,
+                                 history: EventHistory) -> None:
     """
     Run a task that reads multipart messages: topic, data.
 
     This is the publisher server. Clients connect using zmq.PUSH pattern and
-    send messages to topics. Each topic, data pair is enqueued in queue.
+    send messages to topics; a message may hold several events of its
+    topic. Each event is numbered, recorded in the history and put in the
+    outbox.
 
     :param connection: The network connection.
-    :param queue: Queue for received messages.
+    :param outbox: Outbox for received events.
+    :param history: The history of published events.
     :return: None
     """
     try:
         while True:
             m = await connection.recv_multipart()
             log.debug("Event: %s", m)
-            await queue.put(m)
+            if len(m) < 2:
+                log.warning("Discarding malformed event: %s", m)
+                continue
+            for event in m[1:]:
+                outbox.put(history.add([m[0], event]))
     except asyncio.CancelledError:
         log.exception("Done")
     finally:
@@ -35,19 +47,58 @@ async def _publisher_server_task(connection: Connection,
 
 
 async def _subscriber_server_task(connection: Connection,
-                                  queue: Queue) -> None:
+                                  outbox: Outbox) -> None:
     """
     Run a task that publishes messages to subscribers.
 
     :param connection: The network connection.
-    :param queue: The queue of multipart messages to send
+    :param outbox: The events to send
     :return: None
     """
     try:
         while True:
-            s = await queue.get()
-            log.debug("Publishing: %s", s)
-            await connection.send_multipart(s)
+            for s in await outbox.get():
+                log.debug("Publishing: %s", s)
+                await connection.send_multipart(s)
+    except asyncio.CancelledError:
+        log.exception("Done")
+    finally:
+        connection.close()
+
+
+def _snapshot(request: List[bytes], history: EventHistory) -> List[bytes]:
+    """Create the reply to a snapshot request."""
+    try:
+        r = SnapshotRequest.parse_raw(request[0])
+    except (ValueError, IndexError):
+        log.warning("Malformed snapshot request: %s", request)
+        return snapshot_to_frames(history.sequence, False, [])
+    if r.since is not None:
+        events = history.replay(r.topics, r.since)
+        if events is not None:
+            return snapshot_to_frames(history.sequence, True, events)
+    return snapshot_to_frames(history.sequence,
+                              False,
+                              history.last_events(r.topics))
+
+
+async def _snapshot_server_task(connection: Connection,
+                                history: EventHistory) -> None:
+    """
+    Run a task that replies to snapshot requests.
+
+    Clients connect using the zmq.REQ pattern to get the last event of
+    topics, or the events they missed, when they start subscribing.
+
+    :param connection: The network connection.
+    :param history: The history of published messages.
+    :return: None
+    """
+    try:
+        while True:
+            request = await connection.recv_multipart()
+            log.debug("Snapshot request: %s", request)
+            await connection.send_multipart(_snapshot(request, history))
     except asyncio.CancelledError:
         log.exception("Done")
     finally:
@@ -56,18 +107,28 @@ async def _subscriber_server_task(connection: Connection,
 
 async def run(settings: Settings) -> None:
     """Run the server tasks. Will not return."""
-    queue: Queue = Queue()
+    outbox = Outbox(max_queued=settings.max_queued_events,
+                    windows=ConflationWindows(settings.conflation_windows),
+                    max_batch=settings.max_batch_events)
+    history = EventHistory(max_replay=settings.max_replay_events)
 
     subtask = asyncio.create_task(
         _subscriber_server_task(
             create_publisher(settings.subscriber_address.connection_string()),
-            queue
+            outbox
         )
     )
     pubtask = asyncio.create_task(
         _publisher_server_task(
             create_pull(settings.publisher_address.connection_string()),
-            queue
+            outbox,
+            history
+        )
+    )
+    snapshottask = asyncio.create_task(
+        _snapshot_server_task(
+            create_reply(settings.snapshot_address.connection_string()),
+            history
         )
     )
-    await asyncio.gather(subtask, pubtask)
+    await asyncio.gather(subtask, pubtask, snapshottask)
@@ -1,5 +1,7 @@
 """Settings class."""
 
+from typing import Dict
+
 from typing_extensions import Literal
 from pydantic import BaseSettings, BaseModel, Field
 
@@ -26,6 +28,31 @@ class Settings(BaseSettings):
 
     publisher_address: ServerBindAddress = ServerBindAddress(scheme="ipc")
     subscriber_address: ServerBindAddress = ServerBindAddress(scheme="tcp")
+    snapshot_address: ServerBindAddress = \
+        ServerBindAddress(scheme="tcp", port=5557)
+
+    max_queued_events: int = Field(
+        1000,
+        description="The most events that may wait to be published. When "
+                    "subscribers fall further behind, the oldest events of "
+                    "the busiest topic are dropped."
+    )
+    max_batch_events: int = Field(
+        100,
+        description="The most events of a topic sent to subscribers in one "
+                    "message."
+    )
+    conflation_windows: Dict[str, float] = Field(
+        {},
+        description="The conflation window, in seconds, of topics starting "
+                    "with each prefix. Within the window only the newest "
+                    "event of a topic is sent to subscribers."
+    )
+    max_replay_events: int = Field(
+        1000,
+        description="The number of recent events kept for subscribers to "
+                    "catch up on through the snapshot address."
+    )
 
     production: bool = Field(
         True,
@@ -47,6 +47,9 @@ INSTALL_REQUIRES = [
     'pyzmq==19.0.2',
     'pydantic==1.4'
 ]
+EXTRAS_REQUIRE = {
+    'msgpack': ['msgpack==1.0.2'],
+}
 
 
 def read(*parts):
@@ -76,5 +79,6 @@ if __name__ == "__main__":
         zip_safe=False,
         classifiers=CLASSIFIERS,
         install_requires=INSTALL_REQUIRES,
+        extras_require=EXTRAS_REQUIRE,
         include_package_data=True
     )
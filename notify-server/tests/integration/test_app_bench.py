@@ -0,0 +1,20 @@
+"""Benchmark application integration tests."""
+import pytest
+
+from notify_server.app_bench import BenchmarkConfig, run
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_benchmark() -> None:
+    """Test that a short benchmark receives every event."""
+    config = BenchmarkConfig(publishers=2,
+                             subscribers=2,
+                             rate=100,
+                             duration=0.5,
+                             size=10)
+    result = await run(config)
+    assert result.published == 100
+    assert result.received == 200
+    assert result.dropped == 0
+    assert result.latency_p50 is not None
@@ -4,7 +4,7 @@ from typing import AsyncGenerator, Tuple
 
 import pytest
 
-from notify_server.clients import publisher, subscriber
+from notify_server.clients import publisher, snapshot, subscriber
 from notify_server.models.event import Event
 from notify_server.settings import Settings
 
@@ -75,3 +75,37 @@ async def test_two_pub_two_sub_two_topics(
     e = await subscriber_all_topics.next_event()
     assert e.topic == "topic2"
     assert e.event == event
+
+
+@pytest.fixture
+async def snapshot_client(settings: Settings) ->\
+        AsyncGenerator[snapshot.SnapshotClient, None]:
+    """Create snapshot client."""
+    client = snapshot.create(settings.snapshot_address.connection_string())
+    yield client
+    client.close()
+
+
+async def test_late_subscriber_snapshot(
+        server_fixture: Task,
+        two_publishers: Tuple[publisher.Publisher, publisher.Publisher],
+        snapshot_client: snapshot.SnapshotClient,
+        event: Event) -> None:
+    """Test that a subscriber gets events published before it started."""
+    await sleep(.1)
+
+    pub1, pub2 = two_publishers
+
+    await pub1.send("topic1", event)
+    await pub2.send("topic2", event)
+    await pub1.send("topic1", event)
+    await sleep(.1)
+
+    snap = await snapshot_client.get(TOPICS)
+    assert snap.sequence == 3
+    assert [(e.topic, e.sequence) for e in snap.events] == \
+        [("topic2", 2), ("topic1", 3)]
+
+    snap = await snapshot_client.get(TOPICS[:1], since=1)
+    assert snap.replayed
+    assert [(e.topic, e.sequence) for e in snap.events] == [("topic1", 3)]
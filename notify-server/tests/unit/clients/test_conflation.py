@@ -0,0 +1,11 @@
+"""Unit tests for conflation windows."""
+from notify_server.clients.conflation import ConflationWindows
+
+
+def test_window() -> None:
+    """Test that topics match the longest prefix."""
+    windows = ConflationWindows({"module": 1, "module_temp": 0.5, "x": 0})
+    assert windows.window("module_temp_1") == 0.5
+    assert windows.window(b"module_status") == 1
+    assert windows.window("hardware") == 0
+    assert windows.window("x") == 0
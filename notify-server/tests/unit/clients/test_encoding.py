@@ -0,0 +1,86 @@
+"""Unit tests for the encoding module."""
+from datetime import datetime
+
+import pytest
+from _pytest.fixtures import FixtureRequest
+from _pytest.monkeypatch import MonkeyPatch
+from opentrons.hardware_control.types import DoorState
+
+from notify_server.clients import encoding
+from notify_server.clients.encoding import Encoding, encode, decode, \
+    check_encoding
+from notify_server.models.event import Event
+from notify_server.models.hardware_event import DoorStatePayload
+from notify_server.models.sample_events import SampleOne, SampleOneData
+
+
+@pytest.fixture(params=["sample_two", "sample_one", "door_state"])
+def any_event(request: FixtureRequest, event: Event) -> Event:
+    """Events of payloads with plain, nested and enum fields."""
+    param = request.param  # type: ignore
+    if param == "sample_one":
+        return Event(createdOn=datetime(2000, 1, 1, 1, 2, 3, 4),
+                     publisher="pub",
+                     data=SampleOne(data=SampleOneData(val1=1, val2="2")))
+    if param == "door_state":
+        return Event(createdOn=datetime(2000, 1, 1),
+                     publisher="pub",
+                     data=DoorStatePayload(state=DoorState.OPEN))
+    return event
+
+
+def test_encode_json(any_event: Event) -> None:
+    """Test that the json encoding is the same as pydantic's."""
+    assert encode(any_event) == any_event.json().encode('utf-8')
+
+
+@pytest.mark.parametrize(argnames=["trusted"], argvalues=[[True], [False]])
+def test_decode_json(any_event: Event, trusted: bool) -> None:
+    """Test that decoding json creates the event pydantic would."""
+    decoded = decode(any_event.json().encode('utf-8'), trusted=trusted)
+    assert decoded == any_event
+    assert type(decoded.data) is type(any_event.data)  # noqa: E721
+
+
+@pytest.mark.parametrize(argnames=["data"],
+                         argvalues=[
+                             [b'{'],
+                             [b'{}'],
+                             [b'{"createdOn": "2000-01-01T00:00:00", '
+                              b'"publisher": "pub", '
+                              b'"data": {"type": "Unknown"}}'],
+                             [b'{"createdOn": "2000-01-01T00:00:00", '
+                              b'"publisher": "pub", '
+                              b'"data": {"type": "SampleTwo", "val1": 1}}']])
+def test_decode_trusted_fail(data: bytes) -> None:
+    """Test that a malformed event is an error even when trusted."""
+    with pytest.raises(ValueError):
+        decode(data, trusted=True)
+
+
+@pytest.mark.parametrize(argnames=["trusted"], argvalues=[[True], [False]])
+def test_msgpack_round_trip(any_event: Event, trusted: bool) -> None:
+    """Test that events survive the msgpack encoding."""
+    pytest.importorskip("msgpack")
+    data = encode(any_event, Encoding.msgpack)
+    assert data[0] == encoding.MSGPACK_SCHEMA_VERSION
+    assert len(data) < len(encode(any_event))
+    assert decode(data, trusted=trusted) == any_event
+
+
+def test_msgpack_malformed() -> None:
+    """Test that a malformed msgpack event is an error."""
+    pytest.importorskip("msgpack")
+    with pytest.raises(ValueError):
+        decode(bytes([encoding.MSGPACK_SCHEMA_VERSION]) + b'\xc1')
+
+
+def test_msgpack_not_installed(monkeypatch: MonkeyPatch,
+                               event: Event) -> None:
+    """Test that msgpack cannot be used without the package."""
+    monkeypatch.setattr(encoding, "msgpack", None)
+    check_encoding(Encoding.json)
+    with pytest.raises(ValueError):
+        check_encoding(Encoding.msgpack)
+    with pytest.raises(ValueError):
+        encode(event, Encoding.msgpack)
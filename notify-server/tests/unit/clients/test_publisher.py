@@ -0,0 +1,86 @@
+"""Unit tests for the publisher."""
+import asyncio
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+
+from notify_server.clients.publisher import Publisher
+from notify_server.clients.serdes import to_frames
+from notify_server.models.event import Event
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def sent() -> List[List[bytes]]:
+    """Record the messages sent by the publisher."""
+    return []
+
+
+@pytest.fixture
+def connection(sent: List[List[bytes]]) -> MagicMock:
+    """Create a connection recording the messages sent."""
+    def send_multipart(frames: List[bytes]) -> asyncio.Future:
+        sent.append(frames)
+        f = asyncio.get_event_loop().create_future()
+        f.set_result(None)
+        return f
+
+    m = MagicMock()
+    m.send_multipart.side_effect = send_multipart
+    return m
+
+
+def events(n: int, event: Event) -> List[Event]:
+    """Create events with different data."""
+    return [event.copy(update={"publisher": str(i)}) for i in range(n)]
+
+
+async def test_send_immediately(connection: MagicMock,
+                                sent: List[List[bytes]],
+                                event: Event) -> None:
+    """Test that events are sent as published by default."""
+    publisher = Publisher(connection)
+    await publisher.send("topic", event)
+    assert sent == [to_frames("topic", event)]
+
+
+async def test_batch(connection: MagicMock,
+                     sent: List[List[bytes]],
+                     event: Event) -> None:
+    """Test that events published together are sent in one message."""
+    publisher = Publisher(connection, batch=True)
+    a, b, c = events(3, event)
+    publisher.send_nowait("topic", a)
+    publisher.send_nowait("other", b)
+    await publisher.send("topic", c)
+    assert sorted(sent) == sorted([
+        [b"topic", a.json().encode(), c.json().encode()],
+        [b"other", b.json().encode()]])
+
+
+async def test_conflate(connection: MagicMock,
+                        sent: List[List[bytes]],
+                        event: Event) -> None:
+    """Test that only the newest event is sent within the window."""
+    publisher = Publisher(connection, conflation_windows={"temp": 0.05})
+    a, b, c, d = events(4, event)
+    await publisher.send("temperature", a)
+    first = publisher.send_nowait("temperature", b)
+    second = publisher.send_nowait("temperature", c)
+    await publisher.send("status", d)
+    assert sent == [to_frames("temperature", a), to_frames("status", d)]
+    await asyncio.wait_for(asyncio.gather(first, second), 1)
+    assert sent[2] == to_frames("temperature", c)
+
+
+async def test_close_sends_pending(connection: MagicMock,
+                                   sent: List[List[bytes]],
+                                   event: Event) -> None:
+    """Test that events waiting are sent on close."""
+    publisher = Publisher(connection, batch=True)
+    publisher.send_nowait("topic", event)
+    publisher.close()
+    assert sent == [to_frames("topic", event)]
+    connection.close.assert_called_once()
@@ -3,7 +3,10 @@ from typing import List
 
 import pytest
 from notify_server.clients.serdes import (
-    TopicEvent, MalformedFrames, to_frames, from_frames)
+    TopicEvent, MalformedFrames, Snapshot, to_frames, from_frames,
+    add_sequence, from_batch_frames, snapshot_to_frames,
+    snapshot_from_frames)
+from notify_server.clients.encoding import Encoding
 from notify_server.models.event import Event
 
 
@@ -14,6 +17,14 @@ def test_to_frames(event: Event) -> None:
     ]
 
 
+def test_to_frames_msgpack(event: Event) -> None:
+    """Test that msgpack frames are read back."""
+    pytest.importorskip("msgpack")
+    frames = to_frames(topic="topic", event=event, encoding=Encoding.msgpack)
+    assert frames[1] != event.json().encode('utf-8')
+    assert from_frames(frames) == TopicEvent(topic="topic", event=event)
+
+
 @pytest.mark.parametrize(argnames=["frames"],
                          argvalues=[
                              [[]],
@@ -30,3 +41,56 @@ def test_entry_from_frames(event: Event) -> None:
     """Test that an object is created from_frames."""
     entry = from_frames([b"topic", event.json().encode('utf-8')])
     assert entry == TopicEvent(topic="topic", event=event)
+
+
+def test_entry_from_frames_with_sequence(event: Event) -> None:
+    """Test that the sequence number is read from the frames."""
+    frames = add_sequence(to_frames(topic="topic", event=event), 12)
+    assert frames[2] == b"12"
+    assert from_frames(frames) == TopicEvent(topic="topic",
+                                             event=event,
+                                             sequence=12)
+
+
+def test_from_batch_frames(event: Event) -> None:
+    """Test that each event of a batch is created."""
+    data = event.json().encode('utf-8')
+    assert from_batch_frames([b"topic", data, b"1", data, b"2"]) == [
+        TopicEvent(topic="topic", event=event, sequence=1),
+        TopicEvent(topic="topic", event=event, sequence=2)]
+    assert from_batch_frames([b"topic", data]) == [
+        TopicEvent(topic="topic", event=event)]
+
+
+@pytest.mark.parametrize(argnames=["frames"],
+                         argvalues=[[[]], [[b"topic"]], [[b"a", b"{}"]],
+                                    [[b"a", b"{}", b"1", b"{}"]]])
+def test_from_batch_frames_fail(frames: List[bytes]) -> None:
+    """Test that an exception is raised on a bad batch."""
+    with pytest.raises(MalformedFrames):
+        from_batch_frames(frames)
+
+
+def test_snapshot_frames(event: Event) -> None:
+    """Test that a snapshot survives its frames."""
+    events = [add_sequence(to_frames(topic="a", event=event), 1),
+              add_sequence(to_frames(topic="b", event=event), 3)]
+    frames = snapshot_to_frames(sequence=4, replayed=True, events=events)
+    assert snapshot_from_frames(frames) == Snapshot(
+        sequence=4,
+        replayed=True,
+        events=[TopicEvent(topic="a", event=event, sequence=1),
+                TopicEvent(topic="b", event=event, sequence=3)])
+
+
+@pytest.mark.parametrize(argnames=["frames"],
+                         argvalues=[
+                             [[]],
+                             [[b"{"]],
+                             [[b"{}"]],
+                             [[b'{"sequence": 1, "replayed": false}', b"a"]]]
+                         )
+def test_snapshot_from_frames_fail(frames: List[bytes]) -> None:
+    """Test that an exception is raised on a bad snapshot."""
+    with pytest.raises(MalformedFrames):
+        snapshot_from_frames(frames)
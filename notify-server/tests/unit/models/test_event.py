@@ -5,6 +5,7 @@ from typing import Dict, Any
 import pytest
 
 from notify_server.models.event import Event
+from notify_server.models.protocol_event import ProtocolAnalysisPayload
 from notify_server.models.sample_events import (
     SampleOne, SampleOneData, SampleTwo
 )
@@ -53,6 +54,9 @@ def test_bad_data_attribute(data: Dict[str, Any]) -> None:
         [{"type": "SampleTwo", "val1": 123, "val2": "egg"},
          SampleTwo(val1=123, val2="egg")
          ],
+        [{"event": "analysis_complete", "protocolId": "abc"},
+         ProtocolAnalysisPayload(protocolId="abc")
+         ],
     ])
 def test_good_data(data: Dict[str, Any], expected: Event) -> None:
     """Test that the data member is validated correctly."""
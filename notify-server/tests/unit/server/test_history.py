@@ -0,0 +1,66 @@
+"""Unit tests for the event history."""
+from typing import List
+
+import pytest
+
+from notify_server.server.history import EventHistory
+
+
+def frames(topic: str, data: str = "{}") -> List[bytes]:
+    """Create the frames of a published event."""
+    return [topic.encode(), data.encode()]
+
+
+@pytest.fixture
+def history() -> EventHistory:
+    """History fixture."""
+    return EventHistory(max_replay=3)
+
+
+def test_add_numbers_events(history: EventHistory) -> None:
+    """Test that events get increasing sequence numbers."""
+    assert history.sequence == 0
+    assert history.add(frames("a")) == [b"a", b"{}", b"1"]
+    assert history.add(frames("b")) == [b"b", b"{}", b"2"]
+    assert history.sequence == 2
+
+
+def test_last_events(history: EventHistory) -> None:
+    """Test that the last event of each topic is kept."""
+    history.add(frames("a", "1"))
+    history.add(frames("b", "2"))
+    history.add(frames("a", "3"))
+    history.add(frames("c", "4"))
+    assert history.last_events(["a", "b"]) == [
+        [b"b", b"2", b"2"], [b"a", b"3", b"3"]]
+    assert history.last_events(["d"]) == []
+
+
+def test_last_events_prefix(history: EventHistory) -> None:
+    """Test that topics match by prefix, like subscriptions."""
+    history.add(frames("hardware_events"))
+    assert len(history.last_events(["hardware"])) == 1
+
+
+def test_replay(history: EventHistory) -> None:
+    """Test that the events after a sequence number are replayed."""
+    for topic in "abab":
+        history.add(frames(topic))
+    assert history.replay(["a"], since=2) == [[b"a", b"{}", b"3"]]
+    assert history.replay(["a", "b"], since=4) == []
+
+
+def test_replay_missing_events(history: EventHistory) -> None:
+    """Test that there is no replay once events are dropped."""
+    for topic in "abab":
+        history.add(frames(topic))
+    # event 1 is no longer kept
+    assert history.replay(["a"], since=0) is None
+    assert history.replay(["a"], since=1) is not None
+    # the sequence number is from before a restart
+    assert history.replay(["a"], since=5) is None
+
+
+def test_replay_empty(history: EventHistory) -> None:
+    """Test replaying before any events."""
+    assert history.replay(["a"], since=0) == []
@@ -0,0 +1,66 @@
+"""Unit tests for the outbox."""
+import asyncio
+
+import pytest
+
+from notify_server.clients.conflation import ConflationWindows
+from notify_server.server.outbox import Outbox
+
+pytestmark = pytest.mark.asyncio
+
+
+def outbox(max_queued: int = 10,
+           windows: ConflationWindows = ConflationWindows({}),
+           max_batch: int = 10) -> Outbox:
+    """Create an outbox."""
+    return Outbox(max_queued=max_queued, windows=windows, max_batch=max_batch)
+
+
+async def test_batches_by_topic() -> None:
+    """Test that waiting events of a topic are sent together."""
+    o = outbox(max_batch=2)
+    for i, topic in enumerate("abaa"):
+        o.put([topic.encode(), b"e", str(i).encode()])
+    assert await o.get() == [
+        [b"a", b"e", b"0", b"e", b"2"],
+        [b"a", b"e", b"3"],
+        [b"b", b"e", b"1"]]
+    assert len(o) == 0
+
+
+async def test_get_waits() -> None:
+    """Test that get waits for an event."""
+    o = outbox()
+    get = asyncio.ensure_future(o.get())
+    await asyncio.sleep(0)
+    assert not get.done()
+    o.put([b"a", b"e", b"1"])
+    assert await asyncio.wait_for(get, 1) == [[b"a", b"e", b"1"]]
+
+
+async def test_conflation() -> None:
+    """Test that a conflated topic is sent once per window, newest only."""
+    o = outbox(windows=ConflationWindows({"temp": 0.05}))
+    o.put([b"temp", b"1", b"1"])
+    assert await o.get() == [[b"temp", b"1", b"1"]]
+    o.put([b"temp", b"2", b"2"])
+    o.put([b"other", b"3", b"3"])
+    o.put([b"temp", b"4", b"4"])
+    assert len(o) == 2
+    # the other topic is not held up
+    assert await o.get() == [[b"other", b"3", b"3"]]
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    assert await asyncio.wait_for(o.get(), 1) == [[b"temp", b"4", b"4"]]
+    assert loop.time() - start >= 0.04
+
+
+async def test_drops_from_busiest_topic() -> None:
+    """Test that events are dropped from the topic with the most waiting."""
+    o = outbox(max_queued=3)
+    for i, topic in enumerate("abbb"):
+        o.put([topic.encode(), b"e", str(i).encode()])
+    assert len(o) == 3
+    assert await o.get() == [
+        [b"a", b"e", b"0"],
+        [b"b", b"e", b"2", b"e", b"3"]]
@@ -0,0 +1,54 @@
+"""Unit tests for the server functions."""
+import pytest
+
+from notify_server.clients.serdes import SnapshotRequest, \
+    snapshot_from_frames, to_frames
+from notify_server.models.event import Event
+from notify_server.server.history import EventHistory
+from notify_server.server.server import _snapshot
+
+
+@pytest.fixture
+def history(event: Event) -> EventHistory:
+    """Create a history with events of two topics."""
+    history = EventHistory(max_replay=2)
+    for topic in ("a", "b", "a"):
+        history.add(to_frames(topic, event))
+    return history
+
+
+def test_snapshot_last_events(history: EventHistory, event: Event) -> None:
+    """Test that a snapshot has the last event of each topic."""
+    request = SnapshotRequest(topics=["a", "b"])
+    snapshot = snapshot_from_frames(
+        _snapshot([request.json().encode()], history))
+    assert snapshot.sequence == 3
+    assert not snapshot.replayed
+    assert [(e.topic, e.sequence) for e in snapshot.events] == \
+        [("b", 2), ("a", 3)]
+    assert snapshot.events[0].event == event
+
+
+def test_snapshot_replay(history: EventHistory) -> None:
+    """Test that the events since a sequence number are replayed."""
+    request = SnapshotRequest(topics=["a", "b"], since=1)
+    snapshot = snapshot_from_frames(
+        _snapshot([request.json().encode()], history))
+    assert snapshot.replayed
+    assert [e.sequence for e in snapshot.events] == [2, 3]
+
+
+def test_snapshot_replay_too_old(history: EventHistory) -> None:
+    """Test that the last events are sent if the replay is incomplete."""
+    request = SnapshotRequest(topics=["a", "b"], since=0)
+    snapshot = snapshot_from_frames(
+        _snapshot([request.json().encode()], history))
+    assert not snapshot.replayed
+    assert [e.sequence for e in snapshot.events] == [2, 3]
+
+
+def test_snapshot_malformed(history: EventHistory) -> None:
+    """Test that a malformed request gets an empty reply."""
+    snapshot = snapshot_from_frames(_snapshot([b"{"], history))
+    assert snapshot.sequence == 3
+    assert snapshot.events == []
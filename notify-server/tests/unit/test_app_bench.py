@@ -0,0 +1,43 @@
+"""Unit tests for the benchmark application."""
+import pytest
+
+from notify_server.app_bench import BenchmarkConfig, SubscriberReport, \
+    percentile, summarize
+
+
+@pytest.mark.parametrize(argnames=["fraction", "expected"],
+                         argvalues=[[0, 1], [0.5, 5], [0.99, 10], [1, 10]])
+def test_percentile(fraction: float, expected: float) -> None:
+    """Test the nearest-rank percentile."""
+    assert percentile(list(range(1, 11)), fraction) == expected
+
+
+def test_summarize() -> None:
+    """Test that the reports of subscribers are combined."""
+    config = BenchmarkConfig(duration=2)
+    result = summarize(config, 4, [
+        SubscriberReport(received=4,
+                         latencies=[0.001, 0.002, 0.003, 0.004],
+                         first=10.0,
+                         last=11.0),
+        SubscriberReport(received=2,
+                         latencies=[0.001, 0.010],
+                         first=10.5,
+                         last=12.0)])
+    assert result.published == 4
+    assert result.received == 6
+    assert result.dropped == 2
+    assert result.publish_rate == 2
+    assert result.throughput == 3
+    assert result.latency_p50 == pytest.approx(2)
+    assert result.latency_p99 == pytest.approx(10)
+    assert result.latency_max == pytest.approx(10)
+
+
+def test_summarize_nothing_received() -> None:
+    """Test the summary when subscribers received no events."""
+    result = summarize(BenchmarkConfig(), 10, [
+        SubscriberReport(received=0, latencies=[], first=None, last=None)])
+    assert result.dropped == 10
+    assert result.throughput == 0
+    assert result.latency_p50 is None
@@ -0,0 +1,10 @@
+import json
+import os
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+
+try:
+    with open(os.path.join(HERE, 'package.json')) as pkg:
+        __version__ = json.load(pkg).get('version')
+except OSError:
+    __version__ = 'unknown'
@@ -20,12 +20,14 @@ from .errors import V1HandlerError, \
     build_unhandled_exception_response
 from .dependencies import (
     get_rpc_server, get_protocol_manager, get_hardware_wrapper,
-    verify_hardware, get_session_manager, check_version_header)
+    verify_hardware, get_session_manager, check_version_header,
+    get_subscriber_hub)
 from robot_server import constants
 from robot_server.service.legacy.routers import legacy_routes
 from robot_server.service.session.router import router as session_router
 from robot_server.service.pipette_offset.router import router as pip_os_router
 from robot_server.service.labware.router import router as labware_router
+from robot_server.service.protocol import analysis_pool
 from robot_server.service.protocol.router import router as protocol_router
 from robot_server.service.system.router import router as system_router
 from robot_server.service.tip_length.router import router as tl_router
@@ -100,6 +102,10 @@ async def on_shutdown():
     await (await get_session_manager()).remove_all()
     # Remove all uploaded protocols
     (await get_protocol_manager()).remove_all()
+    # Stop analyzing protocols
+    analysis_pool.shutdown_analysis_pool()
+    # Close the subscriptions to notify-server
+    (await get_subscriber_hub()).close()
 
 
 @app.middleware("http")
@@ -12,6 +12,8 @@ from robot_server.service.json_api import Error
 from robot_server.service.session.manager import SessionManager
 from robot_server.service.protocol.manager import ProtocolManager
 from robot_server.service.legacy.rpc import RPCServer
+from robot_server.service.notifications.hub import SubscriberHub
+from robot_server.settings import get_settings
 
 from notify_server.clients import publisher
 from notify_server.settings import Settings as NotifyServerSettings
@@ -28,6 +30,16 @@ async def get_event_publisher() -> publisher.Publisher:
     return event_publisher
 
 
+@util.call_once
+async def get_subscriber_hub() -> SubscriberHub:
+    """The hub sharing notify-server subscribers between websocket
+    clients."""
+    settings = get_settings()
+    return SubscriberHub(
+        address=settings.notification_server_subscriber_address,
+        max_queued=settings.notification_subscriber_max_queued)
+
+
 @util.call_once
 async def get_hardware_wrapper(
         event_publisher: publisher.Publisher = Depends(get_event_publisher)) \
@@ -78,7 +90,7 @@ async def get_rpc_server(
 @util.call_once
 async def get_protocol_manager() -> ProtocolManager:
     """The single protocol manager instance"""
-    return ProtocolManager()
+    return ProtocolManager(event_publisher=await get_event_publisher())
 
 
 @util.call_once
@@ -1,52 +1,54 @@
 """Websocket subscriber handler functions."""
 import asyncio
 import logging
-from asyncio import CancelledError
 from typing import List
 
+from starlette import status
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
-from notify_server.clients.serdes import TopicEvent
-from notify_server.clients.subscriber import Subscriber, create
-
-from robot_server.settings import get_settings
+from robot_server.service.notifications.hub import SubscriberHub, \
+    Subscription
 
 log = logging.getLogger(__name__)
 
 
 async def handle_socket(
         websocket: WebSocket,
-        topics: List[str]) -> None:
+        topics: List[str],
+        hub: SubscriberHub) -> None:
     """Handle a websocket connection."""
-    subscriber = create(
-        get_settings().notification_server_subscriber_address,
-        topics
-    )
-    await asyncio.gather(
-        receive(websocket, subscriber),
-        route_events(websocket, subscriber)
-    )
+    subscription = hub.subscribe(topics)
+    try:
+        await asyncio.gather(
+            receive(websocket, hub, subscription),
+            route_events(websocket, subscription)
+        )
+    finally:
+        hub.unsubscribe(subscription)
 
 
-async def receive(websocket: WebSocket, subscriber: Subscriber) -> None:
+async def receive(websocket: WebSocket,
+                  hub: SubscriberHub,
+                  subscription: Subscription) -> None:
     """Read data from websocket. Will exit on websocket disconnect."""
     try:
         while True:
             await websocket.receive_json()
     except WebSocketDisconnect:
         log.info("Websocket subscriber disconnected.")
-        subscriber.close()
+        hub.unsubscribe(subscription)
 
 
-async def send(websocket: WebSocket, entry: TopicEvent) -> None:
-    """Send entry to web socket."""
-    await websocket.send_text(entry.json())
+async def send(websocket: WebSocket, text: str) -> None:
+    """Send an encoded event to web socket."""
+    await websocket.send_text(text)
 
 
-async def route_events(websocket: WebSocket, subscriber: Subscriber) -> None:
-    """Route events from subscriber to websocket."""
-    try:
-        async for entry in subscriber:
-            await send(websocket, entry)
-    except CancelledError:
-        log.exception("Connection to notify-server closed.")
+async def route_events(websocket: WebSocket,
+                       subscription: Subscription) -> None:
+    """Route events from subscription to websocket."""
+    async for text in subscription:
+        await send(websocket, text)
+    if subscription.dropped:
+        # The client can't keep up; it may connect again
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
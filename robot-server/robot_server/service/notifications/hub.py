@@ -0,0 +1,146 @@
+"""
+A hub sharing notify-server subscriptions between websocket clients.
+
+Each distinct set of topics has a single subscriber to notify-server, no
+matter how many websockets ask for it. Every event the subscriber receives
+is encoded to JSON once, and the text is queued for each of those
+websockets. A client that falls too far behind is dropped rather than
+letting its queue grow; it can connect again.
+"""
+import asyncio
+import logging
+import typing
+
+from notify_server.clients.subscriber import Subscriber, create
+
+log = logging.getLogger(__name__)
+
+
+class Subscription:
+    """The events queued for one websocket client."""
+
+    def __init__(self, topics: typing.FrozenSet[str], max_queued: int):
+        """
+        Constructor
+
+        :param topics: The topics subscribed to
+        :param max_queued: The most events that may wait to be sent
+        """
+        self.topics = topics
+        self._max_queued = max_queued
+        self._queue: 'asyncio.Queue[typing.Optional[str]]' = asyncio.Queue()
+        self._ended = False
+        self._dropped = False
+
+    @property
+    def dropped(self) -> bool:
+        """Whether the client was dropped for not keeping up"""
+        return self._dropped
+
+    def put(self, text: str) -> None:
+        """Queue an encoded event, dropping the client if it is too far
+        behind."""
+        if self._ended:
+            return
+        if self._queue.qsize() >= self._max_queued:
+            log.warning(f"Dropping notification subscriber to "
+                        f"{sorted(self.topics)}: more than "
+                        f"{self._max_queued} events waiting")
+            self._dropped = True
+            self.end()
+        else:
+            self._queue.put_nowait(text)
+
+    def end(self) -> None:
+        """No more events will be queued"""
+        if not self._ended:
+            self._ended = True
+            self._queue.put_nowait(None)
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> str:
+        text = await self._queue.get()
+        if text is None:
+            raise StopAsyncIteration()
+        return text
+
+
+class _Feed:
+    """A notify-server subscriber fanning out to subscriptions"""
+
+    def __init__(self, subscriber: Subscriber):
+        self._subscriber = subscriber
+        self.subscriptions: typing.Set[Subscription] = set()
+        self._task = asyncio.get_event_loop().create_task(self._run())
+
+    @property
+    def closed(self) -> bool:
+        return self._task.done()
+
+    async def _run(self) -> None:
+        try:
+            async for entry in self._subscriber:
+                text = entry.json()
+                for subscription in list(self.subscriptions):
+                    subscription.put(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("Connection to notify-server closed.")
+        finally:
+            for subscription in self.subscriptions:
+                subscription.end()
+
+    def close(self) -> None:
+        self._task.cancel()
+        self._subscriber.close()
+
+
+class SubscriberHub:
+    """Shares notify-server subscribers between websocket clients."""
+
+    def __init__(self, address: str, max_queued: int):
+        """
+        Constructor
+
+        :param address: The notify-server address to subscribe to
+        :param max_queued: The most events that may wait to be sent to a
+            client before it is dropped
+        """
+        self._address = address
+        self._max_queued = max_queued
+        self._feeds: typing.Dict[typing.FrozenSet[str], _Feed] = {}
+
+    def subscribe(self, topics: typing.Sequence[str]) -> Subscription:
+        """Start queueing the events of the topics for a client"""
+        key = frozenset(topics)
+        feed = self._feeds.get(key)
+        if feed is None or feed.closed:
+            # Only the robot's own services publish to notify-server
+            feed = _Feed(create(self._address, sorted(key), trusted=True))
+            self._feeds[key] = feed
+        subscription = Subscription(key, self._max_queued)
+        feed.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop queueing events for a client. The subscriber to
+        notify-server is closed when its last client unsubscribes."""
+        subscription.end()
+        feed = self._feeds.get(subscription.topics)
+        if feed is None:
+            return
+        feed.subscriptions.discard(subscription)
+        if not feed.subscriptions:
+            del self._feeds[subscription.topics]
+            feed.close()
+
+    def close(self) -> None:
+        """Close all subscribers to notify-server"""
+        for feed in self._feeds.values():
+            feed.close()
+            for subscription in feed.subscriptions:
+                subscription.end()
+        self._feeds = {}
@@ -1,8 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from starlette.websockets import WebSocket
+from robot_server.service.dependencies import get_subscriber_hub
 from robot_server.service.notifications import handle_subscriber
+from robot_server.service.notifications.hub import SubscriberHub
 
 router = APIRouter()
 
@@ -10,7 +12,8 @@ router = APIRouter()
 @router.websocket("/notifications/subscribe")
 async def handle_subscribe(
         websocket: WebSocket,
-        topic: List[str] = Query(...)):
+        topic: List[str] = Query(...),
+        hub: SubscriberHub = Depends(get_subscriber_hub)):
     """Accept a websocket connection."""
     await websocket.accept()
-    await handle_subscriber.handle_socket(websocket, topic)
+    await handle_subscriber.handle_socket(websocket, topic, hub)
@@ -0,0 +1,264 @@
+"""Cache of protocol analysis results keyed by content hash."""
+import hashlib
+import logging
+import os
+import threading
+import typing
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+import opentrons
+from opentrons.config import feature_flags as fflags
+from opentrons.protocols.api_support.constants import USER_DEFS_PATH
+from opentrons.protocols.api_support.definitions import MAX_SUPPORTED_VERSION
+
+import robot_server
+from robot_server.service.protocol import analysis_pool, analyze, \
+    contents, models
+from robot_server.service.protocol.analyze import AnalysisResult
+from robot_server.service.protocol.errors import ProtocolIOException
+from robot_server.settings import get_settings
+
+log = logging.getLogger(__name__)
+
+CACHE_FILE_SUFFIX = '.json'
+
+# Feature flags that change what a protocol analysis finds
+KEY_FEATURE_FLAGS = (
+    fflags.short_fixed_trash,
+    fflags.calibrate_to_bottom,
+    fflags.dots_deck_type,
+    fflags.use_old_aspiration_functions,
+)
+
+
+class CachedAnalysis(BaseModel):
+    """The form in which an analysis result is stored on disk."""
+    meta: models.Meta
+    requiredEquipment: models.RequiredEquipment
+    errors: typing.List[models.ProtocolError]
+
+
+def analysis_key(protocol_contents: contents.Contents) -> str:
+    """
+    Build the cache key of a protocol's analysis.
+
+    The key covers the protocol and support files, the versions of the
+    protocol API and of the server, the feature flags that affect analysis
+    and the custom labware definitions saved on the robot.
+    """
+    hasher = hashlib.sha256()
+
+    def add(part: str):
+        hasher.update(part.encode('utf-8'))
+        hasher.update(b'\0')
+
+    for part in (opentrons.__version__, robot_server.__version__,
+                 str(MAX_SUPPORTED_VERSION),
+                 protocol_contents.protocol_file.path.name,
+                 protocol_contents.protocol_file.content_hash):
+        add(part)
+    for support_file in sorted(protocol_contents.support_files,
+                               key=lambda f: f.path.name):
+        add(support_file.path.name)
+        add(support_file.content_hash)
+    for flag in KEY_FEATURE_FLAGS:
+        add(str(bool(flag())))
+    for definition in _user_labware_files():
+        stat = definition.stat()
+        add(f'{definition}:{stat.st_mtime_ns}:{stat.st_size}')
+    return hasher.hexdigest()
+
+
+def _user_labware_files() -> typing.List[Path]:
+    if not USER_DEFS_PATH.is_dir():
+        return []
+    return sorted(USER_DEFS_PATH.glob('**/*.json'))
+
+
+class AnalysisCache:
+    """
+    A bounded cache of analysis results.
+
+    The most recently used results are kept in memory. If there is a cache
+    directory, every result is also stored there as a JSON file so that it
+    outlives the server process; the least recently used files are removed
+    once there are more than max_entries of them.
+    """
+
+    def __init__(self,
+                 max_entries: int,
+                 directory: typing.Optional[Path] = None):
+        """Constructor"""
+        self._max_entries = max_entries
+        self._directory = directory
+        self._entries: 'OrderedDict[str, AnalysisResult]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> typing.Optional[AnalysisResult]:
+        """Look up a result, from memory first and then from disk"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._touch(key)
+                return result
+            result = self._load(key)
+            if result is not None:
+                self._remember(key, result)
+            return result
+
+    def put(self, key: str, result: AnalysisResult) -> None:
+        """Add a result, evicting the least recently used if full"""
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._remember(key, result)
+            self._store(key, result)
+
+    def clear(self) -> None:
+        """Remove every result, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            for path in self._files():
+                self._remove(path)
+
+    def _remember(self, key: str, result: AnalysisResult) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> typing.Optional[Path]:
+        if self._directory is None:
+            return None
+        return self._directory / (key + CACHE_FILE_SUFFIX)
+
+    def _files(self) -> typing.List[Path]:
+        if self._directory is None or not self._directory.is_dir():
+            return []
+        return list(self._directory.glob('*' + CACHE_FILE_SUFFIX))
+
+    def _touch(self, key: str) -> None:
+        # file modification times record use, for eviction on disk
+        path = self._path(key)
+        if path is not None:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def _load(self, key: str) -> typing.Optional[AnalysisResult]:
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            cached = CachedAnalysis.parse_file(path)
+        except (OSError, ValueError, ValidationError):
+            log.warning(f"Discarding unreadable analysis cache {path}")
+            self._remove(path)
+            return None
+        self._touch(key)
+        return AnalysisResult(meta=cached.meta,
+                              required_equipment=cached.requiredEquipment,
+                              errors=cached.errors)
+
+    def _store(self, key: str, result: AnalysisResult) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        cached = CachedAnalysis(meta=result.meta,
+                                requiredEquipment=result.required_equipment,
+                                errors=result.errors)
+        temp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp.write_text(cached.json())
+            os.replace(temp, path)
+        except OSError:
+            log.exception(f"Could not write analysis cache {path}")
+            return
+        self._evict_files()
+
+    def _evict_files(self) -> None:
+        files = self._files()
+        if len(files) <= self._max_entries:
+            return
+        files.sort(key=lambda f: f.stat().st_mtime_ns)
+        for path in files[:len(files) - self._max_entries]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            log.exception(f"Could not remove analysis cache {path}")
+
+
+@lru_cache(maxsize=1)
+def get_analysis_cache() -> AnalysisCache:
+    """Get the analysis cache configured in the settings"""
+    settings = get_settings()
+    directory = settings.protocol_analysis_cache_dir
+    return AnalysisCache(
+        max_entries=settings.protocol_analysis_cache_max_entries,
+        directory=Path(directory) if directory else None)
+
+
+def cached_analysis(protocol_contents: contents.Contents) \
+        -> typing.Optional[AnalysisResult]:
+    """Look up the result of an earlier analysis of the same contents"""
+    return get_analysis_cache().get(analysis_key(protocol_contents))
+
+
+def analyze_protocol(protocol_id: str,
+                     protocol_contents: contents.Contents) -> AnalysisResult:
+    """
+    Analyze a protocol, reusing the result of an earlier analysis of the
+    same contents if there is one.
+
+    A copy of the protocol files is analyzed, so that the protocol being
+    updated or removed while the analysis runs cannot change the files
+    under it and have the result stored against the wrong contents.
+    """
+    try:
+        snapshot = contents.snapshot(protocol_contents)
+    except ProtocolIOException:
+        # the protocol was removed before it could be copied
+        return analyze.failed_analysis(models.ProtocolError(
+            type="AnalysisFailed",
+            description="The protocol files could not be read"))
+    try:
+        return _analyze_snapshot(protocol_id, snapshot)
+    finally:
+        contents.clean_up(snapshot)
+
+
+def _analyze_snapshot(protocol_id: str,
+                      snapshot: contents.Contents) -> AnalysisResult:
+    cache = get_analysis_cache()
+    key = analysis_key(snapshot)
+    result = cache.get(key)
+    if result is not None:
+        log.debug(f"Using cached analysis of "
+                  f"{snapshot.protocol_file.path.name}")
+        return result
+    pool = analysis_pool.get_analysis_pool()
+    if pool is None:
+        result = analyze.analyze_protocol(snapshot)
+    else:
+        try:
+            result = pool.analyze(protocol_id, snapshot)
+        except analysis_pool.AnalysisInterrupted as e:
+            # the next upload of the same protocol should try again
+            return analyze.failed_analysis(e.error)
+    if result.cacheable:
+        cache.put(key, result)
+    else:
+        log.debug(f"Not caching analysis of "
+                  f"{snapshot.protocol_file.path.name}: {result.errors}")
+    return result
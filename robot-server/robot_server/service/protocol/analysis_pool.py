@@ -0,0 +1,298 @@
+"""
+A pool of worker processes for analyzing protocols.
+
+Analysis changes the working directory and sys.path of the process it runs
+in, so each one runs in its own worker process. Workers are forked from a
+server process that has already imported the protocol API, and each warms
+up by building a simulation before taking jobs. A job that runs too long
+gets its worker killed and replaced; workers may also have a limit on the
+memory they use.
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from tempfile import TemporaryDirectory
+
+from robot_server.service.protocol import analyze, contents, models
+from robot_server.service.protocol.analyze import AnalysisResult
+from robot_server.settings import get_settings
+from robot_server.util import FileMeta
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None  # type: ignore
+
+log = logging.getLogger(__name__)
+
+# Modules loaded once in the process that workers are forked from
+PRELOAD_MODULES = [
+    'opentrons.protocol_api',
+    'robot_server.service.protocol.analyze',
+]
+
+
+class AnalysisInterrupted(analyze.AnalyzeError):
+    """The analysis did not finish, so its result says nothing about the
+    protocol itself."""
+    pass
+
+
+class AnalysisJob(typing.NamedTuple):
+    protocol_id: str
+    protocol_file: FileMeta
+    support_files: typing.List[FileMeta]
+    directory: str
+
+
+class _ExistingDirectory(TemporaryDirectory):
+    """The protocol directory as seen from a worker. It belongs to the
+    server, so the worker never removes it."""
+    def __init__(self, name: str):
+        self.name = name
+
+    def cleanup(self) -> None:
+        pass
+
+
+def _limit_memory(memory_limit: typing.Optional[int]) -> None:
+    if memory_limit and resource is not None:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _warm_up() -> None:
+    from opentrons.protocols import schemas
+    from opentrons.protocols.parse import MAX_SUPPORTED_JSON_SCHEMA_VERSION
+    schemas.get_validator(schemas.LABWARE_SCHEMA_V2)
+    for version in range(3, MAX_SUPPORTED_JSON_SCHEMA_VERSION + 1):
+        schemas.get_validator(schemas.protocol_schema_path(version))
+    # start the shared simulator and load the deck
+    with analyze._context_factory.build():
+        pass
+
+
+def _worker_main(conn: Connection,
+                 memory_limit: typing.Optional[int]) -> None:
+    _limit_memory(memory_limit)
+    _warm_up()
+    while True:
+        job: typing.Optional[AnalysisJob] = conn.recv()
+        if job is None:
+            break
+        protocol_contents = contents.Contents(
+            protocol_file=job.protocol_file,
+            support_files=job.support_files,
+            directory=_ExistingDirectory(job.directory))
+        try:
+            conn.send((analyze.analyze_protocol(protocol_contents), None))
+        except Exception as e:
+            log.exception(f"Failed to analyze {job.protocol_id}")
+            conn.send((None, models.ProtocolError(
+                type=e.__class__.__name__, description=str(e))))
+
+
+class _Worker:
+    def __init__(self,
+                 context: typing.Any,
+                 memory_limit: typing.Optional[int]):
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit),
+            daemon=True)
+        self._process.start()
+        child_conn.close()
+
+    def run(self, job: AnalysisJob, timeout: float) -> AnalysisResult:
+        """
+        Run a job in the worker.
+
+        :raise TimeoutError: If the job takes longer than timeout
+        :raise EOFError: If the worker exits
+        :raise AnalysisInterrupted: If the analysis raises an error
+        """
+        self._conn.send(job)
+        if not self._conn.poll(timeout):
+            raise TimeoutError()
+        result, error = self._conn.recv()
+        if error:
+            raise AnalysisInterrupted(error=error)
+        return result
+
+    def stop(self, timeout: float = 1) -> None:
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self._process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+
+
+class AnalysisPool:
+    """
+    A fixed number of analysis worker processes.
+
+    Any number of threads can submit analyses; each waits for an idle
+    worker. Analyses of the same protocol run one at a time.
+    """
+
+    def __init__(self,
+                 workers: int,
+                 timeout: float,
+                 memory_limit: typing.Optional[int] = None):
+        """
+        Start the worker processes.
+
+        :param workers: The number of worker processes
+        :param timeout: The longest an analysis may take, in seconds
+        :param memory_limit: The most memory a worker may use, in megabytes
+        """
+        self._timeout = timeout
+        self._memory_limit = memory_limit
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context(
+            'forkserver' if 'forkserver' in methods else 'spawn')
+        if 'forkserver' in methods:
+            self._context.set_forkserver_preload(PRELOAD_MODULES)
+        self._workers: typing.List[_Worker] = []
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._active_protocols: typing.Set[str] = set()
+        self._condition = threading.Condition()
+        for _ in range(workers):
+            self._add_worker()
+
+    def analyze(self,
+                protocol_id: str,
+                protocol_contents: contents.Contents) \
+            -> AnalysisResult:
+        """
+        Analyze a protocol in a worker.
+
+        :raise AnalysisInterrupted: If the analysis timed out, its worker
+            exited or it failed for a reason other than the protocol
+        """
+        job = AnalysisJob(protocol_id=protocol_id,
+                          protocol_file=protocol_contents.protocol_file,
+                          support_files=protocol_contents.support_files,
+                          directory=protocol_contents.directory.name)
+        with self._condition:
+            self._condition.wait_for(
+                lambda: protocol_id not in self._active_protocols)
+            self._active_protocols.add(protocol_id)
+        try:
+            return self._run(job)
+        finally:
+            with self._condition:
+                self._active_protocols.discard(protocol_id)
+                self._condition.notify_all()
+
+    def shutdown(self) -> None:
+        """Stop all the workers"""
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    def _run(self, job: AnalysisJob) -> AnalysisResult:
+        worker = self._idle.get()
+        try:
+            result = worker.run(job, self._timeout)
+        except TimeoutError:
+            log.warning(f"Analysis of {job.protocol_id} timed out")
+            self._replace(worker)
+            raise AnalysisInterrupted(error=models.ProtocolError(
+                type="AnalysisTimeout",
+                description=f"Analysis took longer than "
+                            f"{self._timeout} seconds"))
+        except (EOFError, OSError):
+            log.exception(f"Analysis worker for {job.protocol_id} exited")
+            self._replace(worker)
+            raise AnalysisInterrupted(error=models.ProtocolError(
+                type="AnalysisFailed",
+                description="The analysis worker exited unexpectedly"))
+        except AnalysisInterrupted:
+            self._idle.put(worker)
+            raise
+        self._idle.put(worker)
+        return result
+
+    def _add_worker(self) -> None:
+        worker = _Worker(self._context, self._memory_limit)
+        self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        self._workers.remove(worker)
+        self._add_worker()
+
+
+_pool: typing.Optional[AnalysisPool] = None
+_executor: typing.Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_analysis_pool() -> typing.Optional[AnalysisPool]:
+    """
+    Get the analysis pool configured in the settings, starting it if
+    needed. If the settings ask for no workers, there is no pool and
+    protocols are analyzed in the server process.
+    """
+    global _pool
+    settings = get_settings()
+    if settings.protocol_analysis_workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = AnalysisPool(
+                workers=settings.protocol_analysis_workers,
+                timeout=settings.protocol_analysis_timeout,
+                memory_limit=settings.protocol_analysis_memory_limit)
+        return _pool
+
+
+def _set_event_loop() -> None:
+    # protocol contexts built on an analysis thread need an event loop
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+def submit(fn: typing.Callable[..., AnalysisResult],
+           *args: typing.Any) -> 'Future[AnalysisResult]':
+    """
+    Run an analysis function in the background.
+
+    Each analysis waits on a thread, so that requests are not held up by
+    it. There is a thread for each worker in the analysis pool; if there is
+    no pool, analyses run in the server process one at a time, since each
+    changes the working directory of the process while it runs.
+    """
+    global _executor
+    with _pool_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(get_settings().protocol_analysis_workers, 1),
+                thread_name_prefix='protocol-analysis',
+                initializer=_set_event_loop)
+        return _executor.submit(fn, *args)
+
+
+def shutdown_analysis_pool() -> None:
+    """Stop the analysis pool and background analyses, if they started"""
+    global _pool, _executor
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
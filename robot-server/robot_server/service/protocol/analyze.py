@@ -6,8 +6,8 @@ from json import JSONDecodeError
 from opentrons.protocol_api import ProtocolContext
 from opentrons.protocols.execution.errors import ExceptionInProtocolError
 from opentrons.protocols.execution.execute import run_protocol
-from opentrons.protocols.implementations.simulators.protocol_context import \
-    ProtocolContextSimulation
+from opentrons.protocols.implementations.simulators.context_factory import \
+    SimulationContextFactory
 from opentrons.protocols.parse import parse
 from opentrons.protocols.types import Protocol
 
@@ -18,22 +18,33 @@ from robot_server.service.protocol.environment import protocol_environment
 
 log = logging.getLogger(__name__)
 
+# analyses share a warm hardware simulator rather than each starting one
+_context_factory = SimulationContextFactory()
+
 
 @dataclass(frozen=True)
 class AnalysisResult:
     meta: models.Meta
     required_equipment: models.RequiredEquipment
     errors: typing.List[models.ProtocolError] = field(default_factory=list)
+    # False if an error is not down to the protocol itself, so that another
+    # analysis of the same contents might not find it
+    cacheable: bool = True
 
 
 class AnalyzeError(Exception):
-    def __init__(self, error: models.ProtocolError):
+    def __init__(self, error: models.ProtocolError, cacheable: bool = True):
         self._error = error
+        self._cacheable = cacheable
 
     @property
     def error(self) -> models.ProtocolError:
         return self._error
 
+    @property
+    def cacheable(self) -> bool:
+        return self._cacheable
+
 
 class AnalyzeParseError(AnalyzeError):
     pass
@@ -50,24 +61,44 @@ def analyze_protocol(protocol_contents: contents.Contents) -> AnalysisResult:
         return _analyze(protocol_contents)
 
 
+def pending_analysis() -> AnalysisResult:
+    """The empty result reported until an analysis completes."""
+    return AnalysisResult(
+        meta=_extract_metadata(None),
+        required_equipment=_extract_equipment(None),
+        errors=[]
+    )
+
+
+def failed_analysis(error: models.ProtocolError) -> AnalysisResult:
+    """The result of an analysis that could not be completed."""
+    return AnalysisResult(
+        meta=_extract_metadata(None),
+        required_equipment=_extract_equipment(None),
+        errors=[error]
+    )
+
+
 def _analyze(protocol_contents: contents.Contents) -> AnalysisResult:
     """Analyze the protocol to extract metadata and equipment requirements."""
     errors = []
+    cacheable = True
     protocol = None
-    ctx = None
+    equipment = None
     try:
         protocol = _parse_protocol(protocol_contents=protocol_contents)
-        ctx = _simulate_protocol(protocol)
+        equipment = _simulate_protocol(protocol)
     except AnalyzeError as e:
         errors.append(e.error)
+        cacheable = e.cacheable
 
     meta = _extract_metadata(protocol)
-    equipment = _extract_equipment(ctx)
 
     return AnalysisResult(
         meta=meta,
-        required_equipment=equipment,
-        errors=errors
+        required_equipment=equipment or _extract_equipment(None),
+        errors=errors,
+        cacheable=cacheable
     )
 
 
@@ -152,23 +183,22 @@ def _parse_protocol(protocol_contents: contents.Contents) -> Protocol:
             error=models.ProtocolError(
                 type=e.__class__.__name__,
                 description=str(e)
-            )
+            ),
+            # the protocol file could not be read
+            cacheable=not isinstance(e, OSError)
         )
 
 
-def _simulate_protocol(protocol: Protocol) -> ProtocolContext:
+def _simulate_protocol(protocol: Protocol) -> models.RequiredEquipment:
     """
-    Simulate the protocol
+    Simulate the protocol and extract its equipment requirements
 
     :raise AnalyzeSimulationError:
     """
     try:
-        ctx = ProtocolContext.build_using(
-            implementation=ProtocolContextSimulation.build_using(protocol),
-            protocol=protocol,
-        )
-        run_protocol(protocol, context=ctx)
-        return ctx
+        with _context_factory.build(protocol) as ctx:
+            run_protocol(protocol, context=ctx)
+            return _extract_equipment(ctx)
     except ExceptionInProtocolError as e:
         raise AnalyzeSimulationError(
             error=models.ProtocolError(
@@ -178,9 +208,12 @@ def _simulate_protocol(protocol: Protocol) -> ProtocolContext:
             )
         )
     except Exception as e:
+        # not raised by the protocol's own code, so it may be down to the
+        # server rather than the protocol
         raise AnalyzeSimulationError(
             error=models.ProtocolError(
                 type=e.__class__.__name__,
                 description=str(e),
-            )
+            ),
+            cacheable=False
         )
@@ -0,0 +1,120 @@
+"""A protocol file uploaded in chunks, which a client may resume."""
+import hashlib
+import logging
+import typing
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from opentrons.util.helpers import utc_now
+
+from robot_server.service.protocol import errors
+from robot_server.service.protocol.contents import DIR_PREFIX
+from robot_server.util import FileMeta
+
+log = logging.getLogger(__name__)
+
+DIR_SUFFIX = '._upload_dir'
+
+# The largest chunk accepted. Chunks are held in memory until they have all
+# arrived, so that a chunk cut short is never appended.
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+class ChunkedUpload:
+    """
+    A protocol file being received in chunks.
+
+    Each chunk is appended to the file and hashed as it arrives, so the
+    file is ready to become a protocol as soon as the last one is received.
+    A client whose connection drops asks how many bytes were received and
+    resumes from there.
+    """
+
+    def __init__(self, identifier: str, filename: str):
+        """
+        Constructor
+
+        :param identifier: The id of the upload
+        :param filename: The name of the file being uploaded
+        :raise ProtocolIOException: On failure to create the file
+        """
+        self._identifier = identifier
+        self._filename = Path(filename).name
+        self._created_at = utc_now()
+        self._received = 0
+        self._hasher = hashlib.sha256()
+        try:
+            self._directory = TemporaryDirectory(suffix=DIR_SUFFIX,
+                                                 prefix=DIR_PREFIX)
+            self._path = Path(self._directory.name) / self._filename
+            self._path.touch()
+        except IOError as e:
+            log.exception("Failed to create upload file.")
+            raise errors.ProtocolIOException(str(e))
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def filename(self) -> str:
+        return self._filename
+
+    @property
+    def created_at(self) -> datetime:
+        return self._created_at
+
+    @property
+    def received(self) -> int:
+        """The number of bytes received"""
+        return self._received
+
+    @property
+    def content_hash(self) -> str:
+        """The sha256 of the bytes received"""
+        return self._hasher.hexdigest()
+
+    def append(self,
+               offset: int,
+               chunk: bytes,
+               checksum: typing.Optional[str] = None) -> None:
+        """
+        Append a chunk to the file
+
+        :param offset: Where in the file the chunk goes. Must be the number
+            of bytes received so far.
+        :param chunk: The chunk
+        :param checksum: The sha256 of the chunk as hex, if the client sent
+            one
+        :raise ChunkOffsetMismatch: The chunk does not follow the bytes
+            received
+        :raise ChunkChecksumMismatch: The chunk does not match its checksum
+        :raise ProtocolIOException: On failure to write the chunk
+        """
+        if offset != self._received:
+            raise errors.ChunkOffsetMismatch(offset, self._received)
+        if checksum is not None:
+            calculated = hashlib.sha256(chunk).hexdigest()
+            if calculated != checksum.lower():
+                raise errors.ChunkChecksumMismatch(
+                    f"Chunk at offset {offset}: calculated {calculated} "
+                    f"!= sent {checksum}")
+        try:
+            with self._path.open('r+b') as f:
+                f.seek(offset)
+                f.write(chunk)
+                f.truncate()
+        except IOError as e:
+            log.exception("Failed to write upload chunk.")
+            raise errors.ProtocolIOException(str(e))
+        self._hasher.update(chunk)
+        self._received += len(chunk)
+
+    def file_meta(self) -> FileMeta:
+        """The file received so far, with its hash"""
+        return FileMeta(path=self._path, content_hash=self.content_hash)
+
+    def clean_up(self) -> None:
+        """Remove the file"""
+        self._directory.cleanup()
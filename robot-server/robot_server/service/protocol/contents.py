@@ -1,5 +1,7 @@
 """Functions and models of the contents and location of uploaded protocol."""
+import hashlib
 import logging
+import shutil
 import typing
 from dataclasses import dataclass, field, replace
 from pathlib import Path
@@ -16,6 +18,7 @@ log = logging.getLogger(__name__)
 
 DIR_PREFIX = 'opentrons_'
 DIR_SUFFIX = '._proto_dir'
+SNAPSHOT_DIR_SUFFIX = '._snapshot_dir'
 
 
 @dataclass
@@ -59,6 +62,36 @@ def create(
     )
 
 
+def create_from_file(protocol_file: FileMeta) -> Contents:
+    """
+    Create the temporary directory from a protocol file already saved.
+
+    The file is moved into the directory; its hash is kept rather than
+    read again.
+
+    :param protocol_file: The saved protocol file and its hash
+    :raise ProtocolIOException:
+    """
+    try:
+        temp_dir = TemporaryDirectory(suffix=DIR_SUFFIX,
+                                      prefix=DIR_PREFIX)
+        try:
+            path = Path(temp_dir.name) / protocol_file.path.name
+            shutil.move(str(protocol_file.path), str(path))
+        except IOError:
+            temp_dir.cleanup()
+            raise
+    except IOError as e:
+        log.exception("Failed to move uploaded file.")
+        raise ProtocolIOException(str(e))
+
+    return Contents(
+        protocol_file=FileMeta(path=path,
+                               content_hash=protocol_file.content_hash),
+        directory=temp_dir,
+    )
+
+
 def update(
         contents: Contents,
         upload_file: UploadFile) -> Contents:
@@ -92,6 +125,45 @@ def update(
         )
 
 
+def snapshot(contents: Contents) -> Contents:
+    """
+    Copy the protocol files to a new temporary directory.
+
+    The copies are hashed as they are made, so the hashes are of the files
+    copied even if the protocol was updated in the meantime.
+
+    :raise ProtocolIOException:
+    """
+    try:
+        temp_dir = TemporaryDirectory(suffix=SNAPSHOT_DIR_SUFFIX,
+                                      prefix=DIR_PREFIX)
+        try:
+            temp_dir_path = Path(temp_dir.name)
+            protocol_file_meta = _copy_file(temp_dir_path,
+                                            contents.protocol_file)
+            support_files_meta = [_copy_file(temp_dir_path, s)
+                                  for s in contents.support_files]
+        except IOError:
+            temp_dir.cleanup()
+            raise
+    except IOError as e:
+        log.warning(f"Failed to copy protocol files: {e}")
+        raise ProtocolIOException(str(e))
+
+    return Contents(
+        protocol_file=protocol_file_meta,
+        support_files=support_files_meta,
+        directory=temp_dir,
+    )
+
+
+def _copy_file(directory: Path, file_meta: FileMeta) -> FileMeta:
+    data = file_meta.path.read_bytes()
+    path = directory / file_meta.path.name
+    path.write_bytes(data)
+    return FileMeta(path=path, content_hash=hashlib.sha256(data).hexdigest())
+
+
 def get_protocol_contents(contents: Contents) -> str:
     """Read the protocol file contents as a string"""
     with contents.protocol_file.path.open("r") as f:
@@ -1,4 +1,32 @@
-from robot_server.service.errors import RobotServerError, CommonErrorDef
+from http import HTTPStatus
+
+from robot_server.service.errors import RobotServerError, CommonErrorDef, \
+    ErrorDef, ErrorCreateDef
+
+
+class ProtocolUploadErrorDef(ErrorDef):
+    CHUNK_OFFSET_MISMATCH = ErrorCreateDef(
+        status_code=HTTPStatus.CONFLICT,
+        title='Chunk Offset Mismatch',
+        format_string='The chunk at offset {offset} does not follow the '
+                      '{received} bytes received'
+    )
+    CHUNK_CHECKSUM_MISMATCH = ErrorCreateDef(
+        status_code=HTTPStatus.BAD_REQUEST,
+        title='Checksum Mismatch',
+        format_string='{reason}'
+    )
+    CHUNK_TOO_LARGE = ErrorCreateDef(
+        status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        title='Chunk Too Large',
+        format_string='Chunks must have a Content-Length of at most '
+                      '{max_size} bytes'
+    )
+    INCOMPLETE_CHUNK = ErrorCreateDef(
+        status_code=HTTPStatus.BAD_REQUEST,
+        title='Incomplete Chunk',
+        format_string='The chunk at offset {offset} was cut short'
+    )
 
 
 class ProtocolException(RobotServerError):
@@ -34,3 +62,43 @@ class ProtocolUploadCountLimitReached(ProtocolException):
     def __init__(self, msg: str):
         super().__init__(definition=CommonErrorDef.ACTION_FORBIDDEN,
                          reason=msg)
+
+
+class UploadNotFoundException(ProtocolException):
+    """Chunked upload is not found"""
+    def __init__(self, identifier: str):
+        super().__init__(definition=CommonErrorDef.RESOURCE_NOT_FOUND,
+                         resource='upload',
+                         id=identifier)
+
+
+class ChunkOffsetMismatch(ProtocolException):
+    """A chunk does not follow the bytes already received"""
+    def __init__(self, offset: int, received: int):
+        super().__init__(
+            definition=ProtocolUploadErrorDef.CHUNK_OFFSET_MISMATCH,
+            meta={'receivedBytes': received},
+            offset=offset,
+            received=received)
+
+
+class ChunkChecksumMismatch(ProtocolException):
+    """A chunk or file does not match its checksum"""
+    def __init__(self, reason: str):
+        super().__init__(
+            definition=ProtocolUploadErrorDef.CHUNK_CHECKSUM_MISMATCH,
+            reason=reason)
+
+
+class ChunkTooLarge(ProtocolException):
+    """A chunk is larger than allowed, or of unknown length"""
+    def __init__(self, max_size: int):
+        super().__init__(definition=ProtocolUploadErrorDef.CHUNK_TOO_LARGE,
+                         max_size=max_size)
+
+
+class IncompleteChunk(ProtocolException):
+    """The connection was lost while a chunk was received"""
+    def __init__(self, offset: int):
+        super().__init__(definition=ProtocolUploadErrorDef.INCOMPLETE_CHUNK,
+                         offset=offset)
@@ -1,9 +1,16 @@
+import asyncio
 import typing
 import logging
 from pathlib import Path
+from uuid import uuid4
 
 from fastapi import UploadFile
+from notify_server.clients.publisher import Publisher
+from notify_server.models import event, topics
+from notify_server.models.protocol_event import ProtocolAnalysisPayload
+from opentrons.util.helpers import utc_now
 
+from robot_server.service.protocol.chunked_upload import ChunkedUpload
 from robot_server.service.protocol.protocol import UploadedProtocol
 from robot_server.service.protocol import errors
 from robot_server.settings import get_settings
@@ -14,8 +21,18 @@ log = logging.getLogger(__name__)
 class ProtocolManager:
     MAX_COUNT = get_settings().protocol_manager_max_protocols
 
-    def __init__(self):
+    def __init__(self, event_publisher: typing.Optional[Publisher] = None):
+        """
+        Constructor
+
+        :param event_publisher: Publishes an event each time a protocol
+            analysis completes
+        """
         self._protocols: typing.Dict[str, UploadedProtocol] = {}
+        self._uploads: typing.Dict[str, ChunkedUpload] = {}
+        self._event_publisher = event_publisher
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = \
+            asyncio.get_event_loop() if event_publisher else None
 
     def create(self,
                protocol_file: UploadFile,
@@ -23,6 +40,77 @@ class ProtocolManager:
                ) -> UploadedProtocol:
         """Create a protocol object from upload"""
         protocol_id = Path(protocol_file.filename).stem
+        self._check_can_create(protocol_id)
+
+        new_protocol = UploadedProtocol.create(
+            protocol_id=protocol_id,
+            protocol_file=protocol_file,
+            support_files=support_files,
+            on_analysis_complete=self._analysis_complete
+        )
+        log.debug(f"Created new protocol: {new_protocol.data}")
+
+        self._protocols[new_protocol.data.identifier] = new_protocol
+        return new_protocol
+
+    def create_upload(self, filename: str) -> ChunkedUpload:
+        """Start a chunked upload of a protocol file"""
+        if len(self._uploads) >= ProtocolManager.MAX_COUNT:
+            raise errors.ProtocolUploadCountLimitReached(
+                f"Upload limit of {ProtocolManager.MAX_COUNT} has "
+                f"been reached.")
+        upload = ChunkedUpload(identifier=str(uuid4()), filename=filename)
+        self._uploads[upload.identifier] = upload
+        return upload
+
+    def get_upload(self, upload_id: str) -> ChunkedUpload:
+        """Get a chunked upload"""
+        try:
+            return self._uploads[upload_id]
+        except KeyError:
+            raise errors.UploadNotFoundException(upload_id)
+
+    def remove_upload(self, upload_id: str) -> ChunkedUpload:
+        """Abandon a chunked upload"""
+        try:
+            upload = self._uploads.pop(upload_id)
+        except KeyError:
+            raise errors.UploadNotFoundException(upload_id)
+        upload.clean_up()
+        return upload
+
+    def complete_upload(self,
+                        upload_id: str,
+                        content_hash: typing.Optional[str] = None
+                        ) -> UploadedProtocol:
+        """
+        Create a protocol object from a completed chunked upload
+
+        :param upload_id: The id of the upload
+        :param content_hash: If specified, the sha256 of the whole file as
+            hex, which must match the chunks received
+        """
+        upload = self.get_upload(upload_id)
+        if content_hash is not None and \
+                content_hash.lower() != upload.content_hash:
+            raise errors.ChunkChecksumMismatch(
+                f"Upload {upload_id}: calculated {upload.content_hash} "
+                f"!= sent {content_hash}")
+        protocol_id = Path(upload.filename).stem
+        self._check_can_create(protocol_id)
+
+        new_protocol = UploadedProtocol.create_from_file(
+            protocol_id=protocol_id,
+            protocol_file=upload.file_meta(),
+            on_analysis_complete=self._analysis_complete
+        )
+        log.debug(f"Created new protocol from upload: {new_protocol.data}")
+
+        self._protocols[new_protocol.data.identifier] = new_protocol
+        self.remove_upload(upload_id)
+        return new_protocol
+
+    def _check_can_create(self, protocol_id: str) -> None:
         if protocol_id in self._protocols:
             raise errors.ProtocolAlreadyExistsException(
                 f"A protocol with id '{protocol_id}' already exists"
@@ -33,15 +121,24 @@ class ProtocolManager:
                 f"Upload limit of {ProtocolManager.MAX_COUNT} has "
                 f"been reached.")
 
-        new_protocol = UploadedProtocol.create(
-            protocol_id=protocol_id,
-            protocol_file=protocol_file,
-            support_files=support_files
-        )
-        log.debug(f"Created new protocol: {new_protocol.data}")
+    def _analysis_complete(self, protocol: UploadedProtocol) -> None:
+        # Analyses complete on background threads, while the publisher
+        # belongs to the event loop
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(
+                self._publish_analysis_complete, protocol.data.identifier)
 
-        self._protocols[new_protocol.data.identifier] = new_protocol
-        return new_protocol
+    def _publish_analysis_complete(self, protocol_id: str) -> None:
+        if self._event_publisher is None:
+            return
+        topic = topics.RobotEventTopics.PROTOCOL_EVENTS
+        publisher = self._publish_analysis_complete.__qualname__
+        self._event_publisher.send_nowait(
+            topic,
+            event.Event(
+                createdOn=utc_now(),
+                publisher=publisher,
+                data=ProtocolAnalysisPayload(protocolId=protocol_id)))
 
     def get(self, protocol_id: str) -> UploadedProtocol:
         """Get a protocol"""
@@ -72,4 +169,10 @@ class ProtocolManager:
                 log.exception(f"Failed to remove protocol {p.data.identifier}")
         ret_val = tuple(self._protocols.values())
         self._protocols = {}
+        for u in self._uploads.values():
+            try:
+                u.clean_up()
+            except IOError:
+                log.exception(f"Failed to remove upload {u.identifier}")
+        self._uploads = {}
         return ret_val
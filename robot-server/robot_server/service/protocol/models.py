@@ -1,5 +1,6 @@
 import typing
 from datetime import datetime
+from enum import Enum
 
 from opentrons.protocols.geometry.module_geometry import ModuleModel
 from opentrons_shared_data.pipette.dev_types import PipetteName
@@ -8,7 +9,7 @@ from pydantic import BaseModel, Field
 
 from opentrons.hardware_control.dev_types import ONE_CHANNEL, EIGHT_CHANNELS
 from robot_server.service.json_api import (
-    ResponseModel, ResponseDataModel, MultiResponseModel)
+    ResponseModel, ResponseDataModel, MultiResponseModel, RequestModel)
 
 from robot_server.service.legacy.models.control import Mount
 
@@ -69,6 +70,12 @@ class ProtocolError(BaseModel):
     fileName: typing.Optional[str] = None
 
 
+class AnalysisStatus(str, Enum):
+    """The state of the analysis of a protocol"""
+    pending = "pending"
+    complete = "complete"
+
+
 class FileAttributes(BaseModel):
     basename: str
 
@@ -82,6 +89,11 @@ class ProtocolResponseAttributes(ResponseDataModel):
     createdAt: datetime =\
         Field(...,
               description="When the protocol was uploaded.")
+    analysis: AnalysisStatus =\
+        Field(...,
+              description="Whether the protocol has been analyzed. Until "
+                          "it has, the required equipment, metadata and "
+                          "errors are empty.")
     requiredEquipment: RequiredEquipment =\
         Field(...,
               description="The equipment required by the protocol.")
@@ -97,3 +109,27 @@ class ProtocolResponseAttributes(ResponseDataModel):
 ProtocolResponse = ResponseModel[ProtocolResponseAttributes]
 
 MultiProtocolResponse = MultiResponseModel[ProtocolResponseAttributes]
+
+
+class UploadCreateAttributes(BaseModel):
+    filename: str =\
+        Field(...,
+              description="The name of the protocol file to be uploaded.")
+
+
+class UploadResponseAttributes(ResponseDataModel):
+    filename: str =\
+        Field(...,
+              description="The name of the protocol file being uploaded.")
+    receivedBytes: int =\
+        Field(...,
+              description="How many bytes of the file have been received. "
+                          "The next chunk must be sent at this offset.")
+    createdAt: datetime =\
+        Field(...,
+              description="When the upload was started.")
+
+
+UploadCreateRequest = RequestModel[UploadCreateAttributes]
+
+UploadResponse = ResponseModel[UploadResponseAttributes]
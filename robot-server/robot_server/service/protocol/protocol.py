@@ -1,13 +1,18 @@
 """Internal models of uploaded protocol"""
 import logging
+import threading
 import typing
+from concurrent.futures import Future
 from contextlib import contextmanager
 from datetime import datetime
 from dataclasses import dataclass, field
 
 from fastapi import UploadFile
 
-from robot_server.service.protocol import contents, analyze, environment
+from robot_server.service.protocol import contents, analysis_cache, \
+    analysis_pool, analyze, environment, models
+from robot_server.service.protocol.analyze import AnalysisResult
+from robot_server.util import FileMeta
 from opentrons.util.helpers import utc_now
 
 log = logging.getLogger(__name__)
@@ -17,64 +22,180 @@ log = logging.getLogger(__name__)
 class UploadedProtocolData:
     identifier: str
     contents: contents.Contents
-    analysis_result: analyze.AnalysisResult
+    # None until the protocol has been analyzed
+    analysis_result: typing.Optional[AnalysisResult] = None
     last_modified_at: datetime = field(default_factory=utc_now)
     created_at: datetime = field(default_factory=utc_now)
 
 
+AnalysisCallback = typing.Callable[['UploadedProtocol'], None]
+
+
 class UploadedProtocol:
     # TODO AL 20201219 - make the methods of this class async
     def __init__(self,
-                 data: UploadedProtocolData):
-        """Constructor"""
+                 data: UploadedProtocolData,
+                 on_analysis_complete: typing.Optional[AnalysisCallback]
+                 = None):
+        """
+        Constructor
+
+        :param data: The protocol's data
+        :param on_analysis_complete: Called, from a background thread, each
+            time an analysis of the protocol completes
+        """
         self._data = data
+        self._on_analysis_complete = on_analysis_complete
+        self._analysis: typing.Optional['Future[AnalysisResult]'] = None
+        self._analysis_changed = threading.Condition()
 
     @classmethod
     def create(
             cls,
             protocol_id: str,
             protocol_file: UploadFile,
-            support_files: typing.List[UploadFile]) -> 'UploadedProtocol':
+            support_files: typing.List[UploadFile],
+            on_analysis_complete: typing.Optional[AnalysisCallback] = None
+    ) -> 'UploadedProtocol':
         """
-        Create the UploadedProtocol object. The protocol is analyzed after the
-         files are saved.
+        Create the UploadedProtocol object. The protocol is analyzed in the
+         background after the files are saved.
 
         :param protocol_id: The id assigned to this protocol
         :param protocol_file: The uploaded protocol file
         :param support_files: Optional support files
+        :param on_analysis_complete: Called when an analysis completes
 
         :raise ProtocolIOException: On failure to save uploaded files.
-        :raise ProtocolAnalysisException: On failure to analyze the protocol.
         """
         protocol_contents = contents.create(
             protocol_file=protocol_file,
             support_files=support_files,
         )
-        analysis_results = analyze.analyze_protocol(protocol_contents)
+        return cls._create(protocol_id, protocol_contents,
+                           on_analysis_complete)
 
-        return cls(
+    @classmethod
+    def create_from_file(
+            cls,
+            protocol_id: str,
+            protocol_file: FileMeta,
+            on_analysis_complete: typing.Optional[AnalysisCallback] = None
+    ) -> 'UploadedProtocol':
+        """
+        Create the UploadedProtocol object from a protocol file already
+         saved, such as one uploaded in chunks. The file is moved into the
+         protocol's directory.
+
+        :param protocol_id: The id assigned to this protocol
+        :param protocol_file: The saved protocol file and its hash
+        :param on_analysis_complete: Called when an analysis completes
+
+        :raise ProtocolIOException: On failure to move the file.
+        """
+        protocol_contents = contents.create_from_file(protocol_file)
+        return cls._create(protocol_id, protocol_contents,
+                           on_analysis_complete)
+
+    @classmethod
+    def _create(
+            cls,
+            protocol_id: str,
+            protocol_contents: contents.Contents,
+            on_analysis_complete: typing.Optional[AnalysisCallback]
+    ) -> 'UploadedProtocol':
+        protocol = cls(
             UploadedProtocolData(
                 identifier=protocol_id,
-                analysis_result=analysis_results,
                 contents=protocol_contents
-            )
+            ),
+            on_analysis_complete=on_analysis_complete
         )
+        protocol._start_analysis()
+        return protocol
 
     def update(self, support_file: UploadFile) -> None:
         """
-        Add or replace a file in the protocol temp directory.
+        Add or replace a file in the protocol temp directory. The protocol is
+        analyzed again in the background.
 
         :raise ProtocolIOException: On failure to save uploaded file.
         """
         c = contents.update(self._data.contents, support_file)
-
-        # Re-analyze protocol
-        self._data.analysis_result = analyze.analyze_protocol(c)
         self._data.last_modified_at = utc_now()
         self._data.contents = c
 
+        # Re-analyze protocol
+        self._start_analysis()
+
+    def wait_for_analysis(self, timeout: typing.Optional[float] = None) \
+            -> AnalysisResult:
+        """
+        Wait for the current analysis of the protocol to complete.
+
+        :raise TimeoutError: If it takes longer than timeout seconds
+        """
+        with self._analysis_changed:
+            if not self._analysis_changed.wait_for(
+                    lambda: self._data.analysis_result is not None, timeout):
+                raise TimeoutError()
+            return typing.cast(AnalysisResult, self._data.analysis_result)
+
+    def _start_analysis(self) -> None:
+        protocol_contents = self._data.contents
+        cached = analysis_cache.cached_analysis(protocol_contents)
+        with self._analysis_changed:
+            if self._analysis is not None:
+                # its result will be out of date
+                self._analysis.cancel()
+                self._analysis = None
+            self._data.analysis_result = cached
+            if cached is None:
+                analysis = analysis_pool.submit(
+                    analysis_cache.analyze_protocol,
+                    self._data.identifier,
+                    protocol_contents)
+                self._analysis = analysis
+            else:
+                self._analysis_changed.notify_all()
+        if cached is None:
+            analysis.add_done_callback(self._analysis_done)
+        else:
+            self._analysis_complete(cached)
+
+    def _analysis_done(self, analysis: 'Future[AnalysisResult]') -> None:
+        if analysis.cancelled():
+            return
+        try:
+            result = analysis.result()
+        except Exception as e:
+            log.exception(f"Failed to analyze {self._data.identifier}")
+            result = analyze.failed_analysis(models.ProtocolError(
+                type=e.__class__.__name__, description=str(e)))
+        with self._analysis_changed:
+            if analysis is not self._analysis:
+                # the protocol changed while it was being analyzed
+                return
+            self._analysis = None
+            self._data.analysis_result = result
+            self._analysis_changed.notify_all()
+        self._analysis_complete(result)
+
+    def _analysis_complete(self, result: AnalysisResult) -> None:
+        log.debug(f"Analyzed {self._data.identifier}: "
+                  f"{len(result.errors)} errors")
+        if self._on_analysis_complete is not None:
+            try:
+                self._on_analysis_complete(self)
+            except Exception:
+                log.exception("Analysis completion callback failed")
+
     def clean_up(self) -> None:
         """Protocol is being removed. Perform any clean up required."""
+        with self._analysis_changed:
+            if self._analysis is not None:
+                self._analysis.cancel()
+                self._analysis = None
         contents.clean_up(self._data.contents)
 
     @property
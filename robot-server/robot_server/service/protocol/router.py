@@ -2,12 +2,17 @@ import logging
 import typing
 
 from starlette import status as http_status_codes
-from fastapi import APIRouter, UploadFile, File, Depends, Body
+from starlette.requests import ClientDisconnect
+from fastapi import APIRouter, UploadFile, File, Depends, Body, Query, \
+    Request
 
 from robot_server.service.json_api import ResourceLink
 from robot_server.service.json_api.resource_links import ResourceLinkKey, \
     ResourceLinks
-from robot_server.service.protocol import models as route_models
+from robot_server.service.protocol import analyze, errors, \
+    models as route_models
+from robot_server.service.protocol.chunked_upload import ChunkedUpload, \
+    MAX_CHUNK_SIZE
 from robot_server.service.dependencies import get_protocol_manager
 from robot_server.service.protocol.manager import ProtocolManager
 from robot_server.service.protocol.protocol import UploadedProtocol
@@ -18,6 +23,9 @@ router = APIRouter()
 
 PATH_ROOT = "/protocols"
 PATH_PROTOCOL_ID = PATH_ROOT + "/{protocolId}"
+PATH_UPLOADS = PATH_ROOT + "/uploads"
+PATH_UPLOAD_ID = PATH_UPLOADS + "/{uploadId}"
+PATH_UPLOAD_COMPLETE = PATH_UPLOAD_ID + "/complete"
 
 
 @router.post(PATH_ROOT,
@@ -101,11 +109,136 @@ async def upload_file(
     )
 
 
+@router.post(PATH_UPLOADS,
+             description="Start a chunked upload of a protocol file. The "
+                         "file is sent in chunks which are appended in "
+                         "turn; if the connection drops, ask how many "
+                         "bytes were received and carry on from there.",
+             response_model_exclude_unset=True,
+             response_model=route_models.UploadResponse,
+             status_code=http_status_codes.HTTP_201_CREATED)
+async def create_upload(
+        upload_request: route_models.UploadCreateRequest,
+        protocol_manager: ProtocolManager = Depends(get_protocol_manager)):
+    upload = protocol_manager.create_upload(
+        upload_request.data.filename)
+    return route_models.UploadResponse(
+        data=_to_upload_response(upload),
+        links=get_upload_links(router, upload.identifier)
+    )
+
+
+@router.get(PATH_UPLOAD_ID,
+            description="Get how much of a chunked upload was received",
+            response_model_exclude_unset=True,
+            response_model=route_models.UploadResponse)
+async def get_upload(
+        uploadId: str,
+        protocol_manager: ProtocolManager = Depends(get_protocol_manager)):
+    upload = protocol_manager.get_upload(uploadId)
+    return route_models.UploadResponse(
+        data=_to_upload_response(upload),
+        links=get_upload_links(router, upload.identifier)
+    )
+
+
+@router.put(PATH_UPLOAD_ID,
+            description="Append a chunk, sent as the raw request body, to "
+                        f"a chunked upload. Chunks may be at most "
+                        f"{MAX_CHUNK_SIZE} bytes.",
+            response_model_exclude_unset=True,
+            response_model=route_models.UploadResponse)
+async def upload_chunk(
+        uploadId: str,
+        request: Request,
+        offset: int = Query(...,
+                            description="Where in the file the chunk goes. "
+                                        "Must be the number of bytes "
+                                        "received so far."),
+        sha256: typing.Optional[str] = Query(
+            None,
+            description="The sha256 of the chunk as hex. If specified, a "
+                        "chunk that does not match it is rejected."),
+        protocol_manager: ProtocolManager = Depends(get_protocol_manager)):
+    upload = protocol_manager.get_upload(uploadId)
+    if offset != upload.received:
+        raise errors.ChunkOffsetMismatch(offset, upload.received)
+    length = request.headers.get('content-length')
+    if length is None or not length.isdigit() \
+            or int(length) > MAX_CHUNK_SIZE:
+        raise errors.ChunkTooLarge(MAX_CHUNK_SIZE)
+    # Receive the whole chunk before appending any of it, so that a chunk
+    # cut short by a dropped connection leaves the upload where it was
+    chunk = bytearray()
+    try:
+        async for data in request.stream():
+            chunk.extend(data)
+    except ClientDisconnect:
+        raise errors.IncompleteChunk(offset)
+    if len(chunk) != int(length):
+        raise errors.IncompleteChunk(offset)
+    upload.append(offset, bytes(chunk), sha256)
+    return route_models.UploadResponse(
+        data=_to_upload_response(upload),
+        links=get_upload_links(router, upload.identifier)
+    )
+
+
+@router.delete(PATH_UPLOAD_ID,
+               description="Abandon a chunked upload",
+               response_model_exclude_unset=True,
+               response_model=route_models.UploadResponse)
+async def delete_upload(
+        uploadId: str,
+        protocol_manager: ProtocolManager = Depends(get_protocol_manager)):
+    upload = protocol_manager.remove_upload(uploadId)
+    return route_models.UploadResponse(
+        data=_to_upload_response(upload),
+        links=get_root_links(router)
+    )
+
+
+@router.post(PATH_UPLOAD_COMPLETE,
+             description="Create a protocol from a chunked upload whose "
+                         "chunks have all been sent",
+             response_model_exclude_unset=True,
+             response_model=route_models.ProtocolResponse,
+             status_code=http_status_codes.HTTP_201_CREATED)
+async def complete_upload(
+        uploadId: str,
+        sha256: typing.Optional[str] = Query(
+            None,
+            description="The sha256 of the whole file as hex. If specified, "
+                        "an upload that does not match it is rejected."),
+        protocol_manager: ProtocolManager = Depends(get_protocol_manager)):
+    new_proto = protocol_manager.complete_upload(uploadId, sha256)
+    return route_models.ProtocolResponse(
+        data=_to_response(new_proto),
+        links=get_protocol_links(router, new_proto.data.identifier)
+    )
+
+
+def _to_upload_response(upload: ChunkedUpload) \
+        -> route_models.UploadResponseAttributes:
+    """Create UploadResponse from a ChunkedUpload"""
+    return route_models.UploadResponseAttributes(
+        id=upload.identifier,
+        filename=upload.filename,
+        receivedBytes=upload.received,
+        createdAt=upload.created_at,
+    )
+
+
 def _to_response(uploaded_protocol: UploadedProtocol) \
         -> route_models.ProtocolResponseAttributes:
     """Create ProtocolResponse from an UploadedProtocol"""
     meta = uploaded_protocol.data
-    analysis_result = uploaded_protocol.data.analysis_result
+    analysis_result = meta.analysis_result
+    if analysis_result is None:
+        analysis_status = route_models.AnalysisStatus.pending
+        analysis_result = analyze.pending_analysis()
+    else:
+        analysis_status = route_models.AnalysisStatus.complete
     return route_models.ProtocolResponseAttributes(
         id=meta.identifier,
         protocolFile=route_models.FileAttributes(
@@ -116,6 +249,7 @@ def _to_response(uploaded_protocol: UploadedProtocol) \
         ) for s in meta.contents.support_files],
         lastModifiedAt=meta.last_modified_at,
         createdAt=meta.created_at,
+        analysis=analysis_status,
         metadata=analysis_result.meta,
         requiredEquipment=analysis_result.required_equipment,
         errors=analysis_result.errors
@@ -144,3 +278,14 @@ def get_protocol_links(api_router: APIRouter, protocol_id: str) \
         ResourceLinkKey.protocols: ROOT_RESOURCE,
         ResourceLinkKey.protocol_by_id: PROTOCOL_BY_ID_RESOURCE
     }
+
+
+def get_upload_links(api_router: APIRouter, upload_id: str) \
+        -> ResourceLinks:
+    """Get resource links for chunked upload path handlers"""
+    return {
+        ResourceLinkKey.self: ResourceLink(
+            href=api_router.url_path_for(get_upload.__name__,
+                                         uploadId=upload_id)),
+        ResourceLinkKey.protocols: ROOT_RESOURCE,
+    }
@@ -74,10 +74,42 @@ class RobotServerSettings(BaseSettings):
         description="The maximum number of protocols allowed for upload"
     )
 
+    protocol_analysis_cache_dir: typing.Optional[str] = Field(
+        str(infer_config_base_dir() / 'protocol_analysis_cache'),
+        description="Directory in which protocol analysis results are "
+                    "cached. If empty, results are only cached in memory."
+    )
+    protocol_analysis_cache_max_entries: int = Field(
+        32,
+        description="The maximum number of protocol analysis results to "
+                    "cache. Set to 0 to turn the cache off."
+    )
+
+    protocol_analysis_workers: int = Field(
+        2,
+        description="The number of processes analyzing uploaded protocols. "
+                    "If 0, protocols are analyzed in the server process."
+    )
+    protocol_analysis_timeout: float = Field(
+        300,
+        description="The longest a protocol analysis may take, in seconds."
+    )
+    protocol_analysis_memory_limit: typing.Optional[int] = Field(
+        None,
+        description="The most memory a protocol analysis process may use, "
+                    "in megabytes. If not set, there is no limit."
+    )
+
     notification_server_subscriber_address: str = Field(
         "tcp://localhost:5555",
         description="The endpoint to subscribe to notification server topics."
     )
+    notification_subscriber_max_queued: int = Field(
+        100,
+        description="The most notifications that may wait to be sent to a "
+                    "websocket subscriber. A subscriber that falls further "
+                    "behind is disconnected."
+    )
 
     class Config:
         env_prefix = "OT_ROBOT_SERVER_"
@@ -27,8 +27,10 @@ from opentrons.protocol_api import labware
 from opentrons.types import Point, Mount
 from opentrons.protocols.geometry.deck import Deck
 
+from robot_server.service.protocol.analysis_cache import get_analysis_cache
 from robot_server.service.protocol.manager import ProtocolManager
 from robot_server.service.session.manager import SessionManager
+from robot_server.settings import get_settings
 
 test_router = routing.APIRouter()
 
@@ -75,6 +77,19 @@ def api_client_no_errors(override_hardware) -> TestClient:
     return client
 
 
+@pytest.fixture(scope="session", autouse=True)
+def analysis_cache_directory(tmp_path_factory):
+    """Keep protocol analysis results out of the real config directory"""
+    directory = tmp_path_factory.mktemp("protocol_analysis_cache")
+    os.environ['OT_ROBOT_SERVER_protocol_analysis_cache_dir'] = str(directory)
+    get_settings.cache_clear()
+    get_analysis_cache.cache_clear()
+    yield directory
+    del os.environ['OT_ROBOT_SERVER_protocol_analysis_cache_dir']
+    get_settings.cache_clear()
+    get_analysis_cache.cache_clear()
+
+
 @pytest.fixture(scope="session")
 def request_session():
     session = requests.Session()
@@ -1,10 +1,11 @@
-from typing import AsyncGenerator
+from mock import MagicMock, AsyncMock, patch, DEFAULT
 
 import pytest
-from mock import MagicMock, patch, DEFAULT
+from starlette import status
 from starlette.websockets import WebSocket
 from robot_server.service.notifications import handle_subscriber
-from robot_server.settings import get_settings
+from robot_server.service.notifications.hub import SubscriberHub, \
+    Subscription
 
 
 @pytest.fixture
@@ -13,36 +14,55 @@ def mock_socket() -> MagicMock:
     return MagicMock(spec=WebSocket)
 
 
-async def test_create_subscriber(mock_socket: MagicMock) -> None:
-    """Test that a subscriber is created correctly."""
-    # Why two patch calls? `create` is the name of an arg to `patch.multiple`.
-    with patch.object(handle_subscriber, "create") as mock_create:
-        with patch.multiple(handle_subscriber,
-                            route_events=DEFAULT,
-                            receive=DEFAULT) as values:
-            await handle_subscriber.handle_socket(mock_socket, ["a", "b"])
-            mock_create.assert_called_once_with(
-                        get_settings().notification_server_subscriber_address,
-                        ["a", "b"]
-                    )
-            values['route_events'].assert_called_once()
-            values['receive'].assert_called_once()
-
-
-async def test_route_events(
-        mock_socket: MagicMock,
-        mock_subscriber: AsyncGenerator,
-        topic_event) -> None:
-    """Test that an event is read from subscriber and sent to websocket."""
+@pytest.fixture
+def mock_hub() -> MagicMock:
+    """A mock subscriber hub."""
+    return MagicMock(spec=SubscriberHub)
+
+
+async def test_subscribe(mock_socket: MagicMock, mock_hub: MagicMock) -> None:
+    """Test that the client is subscribed to the hub while connected."""
+    with patch.multiple(handle_subscriber,
+                        route_events=DEFAULT,
+                        receive=DEFAULT) as values:
+        await handle_subscriber.handle_socket(mock_socket, ["a", "b"],
+                                              mock_hub)
+        mock_hub.subscribe.assert_called_once_with(["a", "b"])
+        subscription = mock_hub.subscribe.return_value
+        values['route_events'].assert_called_once_with(mock_socket,
+                                                       subscription)
+        values['receive'].assert_called_once()
+        mock_hub.unsubscribe.assert_called_once_with(subscription)
+
+
+async def test_route_events(mock_socket: MagicMock) -> None:
+    """Test that events are read from the subscription and sent to the
+    websocket."""
+    subscription = Subscription(frozenset(["a"]), max_queued=10)
+    subscription.put("one")
+    subscription.put("two")
+    subscription.end()
+    with patch.object(handle_subscriber, "send") as mock_send:
+        await handle_subscriber.route_events(mock_socket, subscription)
+        assert mock_send.call_args_list == [((mock_socket, "one"),),
+                                            ((mock_socket, "two"),)]
+    mock_socket.close.assert_not_called()
+
+
+async def test_route_events_dropped(mock_socket: MagicMock) -> None:
+    """Test that a client that falls behind is disconnected."""
+    mock_socket.close = AsyncMock()
+    subscription = Subscription(frozenset(["a"]), max_queued=1)
+    subscription.put("one")
+    subscription.put("two")
     with patch.object(handle_subscriber, "send") as mock_send:
-        await handle_subscriber.route_events(mock_socket,
-                                             mock_subscriber)
-        mock_send.assert_called_once_with(mock_socket, topic_event)
+        await handle_subscriber.route_events(mock_socket, subscription)
+        mock_send.assert_called_once_with(mock_socket, "one")
+    mock_socket.close.assert_called_once_with(
+        code=status.WS_1013_TRY_AGAIN_LATER)
 
 
-async def test_send_entry(
-        topic_event,
-        mock_socket: MagicMock) -> None:
-    """Test that entry is sent as json."""
-    await handle_subscriber.send(mock_socket, topic_event)
-    mock_socket.send_text.assert_called_once_with(topic_event.json())
+async def test_send_entry(mock_socket: MagicMock) -> None:
+    """Test that the encoded event is sent as text."""
+    await handle_subscriber.send(mock_socket, "text")
+    mock_socket.send_text.assert_called_once_with("text")
@@ -0,0 +1,108 @@
+import asyncio
+from typing import List
+
+import pytest
+from mock import MagicMock, patch
+from notify_server.clients.serdes import TopicEvent
+
+from robot_server.service.notifications import hub
+
+
+class FakeSubscriber:
+    """A subscriber yielding the events put in its queue."""
+
+    def __init__(self, address: str, topics: List[str],
+                 trusted: bool) -> None:
+        self.address = address
+        self.topics = topics
+        self.trusted = trusted
+        self.queue: 'asyncio.Queue[TopicEvent]' = asyncio.Queue()
+        self.close = MagicMock()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> TopicEvent:
+        return await self.queue.get()
+
+
+@pytest.fixture
+def subscribers(loop) -> List[FakeSubscriber]:
+    """The subscribers created by the hub, in order"""
+    created: List[FakeSubscriber] = []
+
+    def create(address, topics, trusted):
+        created.append(FakeSubscriber(address, topics, trusted))
+        return created[-1]
+
+    with patch.object(hub, "create", side_effect=create):
+        yield created
+
+
+@pytest.fixture
+def subscriber_hub() -> hub.SubscriberHub:
+    return hub.SubscriberHub(address="tcp://somewhere", max_queued=2)
+
+
+async def next_text(subscription: hub.Subscription) -> str:
+    return await asyncio.wait_for(subscription.__anext__(), 1)
+
+
+async def test_shares_subscriber(subscriber_hub, subscribers, topic_event):
+    """Test that clients of the same topics share a subscriber and that
+    each event is encoded once."""
+    first = subscriber_hub.subscribe(["a", "b"])
+    second = subscriber_hub.subscribe(["b", "a"])
+    assert len(subscribers) == 1
+    assert subscribers[0].address == "tcp://somewhere"
+    assert subscribers[0].topics == ["a", "b"]
+    assert subscribers[0].trusted
+
+    with patch.object(type(topic_event), "json",
+                      return_value="encoded") as mock_json:
+        subscribers[0].queue.put_nowait(topic_event)
+        assert await next_text(first) == "encoded"
+        assert await next_text(second) == "encoded"
+        mock_json.assert_called_once()
+
+
+async def test_different_topics(subscriber_hub, subscribers):
+    """Test that each set of topics has its own subscriber."""
+    subscriber_hub.subscribe(["a"])
+    subscriber_hub.subscribe(["a", "b"])
+    assert len(subscribers) == 2
+
+
+async def test_last_unsubscribe_closes(subscriber_hub, subscribers):
+    """Test that the subscriber closes when its last client leaves."""
+    first = subscriber_hub.subscribe(["a"])
+    second = subscriber_hub.subscribe(["a"])
+    subscriber_hub.unsubscribe(first)
+    subscribers[0].close.assert_not_called()
+    subscriber_hub.unsubscribe(second)
+    subscribers[0].close.assert_called_once()
+    # the next client gets a new subscriber
+    subscriber_hub.subscribe(["a"])
+    assert len(subscribers) == 2
+
+
+async def test_slow_client_dropped(subscriber_hub, subscribers, topic_event):
+    """Test that a client falling behind is dropped without holding up
+    the others."""
+    slow = subscriber_hub.subscribe(["a"])
+    fast = subscriber_hub.subscribe(["a"])
+    for _ in range(3):
+        subscribers[0].queue.put_nowait(topic_event)
+        assert await next_text(fast) == topic_event.json()
+    assert slow.dropped
+    assert not fast.dropped
+    # the events queued before it was dropped are still sent
+    assert [text async for text in slow] == [topic_event.json()] * 2
+
+
+async def test_close(subscriber_hub, subscribers):
+    """Test that closing the hub ends all subscriptions."""
+    subscription = subscriber_hub.subscribe(["a"])
+    subscriber_hub.close()
+    subscribers[0].close.assert_called_once()
+    assert [text async for text in subscription] == []
@@ -6,7 +6,7 @@ import pytest
 from starlette.testclient import TestClient
 from starlette.websockets import WebSocketDisconnect
 
-from robot_server.service.notifications import handle_subscriber
+from robot_server.service.notifications import handle_subscriber, hub
 
 
 def test_subscribe(api_client: TestClient):
@@ -32,9 +32,7 @@ def test_integration(
         mock_subscriber: AsyncGenerator,
         topic_event) -> None:
     """Test receiving a single event."""
-    with patch.object(handle_subscriber,
-                      "create",
-                      return_value=mock_subscriber):
+    with patch.object(hub, "create", return_value=mock_subscriber):
         sock = api_client.websocket_connect(
             "/notifications/subscribe?topic=t"
         )
@@ -0,0 +1,212 @@
+import os
+from dataclasses import replace
+from hashlib import sha256
+from pathlib import Path
+from mock import patch, MagicMock
+
+import pytest
+
+from robot_server.service.protocol import analysis_cache, analyze, models
+from robot_server.service.protocol.contents import Contents
+from robot_server.util import FileMeta
+
+
+@pytest.fixture
+def protocol_contents() -> Contents:
+    return Contents(
+        protocol_file=FileMeta(path=Path("abc.py"), content_hash="123"),
+        support_files=[
+            FileMeta(path=Path("a.json"), content_hash="456"),
+            FileMeta(path=Path("b.csv"), content_hash="789"),
+        ],
+        directory=MagicMock())
+
+
+@pytest.fixture
+def result() -> analyze.AnalysisResult:
+    return analyze.AnalysisResult(
+        meta=models.Meta(name="a", author="b", apiLevel="2.8"),
+        required_equipment=models.RequiredEquipment(
+            pipettes=[models.LoadedPipette(mount="left",
+                                           requestedAs="p300_single",
+                                           pipetteName="p300_single",
+                                           channels=1)],
+            labware=[models.LoadedLabware(label="trash",
+                                          uri="opentrons/trash/1",
+                                          location=12)],
+            modules=[]),
+        errors=[models.ProtocolError(type="error", description="desc")])
+
+
+def test_key_depends_on_contents(protocol_contents):
+    key = analysis_cache.analysis_key(protocol_contents)
+    # support file order does not matter
+    protocol_contents.support_files.reverse()
+    assert analysis_cache.analysis_key(protocol_contents) == key
+
+    protocol_contents.support_files[0] = FileMeta(path=Path("b.csv"),
+                                                  content_hash="000")
+    assert analysis_cache.analysis_key(protocol_contents) != key
+
+
+def test_key_depends_on_feature_flags(protocol_contents):
+    flag = MagicMock(return_value=False)
+    with patch.object(analysis_cache, "KEY_FEATURE_FLAGS", (flag,)):
+        key = analysis_cache.analysis_key(protocol_contents)
+        flag.return_value = True
+        assert analysis_cache.analysis_key(protocol_contents) != key
+
+
+def test_key_depends_on_server_version(protocol_contents):
+    key = analysis_cache.analysis_key(protocol_contents)
+    with patch.object(analysis_cache.robot_server, "__version__", "0.0.1"):
+        assert analysis_cache.analysis_key(protocol_contents) != key
+
+
+def test_cache_directory_is_for_tests(analysis_cache_directory):
+    assert analysis_cache.get_analysis_cache()._directory \
+        == analysis_cache_directory
+
+
+def test_memory_cache_evicts_least_recently_used(result):
+    cache = analysis_cache.AnalysisCache(max_entries=2)
+    cache.put("a", result)
+    cache.put("b", result)
+    assert cache.get("a") is result
+    cache.put("c", result)
+    assert cache.get("b") is None
+    assert cache.get("a") is result
+    assert cache.get("c") is result
+
+
+def test_disk_cache_round_trip(tmp_path, result):
+    analysis_cache.AnalysisCache(max_entries=2, directory=tmp_path)\
+        .put("a", result)
+    # a new cache, as after a restart, reads the stored result
+    assert analysis_cache.AnalysisCache(max_entries=2, directory=tmp_path)\
+        .get("a") == result
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, result):
+    cache = analysis_cache.AnalysisCache(max_entries=2, directory=tmp_path)
+    cache.put("a", result)
+    cache.put("b", result)
+    # make "a" the most recently used on disk
+    os.utime(tmp_path / "b.json", (1000, 1000))
+    os.utime(tmp_path / "a.json", (2000, 2000))
+    cache.put("c", result)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json", "c.json"]
+
+
+def test_disk_cache_discards_unreadable(tmp_path):
+    (tmp_path / "a.json").write_text("{not json")
+    cache = analysis_cache.AnalysisCache(max_entries=2, directory=tmp_path)
+    assert cache.get("a") is None
+    assert not (tmp_path / "a.json").exists()
+
+
+def test_disabled_cache(tmp_path, result):
+    cache = analysis_cache.AnalysisCache(max_entries=0, directory=tmp_path)
+    cache.put("a", result)
+    assert cache.get("a") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def mock_cache():
+    cache = analysis_cache.AnalysisCache(max_entries=2)
+    with patch.object(analysis_cache, "get_analysis_cache",
+                      return_value=cache):
+        yield cache
+
+
+@pytest.fixture
+def saved_contents(tmp_path) -> Contents:
+    path = tmp_path / "abc.py"
+    path.write_text("protocol")
+    directory = MagicMock()
+    directory.name = str(tmp_path)
+    return Contents(protocol_file=FileMeta(path=path, content_hash="123"),
+                    support_files=[],
+                    directory=directory)
+
+
+def test_analyze_protocol_uses_cache(mock_cache, saved_contents, result):
+    with patch.object(analysis_cache.analysis_pool, "get_analysis_pool",
+                      return_value=None), \
+            patch.object(analyze, "analyze_protocol",
+                         return_value=result) as mock_analyze:
+        assert analysis_cache.analyze_protocol(
+            "abc", saved_contents) is result
+        assert analysis_cache.analyze_protocol(
+            "abc", saved_contents) is result
+        mock_analyze.assert_called_once()
+
+
+def test_analyze_protocol_uses_pool(mock_cache, saved_contents, result):
+    pool = MagicMock()
+    pool.analyze.return_value = result
+    with patch.object(analysis_cache.analysis_pool, "get_analysis_pool",
+                      return_value=pool):
+        assert analysis_cache.analyze_protocol(
+            "abc", saved_contents) is result
+        pool.analyze.assert_called_once()
+        assert pool.analyze.call_args[0][0] == "abc"
+
+
+def test_interrupted_analysis_not_cached(mock_cache, saved_contents):
+    error = models.ProtocolError(type="AnalysisTimeout", description="slow")
+    pool = MagicMock()
+    pool.analyze.side_effect = analysis_cache.analysis_pool\
+        .AnalysisInterrupted(error=error)
+    with patch.object(analysis_cache.analysis_pool, "get_analysis_pool",
+                      return_value=pool):
+        assert analysis_cache.analyze_protocol(
+            "abc", saved_contents).errors == [error]
+        assert analysis_cache.analyze_protocol(
+            "abc", saved_contents).errors == [error]
+        assert pool.analyze.call_count == 2
+
+
+def test_uncacheable_analysis_not_cached(mock_cache, saved_contents, result):
+    uncacheable = replace(result, cacheable=False)
+    with patch.object(analysis_cache.analysis_pool, "get_analysis_pool",
+                      return_value=None), \
+            patch.object(analyze, "analyze_protocol",
+                         return_value=uncacheable) as mock_analyze:
+        analysis_cache.analyze_protocol("abc", saved_contents)
+        analysis_cache.analyze_protocol("abc", saved_contents)
+        assert mock_analyze.call_count == 2
+
+
+def test_analyze_protocol_analyzes_a_copy(mock_cache, saved_contents,
+                                          result):
+    key = analysis_cache.analysis_key(
+        replace(saved_contents,
+                protocol_file=FileMeta(path=saved_contents.protocol_file.path,
+                                       content_hash=sha256(b"protocol")
+                                       .hexdigest())))
+
+    def analyze_protocol(snapshot):
+        assert snapshot.protocol_file.path.read_text() == "protocol"
+        # the protocol is updated while it is analyzed
+        saved_contents.protocol_file.path.write_text("updated")
+        assert snapshot.protocol_file.path.read_text() == "protocol"
+        return result
+
+    with patch.object(analysis_cache.analysis_pool, "get_analysis_pool",
+                      return_value=None), \
+            patch.object(analyze, "analyze_protocol",
+                         side_effect=analyze_protocol):
+        assert analysis_cache.analyze_protocol(
+            "abc", saved_contents) is result
+    # the result is stored against the contents that were analyzed
+    assert mock_cache.get(key) is result
+
+
+def test_analyze_removed_protocol(mock_cache, saved_contents):
+    saved_contents.protocol_file.path.unlink()
+    with patch.object(analyze, "analyze_protocol") as mock_analyze:
+        result = analysis_cache.analyze_protocol("abc", saved_contents)
+    mock_analyze.assert_not_called()
+    assert [e.type for e in result.errors] == ["AnalysisFailed"]
@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from robot_server.service.protocol import analysis_pool, analyze, contents
+from robot_server.util import FileMeta
+
+
+PROTOCOL = """
+import os
+metadata = {"apiLevel": "2.8"}
+
+def run(ctx):
+    ctx.load_labware("corning_96_wellplate_360ul_flat", 1)
+    ctx.comment(os.getcwd())
+"""
+
+SLOW_PROTOCOL = """
+import time
+metadata = {"apiLevel": "2.8"}
+
+def run(ctx):
+    time.sleep(30)
+"""
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = analysis_pool.AnalysisPool(workers=2, timeout=10)
+    yield pool
+    pool.shutdown()
+
+
+def make_contents(text: str) -> contents.Contents:
+    directory = TemporaryDirectory()
+    path = Path(directory.name) / "protocol.py"
+    path.write_text(text)
+    return contents.Contents(
+        protocol_file=FileMeta(path=path, content_hash=""),
+        support_files=[],
+        directory=directory)
+
+
+def test_analyze(pool):
+    protocol_contents = make_contents(PROTOCOL)
+    cwd = os.getcwd()
+    result = pool.analyze("protocol", protocol_contents)
+    assert result.errors == []
+    assert result.meta.apiLevel == "2.8"
+    assert [lw.location for lw in result.required_equipment.labware] \
+        == [1, 12]
+    # the server process's working directory is untouched
+    assert os.getcwd() == cwd
+    protocol_contents.directory.cleanup()
+
+
+def test_analyze_error(pool):
+    protocol_contents = make_contents(
+        'metadata = {"apiLevel": "2.8"}\ndef run(ctx):\n  raise ValueError()')
+    result = pool.analyze("protocol", protocol_contents)
+    assert [e.type for e in result.errors] == ["ExceptionInProtocolError"]
+    protocol_contents.directory.cleanup()
+
+
+def test_timeout(pool):
+    pool._timeout = 1
+    slow = make_contents(SLOW_PROTOCOL)
+    try:
+        with pytest.raises(analysis_pool.AnalysisInterrupted) as e:
+            pool.analyze("slow", slow)
+        assert e.value.error.type == "AnalysisTimeout"
+    finally:
+        pool._timeout = 10
+        slow.directory.cleanup()
+    # the killed worker was replaced
+    protocol_contents = make_contents(PROTOCOL)
+    for _ in range(2):
+        assert pool.analyze("protocol", protocol_contents).errors == []
+    protocol_contents.directory.cleanup()
+
+
+def test_submit_in_process():
+    # with no pool, the analysis runs on a thread with no event loop of
+    # its own
+    protocol_contents = make_contents(PROTOCOL)
+    try:
+        result = analysis_pool.submit(
+            analyze.analyze_protocol, protocol_contents).result(timeout=30)
+        assert result.errors == []
+        assert [lw.location for lw in result.required_equipment.labware] \
+            == [1, 12]
+    finally:
+        analysis_pool.shutdown_analysis_pool()
+        protocol_contents.directory.cleanup()
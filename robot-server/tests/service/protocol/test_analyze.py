@@ -45,14 +45,12 @@ def test__analyze(
     # Set up input/output
     mock_contents = MagicMock()
     mock_protocol = MagicMock()
-    mock_ctx = MagicMock()
     meta = models.Meta(name="a", author="b", apiLevel="c")
     equipment = models.RequiredEquipment(pipettes=[], labware=[], modules=[])
 
     mock_parse_protocol.return_value = mock_protocol
-    mock_simulate_protocol.return_value = mock_ctx
+    mock_simulate_protocol.return_value = equipment
     mock_extract_metadata.return_value = meta
-    mock_extract_equipment.return_value = equipment
 
     # Call analyze
     analysis_result = analyze._analyze(mock_contents)
@@ -63,7 +61,7 @@ def test__analyze(
     )
     mock_simulate_protocol.assert_called_once_with(mock_protocol)
     mock_extract_metadata.assert_called_once_with(mock_protocol)
-    mock_extract_equipment.assert_called_once_with(mock_ctx)
+    mock_extract_equipment.assert_not_called()
 
     assert analysis_result.meta is meta
     assert analysis_result.required_equipment is equipment
@@ -371,3 +369,26 @@ def test_json_parse_error(json_contents):
         assert r.errors[0].lineNumber == 1
         assert r.errors[0].description != ""
         assert r.errors[0].type == "JSONDecodeError"
+
+
+def test_simulate_error_cacheable(mock_protocol_run):
+    """Test that only errors raised by the protocol can be cached"""
+    mock_protocol_run.side_effect = ExceptionInProtocolError(
+        None, None, message="err", line=123)
+    with pytest.raises(analyze.AnalyzeSimulationError) as e:
+        analyze._simulate_protocol(None)
+    assert e.value.cacheable
+
+    mock_protocol_run.side_effect = RuntimeError("no event loop")
+    with pytest.raises(analyze.AnalyzeSimulationError) as e:
+        analyze._simulate_protocol(None)
+    assert not e.value.cacheable
+
+
+def test_unreadable_protocol_not_cacheable(python_contents):
+    """Test that failing to read the protocol file is not cached"""
+    with patch.object(contents, "get_protocol_contents",
+                      side_effect=FileNotFoundError("gone")):
+        r = analyze._analyze(python_contents)
+    assert [e.type for e in r.errors] == ["FileNotFoundError"]
+    assert not r.cacheable
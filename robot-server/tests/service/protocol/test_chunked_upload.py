@@ -0,0 +1,55 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from robot_server.service.protocol import errors
+from robot_server.service.protocol.chunked_upload import ChunkedUpload
+
+
+@pytest.fixture
+def upload():
+    u = ChunkedUpload(identifier="123", filename="some/dir/my_protocol.py")
+    yield u
+    u.clean_up()
+
+
+def test_create(upload):
+    assert upload.identifier == "123"
+    assert upload.filename == "my_protocol.py"
+    assert upload.received == 0
+    assert upload.file_meta().path.name == "my_protocol.py"
+    assert upload.file_meta().path.exists()
+
+
+def test_append(upload):
+    upload.append(0, b"abc")
+    upload.append(3, b"def", hashlib.sha256(b"def").hexdigest().upper())
+    assert upload.received == 6
+    meta = upload.file_meta()
+    assert meta.path.read_bytes() == b"abcdef"
+    assert meta.content_hash == hashlib.sha256(b"abcdef").hexdigest()
+
+
+@pytest.mark.parametrize(argnames="offset", argvalues=[0, 2, 4])
+def test_append_offset_mismatch(upload, offset):
+    upload.append(0, b"abc")
+    with pytest.raises(errors.ChunkOffsetMismatch):
+        upload.append(offset, b"def")
+    assert upload.received == 3
+    assert upload.file_meta().path.read_bytes() == b"abc"
+
+
+def test_append_checksum_mismatch(upload):
+    upload.append(0, b"abc")
+    with pytest.raises(errors.ChunkChecksumMismatch):
+        upload.append(3, b"def", hashlib.sha256(b"xyz").hexdigest())
+    assert upload.received == 3
+    assert upload.content_hash == hashlib.sha256(b"abc").hexdigest()
+
+
+def test_clean_up():
+    u = ChunkedUpload(identifier="123", filename="my_protocol.py")
+    directory = u.file_meta().path.parent
+    u.clean_up()
+    assert Path(directory).exists() is False
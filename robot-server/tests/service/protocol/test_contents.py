@@ -1,3 +1,4 @@
+from hashlib import sha256
 from pathlib import Path
 from mock import patch, MagicMock
 
@@ -5,6 +6,7 @@ import pytest
 from fastapi import UploadFile
 
 from robot_server.service.protocol import contents, errors
+from robot_server.util import FileMeta
 
 
 @pytest.fixture
@@ -180,3 +182,49 @@ def test_update(contents_fixture):
 def test_cleanup(contents_fixture):
     contents.clean_up(contents_fixture)
     assert Path(contents_fixture.directory.name).exists() is False
+
+
+def test_create_from_file(tmp_path):
+    path = tmp_path / "uploaded.py"
+    path.write_bytes(b"abc")
+    c = contents.create_from_file(FileMeta(path=path, content_hash="1234"))
+    try:
+        assert path.exists() is False
+        assert c.protocol_file.path.read_bytes() == b"abc"
+        assert c.protocol_file.path.name == "uploaded.py"
+        assert c.protocol_file.path.parent == Path(c.directory.name)
+        assert c.protocol_file.content_hash == "1234"
+        assert c.support_files == []
+    finally:
+        contents.clean_up(c)
+
+
+def test_snapshot(tmp_path):
+    (tmp_path / "proto.py").write_bytes(b"abc")
+    (tmp_path / "data.csv").write_bytes(b"1,2")
+    original = contents.Contents(
+        protocol_file=FileMeta(path=tmp_path / "proto.py",
+                               content_hash="stale"),
+        support_files=[FileMeta(path=tmp_path / "data.csv",
+                                content_hash="stale")],
+        directory=MagicMock())
+    c = contents.snapshot(original)
+    try:
+        assert Path(c.directory.name) != tmp_path
+        assert c.protocol_file.path.read_bytes() == b"abc"
+        assert c.protocol_file.path.parent == Path(c.directory.name)
+        # the copies are hashed
+        assert c.protocol_file.content_hash == sha256(b"abc").hexdigest()
+        assert [(f.path.name, f.content_hash) for f in c.support_files] \
+            == [("data.csv", sha256(b"1,2").hexdigest())]
+    finally:
+        contents.clean_up(c)
+
+
+def test_snapshot_missing_file(tmp_path):
+    original = contents.Contents(
+        protocol_file=FileMeta(path=tmp_path / "proto.py",
+                               content_hash="123"),
+        directory=MagicMock())
+    with pytest.raises(errors.ProtocolIOException):
+        contents.snapshot(original)
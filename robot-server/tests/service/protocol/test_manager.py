@@ -1,7 +1,10 @@
+import asyncio
 from pathlib import Path
 
 import pytest
 from mock import MagicMock, patch
+from notify_server.models import topics
+from notify_server.models.protocol_event import ProtocolAnalysisPayload
 
 from robot_server.service.protocol import errors
 from robot_server.service.protocol.contents import Contents
@@ -27,7 +30,8 @@ def mock_uploaded_protocol():
 def mock_uploaded_control_constructor(mock_uploaded_protocol):
     with patch("robot_server.service.protocol."
                "manager.UploadedProtocol.create") as p:
-        def side_effect(protocol_id, protocol_file, support_files):
+        def side_effect(protocol_id, protocol_file, support_files,
+                        on_analysis_complete):
             mock_uploaded_protocol.data = UploadedProtocolData(
                 identifier=protocol_id,
                 contents=Contents(
@@ -57,7 +61,8 @@ class TestCreate:
         mock_uploaded_control_constructor.assert_called_once_with(
             protocol_id=Path(mock_upload_file.filename).stem,
             protocol_file=mock_upload_file,
-            support_files=[])
+            support_files=[],
+            on_analysis_complete=manager._analysis_complete)
         assert p == mock_uploaded_protocol
         assert manager._protocols[mock_uploaded_protocol.data.identifier] == p
 
@@ -96,6 +101,26 @@ class TestCreate:
                 manager.create(mock_upload_file, [])
 
 
+class TestAnalysisComplete:
+    async def test_publishes_event(self, loop, mock_uploaded_protocol,
+                                   manager_with_mock_protocol):
+        publisher = MagicMock()
+        manager = ProtocolManager(event_publisher=publisher)
+        manager._analysis_complete(mock_uploaded_protocol)
+        # the event is sent from the event loop
+        publisher.send_nowait.assert_not_called()
+        await asyncio.sleep(0)
+        publisher.send_nowait.assert_called_once()
+        topic, event = publisher.send_nowait.call_args[0]
+        assert topic == topics.RobotEventTopics.PROTOCOL_EVENTS
+        assert event.data == ProtocolAnalysisPayload(
+            protocolId=mock_uploaded_protocol.data.identifier)
+
+    def test_no_publisher(self, mock_uploaded_protocol,
+                          manager_with_mock_protocol):
+        manager_with_mock_protocol._analysis_complete(mock_uploaded_protocol)
+
+
 class TestGet:
     def test_get(self, manager_with_mock_protocol, mock_uploaded_protocol):
         assert manager_with_mock_protocol.get(
@@ -137,3 +162,90 @@ class TestRemoveAll:
         manager_with_mock_protocol.remove_all()
         mock_uploaded_protocol.clean_up.assert_called_once()
         assert manager_with_mock_protocol._protocols == {}
+
+
+@pytest.fixture
+def manager_with_upload():
+    manager = ProtocolManager()
+    upload = manager.create_upload("some_file_name.py")
+    upload.append(0, b"abc")
+    yield manager, upload
+    manager.remove_all()
+
+
+class TestUploads:
+    def test_create_upload(self):
+        manager = ProtocolManager()
+        upload = manager.create_upload("some_file_name.py")
+        assert manager.get_upload(upload.identifier) is upload
+        manager.remove_all()
+
+    def test_create_upload_limit_reached(self, manager_with_upload):
+        manager, _ = manager_with_upload
+        with patch.object(ProtocolManager, "MAX_COUNT", 1):
+            with pytest.raises(errors.ProtocolUploadCountLimitReached):
+                manager.create_upload("other_file_name.py")
+
+    def test_upload_not_found(self):
+        manager = ProtocolManager()
+        with pytest.raises(errors.UploadNotFoundException):
+            manager.get_upload("___")
+        with pytest.raises(errors.UploadNotFoundException):
+            manager.remove_upload("___")
+        with pytest.raises(errors.UploadNotFoundException):
+            manager.complete_upload("___")
+
+    def test_remove_upload(self, manager_with_upload):
+        manager, upload = manager_with_upload
+        path = upload.file_meta().path
+        assert manager.remove_upload(upload.identifier) is upload
+        assert path.exists() is False
+        with pytest.raises(errors.UploadNotFoundException):
+            manager.get_upload(upload.identifier)
+
+    def test_complete_upload(self, manager_with_upload,
+                             mock_uploaded_protocol):
+        manager, upload = manager_with_upload
+        file_meta = upload.file_meta()
+        with patch("robot_server.service.protocol."
+                   "manager.UploadedProtocol.create_from_file",
+                   return_value=mock_uploaded_protocol) as p, \
+                patch.object(ProtocolManager, "MAX_COUNT", 1):
+            mock_uploaded_protocol.data = UploadedProtocolData(
+                identifier="some_file_name",
+                contents=Contents(protocol_file=file_meta, directory=None))
+            proto = manager.complete_upload(upload.identifier,
+                                            upload.content_hash.upper())
+        p.assert_called_once_with(
+            protocol_id="some_file_name",
+            protocol_file=file_meta,
+            on_analysis_complete=manager._analysis_complete)
+        assert proto is mock_uploaded_protocol
+        assert manager.get("some_file_name") is proto
+        with pytest.raises(errors.UploadNotFoundException):
+            manager.get_upload(upload.identifier)
+
+    def test_complete_upload_checksum_mismatch(self, manager_with_upload):
+        manager, upload = manager_with_upload
+        with pytest.raises(errors.ChunkChecksumMismatch):
+            manager.complete_upload(upload.identifier, "1234")
+        assert manager.get_upload(upload.identifier) is upload
+        assert manager.get_all() == ()
+
+    def test_complete_upload_already_exists(self,
+                                            manager_with_mock_protocol):
+        upload = manager_with_mock_protocol.create_upload(
+            "some_file_name.py")
+        with pytest.raises(errors.ProtocolAlreadyExistsException):
+            manager_with_mock_protocol.complete_upload(upload.identifier)
+        assert manager_with_mock_protocol.get_upload(
+            upload.identifier) is upload
+        manager_with_mock_protocol.remove_all()
+
+    def test_remove_all(self, manager_with_upload):
+        manager, upload = manager_with_upload
+        path = upload.file_meta().path
+        manager.remove_all()
+        assert path.exists() is False
+        with pytest.raises(errors.UploadNotFoundException):
+            manager.get_upload(upload.identifier)
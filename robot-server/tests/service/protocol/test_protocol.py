@@ -0,0 +1,114 @@
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+from mock import MagicMock, patch
+
+from robot_server.service.protocol import analysis_cache, analysis_pool, \
+    analyze, models
+from robot_server.service.protocol.contents import Contents
+from robot_server.service.protocol.protocol import UploadedProtocol, \
+    UploadedProtocolData
+from robot_server.util import FileMeta
+
+
+@pytest.fixture
+def result() -> analyze.AnalysisResult:
+    return analyze.AnalysisResult(
+        meta=models.Meta(name="a", author="b", apiLevel="2.8"),
+        required_equipment=models.RequiredEquipment(
+            pipettes=[], labware=[], modules=[]))
+
+
+@pytest.fixture
+def futures():
+    """The analyses submitted to the background, in order"""
+    submitted = []
+
+    def submit(fn, *args):
+        future = Future()
+        submitted.append(future)
+        return future
+
+    with patch.object(analysis_pool, "submit", side_effect=submit):
+        yield submitted
+
+
+@pytest.fixture
+def cached():
+    with patch.object(analysis_cache, "cached_analysis",
+                      return_value=None) as p:
+        yield p
+
+
+@pytest.fixture
+def on_complete():
+    return MagicMock()
+
+
+@pytest.fixture
+def protocol(futures, cached, on_complete) -> UploadedProtocol:
+    protocol = UploadedProtocol(
+        UploadedProtocolData(
+            identifier="abc",
+            contents=Contents(
+                protocol_file=FileMeta(path=Path("abc.py"),
+                                       content_hash="123"),
+                directory=MagicMock())),
+        on_analysis_complete=on_complete)
+    protocol._start_analysis()
+    return protocol
+
+
+def test_analysis_pending(protocol, futures, on_complete):
+    assert len(futures) == 1
+    assert protocol.data.analysis_result is None
+    with pytest.raises(TimeoutError):
+        protocol.wait_for_analysis(timeout=0)
+    on_complete.assert_not_called()
+
+
+def test_analysis_complete(protocol, futures, on_complete, result):
+    futures[0].set_result(result)
+    assert protocol.data.analysis_result is result
+    assert protocol.wait_for_analysis(timeout=0) is result
+    on_complete.assert_called_once_with(protocol)
+
+
+def test_analysis_raises(protocol, futures, on_complete):
+    futures[0].set_exception(RuntimeError("oops"))
+    assert protocol.wait_for_analysis(timeout=0).errors == [
+        models.ProtocolError(type="RuntimeError", description="oops")]
+    on_complete.assert_called_once_with(protocol)
+
+
+def test_cached_analysis_completes_immediately(protocol, futures, cached,
+                                               on_complete, result):
+    cached.return_value = result
+    protocol._start_analysis()
+    # the earlier analysis is no longer needed
+    assert futures[0].cancelled()
+    assert len(futures) == 1
+    assert protocol.wait_for_analysis(timeout=0) is result
+    on_complete.assert_called_once_with(protocol)
+
+
+def test_new_analysis_supersedes_old(protocol, futures, on_complete, result):
+    # too late to be cancelled
+    futures[0].set_running_or_notify_cancel()
+    protocol._start_analysis()
+    assert len(futures) == 2
+    # the old analysis ends anyway, but its result is out of date
+    futures[0].set_result(result)
+    assert protocol.data.analysis_result is None
+    on_complete.assert_not_called()
+
+    futures[1].set_result(result)
+    assert protocol.wait_for_analysis(timeout=0) is result
+    on_complete.assert_called_once_with(protocol)
+
+
+def test_clean_up_cancels_analysis(protocol, futures):
+    with patch("robot_server.service.protocol.protocol.contents.clean_up"):
+        protocol.clean_up()
+    assert futures[0].cancelled()
@@ -0,0 +1,120 @@
+import hashlib
+
+import pytest
+from mock import patch
+
+from robot_server.service.dependencies import get_protocol_manager
+from robot_server.service.protocol.manager import ProtocolManager
+from robot_server.service.protocol import analysis_pool, chunked_upload
+
+
+PROTOCOL = b"""
+metadata = {'apiLevel': '2.0'}
+
+def run(ctx):
+    ctx.load_labware('corning_96_wellplate_360ul_flat', 1)
+"""
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(ProtocolManager, "MAX_COUNT", 2)
+    # Analyze in this process rather than in the pool's workers
+    with patch.object(analysis_pool, "get_analysis_pool", return_value=None):
+        m = ProtocolManager()
+        yield m
+        m.remove_all()
+
+
+@pytest.fixture
+def client(api_client, manager):
+    async def get():
+        return manager
+
+    api_client.app.dependency_overrides[get_protocol_manager] = get
+    yield api_client
+    del api_client.app.dependency_overrides[get_protocol_manager]
+
+
+@pytest.fixture
+def upload_id(client):
+    response = client.post("/protocols/uploads",
+                           json={"data": {"filename": "chunked.py"}})
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["filename"] == "chunked.py"
+    assert data["receivedBytes"] == 0
+    return data["id"]
+
+
+def test_chunked_upload(client, manager, upload_id):
+    path = f"/protocols/uploads/{upload_id}"
+    chunks = [PROTOCOL[:20], PROTOCOL[20:]]
+    offset = 0
+    for chunk in chunks:
+        response = client.put(
+            path, data=chunk,
+            params={"offset": offset,
+                    "sha256": hashlib.sha256(chunk).hexdigest()})
+        assert response.status_code == 200
+        offset += len(chunk)
+        assert response.json()["data"]["receivedBytes"] == \
+            offset
+
+    response = client.get(path)
+    assert response.json()["data"]["receivedBytes"] == \
+        len(PROTOCOL)
+
+    response = client.post(
+        f"{path}/complete",
+        params={"sha256": hashlib.sha256(PROTOCOL).hexdigest()})
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["id"] == "chunked"
+    assert data["protocolFile"]["basename"] == "chunked.py"
+
+    assert client.get(path).status_code == 404
+    proto = manager.get("chunked")
+    assert proto.data.contents.protocol_file.path.read_bytes() == PROTOCOL
+    result = proto.wait_for_analysis(timeout=30)
+    assert result.errors == []
+    assert result.meta.apiLevel == "2.0"
+    assert [(lw.uri, lw.location)
+            for lw in result.required_equipment.labware] == [
+        ("opentrons/corning_96_wellplate_360ul_flat/1", 1),
+        ("opentrons/opentrons_1_trash_1100ml_fixed/1", 12)]
+
+
+def test_chunk_errors(client, upload_id, monkeypatch):
+    path = f"/protocols/uploads/{upload_id}"
+    client.put(path, data=b"abc", params={"offset": 0})
+
+    response = client.put(path, data=b"def", params={"offset": 0})
+    assert response.status_code == 409
+    assert response.json()["errors"][0]["meta"]["receivedBytes"] == 3
+
+    response = client.put(path, data=b"def",
+                          params={"offset": 3,
+                                  "sha256": hashlib.sha256(b"").hexdigest()})
+    assert response.status_code == 400
+
+    monkeypatch.setattr(chunked_upload, "MAX_CHUNK_SIZE", 2)
+    monkeypatch.setattr("robot_server.service.protocol.router."
+                        "MAX_CHUNK_SIZE", 2)
+    response = client.put(path, data=b"def", params={"offset": 3})
+    assert response.status_code == 413
+
+    response = client.get(path)
+    assert response.json()["data"]["receivedBytes"] == 3
+
+    response = client.post(f"{path}/complete",
+                           params={"sha256": hashlib.sha256(b"").hexdigest()})
+    assert response.status_code == 400
+
+
+def test_delete_upload(client, upload_id):
+    path = f"/protocols/uploads/{upload_id}"
+    assert client.delete(path).status_code == 200
+    assert client.get(path).status_code == 404
+    assert client.put(path, data=b"abc",
+                      params={"offset": 0}).status_code == 404
@@ -77,6 +77,11 @@ def get_app(system_version_file: str = None,
         web.post('/server/update/cancel', update.cancel),
         web.get('/server/update/{session}/status', update.status),
         web.post('/server/update/{session}/file', update.file_upload),
+        web.get('/server/update/{session}/file/chunks',
+                update.file_chunks_status),
+        web.post('/server/update/{session}/file/chunks', update.file_chunk),
+        web.post('/server/update/{session}/file/chunks/complete',
+                 update.file_chunks_complete),
         web.post('/server/update/{session}/commit', update.commit),
         web.post('/server/restart', control.restart),
         web.get('/server/ssh_keys', ssh_key_management.list_keys),
@@ -0,0 +1,115 @@
+"""
+otupdate.buildroot.chunked_upload: receiving an update file in chunks
+
+An update file can be uploaded as a sequence of chunks rather than one
+multipart body, so that a client whose connection drops can ask how much
+was received and carry on from there instead of starting over. Each chunk
+is hashed as it is appended, so the hashes of the whole file and of the
+rootfs in it are ready as soon as the last chunk arrives.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from . import file_actions
+
+LOG = logging.getLogger(__name__)
+
+# The largest chunk accepted. Chunks are held in memory until their
+# checksum is checked, so that a chunk cut short is never appended.
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+class ChunkOffsetMismatch(ValueError):
+    def __init__(self, offset: int, received: int):
+        self.message = f'Chunk at offset {offset} does not follow the '\
+            f'{received} bytes received'
+        self.short = 'Offset Mismatch'
+        self.received = received
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.message}>'
+
+    def __str__(self):
+        return self.message
+
+
+class ChunkChecksumMismatch(ValueError):
+    def __init__(self, message):
+        self.message = message
+        self.short = 'Checksum Mismatch'
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.message}>'
+
+    def __str__(self):
+        return self.message
+
+
+class ChunkedUpload:
+    """
+    An update file being received in chunks
+
+    The chunks are appended to the file in the session download area, and
+    the number of bytes in it is how much has been received. Hold ``lock``
+    while appending, so that chunks sent at once are appended in turn.
+    """
+    def __init__(self, path: str) -> None:
+        self._path = path
+        open(path, 'wb').close()
+        self.lock = asyncio.Lock()
+        self._received = 0
+        self._hasher = hashlib.sha256()
+        self._rootfs_hasher = file_actions.RootfsHasher()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def received(self) -> int:
+        """ The number of bytes received """
+        return self._received
+
+    @property
+    def file_hash(self) -> bytes:
+        """ The sha256 of the bytes received, as ascii hex """
+        return self._hasher.hexdigest().encode()
+
+    @property
+    def rootfs_hash(self) -> Optional[bytes]:
+        """ The hash of the rootfs, if it was found in what was received """
+        return self._rootfs_hasher.hexdigest
+
+    def append(self,
+               offset: int,
+               chunk: bytes,
+               checksum: Optional[str] = None) -> None:
+        """ Append a chunk. Blocking; call it in an executor.
+
+        :param offset: Where in the file the chunk goes. Must be the number
+                       of bytes received so far.
+        :param chunk: The chunk
+        :param checksum: If specified, the sha256 of the chunk as hex
+        :raises ChunkOffsetMismatch: If the chunk does not follow the bytes
+                                     received
+        :raises ChunkChecksumMismatch: If the chunk does not match its
+                                       checksum
+        """
+        if offset != self._received:
+            raise ChunkOffsetMismatch(offset, self._received)
+        if checksum is not None:
+            calculated = hashlib.sha256(chunk).hexdigest()
+            if calculated != checksum.lower():
+                raise ChunkChecksumMismatch(
+                    f'Chunk at offset {offset}: calculated {calculated} '
+                    f'!= sent {checksum}')
+        with open(self._path, 'r+b') as f:
+            f.seek(offset)
+            f.write(chunk)
+            f.truncate()
+        self._hasher.update(chunk)
+        self._rootfs_hasher.update(chunk)
+        self._received += len(chunk)
+        LOG.debug(f'Chunked upload: {self._received}B received')
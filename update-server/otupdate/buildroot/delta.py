@@ -0,0 +1,350 @@
+"""
+otupdate.buildroot.delta: block-level delta rootfs images
+
+Most of a rootfs is the same from one release to the next, so an update can
+carry a delta instead of the whole image: the blocks of the new image that
+are already in the image the robot is running are copied from the active
+partition, and only the others are sent.
+
+A delta is a header followed by records, all little endian:
+
+- header: ``b'OTDELTA1'``, the block size (u32), the size of the target
+  image (u64) and the sha256 of the base image as 64 bytes of ascii hex
+- ``b'C'``: copy a run of blocks from the base; the index of the first base
+  block (u64), the number of blocks (u32) and the sha256 of those blocks of
+  the base (32 bytes)
+- ``b'D'``: the number of blocks (u32) followed by that many blocks of data
+- ``b'E'``: the end of the delta
+
+The records describe the target image block by block, in order. The last
+block of the target is padded with zeros, and the output is cut to the
+target size. Copies never reach past the last whole block of the base, so
+they can be read from a partition, which is larger than the image on it.
+
+The active partition is not exactly the image that was written to it:
+committing an update mounts it read-write and writes the machine id to it.
+When the base is an ext4 image, a delta never copies from the blocks that
+this may change (see :py:mod:`otupdate.buildroot.ext4`); the blocks of the
+target that only they hold are sent as data. The hash of each copied run is
+still checked as it is copied. If a run does not match, the delta cannot be
+applied on this robot and a full image must be sent instead.
+"""
+import argparse
+import binascii
+import hashlib
+import logging
+import os
+import struct
+from typing import Callable, Dict, IO, List, NamedTuple, Optional, Tuple
+
+from . import ext4
+
+LOG = logging.getLogger(__name__)
+
+DELTA_MAGIC = b'OTDELTA1'
+# ext4's block size, so that a file that did not change is whole blocks
+DEFAULT_BLOCK_SIZE = 4096
+# The size of the chunks copied and written at once
+CHUNK_SIZE = 1024 * 1024
+# The most blocks of data in one record, so that making a delta does not
+# hold a long run of changed blocks in memory
+MAX_DATA_BLOCKS = 256
+
+_HEADER = struct.Struct('<8sIQ64s')
+_COPY = struct.Struct('<QI32s')
+_DATA = struct.Struct('<I')
+OP_COPY = b'C'
+OP_DATA = b'D'
+OP_END = b'E'
+
+
+class BaseMismatch(ValueError):
+    def __init__(self, message):
+        self.message = message
+        self.short = 'Base Mismatch'
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.message}>'
+
+    def __str__(self):
+        return self.message
+
+
+class BadDelta(ValueError):
+    def __init__(self, message):
+        self.message = message
+        self.short = 'Bad Delta'
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.message}>'
+
+    def __str__(self):
+        return self.message
+
+
+class DeltaHeader(NamedTuple):
+    block_size: int
+    target_size: int
+    base_hash: bytes
+
+
+def _read_exactly(stream: IO[bytes], size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise BadDelta(f'Delta ends early: read {len(data)} of {size}B')
+    return data
+
+
+def read_header(delta: IO[bytes]) -> DeltaHeader:
+    """ Read the header of a delta
+
+    :param delta: The delta, at its start
+    :raises BadDelta: If it is not a delta
+    """
+    magic, block_size, target_size, base_hash\
+        = _HEADER.unpack(_read_exactly(delta, _HEADER.size))
+    if magic != DELTA_MAGIC or not block_size:
+        raise BadDelta('Not a rootfs delta')
+    return DeltaHeader(block_size, target_size, base_hash)
+
+
+class _Output:
+    """ The target image being written, cut to its size and hashed """
+    def __init__(self, outfile: IO[bytes],
+                 target_size: int,
+                 progress_callback: Callable[[float], None],
+                 algo: str) -> None:
+        self._outfile = outfile
+        self._target_size = target_size
+        self._progress_callback = progress_callback
+        self._hasher = hashlib.new(algo)
+        self.written = 0
+
+    def write(self, data: bytes) -> None:
+        data = data[:self._target_size - self.written]
+        self._outfile.write(data)
+        self._hasher.update(data)
+        self.written += len(data)
+        self._progress_callback(self.written / (self._target_size or 1))
+
+    def hexdigest(self) -> bytes:
+        return binascii.hexlify(self._hasher.digest())
+
+
+def _copy_run(delta: IO[bytes], base: IO[bytes], output: _Output,
+              block_size: int, chunk_size: int) -> None:
+    first, count, expected = _COPY.unpack(_read_exactly(delta, _COPY.size))
+    base.seek(first * block_size)
+    run_hasher = hashlib.sha256()
+    remaining = count * block_size
+    while remaining:
+        data = base.read(min(chunk_size, remaining))
+        if not data:
+            raise BaseMismatch(
+                f'Base ends before block {first + count} of a copy')
+        run_hasher.update(data)
+        output.write(data)
+        remaining -= len(data)
+    if run_hasher.digest() != expected:
+        raise BaseMismatch(f'Blocks {first} to {first + count - 1} of the '
+                           f'base are not the ones the delta was made from')
+
+
+def _data_run(delta: IO[bytes], output: _Output,
+              block_size: int, chunk_size: int) -> None:
+    count, = _DATA.unpack(_read_exactly(delta, _DATA.size))
+    remaining = count * block_size
+    while remaining:
+        data = _read_exactly(delta, min(chunk_size, remaining))
+        output.write(data)
+        remaining -= len(data)
+
+
+def apply_delta(delta: IO[bytes],
+                base_path: str,
+                outfile: str,
+                progress_callback: Callable[[float], None],
+                chunk_size: int = CHUNK_SIZE,
+                algo: str = 'sha256') -> bytes:
+    """ Write the target image of a delta, hashing it as it is written
+
+    :param delta: The delta, at its start
+    :param base_path: The image (or partition) the delta was made against
+    :param outfile: Where to write the target image
+    :param progress_callback: The callback to call for progress between 0
+                              and 1. May not ever be precisely 1.0.
+    :param chunk_size: The size of the chunks to copy and write
+    :param algo: The algorithm to hash the target with. Can be anything
+                 used by :py:mod:`hashlib`
+    :returns: The hash of the target image as ascii hex
+    :raises BaseMismatch: If the base is not the one the delta was made
+                          from
+    :raises BadDelta: If the delta is malformed
+    """
+    header = read_header(delta)
+    LOG.info(f'apply_delta: writing {header.target_size}B to {outfile} '
+             f'from {base_path} (base {header.base_hash!r})')
+    with open(base_path, 'rb') as base, open(outfile, 'wb') as out:
+        output = _Output(out, header.target_size, progress_callback, algo)
+        while True:
+            op = _read_exactly(delta, 1)
+            if op == OP_END:
+                break
+            elif op == OP_COPY:
+                _copy_run(delta, base, output, header.block_size, chunk_size)
+            elif op == OP_DATA:
+                _data_run(delta, output, header.block_size, chunk_size)
+            else:
+                raise BadDelta(f'Unknown delta record {op!r}')
+    if output.written != header.target_size:
+        raise BadDelta(f'Delta wrote {output.written} of '
+                       f'{header.target_size}B')
+    return output.hexdigest()
+
+
+class _DeltaWriter:
+    """ Coalesces the blocks of a target image into delta records """
+    def __init__(self, out: IO[bytes]) -> None:
+        self._out = out
+        self._copy_first: Optional[int] = None
+        self._copy_count = 0
+        self._copy_hasher = hashlib.sha256()
+        self._data: List[bytes] = []
+        self.data_blocks = 0
+
+    def copy(self, base_block: int, block: bytes) -> None:
+        self._flush_data()
+        if self._copy_first is None\
+                or self._copy_first + self._copy_count != base_block:
+            self._flush_copy()
+            self._copy_first = base_block
+        self._copy_count += 1
+        self._copy_hasher.update(block)
+
+    def data(self, block: bytes) -> None:
+        self._flush_copy()
+        self._data.append(block)
+        self.data_blocks += 1
+        if len(self._data) >= MAX_DATA_BLOCKS:
+            self._flush_data()
+
+    def next_copy(self) -> Optional[int]:
+        """ The base block that would continue the current copy, if any """
+        if self._copy_first is None:
+            return None
+        return self._copy_first + self._copy_count
+
+    def finish(self) -> None:
+        self._flush_copy()
+        self._flush_data()
+        self._out.write(OP_END)
+
+    def _flush_copy(self) -> None:
+        if self._copy_first is not None:
+            self._out.write(OP_COPY + _COPY.pack(self._copy_first,
+                                                 self._copy_count,
+                                                 self._copy_hasher.digest()))
+        self._copy_first = None
+        self._copy_count = 0
+        self._copy_hasher = hashlib.sha256()
+
+    def _flush_data(self) -> None:
+        if self._data:
+            self._out.write(OP_DATA + _DATA.pack(len(self._data)))
+            for block in self._data:
+                self._out.write(block)
+        self._data = []
+
+
+def _changing_base_blocks(base_path: str, block_size: int) -> bytearray:
+    with open(base_path, 'rb') as base:
+        try:
+            return ext4.changing_blocks(base, block_size)
+        except ext4.NotExt4 as e:
+            LOG.warning(f'make_delta: {e}: copying from any block of the '
+                        f'base, so the delta may not apply to a partition '
+                        f'that has been in use')
+            return bytearray()
+
+
+def _index_base(base_path: str, block_size: int, changing: bytearray)\
+        -> Tuple[List[bytes], Dict[bytes, int], bytes]:
+    digests: List[bytes] = []
+    index: Dict[bytes, int] = {}
+    hasher = hashlib.sha256()
+    with open(base_path, 'rb') as base:
+        while True:
+            block = base.read(block_size)
+            hasher.update(block)
+            if len(block) != block_size:
+                break
+            if len(digests) < len(changing) and changing[len(digests)]:
+                # matches no block, so it is never copied
+                digests.append(b'')
+                continue
+            digest = hashlib.sha256(block).digest()
+            index.setdefault(digest, len(digests))
+            digests.append(digest)
+    return digests, index, binascii.hexlify(hasher.digest())
+
+
+def make_delta(base_path: str,
+               target_path: str,
+               out: IO[bytes],
+               block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    """ Make a delta of a target image against a base image
+
+    This is for building releases rather than for running on a robot. Ship
+    the delta as ``rootfs.ext4.delta`` in an update zip in place of
+    ``rootfs.ext4``, with the hash (and signature) of the target image as
+    usual.
+
+    :param base_path: The image the robot is running
+    :param target_path: The image to update it to
+    :param out: Where to write the delta
+    :param block_size: The size of the blocks to compare
+    :returns: The number of blocks of data in the delta
+    """
+    digests, index, base_hash = _index_base(
+        base_path, block_size,
+        _changing_base_blocks(base_path, block_size))
+    out.write(_HEADER.pack(DELTA_MAGIC, block_size,
+                           os.path.getsize(target_path), base_hash))
+    writer = _DeltaWriter(out)
+    with open(target_path, 'rb') as target:
+        while True:
+            block = target.read(block_size)
+            if not block:
+                break
+            block = block.ljust(block_size, b'\0')
+            digest = hashlib.sha256(block).digest()
+            # Prefer carrying on the current copy, so a run of blocks that
+            # are in the base many times (like zeros) stays one record
+            following = writer.next_copy()
+            if following is not None and following < len(digests)\
+                    and digests[following] == digest:
+                writer.copy(following, block)
+            elif digest in index:
+                writer.copy(index[digest], block)
+            else:
+                writer.data(block)
+    writer.finish()
+    return writer.data_blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Make a block-level delta of a rootfs image')
+    parser.add_argument('base', help='The image the robot is running')
+    parser.add_argument('target', help='The image to update it to')
+    parser.add_argument('output', help='Where to write the delta')
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE)
+    args = parser.parse_args()
+    with open(args.output, 'wb') as out:
+        data_blocks = make_delta(args.base, args.target, out,
+                                 args.block_size)
+    print(f'{data_blocks} blocks of data, {os.path.getsize(args.output)}B')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+"""
+otupdate.buildroot.ext4: the blocks of an ext4 image that change in use
+
+The partition an update is written to is not left exactly as the image:
+committing the update mounts it read-write to write the machine id. That
+writes the superblock, the group descriptors, the bitmaps, the inode tables
+and the journal, and the new machine id goes in whichever free block is
+allocated for it. The data of the files that are not written stays as it
+was, so those are the blocks a delta can copy from a partition that has
+been in use.
+"""
+import logging
+import struct
+from typing import IO, Iterator, List, NamedTuple, Optional, Tuple
+
+LOG = logging.getLogger(__name__)
+
+SUPERBLOCK_OFFSET = 1024
+SUPERBLOCK_SIZE = 1024
+EXT4_MAGIC = 0xEF53
+EXTENT_MAGIC = 0xF30A
+ROOT_INODE = 2
+MACHINE_ID_PATH = (b'etc', b'machine-id')
+
+COMPAT_HAS_JOURNAL = 0x4
+INCOMPAT_META_BG = 0x10
+INCOMPAT_64BIT = 0x80
+RO_COMPAT_SPARSE_SUPER = 0x1
+BG_BLOCK_UNINIT = 0x2
+INODE_EXTENTS_FL = 0x80000
+INODE_INLINE_DATA_FL = 0x10000000
+# Extents longer than this are unwritten, and this much longer than it
+MAX_INIT_EXTENT_LEN = 32768
+
+_DIRENT = struct.Struct('<IHBB')
+_EXTENT_HEADER = struct.Struct('<HHHHI')
+_EXTENT = struct.Struct('<IHHI')
+_EXTENT_INDEX = struct.Struct('<IIH')
+
+
+class NotExt4(ValueError):
+    def __init__(self, message):
+        self.message = message
+        self.short = 'Not Ext4'
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.message}>'
+
+    def __str__(self):
+        return self.message
+
+
+class _Group(NamedTuple):
+    block_bitmap: int
+    inode_bitmap: int
+    inode_table: int
+    flags: int
+
+
+class _Layout(NamedTuple):
+    block_size: int
+    blocks_count: int
+    first_data_block: int
+    blocks_per_group: int
+    inodes_per_group: int
+    inode_size: int
+    inode_table_blocks: int
+    descriptor_blocks: int
+    sparse_super: bool
+    journal_inode: Optional[int]
+    groups: List[_Group]
+
+
+def _u32(data: bytes, offset: int) -> int:
+    return struct.unpack_from('<I', data, offset)[0]
+
+
+def _u16(data: bytes, offset: int) -> int:
+    return struct.unpack_from('<H', data, offset)[0]
+
+
+def _read_block(image: IO[bytes], layout: _Layout, block: int) -> bytes:
+    image.seek(block * layout.block_size)
+    data = image.read(layout.block_size)
+    if len(data) != layout.block_size:
+        raise NotExt4(f'Block {block} is past the end of the image')
+    return data
+
+
+def _read_groups(image: IO[bytes], first_block: int, block_size: int,
+                 count: int, desc_size: int) -> List[_Group]:
+    image.seek(first_block * block_size)
+    table = image.read(count * desc_size)
+    if len(table) != count * desc_size:
+        raise NotExt4('Group descriptors are past the end of the image')
+    wide = desc_size >= 64
+
+    def block_field(offset: int, lo: int, hi: int) -> int:
+        value = _u32(table, offset + lo)
+        if wide:
+            value |= _u32(table, offset + hi) << 32
+        return value
+
+    return [_Group(block_bitmap=block_field(offset, 0x0, 0x20),
+                   inode_bitmap=block_field(offset, 0x4, 0x24),
+                   inode_table=block_field(offset, 0x8, 0x28),
+                   flags=_u16(table, offset + 0x12))
+            for offset in range(0, len(table), desc_size)]
+
+
+def read_layout(image: IO[bytes]) -> _Layout:
+    """ Read where the metadata of an ext4 filesystem image is
+
+    :param image: The image
+    :raises NotExt4: If it is not an ext4 image this can read
+    """
+    image.seek(SUPERBLOCK_OFFSET)
+    sb = image.read(SUPERBLOCK_SIZE)
+    if len(sb) != SUPERBLOCK_SIZE or _u16(sb, 0x38) != EXT4_MAGIC:
+        raise NotExt4('No ext4 superblock')
+    incompat = _u32(sb, 0x60)
+    if incompat & INCOMPAT_META_BG:
+        raise NotExt4('meta_bg filesystems are not supported')
+    block_size = 1024 << _u32(sb, 0x18)
+    blocks_count = _u32(sb, 0x4)
+    desc_size = 32
+    if incompat & INCOMPAT_64BIT:
+        blocks_count |= _u32(sb, 0x150) << 32
+        desc_size = _u16(sb, 0xFE) or 32
+    first_data_block = _u32(sb, 0x14)
+    blocks_per_group = _u32(sb, 0x20)
+    inodes_per_group = _u32(sb, 0x28)
+    inode_size = _u16(sb, 0x58) if _u32(sb, 0x4C) else 128
+    group_count = -(-(blocks_count - first_data_block) // blocks_per_group)
+    descriptor_blocks = -(-group_count * desc_size // block_size)\
+        + _u16(sb, 0xCE)
+    return _Layout(
+        block_size=block_size,
+        blocks_count=blocks_count,
+        first_data_block=first_data_block,
+        blocks_per_group=blocks_per_group,
+        inodes_per_group=inodes_per_group,
+        inode_size=inode_size,
+        inode_table_blocks=-(-inodes_per_group * inode_size // block_size),
+        descriptor_blocks=descriptor_blocks,
+        sparse_super=bool(_u32(sb, 0x64) & RO_COMPAT_SPARSE_SUPER),
+        journal_inode=(_u32(sb, 0xE0) or None)
+        if _u32(sb, 0x5C) & COMPAT_HAS_JOURNAL else None,
+        groups=_read_groups(image, first_data_block + 1, block_size,
+                            group_count, desc_size))
+
+
+def _read_inode(image: IO[bytes], layout: _Layout, inode: int) -> bytes:
+    group, index = divmod(inode - 1, layout.inodes_per_group)
+    image.seek(layout.groups[group].inode_table * layout.block_size
+               + index * layout.inode_size)
+    return image.read(layout.inode_size)
+
+
+def _extent_blocks(image: IO[bytes], layout: _Layout, node: bytes)\
+        -> Iterator[Tuple[int, bool]]:
+    magic, entries, _, depth, _ = _EXTENT_HEADER.unpack_from(node)
+    if magic != EXTENT_MAGIC:
+        raise NotExt4('Bad extent header')
+    for i in range(entries):
+        offset = _EXTENT_HEADER.size + i * _EXTENT.size
+        if depth:
+            _, leaf_lo, leaf_hi = _EXTENT_INDEX.unpack_from(node, offset)
+            leaf = leaf_hi << 32 | leaf_lo
+            yield leaf, False
+            yield from _extent_blocks(
+                image, layout, _read_block(image, layout, leaf))
+        else:
+            _, length, start_hi, start_lo = _EXTENT.unpack_from(node, offset)
+            if length > MAX_INIT_EXTENT_LEN:
+                length -= MAX_INIT_EXTENT_LEN
+            start = start_hi << 32 | start_lo
+            for block in range(start, start + length):
+                yield block, True
+
+
+def _mapped_blocks(image: IO[bytes], layout: _Layout, block: int,
+                   depth: int) -> Iterator[Tuple[int, bool]]:
+    if not block:
+        return
+    if not depth:
+        yield block, True
+        return
+    yield block, False
+    pointers = _read_block(image, layout, block)
+    for offset in range(0, layout.block_size, 4):
+        yield from _mapped_blocks(image, layout, _u32(pointers, offset),
+                                  depth - 1)
+
+
+def _inode_blocks(image: IO[bytes], layout: _Layout, inode: int)\
+        -> Iterator[Tuple[int, bool]]:
+    """ The blocks an inode uses, each with whether it holds file data """
+    data = _read_inode(image, layout, inode)
+    flags = _u32(data, 0x20)
+    i_block = data[0x28:0x64]
+    if flags & INODE_INLINE_DATA_FL:
+        return
+    if flags & INODE_EXTENTS_FL:
+        yield from _extent_blocks(image, layout, i_block)
+        return
+    pointers = struct.unpack('<15I', i_block)
+    for block in pointers[:12]:
+        yield from _mapped_blocks(image, layout, block, 0)
+    for depth, block in enumerate(pointers[12:], start=1):
+        yield from _mapped_blocks(image, layout, block, depth)
+
+
+def _lookup(image: IO[bytes], layout: _Layout, directory: int,
+            name: bytes) -> Optional[int]:
+    """ Find a name in a directory. Hashed directories can be read like
+    any other, since their index is hidden in empty entries. """
+    for block, is_data in _inode_blocks(image, layout, directory):
+        if not is_data:
+            continue
+        entries = _read_block(image, layout, block)
+        offset = 0
+        while offset + _DIRENT.size <= layout.block_size:
+            inode, rec_len, name_len, _\
+                = _DIRENT.unpack_from(entries, offset)
+            start = offset + _DIRENT.size
+            if inode and entries[start:start + name_len] == name:
+                return inode
+            if rec_len < _DIRENT.size:
+                break
+            offset += rec_len
+    return None
+
+
+def _find(image: IO[bytes], layout: _Layout,
+          path: Tuple[bytes, ...]) -> Optional[int]:
+    inode: Optional[int] = ROOT_INODE
+    for name in path:
+        if inode is None:
+            break
+        inode = _lookup(image, layout, inode, name)
+    return inode
+
+
+def _has_superblock(layout: _Layout, group: int) -> bool:
+    if group <= 1 or not layout.sparse_super:
+        return True
+    for base in (3, 5, 7):
+        power = base
+        while power < group:
+            power *= base
+        if power == group:
+            return True
+    return False
+
+
+def _metadata_runs(layout: _Layout) -> Iterator[Tuple[int, int]]:
+    """ The runs of blocks (first, count) of the superblocks, group
+    descriptors, bitmaps and inode tables """
+    yield 0, layout.first_data_block + 1 + layout.descriptor_blocks
+    for index, group in enumerate(layout.groups):
+        if index and _has_superblock(layout, index):
+            yield (layout.first_data_block + index * layout.blocks_per_group,
+                   1 + layout.descriptor_blocks)
+        yield group.block_bitmap, 1
+        yield group.inode_bitmap, 1
+        yield group.inode_table, layout.inode_table_blocks
+
+
+def _mark_allocated(image: IO[bytes], layout: _Layout,
+                    changing: bytearray) -> None:
+    """ Clear the blocks that are in use, leaving free blocks marked """
+    for index, group in enumerate(layout.groups):
+        if group.flags & BG_BLOCK_UNINIT:
+            # nothing but metadata is in the group, and no bitmap is written
+            continue
+        bitmap = _read_block(image, layout, group.block_bitmap)
+        first = layout.first_data_block + index * layout.blocks_per_group
+        count = min(layout.blocks_per_group, layout.blocks_count - first)
+        for bit in range(count):
+            if bitmap[bit >> 3] & (1 << (bit & 7)):
+                changing[first + bit] = 0
+
+
+def _changing_fs_blocks(image: IO[bytes], layout: _Layout) -> bytearray:
+    changing = bytearray(b'\1' * layout.blocks_count)
+    _mark_allocated(image, layout, changing)
+
+    def mark(first: int, count: int) -> None:
+        changing[first:first + count] = b'\1' * count
+
+    for first, count in _metadata_runs(layout):
+        mark(first, count)
+    for inode in (layout.journal_inode,
+                  _find(image, layout, MACHINE_ID_PATH)):
+        if inode is not None:
+            for block, _ in _inode_blocks(image, layout, inode):
+                mark(block, 1)
+    del changing[layout.blocks_count:]
+    return changing
+
+
+def changing_blocks(image: IO[bytes], block_size: int) -> bytearray:
+    """ Find the blocks of an ext4 image that may change once it is written
+    to a partition and the update is committed
+
+    These are the filesystem's metadata and journal, its free blocks, and
+    the blocks of ``/etc/machine-id``.
+
+    :param image: The image
+    :param block_size: The size of the blocks to flag, which need not be
+                       the filesystem's
+    :returns: A flag for each block of the filesystem, set if any of it may
+              change
+    :raises NotExt4: If it is not an ext4 image this can read
+    """
+    layout = read_layout(image)
+    changing = _changing_fs_blocks(image, layout)
+    if block_size == layout.block_size:
+        return changing
+    flags = bytearray(-(-len(changing) * layout.block_size // block_size))
+    for fs_block, flag in enumerate(changing):
+        if flag:
+            first = fs_block * layout.block_size // block_size
+            last = ((fs_block + 1) * layout.block_size - 1) // block_size
+            flags[first:last + 1] = b'\1' * (last + 1 - first)
+    return flags
@@ -6,23 +6,32 @@ for an update: unzipping update files, hashing rootfs, checking signatures,
 writing to root partitions
 """
 import binascii
+import concurrent.futures
 import contextlib
 import enum
 import hashlib
 import logging
 import os
 import re
+import struct
 import subprocess
 import tempfile
-from typing import (Callable, Dict, List, Mapping, NamedTuple,
+from typing import (Callable, Dict, IO, List, Mapping, NamedTuple,
                     Optional, Sequence, Tuple)
 import zipfile
+import zlib
+
+from . import delta
 
 
 ROOTFS_SIG_NAME = 'rootfs.ext4.hash.sig'
 ROOTFS_HASH_NAME = 'rootfs.ext4.hash'
 ROOTFS_NAME = 'rootfs.ext4'
+ROOTFS_DELTA_NAME = 'rootfs.ext4.delta'
 UPDATE_FILES = [ROOTFS_NAME, ROOTFS_SIG_NAME, ROOTFS_HASH_NAME]
+# The size of the chunks a rootfs is streamed in. Large chunks keep the per
+# chunk cost of decompressing, hashing, writing and progress callbacks low.
+STREAM_CHUNK_SIZE = 1024 * 1024
 LOG = logging.getLogger(__name__)
 
 
@@ -72,6 +81,141 @@ class FileMissing(ValueError):
         return self.message
 
 
+class RootfsHasher:
+    """
+    Hash the rootfs in an update zip while the zip is being received
+
+    Zip files have a local header before the data of each entry, so the
+    rootfs can be found and decompressed from the stream of the file alone.
+    Feed it the file in order with :py:meth:`update`. If the zip is laid out
+    in a way that needs its central directory to read (for instance if an
+    entry before the rootfs has a data descriptor), the hasher gives up and
+    :py:attr:`hexdigest` stays ``None``; the rootfs is then only checked
+    when it is written.
+    """
+    _LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+    _LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+    _ZIP64_EXTRA_ID = 0x0001
+    _FLAG_ENCRYPTED = 0x01
+    _FLAG_DATA_DESCRIPTOR = 0x08
+
+    def __init__(self, algo: str = 'sha256') -> None:
+        self._hasher = hashlib.new(algo)
+        self._buffer = b''
+        self._done = False
+        self._hexdigest: Optional[bytes] = None
+        # The entry whose data is being read
+        self._in_entry = False
+        self._is_rootfs = False
+        self._decompressor: Optional['zlib._Decompress'] = None
+        self._remaining = 0
+
+    @property
+    def hexdigest(self) -> Optional[bytes]:
+        """ The hash of the rootfs as ascii hex, if it was found and read """
+        return self._hexdigest
+
+    def update(self, data: bytes) -> None:
+        """ Feed the next part of the zip file """
+        if self._done:
+            return
+        self._buffer += data
+        try:
+            while not self._done:
+                if self._in_entry:
+                    if not self._read_data():
+                        return
+                elif not self._read_header():
+                    return
+        except (zlib.error, struct.error, UnicodeDecodeError):
+            LOG.exception('RootfsHasher: cannot read zip stream')
+            self._stop()
+
+    def _stop(self) -> None:
+        self._done = True
+        self._buffer = b''
+        self._decompressor = None
+
+    def _read_header(self) -> bool:
+        buf = self._buffer
+        if len(buf) < self._LOCAL_HEADER.size:
+            return False
+        (signature, _, flags, method, _, _, _,
+         compressed_size, _, name_length, extra_length)\
+            = self._LOCAL_HEADER.unpack_from(buf)
+        if signature != self._LOCAL_HEADER_SIGNATURE:
+            # The central directory, or not a zip: the rootfs was not found
+            LOG.info('RootfsHasher: no rootfs before end of zip entries')
+            self._stop()
+            return False
+        data_start = self._LOCAL_HEADER.size + name_length + extra_length
+        if len(buf) < data_start:
+            return False
+        name = buf[self._LOCAL_HEADER.size:
+                   self._LOCAL_HEADER.size + name_length].decode('utf-8')
+        extra = buf[self._LOCAL_HEADER.size + name_length:data_start]
+        if compressed_size == 0xffffffff:
+            compressed_size = self._zip64_compressed_size(extra)
+        is_rootfs = name == ROOTFS_NAME
+        has_descriptor = flags & self._FLAG_DATA_DESCRIPTOR
+        if flags & self._FLAG_ENCRYPTED\
+                or (has_descriptor and not is_rootfs)\
+                or (has_descriptor and method != zipfile.ZIP_DEFLATED)\
+                or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            LOG.info(f'RootfsHasher: cannot stream {name} (flags {flags}, '
+                     f'compression {method})')
+            self._stop()
+            return False
+        self._buffer = buf[data_start:]
+        self._in_entry = True
+        self._is_rootfs = is_rootfs
+        if method == zipfile.ZIP_DEFLATED:
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        else:
+            self._decompressor = None
+            self._remaining = compressed_size
+        return True
+
+    def _zip64_compressed_size(self, extra: bytes) -> int:
+        # In the zip64 extra field of a local header the uncompressed size
+        # comes first, then the compressed size
+        offset = 0
+        while offset + 4 <= len(extra):
+            field_id, length = struct.unpack_from('<HH', extra, offset)
+            if field_id == self._ZIP64_EXTRA_ID:
+                return struct.unpack_from('<QQ', extra, offset + 4)[1]
+            offset += 4 + length
+        raise struct.error('No zip64 sizes in local header')
+
+    def _read_data(self) -> bool:
+        if self._decompressor is None:
+            data = self._buffer[:self._remaining]
+            self._remaining -= len(data)
+            self._buffer = self._buffer[len(data):]
+            if self._is_rootfs:
+                self._hasher.update(data)
+            finished = self._remaining == 0
+        else:
+            decompressor = self._decompressor
+            data = self._buffer
+            while data:
+                # Bound the output: a chunk of zeros inflates a thousandfold
+                out = decompressor.decompress(data, STREAM_CHUNK_SIZE)
+                if self._is_rootfs:
+                    self._hasher.update(out)
+                data = decompressor.unconsumed_tail
+            finished = decompressor.eof
+            self._buffer = decompressor.unused_data if finished else b''
+        if not finished:
+            return False
+        self._in_entry = False
+        if self._is_rootfs:
+            self._hexdigest = binascii.hexlify(self._hasher.digest())
+            LOG.info(f'RootfsHasher: rootfs hash {self._hexdigest!r}')
+            self._stop()
+        return True
+
+
 def unzip_update(filepath: str,
                  progress_callback: Callable[[float], None],
                  acceptable_files: Sequence[str],
@@ -286,6 +430,160 @@ def validate_update(filepath: str,
     return rootfs
 
 
+def check_update(filepath: str,
+                 cert_path: Optional[str],
+                 rootfs_hash: Optional[bytes] = None) -> bytes:
+    """ Check the small files of an update before streaming its rootfs
+
+    - Checks that the zip has a rootfs, or a delta of one
+    - Unzips the rootfs hash (and its signature) to the zip's directory
+    - If requested, checks the signature of the hash
+    - If the rootfs was hashed while the zip was received, checks the hash
+
+    The rootfs itself is checked against the hash by :py:meth:`stream_update`
+    as it is written in any case.
+
+    :param filepath: The path to the update zip file
+    :param cert_path: Path to an x.509 certificate to check the signature
+                      against. If ``None``, signature checking is disabled
+    :param rootfs_hash: The hash of the rootfs from a :py:class:`RootfsHasher`
+                        if there is one, as ascii hex
+    :returns: The packaged hash of the rootfs, as ascii hex
+
+    :raises FileMissing: If a mandatory file is missing
+    :raises SignatureMismatch: If the signature does not verify
+    :raises HashMismatch: If ``rootfs_hash`` is not the packaged hash
+    :raises BadDelta: If the zip has a delta that is not one
+    """
+    with zipfile.ZipFile(filepath, 'r') as zf:
+        names = zf.namelist()
+        if ROOTFS_DELTA_NAME in names:
+            with zf.open(ROOTFS_DELTA_NAME) as rootfs_delta:
+                header = delta.read_header(rootfs_delta)
+            LOG.info(f'Update is a delta against base {header.base_hash!r}')
+        elif ROOTFS_NAME not in names:
+            raise FileMissing(f'File {ROOTFS_NAME} missing from zip')
+
+    required = [ROOTFS_HASH_NAME]
+    if cert_path:
+        required.append(ROOTFS_SIG_NAME)
+    files, _ = unzip_update(filepath, lambda progress: None,
+                            [ROOTFS_HASH_NAME, ROOTFS_SIG_NAME],
+                            required)
+    hashfile = files.get(ROOTFS_HASH_NAME)
+    assert hashfile
+    if cert_path:
+        sigfile = files.get(ROOTFS_SIG_NAME)
+        assert sigfile
+        verify_signature(hashfile, sigfile, cert_path)
+    packaged_hash = open(hashfile, 'rb').read().strip()
+    if rootfs_hash is not None and rootfs_hash != packaged_hash:
+        msg = f"Hash mismatch: received {rootfs_hash!r} != "\
+            f"packaged {packaged_hash!r}"
+        LOG.error(msg)
+        raise HashMismatch(msg)
+    return packaged_hash
+
+
+def write_and_hash(infile: IO[bytes],
+                   outfile: str,
+                   progress_callback: Callable[[float], None],
+                   file_size: int,
+                   chunk_size: int = STREAM_CHUNK_SIZE,
+                   algo: str = 'sha256') -> bytes:
+    """ Write a stream to a file, hashing it in the same pass
+
+    Each chunk is hashed while it is written, and the next chunk is read
+    (and decompressed, for a zip member) while the last one is written.
+
+    :param infile: The stream to read
+    :param outfile: The output filepath
+    :param progress_callback: The callback to call for progress between 0
+                              and 1. May not ever be precisely 1.0.
+    :param file_size: The size of the stream (for generating progress
+                      percentage)
+    :param chunk_size: The size of the chunks to read, hash and write
+    :param algo: The algorithm to use. Can be anything used by
+                 :py:mod:`hashlib`
+    :returns: The hash of the stream as ascii hex
+    """
+    hasher = hashlib.new(algo)
+    total_written = 0
+    LOG.info(f'write_and_hash: writing {file_size}B'
+             f' to {outfile} in {chunk_size}B chunks')
+    with open(outfile, 'wb') as part, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1) as writer:
+        writing: Optional[concurrent.futures.Future] = None
+        while True:
+            chunk = infile.read(chunk_size)
+            if writing:
+                writing.result()
+            writing = writer.submit(part.write, chunk)
+            hasher.update(chunk)
+            total_written += len(chunk)
+            progress_callback(total_written / file_size)
+            if len(chunk) != chunk_size:
+                break
+        writing.result()
+    return binascii.hexlify(hasher.digest())
+
+
+def stream_update(filepath: str,
+                  packaged_hash: bytes,
+                  progress_callback: Callable[[float], None],
+                  chunk_size: int = STREAM_CHUNK_SIZE) -> RootPartitions:
+    """
+    Write the rootfs of an update to the next root partition in one pass
+
+    - Figure out, from the system, the correct root partition to write to
+    - Decompress the rootfs from the update zip, hashing it and writing it
+      there as it goes, with progress. If the zip has a delta instead, the
+      rootfs is made from the delta and the active partition.
+    - Check the hash against the packaged hash
+
+    Nothing is written anywhere else, and the rootfs is read only once. If
+    the hash does not match, or a delta does not match the active
+    partition, the partition written to is still the unused one, and the
+    update must not be committed.
+
+    :param filepath: The path to the update zip file
+    :param packaged_hash: The hash returned by :py:meth:`check_update`
+    :param progress_callback: A callback to call periodically with progress
+                              between 0 and 1.0. May never reach precisely
+                              1.0, best only for user information.
+    :param chunk_size: The size of the chunks to decompress, hash and write
+    :returns: The root partition that the rootfs image was written to, e.g.
+              ``RootPartitions.TWO`` or ``RootPartitions.THREE``.
+
+    :raises HashMismatch: If the rootfs does not match the packaged hash
+    :raises BaseMismatch: If a delta was not made against the image in the
+                          active partition; send the full image instead
+    """
+    unused = _find_unused_partition()
+    part_path = unused.value.path
+    with zipfile.ZipFile(filepath, 'r') as zf:
+        if ROOTFS_DELTA_NAME in zf.namelist():
+            base_path = _find_active_partition().value.path
+            with zf.open(ROOTFS_DELTA_NAME) as rootfs_delta:
+                rootfs_hash = delta.apply_delta(rootfs_delta, base_path,
+                                                part_path,
+                                                progress_callback,
+                                                chunk_size)
+        else:
+            info = zf.getinfo(ROOTFS_NAME)
+            with zf.open(info) as rootfs:
+                rootfs_hash = write_and_hash(rootfs, part_path,
+                                             progress_callback,
+                                             info.file_size or 1,
+                                             chunk_size)
+    if packaged_hash != rootfs_hash:
+        msg = f"Hash mismatch: calculated {rootfs_hash!r} != "\
+            f"packaged {packaged_hash!r}"
+        LOG.error(msg)
+        raise HashMismatch(msg)
+    return unused
+
+
 def _find_unused_partition() -> RootPartitions:
     """ Find the currently-unused root partition to write to """
     which = subprocess.check_output(['ot-unused-partition']).strip()
@@ -293,6 +591,13 @@ def _find_unused_partition() -> RootPartitions:
             b'3': RootPartitions.THREE}[which]
 
 
+def _find_active_partition() -> RootPartitions:
+    """ Find the root partition that is running, which deltas apply to """
+    if _find_unused_partition() == RootPartitions.TWO:
+        return RootPartitions.THREE
+    return RootPartitions.TWO
+
+
 def write_file(infile: str,
                outfile: str,
                progress_callback: Callable[[float], None],
@@ -16,7 +16,7 @@ from typing import Optional
 from aiohttp import web, BodyPartReader
 
 from .constants import APP_VARIABLE_PREFIX, RESTART_LOCK_NAME
-from . import config, file_actions
+from . import chunked_upload, config, file_actions
 from .update_session import UpdateSession, Stages
 
 SESSION_VARNAME = APP_VARIABLE_PREFIX + 'session'
@@ -76,23 +76,34 @@ async def status(request: web.Request, session: UpdateSession) -> web.Response:
         status=200)
 
 
-async def _save_file(part: BodyPartReader, path: str):
+async def _save_file(part: BodyPartReader,
+                     path: str,
+                     hasher: file_actions.RootfsHasher):
+    """ Save an uploaded file, hashing the rootfs in it as it arrives """
+    loop = asyncio.get_event_loop()
     with open(os.path.join(path, part.name), 'wb') as write:
         while not part.at_eof():
-            chunk = await part.read_chunk()
+            chunk = await part.read_chunk(file_actions.STREAM_CHUNK_SIZE)
             decoded = part.decode(chunk)
             write.write(decoded)
+            # Decompressing and hashing would hold up the event loop
+            await loop.run_in_executor(None, hasher.update, decoded)
 
 
 def _begin_write(session: UpdateSession,
                  loop: asyncio.AbstractEventLoop,
-                 rootfs_file_path: str):
-    """ Start the write process. """
+                 downloaded_update_path: str,
+                 packaged_hash: bytes):
+    """ Start the write process.
+
+    The rootfs is decompressed, hashed and written to the unused partition
+    in a single pass, and the hash is checked once it is written.
+    """
     session.set_progress(0)
     session.set_stage(Stages.WRITING)
     write_future = asyncio.ensure_future(loop.run_in_executor(
-        None, file_actions.write_update, rootfs_file_path,
-        session.set_progress))
+        None, file_actions.stream_update, downloaded_update_path,
+        packaged_hash, session.set_progress))
 
     def write_done(fut):
         exc = fut.exception()
@@ -109,17 +120,23 @@ def _begin_validation(
         session: UpdateSession,
         config: config.Config,
         loop: asyncio.AbstractEventLoop,
-        downloaded_update_path: str)\
+        downloaded_update_path: str,
+        rootfs_hash: Optional[bytes] = None)\
         -> asyncio.futures.Future:
-    """ Start the validation process. """
+    """ Start the validation process.
+
+    This checks the files and signature of the update, and the hash of the
+    rootfs if it was computed while the update was uploaded; the rootfs is
+    checked against its hash again while it is written.
+    """
     session.set_stage(Stages.VALIDATING)
     cert_path = config.update_cert_path\
         if config.signature_required else None
 
     validation_future \
         = asyncio.ensure_future(loop.run_in_executor(
-            None, file_actions.validate_update,
-            downloaded_update_path, session.set_progress, cert_path))
+            None, file_actions.check_update,
+            downloaded_update_path, cert_path, rootfs_hash))
 
     def validation_done(fut):
         exc = fut.exception()
@@ -127,15 +144,23 @@ def _begin_validation(
             session.set_error(getattr(exc, 'short', str(type(exc))),
                               str(exc))
         else:
-            rootfs_file = fut.result()
+            packaged_hash = fut.result()
             loop.call_soon_threadsafe(_begin_write,
                                       session,
                                       loop,
-                                      rootfs_file)
+                                      downloaded_update_path,
+                                      packaged_hash)
     validation_future.add_done_callback(validation_done)
     return validation_future
 
 
+def _file_already_uploaded() -> web.Response:
+    return web.json_response(
+        data={'error': 'file-already-uploaded',
+              'message': 'A file has already been sent for this update'},
+        status=409)
+
+
 @require_session
 async def file_upload(
         request: web.Request, session: UpdateSession) -> web.Response:
@@ -145,10 +170,8 @@ async def file_upload(
     body called 'ot2-system.zip'.
     """
     if session.stage != Stages.AWAITING_FILE:
-        return web.json_response(
-            data={'error': 'file-already-uploaded',
-                  'message': 'A file has already been sent for this update'},
-            status=409)
+        return _file_already_uploaded()
+    hasher = file_actions.RootfsHasher()
     reader = await request.multipart()
     async for part in reader:
         if part.name != 'ot2-system.zip':
@@ -156,13 +179,153 @@ async def file_upload(
                 f"Unknown field name {part.name} in file_upload, ignoring")
             await part.release()
         else:
-            await _save_file(part, session.download_path)
+            await _save_file(part, session.download_path, hasher)
 
+    if session.stage != Stages.AWAITING_FILE:
+        # a chunked upload of the file completed while this one was sent
+        return _file_already_uploaded()
     _begin_validation(
         session,
         config.config_from_request(request),
         asyncio.get_event_loop(),
-        os.path.join(session.download_path, 'ot2-system.zip'))
+        os.path.join(session.download_path, 'ot2-system.zip'),
+        hasher.hexdigest)
+
+    return web.json_response(data=session.state,
+                             status=201)
+
+
+@require_session
+async def file_chunks_status(
+        request: web.Request, session: UpdateSession) -> web.Response:
+    """ Serves GET /update/:session/file/chunks
+
+    Tells a client resuming a chunked upload how many bytes were received.
+    """
+    if session.stage != Stages.AWAITING_FILE:
+        return _file_already_uploaded()
+    upload = session.chunked_upload
+    return web.json_response(
+        data={'received': upload.received if upload is not None else 0,
+              'stage': session.stage.value.short},
+        status=200)
+
+
+def _check_chunk_request(
+        request: web.Request,
+        session: UpdateSession) -> Optional[web.Response]:
+    """ Check a chunk can be received, returning the response if not """
+    if session.stage != Stages.AWAITING_FILE:
+        return _file_already_uploaded()
+    try:
+        int(request.query['offset'])
+    except (KeyError, ValueError):
+        return web.json_response(
+            data={'error': 'bad-offset',
+                  'message': 'An integer offset query parameter is required'},
+            status=400)
+    length = request.content_length
+    if length is None:
+        return web.json_response(
+            data={'error': 'length-required',
+                  'message': 'Chunks must have a Content-Length'},
+            status=411)
+    if length > chunked_upload.MAX_CHUNK_SIZE:
+        return web.json_response(
+            data={'error': 'chunk-too-large',
+                  'message': f'Chunks may be at most '
+                  f'{chunked_upload.MAX_CHUNK_SIZE} bytes'},
+            status=413)
+    return None
+
+
+@require_session
+async def file_chunk(
+        request: web.Request, session: UpdateSession) -> web.Response:
+    """ Serves POST /update/:session/file/chunks?offset=...&sha256=...
+
+    The body is the next chunk of 'ot2-system.zip', of at most
+    ``chunked_upload.MAX_CHUNK_SIZE`` bytes. ``offset`` must be the number
+    of bytes received so far; ``sha256``, the hex hash of the chunk, is
+    optional. A chunk that does not arrive whole is discarded.
+    """
+    error = _check_chunk_request(request, session)
+    if error is not None:
+        return error
+    offset = int(request.query['offset'])
+    length = request.content_length
+    assert length is not None
+    try:
+        chunk = await request.content.readexactly(length)
+    except asyncio.IncompleteReadError:
+        LOG.warning(f"Chunk at offset {offset} cut short, discarding")
+        return web.json_response(
+            data={'error': 'incomplete-chunk',
+                  'message': 'The chunk was cut short'},
+            status=400)
+
+    upload = session.begin_chunked_upload()
+    async with upload.lock:
+        # the upload may have completed while the chunk was read
+        if session.stage != Stages.AWAITING_FILE:
+            return _file_already_uploaded()
+        try:
+            await asyncio.get_event_loop().run_in_executor(
+                None, upload.append, offset, chunk,
+                request.query.get('sha256'))
+        except chunked_upload.ChunkOffsetMismatch as e:
+            return web.json_response(
+                data={'error': 'bad-offset',
+                      'message': str(e),
+                      'received': e.received},
+                status=409)
+        except chunked_upload.ChunkChecksumMismatch as e:
+            return web.json_response(
+                data={'error': 'bad-checksum',
+                      'message': str(e)},
+                status=400)
+    return web.json_response(
+        data={'received': upload.received},
+        status=200)
+
+
+@require_session
+async def file_chunks_complete(
+        request: web.Request, session: UpdateSession) -> web.Response:
+    """ Serves POST /update/:session/file/chunks/complete
+
+    Ends a chunked upload and starts validating the file, like
+    /update/:session/file does. The body may be json with the hex
+    ``sha256`` of the whole file to check it against.
+    """
+    if session.stage != Stages.AWAITING_FILE:
+        return _file_already_uploaded()
+    upload = session.chunked_upload
+    if upload is None:
+        return web.json_response(
+            data={'error': 'no-chunks',
+                  'message': 'No chunks have been sent for this update'},
+            status=400)
+    async with upload.lock:
+        # another request may have completed the upload while this one
+        # waited for the lock
+        if session.stage != Stages.AWAITING_FILE:
+            return _file_already_uploaded()
+        if request.can_read_body:
+            expected = (await request.json()).get('sha256')
+            if expected is not None\
+                    and expected.lower().encode() != upload.file_hash:
+                return web.json_response(
+                    data={'error': 'bad-checksum',
+                          'message': f'Calculated {upload.file_hash!r} '
+                          f'!= sent {expected}'},
+                    status=400)
+        _begin_validation(
+            session,
+            config.config_from_request(request),
+            asyncio.get_event_loop(),
+            upload.path,
+            upload.rootfs_hash)
 
     return web.json_response(data=session.state,
                              status=201)
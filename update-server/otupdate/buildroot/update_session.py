@@ -7,6 +7,7 @@ import shutil
 from typing import Mapping, Optional, Union
 import uuid
 
+from .chunked_upload import ChunkedUpload
 
 LOG = logging.getLogger(__name__)
 Value = namedtuple('Value', ('short', 'human'))
@@ -35,6 +36,7 @@ class UpdateSession:
         self._storage_path = storage_path
         self._setup_dl_area()
         self._rootfs_file: Optional[str] = None
+        self._chunked_upload: Optional[ChunkedUpload] = None
         LOG.info(f"Update session: created {self._token}")
 
     def _setup_dl_area(self):
@@ -69,6 +71,22 @@ class UpdateSession:
     def download_path(self) -> str:
         return self._storage_path
 
+    @property
+    def chunked_upload(self) -> Optional[ChunkedUpload]:
+        """ The upload of the update file in chunks, if one has begun """
+        return self._chunked_upload
+
+    def begin_chunked_upload(self) -> ChunkedUpload:
+        """ The upload of the update file in chunks, begun if it has not
+
+        The chunks go to a file of their own rather than to where a
+        multipart upload of the update file is saved.
+        """
+        if self._chunked_upload is None:
+            self._chunked_upload = ChunkedUpload(
+                os.path.join(self._storage_path, 'ot2-system-chunked.zip'))
+        return self._chunked_upload
+
     @property
     def rootfs_file(self) -> str:
         assert self._rootfs_file
@@ -2,6 +2,7 @@ import collections
 import os
 import json
 import re
+import shutil
 import subprocess
 from unittest import mock
 import zipfile
@@ -146,3 +147,42 @@ def testing_partition(monkeypatch, tmpdir):
     find_unused.return_value = FakeRootPartElem(
         'TWO', buildroot.file_actions.Partition(2, partfile))
     return partfile
+
+
+@pytest.fixture
+def make_ext4_image(tmpdir):
+    """
+    Return a function that makes an ext4 image of some files, given as a
+    dict of paths to contents, and returns its path.
+
+    Tests that use this are skipped if e2fsprogs is not installed.
+    """
+    if not (shutil.which('mkfs.ext4') and shutil.which('debugfs')):
+        pytest.skip('needs e2fsprogs')
+
+    def make(name, files, block_size=4096):
+        src = os.path.join(tmpdir, name + '.d')
+        for path, contents in files.items():
+            full = os.path.join(src, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            open(full, 'wb').write(contents)
+        image = os.path.join(tmpdir, name + '.ext4')
+        subprocess.check_call(['mkfs.ext4', '-q', '-F', '-b', str(block_size),
+                               '-d', src, image, '8M'],
+                              stdout=subprocess.DEVNULL)
+        return image
+    return make
+
+
+@pytest.fixture
+def debugfs(make_ext4_image):
+    """
+    Return a function that runs a debugfs command on an image and returns
+    its output
+    """
+    def run(image, command, write=False):
+        args = ['debugfs'] + (['-w'] if write else []) + ['-R', command,
+                                                          image]
+        return subprocess.check_output(
+            args, stderr=subprocess.DEVNULL).decode()
+    return run
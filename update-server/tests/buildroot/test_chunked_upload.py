@@ -0,0 +1,51 @@
+""" tests for otupdate.buildroot.chunked_upload
+"""
+import hashlib
+import os
+import zipfile
+
+import pytest
+
+from otupdate.buildroot import chunked_upload, file_actions
+
+
+def test_append(tmpdir):
+    path = os.path.join(tmpdir, 'ot2-system.zip')
+    upload = chunked_upload.ChunkedUpload(path)
+    assert upload.received == 0
+    upload.append(0, b'abc')
+    upload.append(3, b'def', hashlib.sha256(b'def').hexdigest())
+    assert upload.received == 6
+    assert open(path, 'rb').read() == b'abcdef'
+    assert upload.file_hash\
+        == hashlib.sha256(b'abcdef').hexdigest().encode()
+
+
+def test_append_catches_bad_offset(tmpdir):
+    upload = chunked_upload.ChunkedUpload(os.path.join(tmpdir, 'update'))
+    upload.append(0, b'abc')
+    with pytest.raises(chunked_upload.ChunkOffsetMismatch) as e:
+        upload.append(6, b'ghi')
+    assert e.value.received == 3
+    with pytest.raises(chunked_upload.ChunkOffsetMismatch):
+        upload.append(0, b'abc')
+    assert upload.received == 3
+
+
+def test_append_catches_bad_checksum(tmpdir):
+    path = os.path.join(tmpdir, 'update')
+    upload = chunked_upload.ChunkedUpload(path)
+    with pytest.raises(chunked_upload.ChunkChecksumMismatch):
+        upload.append(0, b'abc', hashlib.sha256(b'abd').hexdigest())
+    assert upload.received == 0
+    assert open(path, 'rb').read() == b''
+
+
+def test_rootfs_hash(downloaded_update_file, tmpdir):
+    upload = chunked_upload.ChunkedUpload(os.path.join(tmpdir, 'update'))
+    contents = open(downloaded_update_file, 'rb').read()
+    for offset in range(0, len(contents), 4096):
+        upload.append(offset, contents[offset:offset + 4096])
+    with zipfile.ZipFile(downloaded_update_file) as zf:
+        assert upload.rootfs_hash\
+            == zf.read(file_actions.ROOTFS_HASH_NAME).strip()
@@ -0,0 +1,154 @@
+""" tests for otupdate.buildroot.delta
+"""
+import binascii
+import hashlib
+import io
+import os
+import struct
+from unittest import mock
+
+import pytest
+
+from otupdate.buildroot import delta
+
+BLOCK = 64
+
+
+def _images(tmpdir, base, target):
+    base_path = os.path.join(tmpdir, 'base.ext4')
+    target_path = os.path.join(tmpdir, 'target.ext4')
+    open(base_path, 'wb').write(base)
+    open(target_path, 'wb').write(target)
+    return base_path, target_path
+
+
+def _make(base_path, target_path):
+    out = io.BytesIO()
+    data_blocks = delta.make_delta(base_path, target_path, out, BLOCK)
+    out.seek(0)
+    return out, data_blocks
+
+
+@pytest.mark.parametrize('chunk_size', [1, BLOCK, 1024 * 1024])
+def test_round_trip(tmpdir, chunk_size):
+    base = os.urandom(BLOCK * 100) + bytes(BLOCK * 50)
+    # Changed, moved, unchanged and zero blocks, and a part block at the end
+    target = base[:BLOCK * 10] + os.urandom(BLOCK * 3)\
+        + base[BLOCK * 50:BLOCK * 60] + base[BLOCK * 13:] + b'end'
+    base_path, target_path = _images(tmpdir, base, target)
+    delta_file, data_blocks = _make(base_path, target_path)
+    assert data_blocks == 4
+
+    header = delta.read_header(delta_file)
+    assert header.block_size == BLOCK
+    assert header.target_size == len(target)
+    assert header.base_hash\
+        == binascii.hexlify(hashlib.sha256(base).digest())
+    delta_file.seek(0)
+
+    out_path = os.path.join(tmpdir, 'out.ext4')
+    cb = mock.Mock()
+    written_hash = delta.apply_delta(delta_file, base_path, out_path, cb,
+                                     chunk_size)
+    assert open(out_path, 'rb').read() == target
+    assert written_hash == binascii.hexlify(hashlib.sha256(target).digest())
+    assert cb.call_args[0][0] == 1.0
+
+
+def test_runs_are_coalesced(tmpdir):
+    base = os.urandom(BLOCK * 100) + bytes(BLOCK * 100)
+    target = base + os.urandom(BLOCK)
+    base_path, target_path = _images(tmpdir, base, target)
+    delta_file, data_blocks = _make(base_path, target_path)
+    assert data_blocks == 1
+    # One copy of the whole base, then the data
+    size = struct.calcsize('<8sIQ64s') + 1 + struct.calcsize('<QI32s')\
+        + 1 + struct.calcsize('<I') + BLOCK + 1
+    assert len(delta_file.getvalue()) == size
+
+
+def test_base_on_a_partition(tmpdir):
+    # A partition is larger than the image on it
+    base = os.urandom(BLOCK * 10 + 5)
+    target = base[:BLOCK * 10] + os.urandom(BLOCK)
+    base_path, target_path = _images(tmpdir, base, target)
+    delta_file, _ = _make(base_path, target_path)
+    open(base_path, 'ab').write(os.urandom(BLOCK * 10))
+    out_path = os.path.join(tmpdir, 'out.ext4')
+    delta.apply_delta(delta_file, base_path, out_path, mock.Mock())
+    assert open(out_path, 'rb').read() == target
+
+
+def test_base_mismatch(tmpdir):
+    base = os.urandom(BLOCK * 10)
+    target = base + os.urandom(BLOCK)
+    base_path, target_path = _images(tmpdir, base, target)
+    delta_file, _ = _make(base_path, target_path)
+    with open(base_path, 'r+b') as f:
+        f.seek(BLOCK * 5)
+        f.write(b'changed')
+    with pytest.raises(delta.BaseMismatch):
+        delta.apply_delta(delta_file, base_path,
+                          os.path.join(tmpdir, 'out.ext4'), mock.Mock())
+
+
+def test_base_too_short(tmpdir):
+    base = os.urandom(BLOCK * 10)
+    base_path, target_path = _images(tmpdir, base, base)
+    delta_file, _ = _make(base_path, target_path)
+    open(base_path, 'wb').write(base[:BLOCK * 5])
+    with pytest.raises(delta.BaseMismatch):
+        delta.apply_delta(delta_file, base_path,
+                          os.path.join(tmpdir, 'out.ext4'), mock.Mock())
+
+
+@pytest.mark.parametrize('cut', [4, 100, -1])
+def test_bad_delta(tmpdir, cut):
+    base = os.urandom(BLOCK * 10)
+    base_path, target_path = _images(tmpdir, base, base + b'more')
+    delta_file, _ = _make(base_path, target_path)
+    with pytest.raises(delta.BadDelta):
+        delta.apply_delta(io.BytesIO(delta_file.getvalue()[:cut]),
+                          base_path, os.path.join(tmpdir, 'out.ext4'),
+                          mock.Mock())
+
+
+def test_not_a_delta():
+    with pytest.raises(delta.BadDelta):
+        delta.read_header(io.BytesIO(os.urandom(200)))
+
+
+def test_base_in_use(tmpdir, make_ext4_image, debugfs):
+    tool = os.urandom(300000)
+    base_path = make_ext4_image('base', {
+        'etc/machine-id': b'uninitialized\n',
+        'bin/tool': tool,
+        'bin/old': os.urandom(50000)})
+    target_path = make_ext4_image('target', {
+        'etc/machine-id': b'uninitialized\n',
+        'bin/tool': tool,
+        'bin/new': os.urandom(50000)})
+    delta_file = io.BytesIO()
+    data_blocks = delta.make_delta(base_path, target_path, delta_file)
+    delta_file.seek(0)
+    # the tool is copied
+    assert data_blocks < os.path.getsize(target_path) // 4096\
+        - len(tool) // 4096
+
+    # Committing an update to the base mounted it read-write, which wrote
+    # the superblock, inode tables and journal, and wrote the machine id
+    machine_id = os.path.join(tmpdir, 'machine-id')
+    open(machine_id, 'w').write('0123456789abcdef0123456789abcdef\n')
+    debugfs(base_path, 'rm /etc/machine-id', write=True)
+    debugfs(base_path, f'write {machine_id} /etc/machine-id', write=True)
+    debugfs(base_path, 'ssv mnt_count 1', write=True)
+    debugfs(base_path, 'sif /bin/tool atime 20201019', write=True)
+    journal = [int(b) for b in debugfs(base_path, 'blocks <8>').split()]
+    with open(base_path, 'r+b') as base:
+        for block in journal:
+            base.seek(block * 4096)
+            base.write(os.urandom(4096))
+
+    out_path = os.path.join(tmpdir, 'out.ext4')
+    delta.apply_delta(delta_file, base_path, out_path, mock.Mock())
+    assert open(out_path, 'rb').read() == open(target_path, 'rb').read()
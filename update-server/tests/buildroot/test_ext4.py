@@ -0,0 +1,47 @@
+""" tests for otupdate.buildroot.ext4
+"""
+import io
+import os
+
+import pytest
+
+from otupdate.buildroot import ext4
+
+FILES = {'etc/machine-id': b'uninitialized\n',
+         'bin/tool': os.urandom(300000)}
+
+
+def _blocks(debugfs, image, path):
+    return [int(b) for b in debugfs(image, f'blocks {path}').split()]
+
+
+def test_changing_blocks(make_ext4_image, debugfs):
+    image = make_ext4_image('image', FILES)
+    changing = ext4.changing_blocks(open(image, 'rb'), 4096)
+    assert len(changing) == 2048
+    # the superblock and group descriptors
+    assert changing[0] and changing[1]
+    # the journal and the machine id
+    for block in _blocks(debugfs, image, '<8>')\
+            + _blocks(debugfs, image, '/etc/machine-id'):
+        assert changing[block], block
+    for block in _blocks(debugfs, image, '/bin/tool'):
+        assert not changing[block], block
+    # the free blocks
+    assert changing[-1]
+
+
+def test_changing_blocks_of_another_size(make_ext4_image, debugfs):
+    image = make_ext4_image('image', FILES, block_size=1024)
+    changing = ext4.changing_blocks(open(image, 'rb'), 4096)
+    assert len(changing) == 2048
+    for block in _blocks(debugfs, image, '/etc/machine-id'):
+        assert changing[block // 4]
+    # the blocks that are all the file's own
+    tool = _blocks(debugfs, image, '/bin/tool')
+    assert not any(changing[block // 4] for block in tool[4:-4])
+
+
+def test_not_ext4():
+    with pytest.raises(ext4.NotExt4):
+        ext4.changing_blocks(io.BytesIO(os.urandom(8192)), 4096)
@@ -11,7 +11,81 @@ import zipfile
 
 import pytest
 
-from otupdate.buildroot import file_actions
+from otupdate.buildroot import delta, file_actions
+
+
+def _rootfs_hash(contents):
+    return binascii.hexlify(hashlib.sha256(contents).digest())
+
+
+def _feed(hasher, contents, chunk_size):
+    for offset in range(0, len(contents), chunk_size):
+        hasher.update(contents[offset:offset + chunk_size])
+
+
+@pytest.mark.parametrize('compression', [zipfile.ZIP_STORED,
+                                         zipfile.ZIP_DEFLATED])
+@pytest.mark.parametrize('chunk_size', [1, 1000, 1024 * 1024])
+def test_rootfs_hasher(tmpdir, compression, chunk_size):
+    rootfs = os.urandom(50000) + bytes(100000)
+    zip_path = os.path.join(tmpdir, 'update.zip')
+    with zipfile.ZipFile(zip_path, 'w', compression) as zf:
+        zf.writestr('VERSION.json', b'{}')
+        zf.writestr(file_actions.ROOTFS_NAME, rootfs)
+        zf.writestr(file_actions.ROOTFS_HASH_NAME, _rootfs_hash(rootfs))
+    hasher = file_actions.RootfsHasher()
+    _feed(hasher, open(zip_path, 'rb').read(), chunk_size)
+    assert hasher.hexdigest == _rootfs_hash(rootfs)
+
+
+def test_rootfs_hasher_zip64(tmpdir):
+    rootfs = os.urandom(10000)
+    zip_path = os.path.join(tmpdir, 'update.zip')
+    with zipfile.ZipFile(zip_path, 'w') as zf:
+        with zf.open(file_actions.ROOTFS_NAME, 'w',
+                     force_zip64=True) as entry:
+            entry.write(rootfs)
+    hasher = file_actions.RootfsHasher()
+    hasher.update(open(zip_path, 'rb').read())
+    assert hasher.hexdigest == _rootfs_hash(rootfs)
+
+
+def test_rootfs_hasher_not_a_zip():
+    hasher = file_actions.RootfsHasher()
+    hasher.update(b'not a zip file at all')
+    assert hasher.hexdigest is None
+
+
+def test_rootfs_hasher_gives_up_on_data_descriptors():
+    class Unseekable:
+        def __init__(self):
+            self.data = b''
+
+        def write(self, data):
+            self.data += data
+            return len(data)
+
+        def flush(self):
+            pass
+
+    # Written to an unseekable stream, entries have data descriptors, so
+    # where an entry ends is only in the central directory
+    stream = Unseekable()
+    with zipfile.ZipFile(stream, 'w') as zf:
+        zf.writestr('VERSION.json', b'{}')
+        zf.writestr(file_actions.ROOTFS_NAME, b'rootfs')
+    hasher = file_actions.RootfsHasher()
+    hasher.update(stream.data)
+    assert hasher.hexdigest is None
+
+
+def test_rootfs_hasher_no_rootfs(tmpdir):
+    zip_path = os.path.join(tmpdir, 'update.zip')
+    with zipfile.ZipFile(zip_path, 'w') as zf:
+        zf.writestr(file_actions.ROOTFS_HASH_NAME, b'abcd')
+    hasher = file_actions.RootfsHasher()
+    hasher.update(open(zip_path, 'rb').read())
+    assert hasher.hexdigest is None
 
 
 def test_unzip(downloaded_update_file):
@@ -200,6 +274,148 @@ def test_write_update(extracted_update_file, testing_partition):
             'rb').read().strip()
 
 
+def test_check_update(downloaded_update_file, testing_cert):
+    packaged_hash = file_actions.check_update(downloaded_update_file,
+                                              testing_cert)
+    with zipfile.ZipFile(downloaded_update_file) as zf:
+        assert packaged_hash\
+            == zf.read(file_actions.ROOTFS_HASH_NAME).strip()
+    # The rootfs is left in the zip
+    assert not os.path.exists(os.path.join(
+        os.path.dirname(downloaded_update_file), file_actions.ROOTFS_NAME))
+
+
+@pytest.mark.exclude_rootfs_ext4_hash_sig
+def test_check_update_hash_only(downloaded_update_file):
+    assert file_actions.check_update(downloaded_update_file, None)
+
+
+def test_check_update_received_hash(downloaded_update_file, testing_cert):
+    with zipfile.ZipFile(downloaded_update_file) as zf:
+        packaged_hash = zf.read(file_actions.ROOTFS_HASH_NAME).strip()
+    assert file_actions.check_update(downloaded_update_file, testing_cert,
+                                     packaged_hash) == packaged_hash
+    with pytest.raises(file_actions.HashMismatch):
+        file_actions.check_update(downloaded_update_file, testing_cert,
+                                  b'abcd')
+
+
+@pytest.mark.bad_sig
+def test_check_update_catches_bad_sig(downloaded_update_file, testing_cert):
+    with pytest.raises(file_actions.SignatureMismatch):
+        file_actions.check_update(downloaded_update_file, testing_cert)
+
+
+@pytest.mark.exclude_rootfs_ext4_hash_sig
+def test_check_update_catches_missing_sig(downloaded_update_file,
+                                          testing_cert):
+    with pytest.raises(file_actions.FileMissing):
+        file_actions.check_update(downloaded_update_file, testing_cert)
+
+
+@pytest.mark.exclude_rootfs_ext4_hash
+def test_check_update_catches_missing_hash(downloaded_update_file):
+    with pytest.raises(file_actions.FileMissing):
+        file_actions.check_update(downloaded_update_file, None)
+
+
+@pytest.mark.exclude_rootfs_ext4
+def test_check_update_catches_missing_image(downloaded_update_file):
+    with pytest.raises(file_actions.FileMissing):
+        file_actions.check_update(downloaded_update_file, None)
+
+
+def test_stream_update(downloaded_update_file, testing_partition):
+    with zipfile.ZipFile(downloaded_update_file) as zf:
+        packaged_hash = zf.read(file_actions.ROOTFS_HASH_NAME).strip()
+        rootfs = zf.read(file_actions.ROOTFS_NAME)
+    cb = mock.Mock()
+    file_actions.stream_update(downloaded_update_file, packaged_hash, cb,
+                               chunk_size=1024)
+
+    assert open(testing_partition, 'rb').read() == rootfs
+    # One callback per chunk, including the fractional one at the end
+    call_count = len(rootfs) // 1024
+    if call_count * 1024 != len(rootfs):
+        call_count += 1
+    assert cb.call_count == call_count
+    assert cb.call_args[0][0] == 1.0
+
+
+def test_stream_update_catches_bad_hash(downloaded_update_file,
+                                        testing_partition):
+    cb = mock.Mock()
+    with pytest.raises(file_actions.HashMismatch):
+        file_actions.stream_update(downloaded_update_file, b'abcd', cb)
+
+
+def _delta_update(downloaded_update_file, tmpdir, monkeypatch):
+    """ Make the update a delta against a fake active partition """
+    with zipfile.ZipFile(downloaded_update_file) as zf:
+        rootfs = zf.read(file_actions.ROOTFS_NAME)
+        others = {name: zf.read(name) for name in zf.namelist()
+                  if name != file_actions.ROOTFS_NAME}
+    base_path = os.path.join(tmpdir, 'fake-active-partition')
+    target_path = os.path.join(tmpdir, 'target.ext4')
+    open(base_path, 'wb').write(rootfs[:60000] + os.urandom(40000))
+    open(target_path, 'wb').write(rootfs)
+    with zipfile.ZipFile(downloaded_update_file, 'w') as zf:
+        with zf.open(file_actions.ROOTFS_DELTA_NAME, 'w') as delta_file:
+            delta.make_delta(base_path, target_path, delta_file)
+        for name, contents in others.items():
+            zf.writestr(name, contents)
+    monkeypatch.setattr(
+        file_actions, '_find_active_partition',
+        mock.Mock(return_value=mock.Mock(
+            value=file_actions.Partition(3, base_path))))
+    return rootfs, base_path
+
+
+def test_check_update_delta(downloaded_update_file, testing_cert,
+                            tmpdir, monkeypatch):
+    rootfs, _ = _delta_update(downloaded_update_file, tmpdir, monkeypatch)
+    assert file_actions.check_update(downloaded_update_file, testing_cert)\
+        == _rootfs_hash(rootfs)
+
+
+@pytest.mark.exclude_rootfs_ext4
+def test_check_update_catches_bad_delta(downloaded_update_file):
+    with zipfile.ZipFile(downloaded_update_file, 'a') as zf:
+        zf.writestr(file_actions.ROOTFS_DELTA_NAME, os.urandom(1000))
+    with pytest.raises(delta.BadDelta):
+        file_actions.check_update(downloaded_update_file, None)
+
+
+def test_stream_update_delta(downloaded_update_file, testing_partition,
+                             tmpdir, monkeypatch):
+    rootfs, _ = _delta_update(downloaded_update_file, tmpdir, monkeypatch)
+    cb = mock.Mock()
+    file_actions.stream_update(downloaded_update_file, _rootfs_hash(rootfs),
+                               cb)
+    assert open(testing_partition, 'rb').read() == rootfs
+    assert cb.call_args[0][0] == 1.0
+
+
+def test_stream_update_delta_catches_bad_base(downloaded_update_file,
+                                              testing_partition,
+                                              tmpdir, monkeypatch):
+    rootfs, base_path = _delta_update(downloaded_update_file, tmpdir,
+                                      monkeypatch)
+    open(base_path, 'wb').write(os.urandom(100000))
+    with pytest.raises(delta.BaseMismatch):
+        file_actions.stream_update(downloaded_update_file,
+                                   _rootfs_hash(rootfs), mock.Mock())
+
+
+@pytest.mark.parametrize('unused,active', [
+    (file_actions.RootPartitions.TWO, file_actions.RootPartitions.THREE),
+    (file_actions.RootPartitions.THREE, file_actions.RootPartitions.TWO)])
+def test_find_active_partition(monkeypatch, unused, active):
+    monkeypatch.setattr(file_actions, '_find_unused_partition',
+                        mock.Mock(return_value=unused))
+    assert file_actions._find_active_partition() == active
+
+
 def test_commit_update(monkeypatch):
     unused = file_actions.RootPartitions.TWO
     new = file_actions.RootPartitions.TWO
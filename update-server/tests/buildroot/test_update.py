@@ -3,6 +3,7 @@
 import asyncio
 import binascii
 import hashlib
+import os
 import zipfile
 
 import pytest
@@ -168,3 +169,164 @@ async def test_update_catches_validation_fail(test_cli, update_session,
         body = await resp.json()
     assert body['stage'] == 'error'
     assert body['error'] == 'File Missing'
+
+
+@pytest.mark.bad_hash
+@pytest.mark.exclude_rootfs_ext4_hash_sig
+@pytest.mark.no_signature_required
+async def test_update_catches_hash_mismatch(test_cli, update_session,
+                                            downloaded_update_file, loop,
+                                            testing_partition):
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file'),
+        data={'ot2-system.zip': open(downloaded_update_file, 'rb')})
+    assert resp.status == 201
+    body = await resp.json()
+    # The rootfs is hashed as it is uploaded, so the mismatch is found
+    # before anything is written to the unused partition
+    then = loop.time()
+    while body['stage'] == 'validating':
+        resp = await test_cli.get(
+            session_endpoint(update_session, 'status'))
+        body = await resp.json()
+        assert loop.time() - then <= 300
+    assert body['stage'] == 'error'
+    assert body['error'] == 'Hash Mismatch'
+    assert not os.path.exists(testing_partition)
+
+
+async def _send_chunks(test_cli, token, contents, chunk_size, start=0):
+    for offset in range(start, len(contents), chunk_size):
+        chunk = contents[offset:offset + chunk_size]
+        resp = await test_cli.post(
+            session_endpoint(token, 'file/chunks'),
+            params={'offset': offset,
+                    'sha256': hashlib.sha256(chunk).hexdigest()},
+            data=chunk)
+        assert resp.status == 200
+        body = await resp.json()
+        assert body['received'] == offset + len(chunk)
+
+
+async def test_chunked_update(test_cli, update_session,
+                              downloaded_update_file, loop,
+                              testing_partition):
+    contents = open(downloaded_update_file, 'rb').read()
+    resp = await test_cli.get(session_endpoint(update_session, 'file/chunks'))
+    assert resp.status == 200
+    assert (await resp.json())['received'] == 0
+
+    # The connection drops after the first part was sent
+    half = len(contents) // 2
+    await _send_chunks(test_cli, update_session, contents[:half], 10000)
+
+    # The client asks where to resume from
+    resp = await test_cli.get(session_endpoint(update_session, 'file/chunks'))
+    received = (await resp.json())['received']
+    assert received == half
+    await _send_chunks(test_cli, update_session, contents, 10000, received)
+
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks/complete'),
+        json={'sha256': hashlib.sha256(contents).hexdigest()})
+    assert resp.status == 201
+    body = await resp.json()
+    assert body['stage'] == 'validating'
+    then = loop.time()
+    while body['stage'] in ('validating', 'writing'):
+        resp = await test_cli.get(session_endpoint(update_session, 'status'))
+        body = await resp.json()
+        assert loop.time() - then <= 300
+    assert body['stage'] == 'done', body
+
+    with zipfile.ZipFile(downloaded_update_file, 'r') as zf:
+        assert open(testing_partition, 'rb').read()\
+            == zf.read('rootfs.ext4')
+
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks'),
+        params={'offset': len(contents)},
+        data=b'more')
+    assert resp.status == 409
+
+
+async def test_chunk_errors(test_cli, update_session):
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks'),
+        params={'offset': 0},
+        data=b'abcd')
+    assert resp.status == 200
+
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks'),
+        params={'offset': 2},
+        data=b'efgh')
+    assert resp.status == 409
+    body = await resp.json()
+    assert body['error'] == 'bad-offset'
+    assert body['received'] == 4
+
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks'),
+        params={'offset': 4,
+                'sha256': hashlib.sha256(b'efgh').hexdigest()},
+        data=b'efgX')
+    assert resp.status == 400
+    assert (await resp.json())['error'] == 'bad-checksum'
+
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks'),
+        data=b'efgh')
+    assert resp.status == 400
+
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks/complete'),
+        json={'sha256': hashlib.sha256(b'abcdefgh').hexdigest()})
+    assert resp.status == 400
+    assert (await resp.json())['error'] == 'bad-checksum'
+
+    resp = await test_cli.get(session_endpoint(update_session, 'file/chunks'))
+    assert (await resp.json())['received'] == 4
+
+
+async def test_chunks_status_leaves_upload_alone(test_cli, update_session):
+    session = test_cli.server.app[update.SESSION_VARNAME]
+    # as a multipart upload saves it
+    uploaded = os.path.join(session.download_path, 'ot2-system.zip')
+    open(uploaded, 'wb').write(b'update')
+
+    resp = await test_cli.get(session_endpoint(update_session, 'file/chunks'))
+    assert resp.status == 200
+    assert (await resp.json())['received'] == 0
+    assert session.chunked_upload is None
+    assert open(uploaded, 'rb').read() == b'update'
+
+    session.set_stage(Stages.VALIDATING)
+    resp = await test_cli.get(session_endpoint(update_session, 'file/chunks'))
+    assert resp.status == 409
+    assert open(uploaded, 'rb').read() == b'update'
+
+
+async def test_complete_without_chunks(test_cli, update_session):
+    resp = await test_cli.post(
+        session_endpoint(update_session, 'file/chunks/complete'))
+    assert resp.status == 400
+    assert (await resp.json())['error'] == 'no-chunks'
+
+
+async def test_chunks_after_complete(test_cli, update_session, loop):
+    session = test_cli.server.app[update.SESSION_VARNAME]
+    upload = session.begin_chunked_upload()
+    # the requests wait for the lock while the upload is completed
+    async with upload.lock:
+        chunk = loop.create_task(test_cli.post(
+            session_endpoint(update_session, 'file/chunks'),
+            params={'offset': 0},
+            data=b'abcd'))
+        complete = loop.create_task(test_cli.post(
+            session_endpoint(update_session, 'file/chunks/complete')))
+        await asyncio.sleep(0.1)
+        session.set_stage(Stages.VALIDATING)
+    assert (await chunk).status == 409
+    assert (await complete).status == 409
+    assert upload.received == 0